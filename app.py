@@ -35,6 +35,9 @@ from extensions import db, socketio, all_skill_data, all_glossary_data
 from manager.data_manager import init_app_data, read_saved_rooms_with_owners
 from manager.utils import session_required
 from manager.json_rule_audit import append_audit
+from manager.payload_cache import SocketJSON
+from manager.socket_queue import message_queue_options
+from manager.perf_counters import install_perf_counters
 
 import cloudinary
 import cloudinary.uploader
@@ -142,7 +145,12 @@ def init_extensions(flask_app, cors_origins=None):
     Compress(flask_app)
     db.init_app(flask_app)
     async_mode = 'eventlet' if IS_RENDER else 'threading'
-    socketio.init_app(flask_app, cors_allowed_origins=cors_origins, async_mode=async_mode)
+    # 文字列化済みペイロード（manager.payload_cache.EncodedPayload）をそのまま送るための json。
+    # 複数ワーカー時はメッセージキュー経由で他ワーカーの接続へも emit を届ける。
+    socketio.init_app(
+        flask_app, cors_allowed_origins=cors_origins, async_mode=async_mode, json=SocketJSON,
+        **message_queue_options(),
+    )
     return flask_app
 
 
@@ -215,6 +223,7 @@ def create_app(config=None, run_startup=True, register_sockets=True, register_ro
     configure_app(flask_app, config=config)
     cors_origins = _get_cors_origins()
     init_extensions(flask_app, cors_origins=cors_origins)
+    install_perf_counters(flask_app)
     if register_routes:
         register_http_routes(flask_app)
     if run_startup:
@@ -292,6 +301,8 @@ def add_header(response):
 # 環境変数で制御:
 #   PERF_LOG=1        … 全リクエストの所要時間を [PERF] 行で出力（詳細計測モード）
 #   SLOW_REQUEST_MS   … この閾値(ms)以上のリクエストは PERF_LOG 無しでも警告（既定 500）
+# PERF_LOG=1 では Socket イベント単位の get_room_state 呼び出し数・DBクエリ数も
+# "[PERF] counters" 行で出力する（manager/perf_counters.py）。
 # Render の Logs を "[PERF]" で絞り込めば、遅いエンドポイントが一覧できる。
 import time as _time
 
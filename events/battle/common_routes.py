@@ -7,6 +7,7 @@ from flask_socketio import emit, rooms
 from extensions import socketio, all_skill_data
 from manager.logs import setup_logger
 from manager.room_access import is_sid_in_room
+from manager.room_actor import room_command
 from manager.room_manager import (
     get_user_info_from_sid, get_room_state, broadcast_log, broadcast_state_update,
     is_authorized_for_character, flush_room_state_now,
@@ -111,6 +112,7 @@ def _log_battle_emit(event_name, room_id, battle_id, payload):
 
 
 @socketio.on('request_next_turn')
+@room_command
 def on_request_next_turn(data):
     room = data.get('room')
     if not room: return
@@ -118,6 +120,7 @@ def on_request_next_turn(data):
     proceed_next_turn(room)
 
 @socketio.on('request_new_round')
+@room_command
 def on_request_new_round(data):
     room = data.get('room')
     if not room: return
@@ -134,6 +137,7 @@ def on_request_new_round(data):
     flush_room_state_now(room)
 
 @socketio.on('request_wide_modal_confirm')
+@room_command
 def on_request_wide_modal_confirm(data):
     room = data.get('room')
     if not room: return
@@ -150,6 +154,7 @@ def on_request_wide_modal_confirm(data):
 
 
 @socketio.on('request_end_round')
+@room_command
 def on_request_end_round(data):
     room = data.get('room')
     if not room: return
@@ -200,6 +205,7 @@ def on_request_end_round(data):
     flush_room_state_now(room)
 
 @socketio.on('request_reset_battle')
+@room_command
 def on_request_reset_battle(data):
     room = data.get('room')
     if not room: return
@@ -219,6 +225,7 @@ def on_request_reset_battle(data):
     flush_room_state_now(room)
 
 @socketio.on('request_force_end_match')
+@room_command
 def on_request_force_end_match(data):
     room = data.get('room')
     if not room: return
@@ -234,6 +241,7 @@ def on_request_force_end_match(data):
     flush_room_state_now(room)
 
 @socketio.on('request_move_token')
+@room_command
 def on_request_move_token(data):
     room = data.get('room')
     char_id = data.get('charId')
@@ -249,6 +257,7 @@ def on_request_move_token(data):
     move_token_logic(room, char_id, x, y, username, attribute)
 
 @socketio.on('open_match_modal')
+@room_command
 def on_open_match_modal(data):
     room = data.get('room')
     if not room: return
@@ -258,6 +267,7 @@ def on_open_match_modal(data):
     open_match_modal_logic(room, data, username)
 
 @socketio.on('close_match_modal')
+@room_command
 def on_close_match_modal(data):
     room = data.get('room')
     if not room: return
@@ -265,6 +275,7 @@ def on_close_match_modal(data):
     close_match_modal_logic(room)
 
 @socketio.on('sync_match_data')
+@room_command
 def on_sync_match_data(data):
     room = data.get('room')
     if not room: return
@@ -277,6 +288,7 @@ def on_sync_match_data(data):
     sync_match_data_logic(room, side, match_data, username, attribute)
 
 @socketio.on('debug_apply_buff')
+@room_command
 def on_debug_apply_buff(data):
     room = data.get('room')
     target_id = data.get('target_id')
@@ -312,6 +324,7 @@ def on_debug_apply_buff(data):
     broadcast_log(room, f"[DEBUG] {char['name']} に {buff_name}({buff_id}) を付与しました。", 'system')
 
 @socketio.on('request_update_battle_background')
+@room_command
 def on_request_update_battle_background(data):
     room = data.get('room')
     image_url = data.get('imageUrl')
@@ -332,6 +345,7 @@ def on_request_update_battle_background(data):
 # 既存バグ修正（計画書34調査中に発見、2026-07-08）: @socketio.on が欠落しており、
 # フロント（visual_ui.js）からの request_switch_battle_mode が常にサーバー側で無反応だった。
 @socketio.on('request_switch_battle_mode')
+@room_command
 def on_request_switch_battle_mode(data):
     room = data.get('room')
     mode = data.get('mode') # 'pvp' or 'pve'
@@ -353,6 +367,7 @@ def on_request_switch_battle_mode(data):
 # 既存バグ修正（計画書34調査中に発見、2026-07-08）: @socketio.on が欠落しており、
 # フロント（visual_panel.js）からの request_ai_suggest_skill が常にサーバー側で無反応だった。
 @socketio.on('request_ai_suggest_skill')
+@room_command
 def on_request_ai_suggest_skill(data):
     room = data.get('room')
     char_id = data.get('charId')
@@ -886,6 +901,7 @@ def _recalculate_redirect_state(room_id, battle_id, state):
 
 @socketio.on('battle_round_request_start')
 @socketio.on('battle_round_request_start')
+@room_command
 def on_battle_round_request_start(data):
     data = data or {}
     _log_battle_recv('battle_round_request_start', data)
@@ -939,6 +955,7 @@ def on_battle_round_request_start(data):
 
 
 @socketio.on('battle_intent_preview')
+@room_command
 def on_battle_intent_preview(data):
     data = data or {}
     _log_battle_recv('battle_intent_preview', data)
@@ -1014,6 +1031,7 @@ def on_battle_intent_preview(data):
 
 
 @socketio.on('battle_intent_commit')
+@room_command
 def on_battle_intent_commit(data):
     data = data or {}
     _log_battle_recv('battle_intent_commit', data)
@@ -1098,6 +1116,7 @@ def on_battle_intent_commit(data):
 
 
 @socketio.on('battle_resolve_confirm')
+@room_command
 def on_battle_resolve_confirm(data):
     data = data or {}
     _log_battle_recv('battle_resolve_confirm', data)
@@ -1137,6 +1156,7 @@ def on_battle_resolve_confirm(data):
 
 
 @socketio.on('battle_resolve_start')
+@room_command
 def on_battle_resolve_start(data):
     data = data or {}
     _log_battle_recv('battle_resolve_start', data)
@@ -1158,6 +1178,7 @@ def on_battle_resolve_start(data):
 
 
 @socketio.on('battle_resolve_flow_advance_request')
+@room_command
 def on_battle_resolve_flow_advance_request(data):
     data = data or {}
     room_id = data.get('room_id') or data.get('room') or data.get('room_name')
@@ -1200,6 +1221,7 @@ def on_battle_resolve_flow_advance_request(data):
 
 
 @socketio.on('battle_intent_uncommit')
+@room_command
 def on_battle_intent_uncommit(data):
     data = data or {}
     room_battle_slot = _ensure_battle_payload(data, require_slot=True)
@@ -1246,6 +1268,7 @@ def on_battle_intent_uncommit(data):
 
 
 @socketio.on('battle_intent_change_skill')
+@room_command
 def on_battle_intent_change_skill(data):
     data = data or {}
     room_battle_slot = _ensure_battle_payload(data, require_slot=True)
@@ -1323,6 +1346,7 @@ def on_battle_intent_change_skill(data):
 
 
 @socketio.on('battle_intent_change_target')
+@room_command
 def on_battle_intent_change_target(data):
     data = data or {}
     room_battle_slot = _ensure_battle_payload(data, require_slot=True)
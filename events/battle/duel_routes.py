@@ -7,6 +7,7 @@ from manager.room_manager import (
 )
 from manager.battle.duel_solver import execute_duel_match, update_duel_declaration, handle_skill_declaration
 from manager.room_access import is_sid_in_room
+from manager.room_actor import room_command
 
 
 def _resolve_username(default="System"):
@@ -85,6 +86,7 @@ def _is_declare_panel_preview_only(data):
 
 
 @socketio.on('request_match')
+@room_command
 def on_request_match(data):
     room = data.get('room')
     if not room: return
@@ -96,6 +98,7 @@ def on_request_match(data):
     execute_duel_match(room, data, username)
 
 @socketio.on('declare_skill')
+@room_command
 def on_declare_skill(data):
     room = data.get('room')
     if not room: return
@@ -117,6 +120,7 @@ def on_declare_skill(data):
     update_duel_declaration(room, data, username)
 
 @socketio.on('request_skill_declaration')
+@room_command
 def on_request_skill_declaration(data):
     room = data.get('room')
     if not room: return
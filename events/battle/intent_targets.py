@@ -1,6 +1,12 @@
 # events/battle/intent_targets.py
 from extensions import all_skill_data
 from manager.battle.skill_rules import _extract_rule_data_from_skill as _extract_rule_data_from_skill_v2
+from manager.skill_catalog import (
+    compiled_skill,
+    intent_skill_tags,
+    normalize_target_scope as _normalize_target_scope,
+    shared_rule_data,
+)
 
 
 def _default_intent_tags(existing=None):
@@ -63,124 +69,18 @@ def _extract_skill_tags(skill_id):
     if not skill_id:
         return []
     skill_data = all_skill_data.get(skill_id, {})
-    tags = list(skill_data.get('tags', []))
-    rule_data = _extract_skill_rule_data(skill_data)
-    for t in rule_data.get('tags', []) if isinstance(rule_data, dict) else []:
-        if t not in tags:
-            tags.append(t)
-    return tags
+    return intent_skill_tags(skill_data, shared_rule_data(skill_data))
 
 def _extract_skill_rule_data(skill_data):
     return _extract_rule_data_from_skill_v2(skill_data, raise_on_error=False)
 
-def _coerce_mass_type(raw_value):
-    text = str(raw_value or '').strip().lower()
-    if not text:
-        return None
-    if text in ['mass_summation', 'summation', 'sum']:
-        return 'mass_summation'
-    if text in ['mass_individual', 'individual']:
-        return 'mass_individual'
-    return None
-
-def _infer_mass_type_from_text(text):
-    merged = str(text or '').lower()
-    if not merged:
-        return None
-
-    if (
-        'mass_summation' in merged
-        or 'summation' in merged
-        or 'sum' in merged
-        or '合算' in merged
-        or '総和' in merged
-    ):
-        return 'mass_summation'
-
-    if (
-        'mass_individual' in merged
-        or 'individual' in merged
-        or '個別' in merged
-        or '単体' in merged
-    ):
-        return 'mass_individual'
-
-    if '広域' in merged:
-        return 'mass_individual'
-    return None
-
 def _infer_mass_type_from_skill(skill_id):
     if not skill_id:
         return None
     skill_data = all_skill_data.get(skill_id, {})
     if not isinstance(skill_data, dict):
         return None
-
-    rule_data = _extract_skill_rule_data(skill_data)
-
-    direct_candidates = [
-        skill_data.get('mass_type'),
-        skill_data.get('target_type'),
-        skill_data.get('targeting'),
-        skill_data.get('targetType'),
-        rule_data.get('mass_type') if isinstance(rule_data, dict) else None,
-        rule_data.get('target_type') if isinstance(rule_data, dict) else None,
-        rule_data.get('targeting') if isinstance(rule_data, dict) else None,
-        rule_data.get('targetType') if isinstance(rule_data, dict) else None,
-    ]
-    for raw in direct_candidates:
-        coerced = _coerce_mass_type(raw)
-        if coerced:
-            return coerced
-
-    merged_parts = []
-    merged_parts.extend(_extract_skill_tags(skill_id))
-    if isinstance(rule_data, dict):
-        rule_tags = rule_data.get('tags', [])
-        if isinstance(rule_tags, list):
-            merged_parts.extend(rule_tags)
-
-    for key in [
-        'category',
-        'distance',
-        '分類',
-        'カテゴリ',
-        '射程',
-        '距離',
-        '対象',
-        'target_scope',
-        'target',
-        'target_type',
-        'targeting',
-        'mass_type',
-    ]:
-        if isinstance(skill_data.get(key), str):
-            merged_parts.append(skill_data.get(key))
-        if isinstance(rule_data, dict) and isinstance(rule_data.get(key), str):
-            merged_parts.append(rule_data.get(key))
-
-    merged = ' '.join(str(v or '').lower() for v in merged_parts)
-    return _infer_mass_type_from_text(merged)
-
-def _normalize_target_scope(raw_value, default='enemy'):
-    text = str(raw_value or '').strip().lower()
-    if text in ['', 'default', 'auto']:
-        return str(default or 'enemy')
-    if text in ['self', 'self_only', 'caster', '自分', '自分対象', '自身', '自己対象']:
-        return 'self'
-    if text in [
-        'enemy', 'enemies', 'foe', 'opponent', 'opponents',
-        '敵', '敵側', 'opposing_team', '相手チーム', '相手チーム対象', '相手チーム指定'
-    ]:
-        return 'enemy'
-    if text in [
-        'ally', 'allies', 'friend', 'friends',
-        '味方', '味方全員', '同じチーム', '同じチーム対象', '同じチーム指定', 'same_team'
-    ]:
-        return 'ally'
-    if text in ['any', 'all', 'both', '全体', 'all_targets']:
-        return 'any'
-    return str(default or 'enemy')
+    return compiled_skill(skill_data).mass_type
 
 def _infer_target_scope_from_skill(skill_id):
     if not skill_id:
@@ -188,40 +88,7 @@ def _infer_target_scope_from_skill(skill_id):
     skill_data = all_skill_data.get(skill_id, {})
     if not isinstance(skill_data, dict):
         return 'enemy'
-    rule_data = _extract_skill_rule_data(skill_data)
-    candidates = [
-        skill_data.get('target_scope'),
-        skill_data.get('targetScope'),
-        skill_data.get('target_team'),
-        skill_data.get('targetTeam'),
-        rule_data.get('target_scope') if isinstance(rule_data, dict) else None,
-        rule_data.get('targetScope') if isinstance(rule_data, dict) else None,
-        rule_data.get('target_team') if isinstance(rule_data, dict) else None,
-        rule_data.get('targetTeam') if isinstance(rule_data, dict) else None,
-    ]
-    for raw in candidates:
-        if raw not in [None, '']:
-            return _normalize_target_scope(raw, default='enemy')
-
-    tags = []
-    for raw_tag in _extract_skill_tags(skill_id):
-        text = str(raw_tag or '').strip()
-        if text:
-            tags.append(text)
-    normalized = {str(v).strip().lower() for v in tags}
-    self_tags = {'self_target', 'target_self', '自分対象', '自身対象', '自己対象'}
-    ally_tags = {'ally_target', 'target_ally', '味方対象', '味方指定', '同じチーム対象', '同じチーム指定', '同陣営対象', '同陣営指定'}
-    any_tags = {'any_target', 'target_any', '全体対象', '対象自由'}
-    enemy_tags = {'enemy_target', 'target_enemy', '敵対象', '相手チーム対象', '相手チーム指定'}
-    if any(str(t).lower() in normalized for t in any_tags):
-        return 'any'
-    if any(str(t).lower() in normalized for t in self_tags):
-        return 'self'
-    if any(str(t).lower() in normalized for t in ally_tags):
-        return 'ally'
-    if any(str(t).lower() in normalized for t in enemy_tags):
-        return 'enemy'
-    return 'enemy'
+    return compiled_skill(skill_data).target_scope
 
 def _resolve_slot_team(state, slot_id):
     if not isinstance(state, dict) or not slot_id:
@@ -342,11 +209,7 @@ def _extract_skill_cost_entries(skill_data):
     direct = skill_data.get('cost')
     if isinstance(direct, list):
         return direct
-
-    rule_data = _extract_skill_rule_data(skill_data)
-    if isinstance(rule_data, dict) and isinstance(rule_data.get('cost'), list):
-        return rule_data.get('cost', [])
-    return []
+    return list(compiled_skill(skill_data).cost)
 
 def _resolve_actor_for_slot(state, slot_id, room_id=None, get_room_state_fn=None):
     if not isinstance(state, dict) or not slot_id:
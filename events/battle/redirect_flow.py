@@ -6,6 +6,8 @@
 # common_routes.py 側の関数（_ensure_intent_for_slot 等）は関数注入で受け取る
 # （本モジュールは common_routes を import しない。循環回避）。
 
+from manager.battle.resolve_trace_runtime import append_trace_entry, trace_step_count
+
 
 def clear_redirect_state(state):
     if not isinstance(state, dict):
@@ -27,8 +29,8 @@ def append_redirect_record(state, record):
     state.setdefault('redirects', [])
     state['redirects'].append(record)
     trace = state.get('resolve', {}).get('trace', [])
-    trace.append({
-        'step': len(trace) + 1,
+    append_trace_entry(trace, {
+        'step': trace_step_count(trace) + 1,
         'kind': record.get('kind', 'redirect'),
         'attacker_slot': record.get('by_slot'),
         'defender_slot': record.get('from_slot'),
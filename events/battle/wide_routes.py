@@ -10,6 +10,7 @@ from manager.battle.wide_solver import (
     update_defender_declaration, update_attacker_declaration
 )
 from manager.room_access import is_sid_in_room
+from manager.room_actor import room_command
 
 
 def _resolve_sid():
@@ -43,6 +44,7 @@ def _is_actor_control_allowed(room, actor_id, sid, user_info):
 
 
 @socketio.on('open_wide_match_modal')
+@room_command
 def on_open_wide_match_modal(data):
     room = data.get('room')
     if not room: return
@@ -54,6 +56,7 @@ def on_open_wide_match_modal(data):
     setup_wide_match_declaration(room, data, username)
 
 @socketio.on('wide_declare_skill')
+@room_command
 def on_wide_declare_skill(data):
     room = data.get('room')
     if not room: return
@@ -74,6 +77,7 @@ def on_wide_declare_skill(data):
     update_defender_declaration(room, data)
 
 @socketio.on('wide_attacker_declare')
+@room_command
 def on_wide_attacker_declare(data):
     room = data.get('room')
     if not room: return
@@ -98,6 +102,7 @@ def on_wide_attacker_declare(data):
     update_attacker_declaration(room, data)
 
 @socketio.on('execute_synced_wide_match')
+@room_command
 def on_execute_synced_wide_match(data):
     room = data.get('room')
     if not room: return
@@ -20,6 +20,7 @@ from manager.room_manager import (
     set_character_owner,
 )
 from manager.utils import apply_passive_effect_buffs
+from manager.room_actor import room_command
 from events.battle_only.catalog_state import (
     _ally_entries_from_formation_record,
     _count_room_allies,
@@ -354,6 +355,7 @@ def handle_bo_enemy_formation_delete(data):
 
 
 @socketio.on('request_bo_select_enemy_formation')
+@room_command
 def handle_bo_select_enemy_formation(data):
     room = str((data or {}).get('room', '')).strip()
     if not room:
@@ -486,6 +488,7 @@ def handle_bo_ally_formation_delete(data):
 
 
 @socketio.on('request_bo_select_ally_formation')
+@room_command
 def handle_bo_select_ally_formation(data):
     room = str((data or {}).get('room', '')).strip()
     if not room:
@@ -625,6 +628,7 @@ def handle_bo_stage_preset_delete(data):
 
 
 @socketio.on('request_bo_select_stage_preset')
+@room_command
 def handle_bo_select_stage_preset(data):
     room = str((data or {}).get('room', '')).strip()
     if not room:
@@ -701,6 +705,7 @@ def handle_bo_select_stage_preset(data):
 
 
 @socketio.on('request_bo_set_ally_mode')
+@room_command
 def handle_bo_set_ally_mode(data):
     room = str((data or {}).get('room', '')).strip()
     if not room:
@@ -728,6 +733,7 @@ def handle_bo_set_ally_mode(data):
 
 
 @socketio.on('request_bo_set_stage_field_effect_enabled')
+@room_command
 def handle_bo_set_stage_field_effect_enabled(data):
     room = str((data or {}).get('room', '')).strip()
     if not room:
@@ -749,6 +755,7 @@ def handle_bo_set_stage_field_effect_enabled(data):
 
 
 @socketio.on('request_bo_set_stage_avatar_enabled')
+@room_command
 def handle_bo_set_stage_avatar_enabled(data):
     room = str((data or {}).get('room', '')).strip()
     if not room:
@@ -770,6 +777,7 @@ def handle_bo_set_stage_avatar_enabled(data):
 
 
 @socketio.on('request_bo_set_control_mode')
+@room_command
 def handle_bo_set_control_mode(data):
     room = str((data or {}).get('room', '')).strip()
     if not room:
@@ -796,6 +804,7 @@ def handle_bo_set_control_mode(data):
 
 
 @socketio.on('request_bo_validate_entry')
+@room_command
 def handle_bo_validate_entry(data):
     room = str((data or {}).get('room', '')).strip()
     if not room:
@@ -818,6 +827,7 @@ def handle_bo_validate_entry(data):
 
 
 @socketio.on('request_bo_draft_state')
+@room_command
 def handle_bo_draft_state(data):
     room = str((data or {}).get('room', '')).strip()
     if not room:
@@ -856,6 +866,7 @@ def handle_bo_draft_state(data):
 
 
 @socketio.on('request_bo_draft_update')
+@room_command
 def handle_bo_draft_update(data):
     room = str((data or {}).get('room', '')).strip()
     if not room:
@@ -919,6 +930,7 @@ def handle_bo_draft_update(data):
 
 
 @socketio.on('request_bo_start_battle')
+@room_command
 def handle_bo_start_battle(data):
     room = str((data or {}).get('room', '')).strip()
     if not room:
@@ -1181,6 +1193,7 @@ def handle_bo_start_battle(data):
 
 
 @socketio.on('request_bo_record_state')
+@room_command
 def handle_bo_record_state(data):
     room = str((data or {}).get('room', '')).strip()
     if not room:
@@ -1198,6 +1211,7 @@ def handle_bo_record_state(data):
 
 
 @socketio.on('request_bo_record_mark_result')
+@room_command
 def handle_bo_record_mark_result(data):
     room = str((data or {}).get('room', '')).strip()
     if not room:
@@ -1286,6 +1300,7 @@ def handle_bo_export_stage_presets_json(_data):
 
 
 @socketio.on('request_bo_record_export')
+@room_command
 def handle_bo_record_export(data):
     room = str((data or {}).get('room', '')).strip()
     if not room:
@@ -21,6 +21,7 @@ from manager.utils import (
 )
 from manager.json_rule_audit import append_audit
 from manager.room_access import is_sid_in_room
+from manager.room_actor import room_command
 from manager.character_tags import (
     CharacterTagValidationError,
     apply_character_tag_policy,
@@ -67,6 +68,7 @@ def _resolve_owned_character_tag(data):
 
 
 @socketio.on('request_add_character')
+@room_command
 def handle_add_character(data):
     room = data.get('room')
     char_data = data.get('charData')
@@ -213,6 +215,7 @@ def handle_add_character(data):
 
 
 @socketio.on('request_reflect_session_results')
+@room_command
 def handle_reflect_session_results(data):
     """計画36 Phase 4: セッション成果（経験値・アイテム）を持ちキャラへ書き戻す。
 
@@ -326,6 +329,7 @@ def handle_reflect_session_results(data):
 
 
 @socketio.on('request_move_character')
+@room_command
 def handle_move_character(data):
     room = data.get('room')
     char_id = data.get('character_id')
@@ -387,11 +391,12 @@ def handle_move_character(data):
                 'last_move_ts': ts if ts else 0
             }, to=room)
 
-        save_specific_room_state(room)
+        save_specific_room_state(room, sections=('characters',))
 
 
 # app.py (576行目あたり、handle_delete_character の前に追加)
 @socketio.on('request_add_debug_character')
+@room_command
 def handle_add_debug_character(data):
     """ (★新規★) GM専用のデバッグキャラクターを追加する """
     room = data.get('room')
@@ -482,6 +487,7 @@ def handle_add_debug_character(data):
         })
 
 @socketio.on('request_delete_character')
+@room_command
 def handle_delete_character(data):
     room = data.get('room')
     char_id = data.get('charId')
@@ -522,6 +528,7 @@ def handle_delete_character(data):
         save_specific_room_state(room)
 
 @socketio.on('request_transfer_character_ownership')
+@room_command
 def handle_transfer_character_ownership(data):
     """キャラクターの所有権を別のユーザーに譲渡"""
     room = data.get('room')
@@ -568,6 +575,7 @@ def handle_transfer_character_ownership(data):
 
 
 @socketio.on('request_update_token_scale')
+@room_command
 def handle_update_token_scale(data):
     """駒のサイズスケールを更新"""
     room = data.get('room')
@@ -589,10 +597,11 @@ def handle_update_token_scale(data):
     char['tokenScale'] = max(0.5, min(2.0, float(scale)))
 
     broadcast_state_update(room)
-    save_specific_room_state(room)
+    save_specific_room_state(room, sections=('characters',))
 
 
 @socketio.on('request_state_update')
+@room_command
 def handle_state_update(data):
     room = data.get('room')
     char_id = data.get('charId')
@@ -639,6 +648,7 @@ def handle_state_update(data):
 
 
 @socketio.on('request_gm_apply_buff')
+@room_command
 def handle_gm_apply_buff(data):
     room = data.get('room')
     target_id = data.get('target_id')
@@ -740,10 +750,11 @@ def handle_gm_apply_buff(data):
         'info'
     )
     broadcast_state_update(room)
-    save_specific_room_state(room)
+    save_specific_room_state(room, sections=('characters',))
 
 
 @socketio.on('request_gm_apply_state')
+@room_command
 def handle_gm_apply_state(data):
     room = data.get('room')
     target_id = data.get('target_id')
@@ -843,10 +854,11 @@ def handle_gm_apply_state(data):
         )
 
     broadcast_state_update(room)
-    save_specific_room_state(room)
+    save_specific_room_state(room, sections=('characters',))
 
 
 @socketio.on('request_gm_remove_buff')
+@room_command
 def handle_gm_remove_buff(data):
     room = data.get('room')
     target_id = data.get('target_id')
@@ -950,7 +962,7 @@ def handle_gm_remove_buff(data):
         username=str(username or ""),
     )
     broadcast_state_update(room)
-    save_specific_room_state(room)
+    save_specific_room_state(room, sections=('characters',))
 
 
 def _normalize_behavior_profile_safe(raw_profile):
@@ -1049,6 +1061,7 @@ def _reset_behavior_runtime_after_enemy_reload(state):
 
 # 戦闘専用モードのSocketイベントは events/socket_battle_only.py に分離。
 @socketio.on('request_save_preset')
+@room_command
 def handle_save_preset(data):
     room = data.get('room')
     preset_name = data.get('name')
@@ -1081,13 +1094,14 @@ def handle_save_preset(data):
     normalized_payload = _normalize_preset_record(current_enemies)
     presets[preset_name] = copy.deepcopy(normalized_payload)
 
-    save_specific_room_state(room)
+    save_specific_room_state(room, sections=('presets',))
 
     msg = f"エネミープリセット「{preset_name}」を保存しました。"
     socketio.emit('new_log', {"message": msg, "type": "system"}, to=request.sid) # 自分だけに通知
     socketio.emit('preset_saved', {"name": preset_name}, to=request.sid) # 完了通知
 
 @socketio.on('request_load_preset')
+@room_command
 def handle_load_preset(data):
     room = data.get('room')
     preset_name = data.get('name')
@@ -1140,6 +1154,7 @@ def handle_load_preset(data):
     save_specific_room_state(room)
 
 @socketio.on('request_delete_preset')
+@room_command
 def handle_delete_preset(data):
     room = data.get('room')
     preset_name = data.get('name')
@@ -1156,7 +1171,7 @@ def handle_delete_preset(data):
     presets = _get_preset_store(state)
     if preset_name in presets:
         del presets[preset_name]
-        save_specific_room_state(room)
+        save_specific_room_state(room, sections=('presets',))
         socketio.emit('preset_deleted', {"name": preset_name}, to=request.sid)
     else:
         _emit_preset_error('not_found', f'プリセット「{preset_name}」が見つかりません。')
@@ -1222,6 +1237,7 @@ def handle_export_preset_json(data):
 
 
 @socketio.on('request_import_preset_json')
+@room_command
 def handle_import_preset_json(data):
     room = data.get('room')
     if not room:
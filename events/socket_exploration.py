@@ -6,6 +6,7 @@ from manager.room_manager import (
     broadcast_log, flush_room_state_now,
 )
 from manager.room_access import is_sid_in_room, sid_has_room_role, GM_ROLES
+from manager.room_actor import room_command
 import logging
 import random
 
@@ -15,6 +16,7 @@ logger = logging.getLogger(__name__)
 # EXPLORATION_PARAMS = ['五感', '採取', '本能', '鑑定', '対話', '尋問', '諜報', '窃取', '隠密', '運動', '制作', '回避']
 
 @socketio.on('request_change_mode')
+@room_command
 def handle_change_mode(data):
     room_name = data.get('room')
     new_mode = data.get('mode')  # 'battle' or 'exploration'
@@ -43,6 +45,7 @@ def handle_change_mode(data):
 
 
 @socketio.on('request_update_exploration_bg')
+@room_command
 def handle_update_exploration_bg(data):
     room_name = data.get('room')
     image_url = data.get('image_url')
@@ -67,6 +70,7 @@ def handle_update_exploration_bg(data):
 
 
 @socketio.on('request_update_tachie_location')
+@room_command
 def handle_update_tachie_location(data):
     room_name = data.get('room')
     char_id = data.get('char_id')
@@ -114,6 +118,7 @@ def handle_update_tachie_location(data):
 
 
 @socketio.on('request_exploration_roll')
+@room_command
 def handle_exploration_roll(data):
     room_name = data.get('room')
     char_id = data.get('char_id')
@@ -14,6 +14,7 @@ from manager.room_manager import (
 from manager.items.usage_manager import item_usage_manager
 from manager.items.loader import item_loader
 from manager.room_access import is_sid_in_room
+from manager.room_actor import room_command
 
 
 def _safe_int(value, default=0):
@@ -23,6 +24,7 @@ def _safe_int(value, default=0):
         return default
 
 @socketio.on('request_use_item')
+@room_command
 def handle_use_item(data):
     """
     アイテム使用イベント
@@ -101,6 +103,7 @@ def handle_use_item(data):
     save_specific_room_state(room)
 
 @socketio.on('request_gm_grant_item')
+@room_command
 def handle_gm_grant_item(data):
     """
     GMアイテム付与イベント（GM専用）
@@ -157,6 +160,7 @@ def handle_gm_grant_item(data):
         emit('item_grant_error', {'message': 'アイテムの付与に失敗しました'})
 
 @socketio.on('request_gm_adjust_item')
+@room_command
 def handle_gm_adjust_item(data):
     room = data.get('room')
     target_id = data.get('target_id')
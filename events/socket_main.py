@@ -5,11 +5,16 @@ from flask_socketio import join_room, leave_room, emit
 # 拡張機能とマネージャーからのインポート
 from extensions import socketio, user_sids
 from manager.room_manager import (
-    get_room_state, broadcast_log, broadcast_user_list, emit_select_resolve_events
+    get_room_state, broadcast_log, broadcast_user_list, emit_select_resolve_events,
+    build_state_snapshot_payload, page_room_logs,
 )
+from manager.state_sync import state_patch_room
+from manager.state_views import role_room, set_sid_attribute, view_for_attribute, viewer_of
+from manager.room_shards import is_local_room, redirect_payload
 from manager.auth import GM_ATTRIBUTE, PLAYER_ATTRIBUTE, resolve_room_attribute
 from manager.room_access import is_sid_in_room, ensure_join_membership_by_name, resolve_room_role, GM_ROLES
 from manager.user_manager import is_user_management_admin
+from manager import catalog_registry
 
 # --- 5.2. SocketIO イベントハンドラ ---
 @socketio.on('connect')
@@ -57,6 +62,10 @@ def handle_join_room(data):
     if 'username' not in session or not session.get('user_id'):
         emit('join_room_error', {'error': '認証が必要です'}, to=request.sid)
         return
+    # ルームを担当するワーカーが別なら、そちらへ接続し直させる。
+    if not is_local_room(room):
+        emit('shard_redirect', redirect_payload(room), to=request.sid)
+        return
     # 表示名は payload ではなく session のユーザー情報から採る（なりすまし防止）。
     username = session.get('username')
     user_id = session.get('user_id')
@@ -84,6 +93,8 @@ def handle_join_room(data):
 
     prev_info = user_sids.get(request.sid)
     prev_room = (prev_info or {}).get('room')
+    # 差分配信(state_patch)に対応したクライアントは join 時に申告する。
+    wants_patch = bool(data.get('state_patch'))
 
     # same SID -> same room rejoin: refresh snapshot only (no duplicate join log)
     if prev_room == room:
@@ -93,9 +104,18 @@ def handle_join_room(data):
             "room": room,
             "user_id": session.get('user_id'),
             "is_app_admin": app_admin,
+            "state_patch": wants_patch,
         }
+        if wants_patch:
+            join_room(state_patch_room(room))
+        elif (prev_info or {}).get('state_patch'):
+            leave_room(state_patch_room(room))
+        prev_view = view_for_attribute((prev_info or {}).get('attribute'))
+        if prev_view != view_for_attribute(attribute):
+            leave_room(role_room(room, prev_view))
+        join_room(role_room(room, view_for_attribute(attribute)))
         state = get_room_state(room)
-        emit('state_updated', state, to=request.sid)
+        emit('state_updated', build_state_snapshot_payload(room, state, to_sid=request.sid), to=request.sid)
         emit_select_resolve_events(room, to_sid=request.sid, include_round_started=True)
         broadcast_user_list(room)
         return
@@ -103,9 +123,15 @@ def handle_join_room(data):
     # move SID from previous room when switching rooms
     if prev_room and prev_room != room:
         leave_room(prev_room)
+        if (prev_info or {}).get('state_patch'):
+            leave_room(state_patch_room(prev_room))
+        leave_room(role_room(prev_room, view_for_attribute((prev_info or {}).get('attribute'))))
         broadcast_user_list(prev_room)
 
     join_room(room)
+    join_room(role_room(room, view_for_attribute(attribute)))
+    if wants_patch:
+        join_room(state_patch_room(room))
 
     user_sids[request.sid] = {
         "username": username,
@@ -113,14 +139,15 @@ def handle_join_room(data):
         "room": room,
         "user_id": session.get('user_id'),
         "is_app_admin": app_admin,
+        "state_patch": wants_patch,
     }
 
     print(f"User {username} [{attribute}] (SID: {request.sid}) joined room: {room}")
 
     # ★ 修正: まず状態を送信してDOMを初期化させる
     state = get_room_state(room)
-    print(f"[JOIN] Sending state_updated to {username} with {len(state.get('logs', []))} logs")
-    emit('state_updated', state, to=request.sid)
+    print(f"[JOIN] Sending state_updated to {username} (logs={'cursor' if wants_patch else len(state.get('logs', []))})")
+    emit('state_updated', build_state_snapshot_payload(room, state, to_sid=request.sid), to=request.sid)
     emit_select_resolve_events(room, to_sid=request.sid, include_round_started=True)
 
     # ★ その後、入室ログを全員に送信
@@ -144,6 +171,35 @@ def handle_request_select_resolve_sync(data):
     emit_select_resolve_events(room, to_sid=request.sid, include_round_started=True)
 
 
+@socketio.on('request_state_snapshot')
+def handle_request_state_snapshot(data):
+    """state_patch の版ずれを検知したクライアントへ全量を送り直す。"""
+    data = data or {}
+    room = data.get('room')
+    if not room:
+        return
+    if not is_sid_in_room(request.sid, room):
+        return
+    state = get_room_state(room)
+    emit('state_updated', build_state_snapshot_payload(room, state, to_sid=request.sid), to=request.sid)
+
+
+@socketio.on('request_logs')
+def handle_request_logs(data):
+    """before_log_id より古いログを最大 limit 件返す（スナップショットに logs を含めないクライアント用）。"""
+    data = data or {}
+    room = data.get('room')
+    if not room:
+        return
+    if not is_sid_in_room(request.sid, room):
+        return
+    view, username = viewer_of(request.sid)
+    page = page_room_logs(
+        room, before_log_id=data.get('before_log_id'), limit=data.get('limit'), view=view, username=username,
+    )
+    emit('logs_page', page, to=request.sid)
+
+
 @socketio.on('request_update_user_info')
 def handle_update_user_info(data):
     sid = request.sid
@@ -165,7 +221,7 @@ def handle_update_user_info(data):
         old_username = user_sids[sid].get('username', '???')
         room_name = user_sids[sid].get('room')
         user_sids[sid]['username'] = new_username
-        user_sids[sid]['attribute'] = new_attribute
+        set_sid_attribute(sid, new_attribute)
 
     print(f"User info updated (SID: {sid}): {old_username} -> {new_username} [{new_attribute}]")
 
@@ -220,3 +276,31 @@ def handle_chat(data):
         # "sroll" と打っただけの場合は空になる可能性があるのでチェック
         if msg.strip():
             broadcast_log(room, msg, 'chat', user=server_user, secret=secret)
+
+
+# --- データカタログの更新通知 ---
+@catalog_registry.on_change
+def _notify_catalog_updated(name, version, replaced):
+    # 初回読み込みは各クライアントが API で取りに来るので、差し替え時だけ通知する
+    if not replaced:
+        return
+    payload = catalog_registry.snapshot()
+    payload['name'] = name
+    socketio.emit('catalog_updated', payload)
+
+
+@socketio.on('request_reload_catalogs')
+def handle_reload_catalogs(data=None):
+    """キャッシュファイルからカタログを読み直す（別プロセスの --update 後など。アプリ管理者専用）
+
+    読み直すのはこのプロセスのカタログだけ。ROOM_SHARDS>1 のときは各シャードの
+    接続先でそれぞれ送るか、全シャードを再起動する（catalog_updated の通知は
+    メッセージキュー経由で全クライアントに届くが、他シャードの中身は古いまま）。
+    """
+    user_info = user_sids.get(request.sid) or {}
+    if not is_user_management_admin(user_info.get('user_id') or session.get('user_id')):
+        emit('error', {'message': 'アプリ管理者権限が必要です'})
+        return
+    names = (data or {}).get('names') if isinstance(data, dict) else None
+    reloaded = catalog_registry.reload(names or None)
+    emit('catalogs_reloaded', {'names': reloaded, **catalog_registry.snapshot()})
@@ -18,6 +18,7 @@ from manager.room_preset_apply import (
     apply_stage_preset_to_room_state,
     build_room_preset_catalog,
 )
+from manager.room_actor import room_command
 
 
 def _emit_error(code, message, event_name="room_preset_error", extra=None):
@@ -91,6 +92,7 @@ def handle_room_preset_catalog(data):
 
 
 @socketio.on("request_room_apply_enemy_preset")
+@room_command
 def handle_room_apply_enemy_preset(data):
     src = data if isinstance(data, dict) else {}
     room = str(src.get("room", "")).strip()
@@ -124,6 +126,7 @@ def handle_room_apply_enemy_preset(data):
 
 
 @socketio.on("request_room_apply_enemy_formation")
+@room_command
 def handle_room_apply_enemy_formation(data):
     src = data if isinstance(data, dict) else {}
     room = str(src.get("room", "")).strip()
@@ -155,6 +158,7 @@ def handle_room_apply_enemy_formation(data):
 
 
 @socketio.on("request_room_apply_stage_preset")
+@room_command
 def handle_room_apply_stage_preset(data):
     src = data if isinstance(data, dict) else {}
     room = str(src.get("room", "")).strip()
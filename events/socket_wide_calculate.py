@@ -10,10 +10,12 @@ from extensions import socketio, all_skill_data
 from manager.room_manager import get_room_state
 from manager.game_logic import get_status_value
 from manager.utils import get_buff_stat_mod
+from manager.room_actor import room_command
 import re
 
 
 @socketio.on('calculate_wide_skill')
+@room_command
 def handle_calculate_wide_skill(data):
     """
     広域マッチでスキルの威力範囲を計算
@@ -4,7 +4,10 @@ import multiprocessing
 # Gunicorn設定ファイル
 # Eventletワーカーとの互換性を確保
 
-bind = f"0.0.0.0:{os.environ.get('PORT', '10000')}"
+# ルーム分割（ROOM_SHARDS>1）では、シャードごとに ROOM_SHARD_INDEX を変えて
+# このプロセスを複数起動し、PORT+番号 で待ち受ける（scripts/run_room_shards.py）。
+# ルーム状態はプロセスメモリにあるため、1プロセスあたりのワーカーは1のまま。
+bind = f"0.0.0.0:{int(os.environ.get('PORT', '10000')) + int(os.environ.get('ROOM_SHARD_INDEX', '0') or 0)}"
 workers = 1  # Eventletでは通常1ワーカーで十分
 worker_class = 'eventlet'
 timeout = 120
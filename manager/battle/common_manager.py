@@ -1,8 +1,6 @@
 import copy
-import json
 import time
 import uuid
-import threading
 from flask_socketio import emit
 from extensions import socketio, all_skill_data
 from plugins.buffs.registry import buff_registry
@@ -13,6 +11,8 @@ from manager.battle.battle_ai import ai_select_targets, ai_suggest_skill
 from manager.battle.skill_access import list_usable_skill_ids
 from manager.dice_roller import roll_dice
 from manager.logs import setup_logger
+from manager.room_actor import room_turn
+from manager.skill_catalog import fresh_effects
 from manager.summons.service import apply_summon_change, process_summon_round_end
 from manager.granted_skills.service import process_granted_skill_round_end, apply_grant_skill_change
 from manager.battle.system_skills import pop_pending_selected_power_recoveries
@@ -20,20 +20,6 @@ from manager.battle.system_skills import pop_pending_selected_power_recoveries
 logger = setup_logger(__name__)
 
 
-_ROUND_TRANSITION_LOCKS = {}
-_ROUND_TRANSITION_LOCKS_GUARD = threading.Lock()
-
-
-def _get_round_transition_lock(room):
-    room_key = str(room or "").strip() or "__default__"
-    with _ROUND_TRANSITION_LOCKS_GUARD:
-        lock = _ROUND_TRANSITION_LOCKS.get(room_key)
-        if lock is None:
-            lock = threading.RLock()
-            _ROUND_TRANSITION_LOCKS[room_key] = lock
-        return lock
-
-
 def _safe_emit(event_name, payload, **kwargs):
     emit_fn = getattr(socketio, "emit", None)
     if callable(emit_fn):
@@ -112,6 +98,7 @@ BEHAVIOR_RANDOM_USABLE_SKILL_ALIASES = {
 get_effective_origin_id = getattr(_utils_mod, 'get_effective_origin_id', lambda *_args, **_kwargs: 0)
 apply_origin_bonus_buffs = getattr(_utils_mod, 'apply_origin_bonus_buffs', lambda *_args, **_kwargs: None)
 clear_newly_applied_flags = getattr(_utils_mod, 'clear_newly_applied_flags', lambda *_args, **_kwargs: 0)
+invalidate_buff_stat_mods = getattr(_utils_mod, 'invalidate_buff_stat_mods', lambda *_args, **_kwargs: None)
 clear_round_limited_flags = getattr(_utils_mod, 'clear_round_limited_flags', lambda *_args, **_kwargs: 0)
 get_round_end_origin_recoveries = getattr(_utils_mod, 'get_round_end_origin_recoveries', lambda *_args, **_kwargs: {})
 
@@ -123,8 +110,6 @@ from manager.battle.pve_intent_planner import (
     _remove_summoned_characters,
     _extract_skill_rule_data,
     _extract_skill_tags,
-    _coerce_mass_type,
-    _infer_mass_type_from_text,
     _infer_mass_type_from_skill,
     _normalize_target_scope,
     _infer_target_scope_from_skill,
@@ -313,8 +298,8 @@ def select_hard_followup_evade_slot(state, battle_state, defender_actor_id, atta
 
 
 def process_full_round_end(room, username):
-    lock = _get_round_transition_lock(room)
-    with lock:
+    # ラウンド遷移はルームのキュー上で直列化する（イベント経由なら入れ子で通る）。
+    with room_turn(room, 'process_full_round_end'):
         return _process_full_round_end_impl(room, username)
 
 
@@ -374,8 +359,11 @@ def _process_full_round_end_impl(room, username):
                     or skill_data.get("特記処理")
                     or "{}"
                 )
-                rule_data = rule_json_str if isinstance(rule_json_str, dict) else json.loads(str(rule_json_str))
-                effects_array = rule_data.get("effects", [])
+                if isinstance(rule_json_str, dict):
+                    effects_array = rule_json_str.get("effects", [])
+                else:
+                    # END_ROUND の効果が無いスキルはパースもコピーもしない
+                    effects_array = fresh_effects(str(rule_json_str), timing="END_ROUND")
                 if effects_array:
                     _, logs, changes = process_skill_effects(effects_array, "END_ROUND", char, char, None, context={'timeline': state.get('timeline', []), 'characters': state['characters'], 'room': room})
                     all_changes.extend(changes)
@@ -515,6 +503,7 @@ def _process_full_round_end_impl(room, username):
                     active_buffs.append(buff)
 
             char['special_buffs'] = active_buffs
+            invalidate_buff_stat_mods(char)
             apply_origin_bonus_buffs(char)
 
 
@@ -579,7 +568,7 @@ def reset_battle_logic(room, mode, username, reset_options=None):
     if not state: return
 
     if mode == 'logs':
-        state['logs'] = []
+        room_manager.clear_room_logs(room)
         broadcast_state_update(room)
         save_specific_room_state(room)
         return
@@ -781,7 +770,7 @@ def force_end_match_logic(room, username):
     state['active_match'] = None
     state['pending_wide_ids'] = []
 
-    save_specific_room_state(room)
+    save_specific_room_state(room, sections=('battle_state', 'core'))
     broadcast_state_update(room)
 
 
@@ -806,7 +795,7 @@ def move_token_logic(room, char_id, x, y, username, attribute):
     target_char["x"] = float(x)
     target_char["y"] = float(y)
 
-    save_specific_room_state(room)
+    save_specific_room_state(room, sections=('characters',))
     broadcast_state_update(room)
 
 def open_match_modal_logic(room, data, username):
@@ -874,7 +863,7 @@ def open_match_modal_logic(room, data, username):
             'match_id': str(uuid.uuid4())
         }
 
-    save_specific_room_state(room)
+    save_specific_room_state(room, sections=('battle_state',))
     _safe_emit('match_modal_opened', {
         'match_type': match_type,
         'attacker_id': attacker_id,
@@ -891,7 +880,7 @@ def close_match_modal_logic(room):
     if 'active_match' in state:
         state['active_match']['is_active'] = False
 
-    save_specific_room_state(room)
+    save_specific_room_state(room, sections=('battle_state',))
     _safe_emit('match_modal_closed', {}, to=room)
     broadcast_state_update(room)
 
@@ -929,12 +918,11 @@ def sync_match_data_logic(room, side, data, username, attribute):
     elif side == 'defender':
         state['active_match']['defender_data'] = data
 
-    save_specific_room_state(room)
+    save_specific_room_state(room, sections=('battle_state',))
     _safe_emit('match_data_updated', {'side': side, 'data': data}, to=room)
 
 def process_round_start(room, username):
-    lock = _get_round_transition_lock(room)
-    with lock:
+    with room_turn(room, 'process_round_start'):
         return _process_round_start_impl(room, username)
 
 
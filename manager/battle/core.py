@@ -150,83 +150,95 @@ COST_CONSUME_POLICY = "on_execute"
 MAX_USE_SKILL_AGAIN_CHAIN_HARD_CAP = 20
 
 
-def _sync_resolve_trace_runtime_deps():
-    _resolve_trace_runtime_mod.logger = logger
-    _resolve_trace_runtime_mod.socketio = socketio
-    _resolve_trace_runtime_mod.all_skill_data = all_skill_data
-    _resolve_trace_runtime_mod.get_room_state = get_room_state
-    _resolve_trace_runtime_mod.save_specific_room_state = save_specific_room_state
-    _resolve_trace_runtime_mod._build_trace_compact_log_message = _build_trace_compact_log_message
-    _resolve_trace_runtime_mod._extract_step_aux_log_lines = _extract_step_aux_log_lines
-    _resolve_trace_runtime_mod._trace_kind_label = _trace_kind_label
-    _resolve_trace_runtime_mod._trace_outcome_label = _trace_outcome_label
-    _resolve_trace_runtime_mod._trace_actor_name = _trace_actor_name
-    _resolve_trace_runtime_mod._trace_damage_total = _trace_damage_total
-    _resolve_trace_runtime_mod._sanitize_power_snapshot = _sanitize_power_snapshot
-    _resolve_trace_runtime_mod._sanitize_power_breakdown = _sanitize_power_breakdown
-    _resolve_trace_runtime_mod._apply_step_end_timing_from_trace = _apply_step_end_timing_from_trace
-
-
-def _sync_resolve_effect_runtime_deps():
-    _resolve_effect_runtime_mod.logger = logger
-    _resolve_effect_runtime_mod.all_skill_data = all_skill_data
-    _resolve_effect_runtime_mod.socketio = socketio
-    _resolve_effect_runtime_mod.get_room_state = get_room_state
-    _resolve_effect_runtime_mod.broadcast_log = broadcast_log
-    _resolve_effect_runtime_mod._update_char_stat = _update_char_stat
-    _resolve_effect_runtime_mod.apply_summon_change = apply_summon_change
-    _resolve_effect_runtime_mod.apply_grant_skill_change = apply_grant_skill_change
-    _resolve_effect_runtime_mod.consume_granted_skill_use = consume_granted_skill_use
-    _resolve_effect_runtime_mod.consume_bleed_maintenance_stack = consume_bleed_maintenance_stack
-    _resolve_effect_runtime_mod.process_skill_effects = process_skill_effects
-    _resolve_effect_runtime_mod.apply_buff = apply_buff
-    _resolve_effect_runtime_mod.remove_buff = remove_buff
-    _resolve_effect_runtime_mod.get_status_value = get_status_value
-    _resolve_effect_runtime_mod.set_status_value = set_status_value
-    _resolve_effect_runtime_mod.DamageSource = DamageSource
-    _resolve_effect_runtime_mod._extract_skill_id_from_data = _extract_skill_id_from_data
-    _resolve_effect_runtime_mod._collect_intrinsic_cancelled_single_slots = _collect_intrinsic_cancelled_single_slots
-    _resolve_effect_runtime_mod._safe_int = _safe_int
-    _resolve_effect_runtime_mod.COST_CONSUME_POLICY = COST_CONSUME_POLICY
-    _resolve_effect_runtime_mod.process_on_damage_buffs = process_on_damage_buffs
-
-
-def _sync_resolve_legacy_log_adapter_deps():
-    _resolve_legacy_log_adapter_mod.all_skill_data = all_skill_data
-    _resolve_legacy_log_adapter_mod.format_skill_name_for_log = format_skill_name_for_log
-    _resolve_legacy_log_adapter_mod.format_skill_display_from_command = format_skill_display_from_command
-    _resolve_legacy_log_adapter_mod._extract_damage_parts_from_legacy_lines = _extract_damage_parts_from_legacy_lines
-    _resolve_legacy_log_adapter_mod._is_dice_damage_source = _is_dice_damage_source
-    _resolve_legacy_log_adapter_mod._humanize_resolve_reason = _humanize_resolve_reason
-
-
-def _sync_resolve_match_runtime_deps():
-    _resolve_match_runtime_mod.logger = logger
-    _resolve_match_runtime_mod.all_skill_data = all_skill_data
-    _resolve_match_runtime_mod.get_room_state = get_room_state
-    _resolve_match_runtime_mod.calculate_skill_preview = calculate_skill_preview
-    _resolve_match_runtime_mod.process_skill_effects = process_skill_effects
-    _resolve_match_runtime_mod.get_status_value = get_status_value
-    _resolve_match_runtime_mod.compute_damage_multipliers = compute_damage_multipliers
-    _resolve_match_runtime_mod.build_power_result_snapshot = build_power_result_snapshot
-    _resolve_match_runtime_mod.roll_dice = roll_dice
-    _resolve_match_runtime_mod._update_char_stat = _update_char_stat
-    _resolve_match_runtime_mod._extract_rule_data_from_skill = _extract_rule_data_from_skill
-    _resolve_match_runtime_mod._skill_deals_damage = _skill_deals_damage
-    _resolve_match_runtime_mod._extract_skill_id_from_data = _extract_skill_id_from_data
-    _resolve_match_runtime_mod._extract_power_pair_from_match_log = _extract_power_pair_from_match_log
-    _resolve_match_runtime_mod._build_clash_power_snapshot = _build_clash_power_snapshot
-    _resolve_match_runtime_mod._estimate_cost_for_skill_from_snapshot = _estimate_cost_for_skill_from_snapshot
-    _resolve_match_runtime_mod._record_used_skill_for_actor = _record_used_skill_for_actor
-    _resolve_match_runtime_mod._snapshot_for_outcome = _snapshot_for_outcome
-    _resolve_match_runtime_mod._trigger_skill_timing_effects = _trigger_skill_timing_effects
-    _resolve_match_runtime_mod._apply_effect_changes_like_duel = _apply_effect_changes_like_duel
-    _resolve_match_runtime_mod._diff_snapshot = _diff_snapshot
-    _resolve_match_runtime_mod._append_multiplier_logs = _append_multiplier_logs
-    _resolve_match_runtime_mod.process_on_damage_buffs = process_on_damage_buffs
-    _resolve_match_runtime_mod.process_on_hit_buffs = process_on_hit_buffs
-    _resolve_match_runtime_mod._resolve_server_ts = _resolve_server_ts
-    _resolve_match_runtime_mod._safe_int = _safe_int
+# Names each resolve helper module reads from core. Rebinding only the entries
+# that differ keeps test monkeypatches on core visible without rewriting every
+# global on each helper call.
+_RESOLVE_DEP_NAMES = {
+    _resolve_trace_runtime_mod: (
+        'logger',
+        'socketio',
+        'all_skill_data',
+        'get_room_state',
+        'save_specific_room_state',
+        '_build_trace_compact_log_message',
+        '_extract_step_aux_log_lines',
+        '_trace_kind_label',
+        '_trace_outcome_label',
+        '_trace_actor_name',
+        '_trace_damage_total',
+        '_sanitize_power_snapshot',
+        '_sanitize_power_breakdown',
+        '_apply_step_end_timing_from_trace',
+    ),
+    _resolve_effect_runtime_mod: (
+        'logger',
+        'all_skill_data',
+        'socketio',
+        'get_room_state',
+        'broadcast_log',
+        '_update_char_stat',
+        'apply_summon_change',
+        'apply_grant_skill_change',
+        'consume_granted_skill_use',
+        'consume_bleed_maintenance_stack',
+        'process_skill_effects',
+        'apply_buff',
+        'remove_buff',
+        'get_status_value',
+        'set_status_value',
+        'DamageSource',
+        '_extract_skill_id_from_data',
+        '_collect_intrinsic_cancelled_single_slots',
+        '_safe_int',
+        'COST_CONSUME_POLICY',
+        'process_on_damage_buffs',
+    ),
+    _resolve_legacy_log_adapter_mod: (
+        'all_skill_data',
+        'format_skill_name_for_log',
+        'format_skill_display_from_command',
+        '_extract_damage_parts_from_legacy_lines',
+        '_is_dice_damage_source',
+        '_humanize_resolve_reason',
+    ),
+    _resolve_match_runtime_mod: (
+        'logger',
+        'all_skill_data',
+        'get_room_state',
+        'calculate_skill_preview',
+        'process_skill_effects',
+        'get_status_value',
+        'compute_damage_multipliers',
+        'build_power_result_snapshot',
+        'roll_dice',
+        '_update_char_stat',
+        '_extract_rule_data_from_skill',
+        '_skill_deals_damage',
+        '_extract_skill_id_from_data',
+        '_extract_power_pair_from_match_log',
+        '_build_clash_power_snapshot',
+        '_estimate_cost_for_skill_from_snapshot',
+        '_record_used_skill_for_actor',
+        '_snapshot_for_outcome',
+        '_trigger_skill_timing_effects',
+        '_apply_effect_changes_like_duel',
+        '_diff_snapshot',
+        '_append_multiplier_logs',
+        'process_on_damage_buffs',
+        'process_on_hit_buffs',
+        '_resolve_server_ts',
+        '_safe_int',
+    ),
+}
+
+
+def _sync_resolve_deps(module):
+    bindings = globals()
+    target = module.__dict__
+    for name in _RESOLVE_DEP_NAMES[module]:
+        value = bindings[name]
+        if target.get(name) is not value:
+            target[name] = value
 
 
 def _resolve_server_ts():
@@ -367,17 +379,17 @@ def _apply_self_destruct_if_needed(room, actor_char, skill_data):
 
 
 def _log_battle_emit(event_name, room_id, battle_id, payload):
-    _sync_resolve_trace_runtime_deps()
+    _sync_resolve_deps(_resolve_trace_runtime_mod)
     return _resolve_trace_runtime_mod._log_battle_emit(event_name, room_id, battle_id, payload)
 
 
 def _build_trace_popup_payload(trace_entry, room_state):
-    _sync_resolve_trace_runtime_deps()
+    _sync_resolve_deps(_resolve_trace_runtime_mod)
     return _resolve_trace_runtime_mod._build_trace_popup_payload(trace_entry, room_state)
 
 
 def _emit_battle_trace(room, battle_id, battle_state, trace_entry):
-    _sync_resolve_trace_runtime_deps()
+    _sync_resolve_deps(_resolve_trace_runtime_mod)
     return _resolve_trace_runtime_mod._emit_battle_trace(room, battle_id, battle_state, trace_entry)
 
 
@@ -395,7 +407,7 @@ def _append_trace(
     rolls=None,
     extra_fields=None
 ):
-    _sync_resolve_trace_runtime_deps()
+    _sync_resolve_deps(_resolve_trace_runtime_mod)
     return _resolve_trace_runtime_mod._append_trace(
         room,
         battle_id,
@@ -411,12 +423,12 @@ def _append_trace(
         extra_fields=extra_fields,
     )
 def _apply_cost(attacker, skill, policy, room=None):
-    _sync_resolve_effect_runtime_deps()
+    _sync_resolve_deps(_resolve_effect_runtime_mod)
     return _resolve_effect_runtime_mod._apply_cost(attacker, skill, policy, room=room)
 
 
 def _apply_damage(defender, amount, damage_type=None, room=None, damage_context=None):
-    _sync_resolve_effect_runtime_deps()
+    _sync_resolve_deps(_resolve_effect_runtime_mod)
     return _resolve_effect_runtime_mod._apply_damage(
         defender,
         amount,
@@ -427,17 +439,17 @@ def _apply_damage(defender, amount, damage_type=None, room=None, damage_context=
 
 
 def _apply_status(defender, status_payload):
-    _sync_resolve_effect_runtime_deps()
+    _sync_resolve_deps(_resolve_effect_runtime_mod)
     return _resolve_effect_runtime_mod._apply_status(defender, status_payload)
 
 
 def _record_used_skill_for_actor(actor, skill_id):
-    _sync_resolve_effect_runtime_deps()
+    _sync_resolve_deps(_resolve_effect_runtime_mod)
     return _resolve_effect_runtime_mod._record_used_skill_for_actor(actor, skill_id)
 
 
 def _apply_outcome_to_state(outcome, characters_by_id, room=None):
-    _sync_resolve_effect_runtime_deps()
+    _sync_resolve_deps(_resolve_effect_runtime_mod)
     return _resolve_effect_runtime_mod._apply_outcome_to_state(
         outcome,
         characters_by_id,
@@ -445,16 +457,6 @@ def _apply_outcome_to_state(outcome, characters_by_id, room=None):
     )
 
 
-def _snapshot_characters_for_timing(state):
-    _sync_resolve_effect_runtime_deps()
-    return _resolve_effect_runtime_mod._snapshot_characters_for_timing(state)
-
-
-def _diff_timing_snapshots(before_map, after_map, damage_source='timing_effect'):
-    _sync_resolve_effect_runtime_deps()
-    return _resolve_effect_runtime_mod._diff_timing_snapshots(before_map, after_map, damage_source=damage_source)
-
-
 def _run_skill_timing_effects(
     room,
     state,
@@ -465,7 +467,7 @@ def _run_skill_timing_effects(
     target_skill_data=None,
     base_damage=0
 ):
-    _sync_resolve_effect_runtime_deps()
+    _sync_resolve_deps(_resolve_effect_runtime_mod)
     return _resolve_effect_runtime_mod._run_skill_timing_effects(
         room,
         state,
@@ -490,7 +492,7 @@ def _trigger_skill_timing_effects(
     base_damage=0,
     emit_source='select_resolve_timing'
 ):
-    _sync_resolve_effect_runtime_deps()
+    _sync_resolve_deps(_resolve_effect_runtime_mod)
     return _resolve_effect_runtime_mod._trigger_skill_timing_effects(
         room,
         state,
@@ -513,7 +515,7 @@ def _apply_phase_timing_for_committed_intents(
     timing,
     intents_override=None
 ):
-    _sync_resolve_effect_runtime_deps()
+    _sync_resolve_deps(_resolve_effect_runtime_mod)
     return _resolve_effect_runtime_mod._apply_phase_timing_for_committed_intents(
         room,
         state,
@@ -525,12 +527,12 @@ def _apply_phase_timing_for_committed_intents(
 
 
 def _apply_step_end_timing_from_trace(room, battle_state, trace_entry):
-    _sync_resolve_effect_runtime_deps()
+    _sync_resolve_deps(_resolve_effect_runtime_mod)
     return _resolve_effect_runtime_mod._apply_step_end_timing_from_trace(room, battle_state, trace_entry)
 
 
 def _emit_char_stat_update(room, char_obj, stat_name, old_value, new_value, source='select_resolve'):
-    _sync_resolve_effect_runtime_deps()
+    _sync_resolve_deps(_resolve_effect_runtime_mod)
     return _resolve_effect_runtime_mod._emit_char_stat_update(
         room,
         char_obj,
@@ -542,7 +544,7 @@ def _emit_char_stat_update(room, char_obj, stat_name, old_value, new_value, sour
 
 
 def _emit_stat_updates_from_applied(room, applied, characters_by_id, source='select_resolve_delegate'):
-    _sync_resolve_effect_runtime_deps()
+    _sync_resolve_deps(_resolve_effect_runtime_mod)
     return _resolve_effect_runtime_mod._emit_stat_updates_from_applied(
         room,
         applied,
@@ -550,7 +552,7 @@ def _emit_stat_updates_from_applied(room, applied, characters_by_id, source='sel
         source=source,
     )
 def to_legacy_duel_log_input(outcome_payload, state, intents, attacker_slot, defender_slot, applied=None, kind='one_sided', outcome='no_effect', notes=None):
-    _sync_resolve_legacy_log_adapter_deps()
+    _sync_resolve_deps(_resolve_legacy_log_adapter_mod)
     return _resolve_legacy_log_adapter_mod.to_legacy_duel_log_input(
         outcome_payload,
         state,
@@ -563,12 +565,12 @@ def to_legacy_duel_log_input(outcome_payload, state, intents, attacker_slot, def
         notes=notes,
     )
 def _snapshot_for_outcome(actor):
-    _sync_resolve_effect_runtime_deps()
+    _sync_resolve_deps(_resolve_effect_runtime_mod)
     return _resolve_effect_runtime_mod._snapshot_for_outcome(actor)
 
 
 def _diff_snapshot(before, after, damage_source='ダメージ'):
-    _sync_resolve_effect_runtime_deps()
+    _sync_resolve_deps(_resolve_effect_runtime_mod)
     return _resolve_effect_runtime_mod._diff_snapshot(before, after, damage_source=damage_source)
 
 
@@ -583,7 +585,7 @@ def _apply_effect_changes_like_duel(
     reuse_requests=None,
     attacker_skill_data=None,
 ):
-    _sync_resolve_effect_runtime_deps()
+    _sync_resolve_deps(_resolve_effect_runtime_mod)
     return _resolve_effect_runtime_mod._apply_effect_changes_like_duel(
         room,
         state,
@@ -596,7 +598,7 @@ def _apply_effect_changes_like_duel(
         attacker_skill_data=attacker_skill_data,
     )
 def _resolve_one_sided_by_existing_logic(room, state, attacker_char, defender_char, attacker_skill_data, defender_skill_data):
-    _sync_resolve_match_runtime_deps()
+    _sync_resolve_deps(_resolve_match_runtime_mod)
     return _resolve_match_runtime_mod._resolve_one_sided_by_existing_logic(
         room,
         state,
@@ -615,7 +617,7 @@ def _resolve_clash_by_existing_logic(
     attacker_skill_data,
     defender_skill_data
 ):
-    _sync_resolve_match_runtime_deps()
+    _sync_resolve_deps(_resolve_match_runtime_mod)
     return _resolve_match_runtime_mod._resolve_clash_by_existing_logic(
         room,
         state,
@@ -634,7 +636,7 @@ def _resolve_hard_attack_followup(
     attacker_skill_data,
     defender_skill_data=None,
 ):
-    _sync_resolve_match_runtime_deps()
+    _sync_resolve_deps(_resolve_match_runtime_mod)
     return _resolve_match_runtime_mod._resolve_hard_attack_followup(
         room,
         state,
@@ -646,7 +648,7 @@ def _resolve_hard_attack_followup(
 
 
 def _roll_power_for_slot(battle_state, slot_id, intents_override=None):
-    _sync_resolve_match_runtime_deps()
+    _sync_resolve_deps(_resolve_match_runtime_mod)
     return _resolve_match_runtime_mod._roll_power_for_slot(
         battle_state,
         slot_id,
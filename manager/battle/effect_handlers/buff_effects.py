@@ -1,6 +1,8 @@
 # manager/battle/effect_handlers/buff_effects.py
 # バフ系 effect ハンドラ（計画書29 Phase 3 で game_logic.process_skill_effects から移設）。
 # ロジック・ログ文字列・changes_to_apply の形式は移設前と同一。
+import copy
+
 from manager.battle import skill_effect_helpers as helpers
 from manager.logs import setup_logger
 
@@ -153,7 +155,8 @@ def handle_apply_buff(effect, target_obj, sim_target, session):
         if isinstance(catalog_effect_data, dict):
             for k, v in catalog_effect_data.items():
                 if k not in effect_data:
-                    effect_data[k] = v
+                    # カタログの効果定義は共有物なので、キャラクターへ載せる分はコピーする
+                    effect_data[k] = copy.deepcopy(v)
                 elif k == "stat_mods" and isinstance(v, dict):
                     if "stat_mods" not in effect_data:
                         effect_data["stat_mods"] = {}
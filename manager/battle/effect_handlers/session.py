@@ -1,6 +1,32 @@
 # manager/battle/effect_handlers/session.py
 import copy
 
+# 効果処理がシミュレーション上で書き換えるフィールド。これ以外（コマンド・画像・所持品・
+# スキル一覧など）は実キャラクターと共有し、コピーしない。hp / mp などのスカラーは
+# 浅いコピーで独立する。
+SIMULATED_MUTABLE_KEYS = ('states', 'special_buffs', 'params', 'flags')
+
+
+def _copy_tree(value):
+    # キャラクターは JSON 由来の dict / list なので deepcopy の memo は要らない
+    if isinstance(value, dict):
+        return {key: _copy_tree(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_copy_tree(item) for item in value]
+    if isinstance(value, (set, bytearray)):
+        return copy.deepcopy(value)
+    return value
+
+
+def simulate_char(real_char):
+    """実キャラクターのシミュレーション用コピー（SIMULATED_MUTABLE_KEYS だけ深くコピーする）。"""
+    sim = dict(real_char)
+    for key in SIMULATED_MUTABLE_KEYS:
+        value = sim.get(key)
+        if isinstance(value, (dict, list)):
+            sim[key] = _copy_tree(value)
+    return sim
+
 
 class EffectSession:
     """process_skill_effects 1回分の共有状態。
@@ -24,16 +50,22 @@ class EffectSession:
         self.log_snippets = []
         self.changes_to_apply = []
         self.simulated_chars = {}
-        # Original hit target (before per-effect target remapping like target=self).
-        self.original_sim_target = None
         self.get_status_value = get_status_value_fn
         self.set_status_value = set_status_value_fn
 
+    @property
+    def original_sim_target(self):
+        """Original hit target (before per-effect target remapping like target=self).
+
+        効果が対象に触れるまでコピーを作らないよう、初回参照時に作る。
+        """
+        return self.get_simulated_char(self.target) if self.target else None
+
     def get_simulated_char(self, real_char):
         if not real_char: return None
         cid = real_char.get('id')
         if cid not in self.simulated_chars:
-            self.simulated_chars[cid] = copy.deepcopy(real_char)
+            self.simulated_chars[cid] = simulate_char(real_char)
         return self.simulated_chars[cid]
 
     def queue_fissure_round_buff(self, target_obj, sim_target, amount, rounds, source='skill'):
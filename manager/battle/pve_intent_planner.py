@@ -1,4 +1,3 @@
-import json
 import time
 import random
 
@@ -17,6 +16,7 @@ from manager.battle.enemy_behavior import (
     normalize_target_candidates,
 )
 from manager.character_tags import get_effective_tag_ids
+from manager.skill_catalog import compiled_skill, parsed_object
 
 
 logger = setup_logger(__name__)
@@ -106,15 +106,12 @@ def _extract_skill_rule_data(skill_data):
         if isinstance(raw, dict):
             return raw
         if isinstance(raw, str):
-            text = raw.strip()
-            if not text.startswith('{'):
-                continue
-            try:
-                parsed = json.loads(text)
-                if isinstance(parsed, dict):
-                    return parsed
-            except Exception:
+            if not raw.strip().startswith('{'):
                 continue
+            # カタログのパース結果を共有する（読むだけ）
+            parsed = parsed_object(raw)
+            if parsed is not None:
+                return parsed
     return {}
 
 def _extract_skill_tags(skill_id):
@@ -141,72 +138,15 @@ def _extract_skill_tags(skill_id):
             normalized.append(text)
     return normalized
 
-def _coerce_mass_type(raw_value):
-    text = str(raw_value or '').strip().lower()
-    if not text:
-        return None
-    if text in ['mass_summation', 'summation', 'sum']:
-        return 'mass_summation'
-    if text in ['mass_individual', 'individual']:
-        return 'mass_individual'
-    return None
-
-def _infer_mass_type_from_text(text):
-    merged = str(text or '').lower()
-    if not merged:
-        return None
-    if (
-        'mass_summation' in merged
-        or 'summation' in merged
-        or 'sum' in merged
-        or '広域-合算' in merged
-        or '合算' in merged
-    ):
-        return 'mass_summation'
-    if (
-        'mass_individual' in merged
-        or 'individual' in merged
-        or '広域-個別' in merged
-        or '個別' in merged
-        or '広域' in merged
-    ):
-        return 'mass_individual'
-    return None
-
-def _infer_mass_type_from_skill(skill_id):
+def _compiled_skill(skill_id):
     if not skill_id:
         return None
-    skill_data = all_skill_data.get(skill_id, {})
-    if not isinstance(skill_data, dict):
-        return None
+    return compiled_skill(all_skill_data.get(skill_id))
 
-    rule_data = _extract_skill_rule_data(skill_data)
-    direct_candidates = [
-        skill_data.get('mass_type'),
-        skill_data.get('target_type'),
-        skill_data.get('targeting'),
-        skill_data.get('targetType'),
-        rule_data.get('mass_type') if isinstance(rule_data, dict) else None,
-        rule_data.get('target_type') if isinstance(rule_data, dict) else None,
-        rule_data.get('targeting') if isinstance(rule_data, dict) else None,
-        rule_data.get('targetType') if isinstance(rule_data, dict) else None,
-    ]
-    for raw in direct_candidates:
-        coerced = _coerce_mass_type(raw)
-        if coerced:
-            return coerced
-
-    merged_parts = _extract_skill_tags(skill_id)
-    for key in [
-        'category', 'attribute', 'distance', 'target_scope', 'target', 'target_type', 'targeting', 'mass_type',
-        '分類', '距離', 'カテゴリ',
-    ]:
-        if isinstance(skill_data.get(key), str):
-            merged_parts.append(skill_data.get(key))
-        if isinstance(rule_data, dict) and isinstance(rule_data.get(key), str):
-            merged_parts.append(rule_data.get(key))
-
-    return _infer_mass_type_from_text(' '.join(str(v or '') for v in merged_parts))
+def _infer_mass_type_from_skill(skill_id):
+    # 広域種別・対象範囲は宣言時と同じくスキルカタログのコンパイル結果を読む
+    record = _compiled_skill(skill_id)
+    return record.mass_type if record is not None else None
 
 def _normalize_target_scope(raw_value, default='enemy'):
     text = str(raw_value or '').strip().lower()
@@ -228,38 +168,8 @@ def _normalize_target_scope(raw_value, default='enemy'):
     return str(default or 'enemy')
 
 def _infer_target_scope_from_skill(skill_id):
-    if not skill_id:
-        return 'enemy'
-    skill_data = all_skill_data.get(skill_id, {})
-    if not isinstance(skill_data, dict):
-        return 'enemy'
-    rule_data = _extract_skill_rule_data(skill_data)
-    candidates = [
-        skill_data.get('target_scope'),
-        skill_data.get('targetScope'),
-        skill_data.get('target_team'),
-        skill_data.get('targetTeam'),
-        rule_data.get('target_scope') if isinstance(rule_data, dict) else None,
-        rule_data.get('targetScope') if isinstance(rule_data, dict) else None,
-        rule_data.get('target_team') if isinstance(rule_data, dict) else None,
-        rule_data.get('targetTeam') if isinstance(rule_data, dict) else None,
-    ]
-    for raw in candidates:
-        if raw not in [None, '']:
-            return _normalize_target_scope(raw, default='enemy')
-
-    normalized_tags = set(_extract_skill_tags(skill_id))
-    if any(tag in normalized_tags for tag in ['any_target', 'target_any', '任意対象', '対象自由']):
-        return 'any'
-    if any(tag in normalized_tags for tag in ['self_target', 'target_self', '自分対象', '自身対象', '自己対象']):
-        return 'self'
-    if any(tag in normalized_tags for tag in ['ally_target', 'target_ally', '味方対象', '味方指定', '同陣営']):
-        return 'ally'
-    if any(tag in normalized_tags for tag in ['同陣営対象', '同陣営指定']):
-        return 'ally'
-    if any(tag in normalized_tags for tag in ['enemy_target', 'target_enemy', '敵対象', '相手陣営対象', '相手陣営指定']):
-        return 'enemy'
-    return 'enemy'
+    record = _compiled_skill(skill_id)
+    return record.target_scope if record is not None else 'enemy'
 
 def _default_intent_tags(existing=None):
     tags = dict(existing or {})
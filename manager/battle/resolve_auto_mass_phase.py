@@ -1,21 +1,29 @@
+from extensions import all_skill_data
 from manager.constants import DamageSource, THORNS_DAMAGE_CATS
+from manager.game_logic import get_status_value
+from manager.utils import clear_newly_applied_flags
 from manager.battle.damage_context import build_damage_context
-from manager.battle.skill_rules import _resolve_skill_category
+from manager.battle.duel_log_utils import _resolve_actor_name, _resolve_skill_name, format_duel_result_lines
+from manager.battle.fp_summary import (
+    _ensure_clash_winner_fp_gain,
+    _sanitize_forced_no_match_clash_summary,
+    _should_grant_clash_win_fp,
+)
+from manager.battle.resolve_context import ResolveRuntime
+from manager.battle.resolve_queue_helpers import (
+    _build_resolve_queues,
+    _compare_outcome,
+    _consume_resolve_slot,
+    _gather_slots_targeting_slot_s,
+    resolve_random_intents,
+)
+from manager.battle.skill_rules import _get_forced_clash_no_effect_reason, _resolve_skill_category
+from manager.battle.timeline_helpers import _is_actor_placed
 from manager.room_manager import _handle_character_death_transition
 
 
-def _sync_from_core():
-    from manager.battle import core as core_mod
-    g = globals()
-    # Pull symbols from core at runtime to preserve test monkeypatch behavior.
-    for name, value in core_mod.__dict__.items():
-        if name.startswith("__"):
-            continue
-        g[name] = value
-
-
-def run_mass_phase(room, battle_id, state, battle_state, resolve_intents, characters_by_id):
-    _sync_from_core()
+def run_mass_phase(room, battle_id, state, battle_state, resolve_intents, characters_by_id, runtime=None):
+    rt = runtime or ResolveRuntime.from_core()
     from manager.battle.common_manager import build_select_resolve_state_payload
 
     if battle_state.get('phase') == 'resolve_mass':
@@ -40,7 +48,7 @@ def run_mass_phase(room, battle_id, state, battle_state, resolve_intents, charac
                 return
             if int(old_hp) == int(new_hp):
                 return
-            socketio.emit('char_stat_updated', {
+            rt.socketio.emit('char_stat_updated', {
                 'room': room,
                 'char_id': char_obj.get('id'),
                 'stat': 'HP',
@@ -110,7 +118,7 @@ def run_mass_phase(room, battle_id, state, battle_state, resolve_intents, charac
         def _trigger_mass_summation_timing(timing, actor_char, target_char, skill_data, target_skill_data=None, base_damage=0):
             if not isinstance(actor_char, dict) or not isinstance(skill_data, dict):
                 return
-            _trigger_skill_timing_effects(
+            rt._trigger_skill_timing_effects(
                 room=room,
                 state=state,
                 characters_by_id=characters_by_id,
@@ -133,7 +141,7 @@ def run_mass_phase(room, battle_id, state, battle_state, resolve_intents, charac
             category = _resolve_skill_category(skill_data)
             if category in THORNS_DAMAGE_CATS:
                 current_hp = int(actor_char.get('hp', 0) or 0)
-                _update_char_stat(
+                rt._update_char_stat(
                     room,
                     actor_char,
                     "HP",
@@ -149,9 +157,9 @@ def run_mass_phase(room, battle_id, state, battle_state, resolve_intents, charac
 
             entangle_val = int(get_status_value(actor_char, "荊棘重絡") or 0)
             if entangle_val > 0:
-                _update_char_stat(room, actor_char, "荊棘重絡", entangle_val - 1, username="[荊棘重絡消費]")
+                rt._update_char_stat(room, actor_char, "荊棘重絡", entangle_val - 1, username="[荊棘重絡消費]")
             else:
-                _update_char_stat(room, actor_char, "荊棘", 0, username="[荊棘消滅]")
+                rt._update_char_stat(room, actor_char, "荊棘", 0, username="[荊棘消滅]")
 
         # Resolve every mass slot first, then hand over to single-phase resolution.
         for slot_id in battle_state['resolve'].get('mass_queue', []):
@@ -167,7 +175,7 @@ def run_mass_phase(room, battle_id, state, battle_state, resolve_intents, charac
             attacker_char = characters_by_id.get(attacker_actor_id)
 
             if not attacker_actor_id or not attacker_char or not _is_actor_placed(state, attacker_actor_id):
-                _append_trace(
+                rt._append_trace(
                     room,
                     battle_id,
                     battle_state,
@@ -180,12 +188,12 @@ def run_mass_phase(room, battle_id, state, battle_state, resolve_intents, charac
                 continue
 
             # Mass attacker skill is resolved in this phase and should count for END_ROUND effects.
-            _record_used_skill_for_actor(attacker_char, attacker_skill_id)
+            rt._record_used_skill_for_actor(attacker_char, attacker_skill_id)
 
             def _emit_mass_one_sided(defender_actor_id, defender_slot=None, trace_kind='mass_individual', trace_notes=None):
                 defender_char = characters_by_id.get(defender_actor_id)
                 if not isinstance(defender_char, dict):
-                    _append_trace(
+                    rt._append_trace(
                         room,
                         battle_id,
                         battle_state,
@@ -202,7 +210,7 @@ def run_mass_phase(room, battle_id, state, battle_state, resolve_intents, charac
                 defender_skill_id = defender_intent.get('skill_id')
                 defender_skill_data = all_skill_data.get(defender_skill_id, {}) if defender_skill_id else None
 
-                delegated = _resolve_one_sided_by_existing_logic(
+                delegated = rt._resolve_one_sided_by_existing_logic(
                     room=room,
                     state=state,
                     attacker_char=attacker_char,
@@ -219,14 +227,14 @@ def run_mass_phase(room, battle_id, state, battle_state, resolve_intents, charac
                     'skill_id': attacker_skill_id,
                     'skill': attacker_skill_data,
                     'apply_cost': False,
-                    'cost_policy': COST_CONSUME_POLICY,
+                    'cost_policy': rt.COST_CONSUME_POLICY,
                     'delegate_applied': delegate_ok,
                     'delegate_summary': delegate_summary if delegate_ok else {}
                 }
-                applied = _apply_outcome_to_state(outcome_payload, characters_by_id)
+                applied = rt._apply_outcome_to_state(outcome_payload, characters_by_id)
 
                 one_sided_notes = None if delegate_ok else (delegated.get('reason') if isinstance(delegated, dict) else 'delegate_failed')
-                legacy_input = to_legacy_duel_log_input(
+                legacy_input = rt.to_legacy_duel_log_input(
                     outcome_payload=outcome_payload,
                     state=state,
                     intents=intents,
@@ -248,14 +256,14 @@ def run_mass_phase(room, battle_id, state, battle_state, resolve_intents, charac
                     damage_report=legacy_input['damage_report'],
                     extra_lines=legacy_input.get('extra_lines')
                 )
-                _log_match_result(log_lines)
+                rt._log_match_result(log_lines)
 
                 outcome_payload['log_lines'] = log_lines
                 outcome_payload['lines'] = log_lines
                 applied['log_lines'] = log_lines
                 applied['lines'] = log_lines
 
-                _append_trace(
+                rt._append_trace(
                     room,
                     battle_id,
                     battle_state,
@@ -291,7 +299,7 @@ def run_mass_phase(room, battle_id, state, battle_state, resolve_intents, charac
                     intents_override=intents
                 )
 
-                attacker_power = _roll_power_for_slot(battle_state, slot_id)
+                attacker_power = rt._roll_power_for_slot(battle_state, slot_id)
                 defender_powers = {}
                 participant_entries = []
                 for p_slot in participant_slots:
@@ -299,8 +307,8 @@ def run_mass_phase(room, battle_id, state, battle_state, resolve_intents, charac
                     participant_char = characters_by_id.get(participant_actor_id)
                     participant_skill_id = (intents.get(p_slot, {}) or {}).get('skill_id')
                     participant_skill_data = all_skill_data.get(participant_skill_id, {}) if participant_skill_id else {}
-                    _record_used_skill_for_actor(participant_char, participant_skill_id)
-                    defender_powers[p_slot] = _roll_power_for_slot(battle_state, p_slot)
+                    rt._record_used_skill_for_actor(participant_char, participant_skill_id)
+                    defender_powers[p_slot] = rt._roll_power_for_slot(battle_state, p_slot)
                     if isinstance(participant_char, dict):
                         participant_entries.append({
                             'slot_id': p_slot,
@@ -319,7 +327,7 @@ def run_mass_phase(room, battle_id, state, battle_state, resolve_intents, charac
                 primary_participant = participant_entries[0] if participant_entries else None
                 primary_participant_char = primary_participant.get('char') if isinstance(primary_participant, dict) else None
                 primary_participant_skill = primary_participant.get('skill_data') if isinstance(primary_participant, dict) else None
-                logger.info(
+                rt.logger.info(
                     "[resolve_mass] type=広域-合算 slot=%s 参加人数=%d attacker_power=%s defender_sum=%s outcome=%s 総和差分=%s",
                     slot_id, len(participant_slots), attacker_power, defender_sum, outcome, delta
                 )
@@ -435,7 +443,7 @@ def run_mass_phase(room, battle_id, state, battle_state, resolve_intents, charac
                 if outcome == 'attacker_win':
                     for evt in damage_events:
                         target_for_timing = characters_by_id.get(evt.get('target_id'))
-                        _trigger_skill_timing_effects(
+                        rt._trigger_skill_timing_effects(
                             room=room,
                             state=state,
                             characters_by_id=characters_by_id,
@@ -450,7 +458,7 @@ def run_mass_phase(room, battle_id, state, battle_state, resolve_intents, charac
                 elif outcome == 'defender_win':
                     actual_damage = int((damage_events[0] if damage_events else {}).get('hp') or 0)
                     for entry in participant_entries:
-                        _trigger_skill_timing_effects(
+                        rt._trigger_skill_timing_effects(
                             room=room,
                             state=state,
                             characters_by_id=characters_by_id,
@@ -489,9 +497,9 @@ def run_mass_phase(room, battle_id, state, battle_state, resolve_intents, charac
                             f"<strong>{target_name}</strong> に <strong>{dmg_val}</strong> ダメージ"
                             f"<br><span style='font-size:0.9em; color:#888;'>内訳: [合計ダメージ {dmg_val}]</span>"
                         )
-                _log_match_result(summary_lines)
+                rt._log_match_result(summary_lines)
 
-                _append_trace(
+                rt._append_trace(
                     room,
                     battle_id,
                     battle_state,
@@ -537,7 +545,7 @@ def run_mass_phase(room, battle_id, state, battle_state, resolve_intents, charac
                     if defender_slot and defender_skill_id:
                         defender_char = characters_by_id.get(defender_actor_id)
                         defender_skill_data = all_skill_data.get(defender_skill_id, {}) if defender_skill_id else None
-                        clash_delegated = _resolve_clash_by_existing_logic(
+                        clash_delegated = rt._resolve_clash_by_existing_logic(
                             room=room,
                             state=state,
                             attacker_char=attacker_char,
@@ -582,19 +590,19 @@ def run_mass_phase(room, battle_id, state, battle_state, resolve_intents, charac
                             'skill_id': attacker_skill_id,
                             'skill': attacker_skill_data,
                             'apply_cost': False,
-                            'cost_policy': COST_CONSUME_POLICY,
+                            'cost_policy': rt.COST_CONSUME_POLICY,
                             'delegate_applied': clash_ok,
                             'delegate_summary': clash_summary if clash_ok else {}
                         }
-                        clash_applied = _apply_outcome_to_state(clash_payload, characters_by_id)
+                        clash_applied = rt._apply_outcome_to_state(clash_payload, characters_by_id)
                         if clash_ok:
-                            _emit_stat_updates_from_applied(
+                            rt._emit_stat_updates_from_applied(
                                 room,
                                 clash_applied,
                                 characters_by_id,
                                 source='resolve_mass_clash'
                             )
-                        legacy_input = to_legacy_duel_log_input(
+                        legacy_input = rt.to_legacy_duel_log_input(
                             outcome_payload=clash_payload,
                             state=state,
                             intents=intents,
@@ -616,8 +624,8 @@ def run_mass_phase(room, battle_id, state, battle_state, resolve_intents, charac
                             damage_report=legacy_input['damage_report'],
                             extra_lines=legacy_input.get('extra_lines')
                         )
-                        _log_match_result(log_lines)
-                        _append_trace(
+                        rt._log_match_result(log_lines)
+                        rt._append_trace(
                             room,
                             battle_id,
                             battle_state,
@@ -661,9 +669,9 @@ def run_mass_phase(room, battle_id, state, battle_state, resolve_intents, charac
             'from': 'resolve_mass',
             'to': 'resolve_single'
         }
-        _log_battle_emit('battle_phase_changed', room, battle_id, phase_payload)
-        socketio.emit('battle_phase_changed', phase_payload, to=room)
+        rt._log_battle_emit('battle_phase_changed', room, battle_id, phase_payload)
+        rt.socketio.emit('battle_phase_changed', phase_payload, to=room)
         payload = build_select_resolve_state_payload(room, battle_id=battle_id)
         if payload:
-            _log_battle_emit('battle_state_updated', room, battle_id, payload)
-            socketio.emit('battle_state_updated', payload, to=room)
+            rt._log_battle_emit('battle_state_updated', room, battle_id, payload)
+            rt.socketio.emit('battle_state_updated', payload, to=room)
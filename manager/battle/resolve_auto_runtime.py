@@ -3,19 +3,14 @@ import time
 
 import manager.battle.resolve_auto_mass_phase as _resolve_auto_mass_phase_mod
 import manager.battle.resolve_auto_single_phase as _resolve_auto_single_phase_mod
-
-
-def _sync_from_core():
-    from manager.battle import core as core_mod
-    g = globals()
-    # Keep this runtime module behavior-identical to core by mirroring
-    # current function bindings (including test monkeypatch targets).
-    for name, value in core_mod.__dict__.items():
-        if name in {"run_select_resolve_auto", "_sync_from_core"}:
-            continue
-        if name.startswith("__"):
-            continue
-        g[name] = value
+from manager.battle.resolve_context import ResolveRuntime
+from manager.battle.resolve_queue_helpers import (
+    _build_resolve_queues,
+    _estimate_mass_trace_steps,
+    _estimate_single_trace_steps,
+    resolve_random_intents,
+)
+from manager.battle.resolve_trace_runtime import _safe_int, trace_step_count
 
 
 def _bo_canonical_side(raw):
@@ -141,9 +136,11 @@ def _auto_reset_battle_only_field(room):
         return False
 
 
-def run_select_resolve_auto(room, battle_id):
-    _sync_from_core()
-    state = get_room_state(room)
+def run_select_resolve_auto(room, battle_id, runtime=None):
+    # Dependencies are captured once per resolve and handed to each phase,
+    # so concurrent resolves never share or rewrite module globals.
+    rt = runtime or ResolveRuntime.from_core()
+    state = rt.get_room_state(room)
     if not state:
         return
 
@@ -174,7 +171,7 @@ def run_select_resolve_auto(room, battle_id):
     mass_steps_est = _estimate_mass_trace_steps(state, battle_state, resolve_intents)
     single_steps_est = _estimate_single_trace_steps(state, battle_state, resolve_intents)
     step_total_est = int(max(0, mass_steps_est + single_steps_est))
-    trace_len = len(resolve_ctx.get('trace', []) or [])
+    trace_len = trace_step_count(resolve_ctx.get('trace', []) or [])
     existing_total = _safe_int(resolve_ctx.get('step_total'), 0)
     # If trace is freshly reset, stale step_total from a previous round must not survive.
     if trace_len <= 0:
@@ -186,7 +183,7 @@ def run_select_resolve_auto(room, battle_id):
         'total': int(resolve_ctx['step_total']),
     }
     try:
-        _apply_phase_timing_for_committed_intents(
+        rt._apply_phase_timing_for_committed_intents(
             room=room,
             state=state,
             battle_state=battle_state,
@@ -195,7 +192,7 @@ def run_select_resolve_auto(room, battle_id):
             intents_override=resolve_intents
         )
     except Exception as e:
-        logger.warning("[timing_effect] RESOLVE_START failed room=%s battle=%s error=%s", room, battle_id, e)
+        rt.logger.warning("[timing_effect] RESOLVE_START failed room=%s battle=%s error=%s", room, battle_id, e)
 
     # Phase handlers are split to keep responsibilities clear while
     # preserving the original call order and side effects.
@@ -206,6 +203,7 @@ def run_select_resolve_auto(room, battle_id):
         battle_state=battle_state,
         resolve_intents=resolve_intents,
         characters_by_id=characters_by_id,
+        runtime=rt,
     )
     _resolve_auto_single_phase_mod.run_single_phase(
         room=room,
@@ -214,13 +212,14 @@ def run_select_resolve_auto(room, battle_id):
         battle_state=battle_state,
         resolve_intents=resolve_intents,
         characters_by_id=characters_by_id,
+        runtime=rt,
     )
     battle_state.pop('__room_state_ref__', None)
     battle_state.pop('__room_name', None)
     battle_state.pop('__resolve_intents_override', None)
 
     bo_result = _maybe_finalize_battle_only_result(room, state)
-    save_specific_room_state(room)
+    rt.save_specific_room_state(room)
 
     if isinstance(bo_result, dict):
         result = str(bo_result.get('result') or 'unknown')
@@ -230,11 +229,11 @@ def run_select_resolve_auto(room, battle_id):
             'draw': 'draw',
         }.get(result, result)
         try:
-            broadcast_log(room, f"[BattleOnly] Auto result: {result_label} (annihilation)", 'info')
+            rt.broadcast_log(room, f"[BattleOnly] Auto result: {result_label} (annihilation)", 'info')
         except Exception:
             pass
         try:
-            socketio.emit(
+            rt.socketio.emit(
                 'bo_record_updated',
                 {
                     'record_id': bo_result.get('record_id'),
@@ -246,7 +245,7 @@ def run_select_resolve_auto(room, battle_id):
         except Exception:
             pass
         try:
-            socketio.emit(
+            rt.socketio.emit(
                 'bo_battle_finished',
                 {
                     'result': result,
@@ -257,10 +256,10 @@ def run_select_resolve_auto(room, battle_id):
         except Exception:
             pass
         try:
-            broadcast_log(room, "[BattleOnly] 勝敗確定。解決表示完了後に自動リセットします。", 'info')
+            rt.broadcast_log(room, "[BattleOnly] 勝敗確定。解決表示完了後に自動リセットします。", 'info')
         except Exception:
             pass
         try:
-            broadcast_state_update(room)
+            rt.broadcast_state_update(room)
         except Exception:
             pass
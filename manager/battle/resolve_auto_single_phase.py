@@ -1,13 +1,34 @@
-def _sync_from_core():
-    from manager.battle import core as core_mod
-    g = globals()
-    # Mirror symbols from core so monkeypatches in tests remain effective.
-    for name, value in core_mod.__dict__.items():
-        if name.startswith("__"):
-            continue
-        g[name] = value
-
-
+import manager.utils as _utils_mod
+from extensions import all_skill_data
+from manager.game_logic import get_status_value
+from manager.utils import clear_newly_applied_flags
+from manager.battle.duel_log_utils import (
+    _extract_skill_id_from_data,
+    _resolve_actor_name,
+    _resolve_skill_name,
+    format_duel_result_lines,
+)
+from manager.battle.fp_summary import _ensure_clash_winner_fp_gain, _should_grant_clash_win_fp
+from manager.battle.resolve_context import ResolveRuntime
+from manager.battle.resolve_queue_helpers import _compute_single_contention
+from manager.battle.resolve_trace_runtime import _resolve_server_ts, _safe_int
+from manager.battle.runtime_actions import proceed_next_turn
+from manager.battle.skill_rules import (
+    _extract_rule_data_from_skill,
+    _get_inherent_skill_cancel_reason,
+    _is_feint_skill,
+    _is_hard_skill,
+    _is_non_clashable_ally_support_pair,
+    _is_normal_skill,
+    _is_same_team_slot_pair,
+    _resolve_skill_role,
+)
+from manager.battle.timeline_helpers import (
+    _consume_legacy_timeline_entries_for_slots,
+    _is_actor_placed,
+    _snapshot_legacy_timeline_state,
+    _sync_legacy_has_acted_flags_from_timeline,
+)
 from manager.battle.system_skills import (
     consume_auto_defense_charge,
     get_system_skill,
@@ -17,8 +38,8 @@ from manager.battle.system_skills import (
 )
 
 
-def run_single_phase(room, battle_id, state, battle_state, resolve_intents, characters_by_id):
-    _sync_from_core()
+def run_single_phase(room, battle_id, state, battle_state, resolve_intents, characters_by_id, runtime=None):
+    rt = runtime or ResolveRuntime.from_core()
     from manager.battle.common_manager import (
         build_select_resolve_state_payload,
         select_evade_insert_slot,
@@ -39,7 +60,7 @@ def run_single_phase(room, battle_id, state, battle_state, resolve_intents, char
         contested_losers = set(contention.get('contested_losers', set()) or set())
 
         if contested_losers:
-            logger.info(
+            rt.logger.info(
                 "[resolve_single_contention] losers=%s winners=%s",
                 sorted(contested_losers),
                 contention_winner_by_target
@@ -89,7 +110,7 @@ def run_single_phase(room, battle_id, state, battle_state, resolve_intents, char
             if len(queue_pairs) < 8:
                 queue_pairs.append(f"{q_slot_id}->{q_target_slot or 'none'}")
 
-        logger.info(
+        rt.logger.info(
             "[resolve_single_queue] total=%d clash=%d one_sided=%d fizzle=%d pairs=%s",
             len(single_queue),
             queue_kind_counts.get('clash', 0),
@@ -103,7 +124,7 @@ def run_single_phase(room, battle_id, state, battle_state, resolve_intents, char
                 return
             if slot_key in processed_slots:
                 if cancelled_without_use:
-                    _mark_slot_cancelled_without_use(battle_state, slot_key)
+                    rt._mark_slot_cancelled_without_use(battle_state, slot_key)
                 return
             processed_slots.add(slot_key)
             slot_data = slots.get(slot_key)
@@ -117,7 +138,7 @@ def run_single_phase(room, battle_id, state, battle_state, resolve_intents, char
                 resolved_slots.append(slot_key)
                 battle_state['resolve']['resolved_slots'] = resolved_slots
             if cancelled_without_use:
-                _mark_slot_cancelled_without_use(battle_state, slot_key)
+                rt._mark_slot_cancelled_without_use(battle_state, slot_key)
 
         def _actor_name_from_slot(slot_key):
             actor_id = slots.get(slot_key, {}).get('actor_id') if slot_key else None
@@ -257,7 +278,7 @@ def run_single_phase(room, battle_id, state, battle_state, resolve_intents, char
                 return {'enabled': False, 'max_reuses': 0, 'consume_cost': consume_cost, 'reuse_cost': reuse_cost, 'stack_reuse_cost': stack_reuse_cost}
             return {
                 'enabled': True,
-                'max_reuses': min(int(max_reuses), int(MAX_USE_SKILL_AGAIN_CHAIN_HARD_CAP)),
+                'max_reuses': min(int(max_reuses), int(rt.MAX_USE_SKILL_AGAIN_CHAIN_HARD_CAP)),
                 'consume_cost': bool(consume_cost),
                 'reuse_cost': reuse_cost,
                 'stack_reuse_cost': stack_reuse_cost,
@@ -318,7 +339,7 @@ def run_single_phase(room, battle_id, state, battle_state, resolve_intents, char
             current_depth = _safe_int(intent_obj.get('reuse_depth', 0), 0)
             existing_limit = _safe_int(intent_obj.get('reuse_chain_limit', 0), 0)
             chain_limit = min(
-                int(MAX_USE_SKILL_AGAIN_CHAIN_HARD_CAP),
+                int(rt.MAX_USE_SKILL_AGAIN_CHAIN_HARD_CAP),
                 max(int(max_reuses), int(existing_limit))
             )
             next_depth = current_depth + 1
@@ -362,7 +383,7 @@ def run_single_phase(room, battle_id, state, battle_state, resolve_intents, char
                         affordable = False
                         break
                 if not affordable:
-                    logger.info(
+                    rt.logger.info(
                         "[reuse_schedule_skip] slot=%s actor=%s reason=insufficient_reuse_cost required=%s",
                         current_slot_id,
                         actor_id,
@@ -373,7 +394,7 @@ def run_single_phase(room, battle_id, state, battle_state, resolve_intents, char
                     c_type = str(c.get('type'))
                     spend = _safe_int(c.get('value', 0), 0)
                     current_val = _safe_int(get_status_value(actor, c_type), 0)
-                    _update_char_stat(
+                    rt._update_char_stat(
                         room,
                         actor,
                         c_type,
@@ -386,7 +407,7 @@ def run_single_phase(room, battle_id, state, battle_state, resolve_intents, char
                 actor_id = intent_obj.get('actor_id') or base_slot.get('actor_id')
                 actor = characters_by_id.get(actor_id) if actor_id else None
                 if not _consume_stack_reuse_cost(actor, stack_reuse_cost):
-                    logger.info(
+                    rt.logger.info(
                         "[reuse_schedule_skip] slot=%s actor=%s reason=insufficient_stack_reuse_cost required=%s",
                         current_slot_id,
                         actor_id,
@@ -449,7 +470,7 @@ def run_single_phase(room, battle_id, state, battle_state, resolve_intents, char
                 'skill_id': skill_id_local,
                 'delegate_summary': {'rolls': {}, 'logs': []}
             }
-            legacy_input = to_legacy_duel_log_input(
+            legacy_input = rt.to_legacy_duel_log_input(
                 outcome_payload=outcome_payload,
                 state=state,
                 intents=intents,
@@ -471,8 +492,8 @@ def run_single_phase(room, battle_id, state, battle_state, resolve_intents, char
                 damage_report=legacy_input['damage_report'],
                 extra_lines=legacy_input.get('extra_lines')
             )
-            _log_match_result(log_lines)
-            _append_trace(
+            rt._log_match_result(log_lines)
+            rt._append_trace(
                 room, battle_id, battle_state, 'fizzle', attacker_slot,
                 target_actor_id=target_actor_id,
                 outcome='no_effect',
@@ -496,7 +517,7 @@ def run_single_phase(room, battle_id, state, battle_state, resolve_intents, char
                 'skill_id': skill_id_local,
                 'delegate_summary': {'rolls': {}, 'logs': []}
             }
-            legacy_input = to_legacy_duel_log_input(
+            legacy_input = rt.to_legacy_duel_log_input(
                 outcome_payload=outcome_payload,
                 state=state,
                 intents=intents,
@@ -519,8 +540,8 @@ def run_single_phase(room, battle_id, state, battle_state, resolve_intents, char
                 damage_report=legacy_input['damage_report'],
                 extra_lines=legacy_input.get('extra_lines')
             )
-            _log_match_result(log_lines)
-            _append_trace(
+            rt._log_match_result(log_lines)
+            rt._append_trace(
                 room,
                 battle_id,
                 battle_state,
@@ -550,7 +571,7 @@ def run_single_phase(room, battle_id, state, battle_state, resolve_intents, char
             slot_id = single_queue_runtime[queue_index]
             clear_newly_applied_flags(state)
             if slot_id in processed_slots:
-                logger.debug("[resolve_single] skip slot=%s reason=processed", slot_id)
+                rt.logger.debug("[resolve_single] skip slot=%s reason=processed", slot_id)
                 queue_index += 1
                 continue
 
@@ -631,11 +652,11 @@ def run_single_phase(room, battle_id, state, battle_state, resolve_intents, char
                     state, battle_state, target_actor_id, slot_id
                 )
                 if evade_slot:
-                    logger.info(
+                    rt.logger.info(
                         "[evade_insert] attacker_slot=%s defender_actor=%s defender_slot=%s reason=%s",
                         slot_id, target_actor_id, evade_slot, evade_reason
                     )
-                    _append_trace(
+                    rt._append_trace(
                         room,
                         battle_id,
                         battle_state,
@@ -669,7 +690,7 @@ def run_single_phase(room, battle_id, state, battle_state, resolve_intents, char
                     queue_index += 1
                     continue
 
-                clash_delegated = _resolve_clash_by_existing_logic(
+                clash_delegated = rt._resolve_clash_by_existing_logic(
                     room=room,
                     state=state,
                     attacker_char=attacker_char,
@@ -765,7 +786,7 @@ def run_single_phase(room, battle_id, state, battle_state, resolve_intents, char
                             'battle_state': state.get('battle_state'),
                             'room_state': state
                         }
-                        _tmp_dmg, _tmp_logs, winner_changes = process_skill_effects(
+                        _tmp_dmg, _tmp_logs, winner_changes = rt.process_skill_effects(
                             winner_effects,
                             "HIT",
                             winner_char,
@@ -782,7 +803,7 @@ def run_single_phase(room, battle_id, state, battle_state, resolve_intents, char
                     else:
                         clash_notes = hard_followup_block_reason
                 if hard_followup_block_log:
-                    broadcast_log(room, hard_followup_block_log, 'info')
+                    rt.broadcast_log(room, hard_followup_block_log, 'info')
 
                 clash_outcome_payload = {
                     'attacker_id': attacker_actor_id,
@@ -790,13 +811,13 @@ def run_single_phase(room, battle_id, state, battle_state, resolve_intents, char
                     'skill_id': skill_id,
                     'skill': skill_data,
                     'apply_cost': False,  # clash cost is handled by delegated existing duel logic
-                    'cost_policy': COST_CONSUME_POLICY,
+                    'cost_policy': rt.COST_CONSUME_POLICY,
                     'delegate_applied': clash_ok,
                     'delegate_summary': clash_summary if clash_ok else {}
                 }
-                clash_applied = _apply_outcome_to_state(clash_outcome_payload, characters_by_id, room=room)
+                clash_applied = rt._apply_outcome_to_state(clash_outcome_payload, characters_by_id, room=room)
                 if clash_ok:
-                    _emit_stat_updates_from_applied(
+                    rt._emit_stat_updates_from_applied(
                         room,
                         clash_applied,
                         characters_by_id,
@@ -811,7 +832,7 @@ def run_single_phase(room, battle_id, state, battle_state, resolve_intents, char
                     'power_b': clash_rolls.get('power_b'),
                     'tie_break': clash_rolls.get('tie_break')
                 }
-                clash_legacy_input = to_legacy_duel_log_input(
+                clash_legacy_input = rt.to_legacy_duel_log_input(
                     outcome_payload=clash_outcome_payload,
                     state=state,
                     intents=intents,
@@ -837,8 +858,8 @@ def run_single_phase(room, battle_id, state, battle_state, resolve_intents, char
                 clash_outcome_payload['lines'] = clash_legacy_lines
                 clash_applied['log_lines'] = clash_legacy_lines
                 clash_applied['lines'] = clash_legacy_lines
-                _log_match_result(clash_legacy_lines)
-                logger.info(
+                rt._log_match_result(clash_legacy_lines)
+                rt.logger.info(
                     "[clash_outcome] slot=%s vs=%s outcome=%s cost=%s damage_events=%d status_events=%d",
                     slot_id,
                     clash_defender_slot,
@@ -853,7 +874,7 @@ def run_single_phase(room, battle_id, state, battle_state, resolve_intents, char
                     'fp': int(clash_applied.get('cost', {}).get('fp', 0))
                 }
 
-                clash_trace_entry = _append_trace(
+                clash_trace_entry = rt._append_trace(
                     room, battle_id, battle_state, 'clash', slot_id,
                     defender_slot=clash_defender_slot,
                     target_actor_id=target_actor_id,
@@ -869,8 +890,8 @@ def run_single_phase(room, battle_id, state, battle_state, resolve_intents, char
                         'log_lines': clash_legacy_lines
                     }
                 )
-                attacker_self_destructed = _apply_self_destruct_if_needed(room, attacker_char, skill_data)
-                defender_self_destructed = _apply_self_destruct_if_needed(room, defender_char, defender_skill_data)
+                attacker_self_destructed = rt._apply_self_destruct_if_needed(room, attacker_char, skill_data)
+                defender_self_destructed = rt._apply_self_destruct_if_needed(room, defender_char, defender_skill_data)
                 if (
                     clash_ok
                     and clash_reuse_slot
@@ -918,7 +939,7 @@ def run_single_phase(room, battle_id, state, battle_state, resolve_intents, char
                         hf_evade_skill_id = hf_evade_intent.get('skill_id')
                         hf_defender_skill_data = all_skill_data.get(hf_evade_skill_id, {}) if hf_evade_skill_id else None
 
-                    hard_res = _resolve_hard_attack_followup(
+                    hard_res = rt._resolve_hard_attack_followup(
                         room=room,
                         state=state,
                         attacker_char=hf_attacker_char,
@@ -940,20 +961,20 @@ def run_single_phase(room, battle_id, state, battle_state, resolve_intents, char
                         'skill_id': hf_skill_id,
                         'skill': hf_attacker_skill_data,
                         'apply_cost': False,
-                        'cost_policy': COST_CONSUME_POLICY,
+                        'cost_policy': rt.COST_CONSUME_POLICY,
                         'delegate_applied': hard_ok,
                         'delegate_summary': hard_summary if hard_ok else {},
                     }
-                    hard_applied = _apply_outcome_to_state(hard_payload, characters_by_id, room=room)
+                    hard_applied = rt._apply_outcome_to_state(hard_payload, characters_by_id, room=room)
                     if hard_ok:
-                        _emit_stat_updates_from_applied(
+                        rt._emit_stat_updates_from_applied(
                             room,
                             hard_applied,
                             characters_by_id,
                             source='resolve_single_hard_attack'
                         )
 
-                    hard_legacy_input = to_legacy_duel_log_input(
+                    hard_legacy_input = rt.to_legacy_duel_log_input(
                         outcome_payload=hard_payload,
                         state=state,
                         intents=intents,
@@ -979,8 +1000,8 @@ def run_single_phase(room, battle_id, state, battle_state, resolve_intents, char
                     hard_payload['lines'] = hard_lines
                     hard_applied['log_lines'] = hard_lines
                     hard_applied['lines'] = hard_lines
-                    _log_match_result(hard_lines)
-                    _append_trace(
+                    rt._log_match_result(hard_lines)
+                    rt._append_trace(
                         room, battle_id, battle_state, 'hard_attack', hf_attacker_slot,
                         defender_slot=hf_defender_slot,
                         target_actor_id=hf_defender_actor_id,
@@ -1016,7 +1037,7 @@ def run_single_phase(room, battle_id, state, battle_state, resolve_intents, char
                 if auto_defense_charge and isinstance(defender_char, dict):
                     charged_skill_id = str((auto_defense_charge or {}).get('skill_id') or '').strip()
                     charged_skill_data = get_system_skill(charged_skill_id)
-                    delegated = _resolve_clash_by_existing_logic(
+                    delegated = rt._resolve_clash_by_existing_logic(
                         room=room,
                         state=state,
                         attacker_char=attacker_char,
@@ -1041,19 +1062,19 @@ def run_single_phase(room, battle_id, state, battle_state, resolve_intents, char
                         'skill_id': skill_id,
                         'skill': skill_data,
                         'apply_cost': False,
-                        'cost_policy': COST_CONSUME_POLICY,
+                        'cost_policy': rt.COST_CONSUME_POLICY,
                         'delegate_applied': clash_ok,
                         'delegate_summary': clash_summary if clash_ok else {}
                     }
-                    clash_applied = _apply_outcome_to_state(clash_outcome_payload, characters_by_id, room=room)
+                    clash_applied = rt._apply_outcome_to_state(clash_outcome_payload, characters_by_id, room=room)
                     if clash_ok:
-                        _emit_stat_updates_from_applied(
+                        rt._emit_stat_updates_from_applied(
                             room,
                             clash_applied,
                             characters_by_id,
                             source='resolve_single_auto_defense_clash'
                         )
-                    clash_legacy_input = to_legacy_duel_log_input(
+                    clash_legacy_input = rt.to_legacy_duel_log_input(
                         outcome_payload=clash_outcome_payload,
                         state=state,
                         intents=intents,
@@ -1079,8 +1100,8 @@ def run_single_phase(room, battle_id, state, battle_state, resolve_intents, char
                     clash_outcome_payload['lines'] = clash_log_lines
                     clash_applied['log_lines'] = clash_log_lines
                     clash_applied['lines'] = clash_log_lines
-                    _log_match_result(clash_log_lines)
-                    _append_trace(
+                    rt._log_match_result(clash_log_lines)
+                    rt._append_trace(
                         room, battle_id, battle_state, 'clash', slot_id,
                         defender_slot=target_slot,
                         target_actor_id=target_actor_id,
@@ -1105,7 +1126,7 @@ def run_single_phase(room, battle_id, state, battle_state, resolve_intents, char
                     queue_index += 1
                     continue
 
-                delegated = _resolve_one_sided_by_existing_logic(
+                delegated = rt._resolve_one_sided_by_existing_logic(
                     room=room,
                     state=state,
                     attacker_char=attacker_char,
@@ -1129,11 +1150,11 @@ def run_single_phase(room, battle_id, state, battle_state, resolve_intents, char
                     'skill_id': skill_id,
                     'skill': _skill_for_outcome,
                     'apply_cost': bool(intent_a.get('apply_cost_on_execute', True)),
-                    'cost_policy': COST_CONSUME_POLICY,
+                    'cost_policy': rt.COST_CONSUME_POLICY,
                     'delegate_applied': delegate_ok,
                     'delegate_summary': delegate_summary if delegate_ok else {}
                 }
-                applied = _apply_outcome_to_state(outcome_payload, characters_by_id, room=room)
+                applied = rt._apply_outcome_to_state(outcome_payload, characters_by_id, room=room)
                 attacker_name = _resolve_actor_name(characters_by_id, attacker_actor_id)
                 defender_name = _resolve_actor_name(characters_by_id, target_actor_id)
                 attacker_skill_name = _resolve_skill_name(skill_id, skill_data)
@@ -1144,7 +1165,7 @@ def run_single_phase(room, battle_id, state, battle_state, resolve_intents, char
                     'tie_break': 'one_sided'
                 }
                 one_sided_notes = None if delegate_ok else (delegated.get('reason') if isinstance(delegated, dict) else 'delegate_failed')
-                one_sided_legacy_input = to_legacy_duel_log_input(
+                one_sided_legacy_input = rt.to_legacy_duel_log_input(
                     outcome_payload=outcome_payload,
                     state=state,
                     intents=intents,
@@ -1170,8 +1191,8 @@ def run_single_phase(room, battle_id, state, battle_state, resolve_intents, char
                 outcome_payload['lines'] = one_sided_log_lines
                 applied['log_lines'] = one_sided_log_lines
                 applied['lines'] = one_sided_log_lines
-                _log_match_result(one_sided_log_lines)
-                logger.info(
+                rt._log_match_result(one_sided_log_lines)
+                rt.logger.info(
                     "[one_sided_outcome] slot=%s attacker=%s target=%s cost=%s damage_events=%d status_events=%d",
                     slot_id,
                     attacker_actor_id,
@@ -1189,7 +1210,7 @@ def run_single_phase(room, battle_id, state, battle_state, resolve_intents, char
                 trace_notes = one_sided_notes
                 trace_rolls = delegate_summary.get('rolls', {}) if isinstance(delegate_summary, dict) else {}
 
-                trace_entry = _append_trace(
+                trace_entry = rt._append_trace(
                     room, battle_id, battle_state, 'one_sided', slot_id,
                     defender_slot=target_slot,
                     target_actor_id=target_actor_id,
@@ -1205,7 +1226,7 @@ def run_single_phase(room, battle_id, state, battle_state, resolve_intents, char
                         'log_lines': one_sided_log_lines
                     }
                 )
-                attacker_self_destructed = _apply_self_destruct_if_needed(room, attacker_char, skill_data)
+                attacker_self_destructed = rt._apply_self_destruct_if_needed(room, attacker_char, skill_data)
                 if delegate_ok:
                     reuse_policy = _collect_reuse_policy(delegate_summary)
                     current_label = trace_display_label
@@ -1231,7 +1252,7 @@ def run_single_phase(room, battle_id, state, battle_state, resolve_intents, char
             1 for intent in (intents or {}).values()
             if isinstance(intent, dict) and bool(intent.get('committed', False))
         )
-        logger.info(
+        rt.logger.info(
             "[round_end_summary] room=%s battle=%s remaining_slots=%d committed_intents=%d",
             room, battle_id, remaining_slots, committed_intents
         )
@@ -1249,7 +1270,7 @@ def run_single_phase(room, battle_id, state, battle_state, resolve_intents, char
             state,
             actor_ids=processed_actor_ids
         )
-        logger.info(
+        rt.logger.info(
             "[resolve_single_turn_sync] room=%s battle=%s processed_slots=%d sync_slots=%d actors=%d consumed_entries=%d has_acted_synced=%d",
             room,
             battle_id,
@@ -1262,9 +1283,9 @@ def run_single_phase(room, battle_id, state, battle_state, resolve_intents, char
         try:
             proceed_next_turn(room, suppress_logs=True, suppress_state_emit=True)
         except Exception as e:
-            logger.warning("[resolve_single_turn_sync] proceed_next_turn failed room=%s battle=%s error=%s", room, battle_id, e)
+            rt.logger.warning("[resolve_single_turn_sync] proceed_next_turn failed room=%s battle=%s error=%s", room, battle_id, e)
         timeline_after = _snapshot_legacy_timeline_state(state)
-        logger.info(
+        rt.logger.info(
             "[resolve_single_turn_snapshot] room=%s battle=%s before(total=%d acted=%d turn=%s/%s head=%s) after(total=%d acted=%d turn=%s/%s head=%s)",
             room,
             battle_id,
@@ -1281,7 +1302,7 @@ def run_single_phase(room, battle_id, state, battle_state, resolve_intents, char
         )
 
         try:
-            _apply_phase_timing_for_committed_intents(
+            rt._apply_phase_timing_for_committed_intents(
                 room=room,
                 state=state,
                 battle_state=battle_state,
@@ -1290,7 +1311,7 @@ def run_single_phase(room, battle_id, state, battle_state, resolve_intents, char
                 intents_override=resolve_intents
             )
         except Exception as e:
-            logger.warning("[timing_effect] RESOLVE_END failed room=%s battle=%s error=%s", room, battle_id, e)
+            rt.logger.warning("[timing_effect] RESOLVE_END failed room=%s battle=%s error=%s", room, battle_id, e)
 
         battle_state['phase'] = 'round_end'
         battle_state['intents'] = {}
@@ -1316,12 +1337,12 @@ def run_single_phase(room, battle_id, state, battle_state, resolve_intents, char
             'slots': battle_state.get('slots', {}),
             'intents': battle_state.get('intents', {})
         }
-        _log_battle_emit('battle_round_finished', room, battle_id, round_finished_payload)
-        socketio.emit('battle_round_finished', round_finished_payload, to=room)
+        rt._log_battle_emit('battle_round_finished', room, battle_id, round_finished_payload)
+        rt.socketio.emit('battle_round_finished', round_finished_payload, to=room)
         payload = build_select_resolve_state_payload(room, battle_id=battle_id)
         if payload:
-            _log_battle_emit('battle_state_updated', room, battle_id, payload)
-            socketio.emit('battle_state_updated', payload, to=room)
+            rt._log_battle_emit('battle_state_updated', room, battle_id, payload)
+            rt.socketio.emit('battle_state_updated', payload, to=room)
         # Do not auto-advance immediately here.
         # In battle_only mode, round-end/start should happen after clients finish
         # resolve-flow playback and explicitly trigger request_end_round.
@@ -1341,6 +1362,7 @@ def _try_auto_advance_battle_only_round(room, state):
         return
 
     from manager.battle.common_manager import process_full_round_end, process_round_start
+    from manager.room_manager import get_room_state
 
     actor = '戦闘専用モード'
     process_full_round_end(room, actor)
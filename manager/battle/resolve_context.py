@@ -0,0 +1,40 @@
+"""Per-resolve dependency context for the select/resolve pipeline."""
+
+
+class ResolveRuntime:
+    """Dependencies one resolve run needs, captured once when the run starts.
+
+    The services (room-state accessor, save hook, log/state broadcast, emitter,
+    logger, dice roller) are bound eagerly. Any other helper is looked up on
+    the source module on first access and kept for the rest of the run, so a
+    resolve never touches module globals and several can run side by side.
+    """
+
+    SERVICES = (
+        'get_room_state',
+        'save_specific_room_state',
+        'broadcast_log',
+        'broadcast_state_update',
+        'socketio',
+        'logger',
+        'roll_dice',
+    )
+
+    def __init__(self, source, **overrides):
+        self._source = source
+        for name in self.SERVICES:
+            setattr(self, name, overrides.pop(name) if name in overrides else getattr(source, name))
+        for name, value in overrides.items():
+            setattr(self, name, value)
+
+    @classmethod
+    def from_core(cls, **overrides):
+        from manager.battle import core as core_mod
+        return cls(core_mod, **overrides)
+
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        value = getattr(self._source, name)
+        setattr(self, name, value)
+        return value
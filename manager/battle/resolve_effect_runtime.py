@@ -4,6 +4,7 @@ from extensions import socketio as _default_socketio
 from manager.buff_catalog import get_buff_effect
 from manager.constants import DamageSource as _DamageSource
 from manager.logs import setup_logger
+from manager.mutation_recorder import MutationRecorder, record_touch
 from manager.room_manager import (
     get_room_state as _default_get_room_state,
     broadcast_log as _default_broadcast_log,
@@ -280,29 +281,24 @@ def _apply_outcome_to_state(outcome, characters_by_id, room=None):
     return applied
 
 
-def _snapshot_characters_for_timing(state):
+def _timing_roster(state):
     if not isinstance(state, dict):
-        return {}
-    out = {}
-    for char in state.get('characters', []) or []:
-        if not isinstance(char, dict):
-            continue
-        cid = char.get('id')
-        if not cid:
-            continue
-        out[cid] = _snapshot_for_outcome(char)
-    return out
+        return []
+    return [
+        char for char in state.get('characters', []) or []
+        if isinstance(char, dict) and char.get('id')
+    ]
 
 
-def _diff_timing_snapshots(before_map, after_map, damage_source='timing_effect'):
+def _diff_recorded_changes(recorder, roster, damage_source='timing_effect'):
+    # Only characters reported to the recorder can have changed; walk the
+    # roster (captured before the pass) to keep the original emit order.
     merged = {'damage': [], 'statuses': [], 'flags': []}
-    if not isinstance(before_map, dict) or not isinstance(after_map, dict):
-        return merged
-    for cid, before in before_map.items():
-        after = after_map.get(cid)
-        if not before or not after:
+    for char in roster:
+        before = recorder.before(char)
+        if not before:
             continue
-        diff = _diff_snapshot(before, after, damage_source=damage_source)
+        diff = _diff_snapshot(before, _snapshot_for_outcome(char), damage_source=damage_source)
         merged['damage'].extend(diff.get('damage', []) or [])
         merged['statuses'].extend(diff.get('statuses', []) or [])
         merged['flags'].extend(diff.get('flags', []) or [])
@@ -338,52 +334,55 @@ def _run_skill_timing_effects(
     if not isinstance(effects_array, list) or not effects_array:
         return result
 
-    before_map = _snapshot_characters_for_timing(state)
+    roster = _timing_roster(state)
+    recorder = MutationRecorder(_snapshot_for_outcome)
+    recorder.touch(actor_char)
+    recorder.touch(target_char)
     context = {
         'timeline': (state.get('timeline', []) if isinstance(state, dict) else []),
         'characters': (state.get('characters', []) if isinstance(state, dict) else []),
         'room': room,
         'actor_skill_data': skill_data,
     }
-    try:
-        bonus_damage, logs, changes = process_skill_effects(
-            effects_array,
-            timing,
-            actor_char,
-            target_char,
-            target_skill_data,
-            context=context,
-            base_damage=base_damage,
-        )
-    except Exception as e:
-        logger.warning(
-            "[timing_effect] timing=%s actor=%s failed: %s",
-            timing,
-            actor_char.get('id'),
-            e
+    with recorder:
+        try:
+            bonus_damage, logs, changes = process_skill_effects(
+                effects_array,
+                timing,
+                actor_char,
+                target_char,
+                target_skill_data,
+                context=context,
+                base_damage=base_damage,
+            )
+        except Exception as e:
+            logger.warning(
+                "[timing_effect] timing=%s actor=%s failed: %s",
+                timing,
+                actor_char.get('id'),
+                e
+            )
+            return result
+
+        result['bonus_damage'] = int(bonus_damage or 0)
+        result['logs'] = list(logs or [])
+        result['changes'] = list(changes or [])
+        result['extra_primary_damage'] = int(
+            _apply_effect_changes_like_duel(
+                room,
+                state,
+                result['changes'],
+                actor_char,
+                target_char,
+                int(base_damage or 0),
+                result['logs'],
+                attacker_skill_data=skill_data,
+            ) or 0
         )
-        return result
-
-    result['bonus_damage'] = int(bonus_damage or 0)
-    result['logs'] = list(logs or [])
-    result['changes'] = list(changes or [])
-    result['extra_primary_damage'] = int(
-        _apply_effect_changes_like_duel(
-            room,
-            state,
-            result['changes'],
-            actor_char,
-            target_char,
-            int(base_damage or 0),
-            result['logs'],
-            attacker_skill_data=skill_data,
-        ) or 0
-    )
 
-    after_map = _snapshot_characters_for_timing(state)
-    diff = _diff_timing_snapshots(
-        before_map,
-        after_map,
+    diff = _diff_recorded_changes(
+        recorder,
+        roster,
         damage_source=f"{str(timing).lower()}_effect"
     )
     result['damage'] = diff.get('damage', []) or []
@@ -798,6 +797,7 @@ def _apply_effect_changes_like_duel(
     for (char, effect_type, name, value) in changes:
         if not isinstance(char, dict):
             continue
+        record_touch(char)
         if effect_type == "APPLY_STATE":
             base_curr = 0
             if name == 'HP':
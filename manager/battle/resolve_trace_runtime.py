@@ -43,6 +43,61 @@ def _safe_int(value, default=0):
     except Exception:
         return default
 
+
+# resolve.trace is a ring: a round keeps at most TRACE_RING_LIMIT steps in the
+# room document. Dropped steps live on as their compact resolve_trace log rows,
+# which follow the normal log trimming/archive.
+TRACE_RING_LIMIT = 200
+TRACE_RING_CHUNK = 50
+
+# persisted_trace_log_keys holds only the current round's keys (the round is
+# stored once in persisted_trace_round). Membership goes through an in-memory
+# set keyed by the resolve dict, rebuilt from the list after a reload.
+PERSISTED_KEYS_LIMIT = 800
+_MAX_KEY_SETS = 4096
+# id(resolve_ctx) -> (resolve_ctx, keys list, keys set)
+_persisted_key_sets = {}
+
+
+def trace_step_count(trace):
+    """Steps appended so far in this round, including those dropped from the ring."""
+    if not isinstance(trace, list) or not trace:
+        return 0
+    last = trace[-1] if isinstance(trace[-1], dict) else {}
+    return max(len(trace), _safe_int(last.get('step'), 0))
+
+
+def append_trace_entry(trace, entry):
+    trace.append(entry)
+    if len(trace) > TRACE_RING_LIMIT + TRACE_RING_CHUNK:
+        del trace[:len(trace) - TRACE_RING_LIMIT]
+
+
+def _persisted_trace_keys(resolve_ctx, round_value):
+    round_value = _safe_int(round_value, 0)
+    keys = resolve_ctx.get('persisted_trace_log_keys')
+    if not isinstance(keys, list) or _safe_int(resolve_ctx.get('persisted_trace_round'), -1) != round_value:
+        keys = []
+        resolve_ctx['persisted_trace_log_keys'] = keys
+        resolve_ctx['persisted_trace_round'] = round_value
+    cached = _persisted_key_sets.get(id(resolve_ctx))
+    if cached is not None and cached[0] is resolve_ctx and cached[1] is keys and len(cached[2]) == len(keys):
+        return keys, cached[2]
+    keys[:] = list(dict.fromkeys(str(key) for key in keys))
+    key_set = set(keys)
+    if len(_persisted_key_sets) >= _MAX_KEY_SETS:
+        _persisted_key_sets.clear()
+    _persisted_key_sets[id(resolve_ctx)] = (resolve_ctx, keys, key_set)
+    return keys, key_set
+
+
+def _remember_persisted_trace_key(resolve_ctx, keys, key_set, trace_key):
+    keys.append(trace_key)
+    key_set.add(trace_key)
+    if len(keys) > PERSISTED_KEYS_LIMIT:
+        del keys[:len(keys) - PERSISTED_KEYS_LIMIT * 3 // 4]
+        key_set.intersection_update(keys)
+
 def _log_battle_emit(event_name, room_id, battle_id, payload):
     payload = payload or {}
     def _len_or_na(key, default_container):
@@ -275,18 +330,18 @@ def _emit_battle_trace(room, battle_id, battle_state, trace_entry):
     # Keep this append-only and idempotent per trace entry.
     try:
         resolve_ctx = battle_state.setdefault('resolve', {}) if isinstance(battle_state, dict) else {}
-        persisted_keys = resolve_ctx.get('persisted_trace_log_keys', [])
-        if not isinstance(persisted_keys, list):
-            persisted_keys = []
+        persisted_keys, persisted_key_set = _persisted_trace_keys(
+            resolve_ctx,
+            battle_state.get('round', 0) if isinstance(battle_state, dict) else 0,
+        )
         trace_key = "|".join([
-            str(battle_state.get('round', 0) if isinstance(battle_state, dict) else 0),
             str(trace_entry.get('step_index', trace_entry.get('step', ''))),
             str(trace_entry.get('kind', '')),
             str(trace_entry.get('attacker_slot_id', trace_entry.get('attacker_slot', ''))),
             str(trace_entry.get('defender_slot_id', trace_entry.get('defender_slot', ''))),
             str(trace_entry.get('timestamp', '')),
         ])
-        if trace_key not in persisted_keys:
+        if trace_key not in persisted_key_set:
             room_state = get_room_state(room)
             if isinstance(room_state, dict):
                 logs = room_state.get('logs')
@@ -345,10 +400,7 @@ def _emit_battle_trace(room, battle_id, battle_state, trace_entry):
                 except Exception:
                     pass
 
-            persisted_keys.append(trace_key)
-            if len(persisted_keys) > 800:
-                persisted_keys = persisted_keys[-800:]
-            resolve_ctx['persisted_trace_log_keys'] = persisted_keys
+            _remember_persisted_trace_key(resolve_ctx, persisted_keys, persisted_key_set, trace_key)
     except Exception as e:
         logger.warning("[resolve_trace_persist] failed room=%s battle=%s error=%s", room, battle_id, e)
 
@@ -379,7 +431,7 @@ def _append_trace(
     extra_fields=None
 ):
     trace = battle_state.get('resolve', {}).get('trace', [])
-    step_index = len(trace)
+    step_index = trace_step_count(trace)
     step_total = _safe_int(battle_state.get('resolve', {}).get('step_total'), 0)
     if step_total <= step_index:
         step_total = step_index + 1
@@ -419,7 +471,7 @@ def _append_trace(
             entry['lines'] = list(entry.get('log_lines'))
         else:
             entry['lines'] = []
-    trace.append(entry)
+    append_trace_entry(trace, entry)
     battle_state['resolve']['trace'] = trace
     logger.info("[resolve_trace] kind=%s attacker_slot=%s", kind, attacker_slot)
     _emit_battle_trace(room, battle_id, battle_state, entry)
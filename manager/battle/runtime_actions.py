@@ -18,7 +18,9 @@ from manager.room_manager import (
 from manager.summons.service import apply_summon_change, process_summon_round_end
 from manager.granted_skills.service import apply_grant_skill_change, process_granted_skill_round_end
 from manager.battle.skill_rules import _extract_rule_data_from_skill
-from manager.utils import set_status_value, apply_origin_bonus_buffs, get_round_end_origin_recoveries
+from manager.utils import (
+    set_status_value, apply_origin_bonus_buffs, get_round_end_origin_recoveries, invalidate_buff_stat_mods,
+)
 
 
 logger = setup_logger(__name__)
@@ -653,6 +655,7 @@ def process_simple_round_end(state, room):
                     active_buffs.append(buff)
 
             char['special_buffs'] = active_buffs
+            invalidate_buff_stat_mods(char)
             apply_origin_bonus_buffs(char)
 
         # アイテム使用回数リセット
@@ -1,30 +1,82 @@
-import json
 import re
 
 from extensions import all_skill_data
-from manager.battle.skill_rules import _extract_rule_data_from_skill, _extract_skill_cost_entries
+from manager import catalog_registry
+from manager.battle.skill_rules import _extract_skill_cost_entries
 from manager.battle.system_skills import SYS_STRUGGLE_ID, ensure_system_skills_registered
 from manager.game_logic import get_status_value
 from manager.json_rule_v2 import JsonRuleV2Error, normalize_skill_constraints_rows
+from manager.skill_catalog import compiled_skill, parsed_object, shared_rule_data
+
+_SKILL_ID_PATTERNS = (
+    re.compile(r"(?:【|\[)\s*([A-Za-z0-9][A-Za-z0-9_-]*)(?=[\s\]】])"),
+    re.compile(r"[【\[]\s*([A-Za-z0-9][A-Za-z0-9_-]*)[^\]】]*[】\]]"),
+)
+
+# 各キャッシュの上限（超えたら空にして作り直す）
+_MAX_ENTRIES = 4096
+
+# commands 文字列 -> 抽出したスキル ID（commands が変わるまで正規表現を回さない）
+_command_skill_ids = {}
+# (id(char), slot_id, allow_instant) -> _UsableMemo
+_usable_memos = {}
+
+_usable_metrics = {"hits": 0, "misses": 0, "parses": 0}
+
+
+class _UsableMemo:
+    __slots__ = ("owner", "key", "stat_types", "stat_values", "usable")
+
+    def __init__(self, owner, key, stat_types, stat_values, usable):
+        self.owner = owner
+        self.key = key
+        self.stat_types = stat_types
+        self.stat_values = stat_values
+        self.usable = usable
+
+
+def get_usable_skill_metrics():
+    metrics = dict(_usable_metrics)
+    metrics["commands"] = len(_command_skill_ids)
+    metrics["memos"] = len(_usable_memos)
+    return metrics
+
+
+def invalidate_usable_skills(char=None):
+    """使用可能スキルのメモを捨てる（char を省略すると全キャラクター分）。"""
+    if char is None:
+        _usable_memos.clear()
+        return
+    owner_id = id(char)
+    for memo_key in [k for k in _usable_memos if k[0] == owner_id]:
+        del _usable_memos[memo_key]
+
+
+def _remember(cache, key, value):
+    if len(cache) >= _MAX_ENTRIES:
+        cache.clear()
+    cache[key] = value
 
 
 def _extract_skill_ids_from_commands(commands_text):
     if not commands_text:
         return []
-    out = []
-    seen = set()
-    patterns = [
-        re.compile(r"(?:【|\[)\s*([A-Za-z0-9][A-Za-z0-9_-]*)(?=[\s\]】])"),
-        re.compile(r"[【\[]\s*([A-Za-z0-9][A-Za-z0-9_-]*)[^\]】]*[】\]]"),
-    ]
-    for pattern in patterns:
-        for skill_id in pattern.findall(str(commands_text)):
-            sid = str(skill_id or "").strip()
-            if not sid or sid in seen:
-                continue
-            seen.add(sid)
-            out.append(sid)
-    return out
+    text = str(commands_text)
+    cached = _command_skill_ids.get(text)
+    if cached is None:
+        _usable_metrics["parses"] += 1
+        out = []
+        seen = set()
+        for pattern in _SKILL_ID_PATTERNS:
+            for skill_id in pattern.findall(text):
+                sid = str(skill_id or "").strip()
+                if not sid or sid in seen:
+                    continue
+                seen.add(sid)
+                out.append(sid)
+        cached = tuple(out)
+        _remember(_command_skill_ids, text, cached)
+    return list(cached)
 
 
 def _extract_granted_skill_ids(char):
@@ -45,23 +97,9 @@ def _extract_granted_skill_ids(char):
 
 
 def _extract_skill_tags(skill_data):
-    tags = []
-    if isinstance(skill_data, dict):
-        raw_tags = skill_data.get("tags", [])
-        if isinstance(raw_tags, list):
-            tags.extend(raw_tags)
-    rule_data = _extract_rule_data_from_skill(skill_data)
-    if isinstance(rule_data, dict):
-        rule_tags = rule_data.get("tags", [])
-        if isinstance(rule_tags, list):
-            tags.extend(rule_tags)
-
-    normalized = []
-    for tag in tags:
-        text = str(tag or "").strip().lower()
-        if text:
-            normalized.append(text)
-    return normalized
+    if not isinstance(skill_data, dict):
+        return []
+    return list(compiled_skill(skill_data).lowered_tags)
 
 
 def _normalize_skill_ids(char):
@@ -103,14 +141,8 @@ def _parse_json_object(raw):
         return dict(raw)
     if not isinstance(raw, str):
         return None
-    text = raw.strip()
-    if not text:
-        return None
-    try:
-        obj = json.loads(text)
-    except Exception:
-        return None
-    return obj if isinstance(obj, dict) else None
+    # 読むだけなのでカタログのパース結果を共有する（行は normalize_skill_constraints_rows でコピーされる）
+    return parsed_object(raw)
 
 
 def _extract_constraints_from_field_row(row):
@@ -192,7 +224,7 @@ def _merge_cost_entries(cost_entries):
 
 
 def build_skill_reference(skill_id, skill_data):
-    rule_data = _extract_rule_data_from_skill(skill_data, raise_on_error=True) if isinstance(skill_data, dict) else {}
+    rule_data = shared_rule_data(skill_data, raise_on_error=True) if isinstance(skill_data, dict) else {}
     base_cost = _normalize_cost_entries(_extract_skill_cost_entries(skill_data if isinstance(skill_data, dict) else {}))
     tags = _extract_skill_tags(skill_data if isinstance(skill_data, dict) else {})
     category = str(
@@ -229,6 +261,22 @@ def build_skill_reference(skill_id, skill_data):
     }
 
 
+def _field_constraint_rows(room_state, battle_state):
+    if isinstance(battle_state, dict):
+        raw_rows = battle_state.get("field_effects", [])
+        if isinstance(raw_rows, list) and raw_rows:
+            return raw_rows
+        if isinstance(battle_state.get("stage_field_effect_profile"), dict):
+            profile_rules = battle_state.get("stage_field_effect_profile", {}).get("rules", [])
+            if isinstance(profile_rules, list):
+                return profile_rules
+    elif isinstance(room_state, dict):
+        raw_rows = room_state.get("field_effects", [])
+        if isinstance(raw_rows, list):
+            return raw_rows
+    return []
+
+
 def collect_skill_constraints(actor, room_state=None, battle_state=None, slot_id=None):
     if not isinstance(actor, dict):
         return []
@@ -266,19 +314,7 @@ def collect_skill_constraints(actor, room_state=None, battle_state=None, slot_id
             f"actor[{actor.get('id', '?')}].special_buffs[{idx}].data.skill_constraints",
         )
 
-    field_rows = []
-    if isinstance(battle_state, dict):
-        raw_rows = battle_state.get("field_effects", [])
-        if isinstance(raw_rows, list) and raw_rows:
-            field_rows = raw_rows
-        elif isinstance(battle_state.get("stage_field_effect_profile"), dict):
-            profile_rules = battle_state.get("stage_field_effect_profile", {}).get("rules", [])
-            if isinstance(profile_rules, list):
-                field_rows = profile_rules
-    elif isinstance(room_state, dict):
-        raw_rows = room_state.get("field_effects", [])
-        if isinstance(raw_rows, list):
-            field_rows = raw_rows
+    field_rows = _field_constraint_rows(room_state, battle_state)
 
     actor_team = str(actor.get("type", "") or "").strip().lower()
     for idx, row in enumerate(field_rows):
@@ -344,17 +380,13 @@ def _match_rule(skill_ref, match):
     return True
 
 
-def get_effective_skill_cost(actor, skill_id, skill_data=None, room_state=None, battle_state=None, slot_id=None):
-    skill_data = skill_data if isinstance(skill_data, dict) else all_skill_data.get(skill_id, {})
-    try:
-        skill_ref = build_skill_reference(skill_id, skill_data if isinstance(skill_data, dict) else {})
-        constraints = collect_skill_constraints(actor, room_state=room_state, battle_state=battle_state, slot_id=slot_id)
-    except JsonRuleV2Error:
-        fallback_cost = _normalize_cost_entries(_extract_skill_cost_entries(skill_data if isinstance(skill_data, dict) else {}))
-        return {"cost": fallback_cost, "matched_rule_ids": []}
+def _sort_constraints(constraints):
+    return sorted(constraints, key=lambda row: _coerce_int(row.get("priority", 100), 100))
+
+
+def _effective_cost(skill_ref, sorted_constraints):
     effective_cost = list(skill_ref.get("cost", []))
     matched_rule_ids = []
-    sorted_constraints = sorted(constraints, key=lambda row: _coerce_int(row.get("priority", 100), 100))
     for row in sorted_constraints:
         mode = str(row.get("mode", "")).strip().lower()
         if mode != "add_cost":
@@ -371,6 +403,17 @@ def get_effective_skill_cost(actor, skill_id, skill_data=None, room_state=None,
     return {"cost": effective_cost, "matched_rule_ids": matched_rule_ids}
 
 
+def get_effective_skill_cost(actor, skill_id, skill_data=None, room_state=None, battle_state=None, slot_id=None):
+    skill_data = skill_data if isinstance(skill_data, dict) else all_skill_data.get(skill_id, {})
+    try:
+        skill_ref = build_skill_reference(skill_id, skill_data if isinstance(skill_data, dict) else {})
+        constraints = collect_skill_constraints(actor, room_state=room_state, battle_state=battle_state, slot_id=slot_id)
+    except JsonRuleV2Error:
+        fallback_cost = _normalize_cost_entries(_extract_skill_cost_entries(skill_data if isinstance(skill_data, dict) else {}))
+        return {"cost": fallback_cost, "matched_rule_ids": []}
+    return _effective_cost(skill_ref, _sort_constraints(constraints))
+
+
 def _can_pay_cost_entries(actor, cost_entries):
     for row in _normalize_cost_entries(cost_entries):
         c_type = str(row.get("type", "")).strip()
@@ -385,6 +428,11 @@ def _can_pay_cost_entries(actor, cost_entries):
 
 def evaluate_skill_access(actor, skill_id, room_state=None, battle_state=None, slot_id=None, allow_instant=False):
     ensure_system_skills_registered()
+    return _evaluate_skill_access(actor, skill_id, room_state, battle_state, slot_id, allow_instant)
+
+
+def _evaluate_skill_access(actor, skill_id, room_state, battle_state, slot_id, allow_instant, sorted_constraints=None):
+    # sorted_constraints を渡すと制約の収集を省く（同じキャラクターの全スキルを続けて見るとき）
     sid = str(skill_id or "").strip()
     if not sid:
         return {
@@ -423,7 +471,10 @@ def evaluate_skill_access(actor, skill_id, room_state=None, battle_state=None, s
     matched_rule_ids = []
     try:
         skill_ref = build_skill_reference(sid, skill_data)
-        constraints = collect_skill_constraints(actor, room_state=room_state, battle_state=battle_state, slot_id=slot_id)
+        if sorted_constraints is None:
+            sorted_constraints = _sort_constraints(collect_skill_constraints(
+                actor, room_state=room_state, battle_state=battle_state, slot_id=slot_id,
+            ))
     except JsonRuleV2Error as exc:
         return {
             "usable": False,
@@ -431,7 +482,6 @@ def evaluate_skill_access(actor, skill_id, room_state=None, battle_state=None, s
             "effective_cost": [],
             "matched_rule_ids": [],
         }
-    sorted_constraints = sorted(constraints, key=lambda row: _coerce_int(row.get("priority", 100), 100))
     for row in sorted_constraints:
         mode = str(row.get("mode", "")).strip().lower()
         if mode != "block":
@@ -444,14 +494,7 @@ def evaluate_skill_access(actor, skill_id, room_state=None, battle_state=None, s
         if rid:
             matched_rule_ids.append(rid)
 
-    cost_eval = get_effective_skill_cost(
-        actor,
-        sid,
-        skill_data=skill_data,
-        room_state=room_state,
-        battle_state=battle_state,
-        slot_id=slot_id,
-    )
+    cost_eval = _effective_cost(skill_ref, sorted_constraints)
     effective_cost = cost_eval.get("cost", [])
     matched_rule_ids.extend(cost_eval.get("matched_rule_ids", []))
     matched_rule_ids = list(dict.fromkeys([x for x in matched_rule_ids if x]))
@@ -476,24 +519,78 @@ def evaluate_skill_access(actor, skill_id, room_state=None, battle_state=None, s
     return {"usable": True, "blocked_reasons": [], "effective_cost": effective_cost, "matched_rule_ids": matched_rule_ids}
 
 
+def _constraint_fingerprint(char, room_state, battle_state):
+    """制約の元になる行の内容。これが変わらなければ収集・正規化の結果も変わらない。"""
+    flags = char.get("flags")
+    buff_rows = tuple(
+        (idx, repr(buff.get("data", {}).get("skill_constraints")))
+        for idx, buff in enumerate(char.get("special_buffs", []) or [])
+        if isinstance(buff, dict) and isinstance(buff.get("data"), dict) and "skill_constraints" in buff["data"]
+    )
+    return (
+        repr(flags.get("skill_constraints")) if isinstance(flags, dict) and "skill_constraints" in flags else None,
+        buff_rows,
+        str(char.get("type", "") or ""),
+        repr(_field_constraint_rows(room_state, battle_state)),
+    )
+
+
+def _cost_stat_values(char, stat_types):
+    return tuple(get_status_value(char, stat_type) for stat_type in stat_types)
+
+
 def list_regular_usable_skill_ids(char, allow_instant=False, room_state=None, battle_state=None, slot_id=None):
     ensure_system_skills_registered()
     if not isinstance(char, dict):
         return []
+    skill_ids = tuple(skill_id for skill_id in _normalize_skill_ids(char) if skill_id != SYS_STRUGGLE_ID)
+    # 結果はスキル構成・スキル定義・制約の元データ・コストに使うステータス値だけで決まる
+    key = (
+        skill_ids,
+        catalog_registry.version(catalog_registry.SKILLS),
+        id(all_skill_data),
+        tuple(id(all_skill_data.get(skill_id)) for skill_id in skill_ids),
+        _constraint_fingerprint(char, room_state, battle_state),
+    )
+    memo_key = (id(char), slot_id, bool(allow_instant))
+    memo = _usable_memos.get(memo_key)
+    if (
+        memo is not None
+        and memo.owner is char
+        and memo.key == key
+        and memo.stat_values == _cost_stat_values(char, memo.stat_types)
+    ):
+        _usable_metrics["hits"] += 1
+        return list(memo.usable)
+    _usable_metrics["misses"] += 1
+
+    try:
+        sorted_constraints = _sort_constraints(collect_skill_constraints(
+            char, room_state=room_state, battle_state=battle_state, slot_id=slot_id,
+        ))
+    except JsonRuleV2Error:
+        sorted_constraints = None
     usable = []
-    for skill_id in _normalize_skill_ids(char):
-        if skill_id == SYS_STRUGGLE_ID:
-            continue
-        ev = evaluate_skill_access(
+    stat_types = set()
+    for skill_id in skill_ids:
+        ev = _evaluate_skill_access(
             char,
             skill_id,
-            room_state=room_state,
-            battle_state=battle_state,
-            slot_id=slot_id,
-            allow_instant=allow_instant,
+            room_state,
+            battle_state,
+            slot_id,
+            allow_instant,
+            sorted_constraints=sorted_constraints,
         )
+        stat_types.update(str(row.get("type", "")).strip() for row in ev.get("effective_cost", []) or [])
         if ev.get("usable", False):
             usable.append(skill_id)
+    stat_types = tuple(sorted(stat_types))
+    _remember(
+        _usable_memos,
+        memo_key,
+        _UsableMemo(char, key, stat_types, _cost_stat_values(char, stat_types), tuple(usable)),
+    )
     return usable
 
 
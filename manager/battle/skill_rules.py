@@ -1,25 +1,10 @@
-import json
-from manager.json_rule_v2 import extract_and_normalize_skill_rule_data, JsonRuleV2Error
+from manager.skill_catalog import compiled_skill, rule_data_copy
+from manager.skill_catalog import shared_rule_data as _shared_rule_data
 
 
 def _extract_rule_data_from_skill(skill_data, *, raise_on_error=False, strict=True):
-    try:
-        skill_id = ""
-        if isinstance(skill_data, dict):
-            skill_id = str(skill_data.get("id", "") or "").strip()
-        return extract_and_normalize_skill_rule_data(
-            skill_data,
-            skill_id=skill_id,
-            strict=strict,
-        )
-    except JsonRuleV2Error:
-        if raise_on_error:
-            raise
-        return {}
-    except Exception:
-        if raise_on_error:
-            raise
-        return {}
+    # 呼び出し側が書き換えてもよいようにコピーを返す（読むだけなら _shared_rule_data）。
+    return rule_data_copy(skill_data, strict=strict, raise_on_error=raise_on_error)
 
 
 def _extract_skill_cost_entries(skill_data):
@@ -28,11 +13,7 @@ def _extract_skill_cost_entries(skill_data):
     direct = skill_data.get('cost')
     if isinstance(direct, list):
         return direct
-    rule_data = _extract_rule_data_from_skill(skill_data)
-    rule_cost = rule_data.get('cost', [])
-    if isinstance(rule_cost, list):
-        return rule_cost
-    return []
+    return list(compiled_skill(skill_data).cost)
 
 def _has_skill_tag(skill_data, tag_name):
     if not isinstance(skill_data, dict):
@@ -40,19 +21,7 @@ def _has_skill_tag(skill_data, tag_name):
     tag = str(tag_name or "").strip()
     if not tag:
         return False
-
-    tags = []
-    rule_data = _extract_rule_data_from_skill(skill_data)
-    if isinstance(rule_data, dict):
-        raw_tags = rule_data.get('tags')
-        if isinstance(raw_tags, list):
-            tags.extend([str(v).strip() for v in raw_tags if str(v).strip()])
-
-    skill_tags = skill_data.get('tags', [])
-    if isinstance(skill_tags, list):
-        tags.extend([str(v).strip() for v in skill_tags if str(v).strip()])
-
-    return tag in tags
+    return tag in compiled_skill(skill_data).tags
 
 
 def _skill_deals_damage(skill_data):
@@ -69,7 +38,7 @@ def _skill_deals_damage(skill_data):
     if resolved_role in {'defense', 'evade'}:
         return False
 
-    rule_data = _extract_rule_data_from_skill(skill_data)
+    rule_data = _shared_rule_data(skill_data)
     if isinstance(rule_data, dict) and isinstance(rule_data.get('deals_damage'), bool):
         return bool(rule_data.get('deals_damage'))
 
@@ -121,18 +90,9 @@ def _is_normal_skill(skill_data):
 
 
 def _collect_skill_tags(skill_data):
-    tags = []
     if not isinstance(skill_data, dict):
-        return tags
-    direct_tags = skill_data.get('tags', [])
-    if isinstance(direct_tags, list):
-        tags.extend([str(v).strip() for v in direct_tags if str(v).strip()])
-    rule_data = _extract_rule_data_from_skill(skill_data)
-    if isinstance(rule_data, dict):
-        rule_tags = rule_data.get('tags', [])
-        if isinstance(rule_tags, list):
-            tags.extend([str(v).strip() for v in rule_tags if str(v).strip()])
-    return tags
+        return []
+    return list(compiled_skill(skill_data).tags)
 
 
 def _resolve_skill_category(skill_data):
@@ -144,7 +104,7 @@ def _resolve_skill_category(skill_data):
         value = skill_data.get(key)
         if isinstance(value, str) and value.strip():
             return value.strip()
-    rule_data = _extract_rule_data_from_skill(skill_data)
+    rule_data = _shared_rule_data(skill_data)
     if isinstance(rule_data, dict):
         for key in ('分類', 'カテゴリ', 'category', 'type'):
             value = rule_data.get(key)
@@ -177,7 +137,7 @@ def _normalize_target_scope(raw_value, default='enemy'):
 def _infer_target_scope_from_skill_data(skill_data):
     if not isinstance(skill_data, dict):
         return 'enemy'
-    rule_data = _extract_rule_data_from_skill(skill_data)
+    rule_data = _shared_rule_data(skill_data)
     candidates = [
         skill_data.get('target_scope'),
         skill_data.get('targetScope'),
@@ -302,7 +262,7 @@ def _estimate_immediate_self_fp_gain(skill_data):
     Estimate immediate self FP gain that can occur during clash execution.
     This intentionally ignores END_ROUND style delayed effects.
     """
-    rule_data = _extract_rule_data_from_skill(skill_data)
+    rule_data = _shared_rule_data(skill_data)
     if not isinstance(rule_data, dict):
         return 0
     effects = rule_data.get('effects', [])
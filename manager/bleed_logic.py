@@ -5,6 +5,8 @@ Bleed resolution helpers shared by round-end flow and custom effects.
 import importlib
 import sys
 
+from manager.mutation_recorder import record_touch
+
 BLEED_MAINTENANCE_BUFF_ID = "Bu-08"
 
 
@@ -106,6 +108,7 @@ def consume_bleed_maintenance_stack(char, amount=1):
 
     consumed = min(int(amount), current)
     remaining = current - consumed
+    record_touch(char)
 
     if remaining > 0:
         buff["count"] = remaining
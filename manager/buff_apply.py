@@ -6,6 +6,7 @@
 # （utils.py がロード時に本モジュールを import するため、トップレベルで utils を
 # import し返すと循環になる）。
 from manager.logs import setup_logger
+from manager.mutation_recorder import record_touch
 
 logger = setup_logger(__name__)
 
@@ -60,6 +61,17 @@ def _resolve_stack_count(payload, explicit_count=None, default=0):
 
 def apply_buff(char_obj, buff_name, lasting, delay, data=None, count=None):
     """バフを付与・更新する"""
+    record_touch(char_obj)
+    try:
+        return _apply_buff(char_obj, buff_name, lasting, delay, data=data, count=count)
+    finally:
+        # 既存行の stat_mods などをその場で書き換えることがあるので集計表を捨てる
+        from manager.utils import invalidate_buff_stat_mods
+        if char_obj:
+            invalidate_buff_stat_mods(char_obj)
+
+
+def _apply_buff(char_obj, buff_name, lasting, delay, data=None, count=None):
     from manager.utils import (
         normalize_buff_name,
         get_status_value,
@@ -1,6 +1,8 @@
 # manager/buff_catalog.py
-import os
 import re
+from collections import OrderedDict
+
+from manager import catalog_registry
 
 """
 バフ・デバフの効果定義ファイル
@@ -366,70 +368,123 @@ def resolve_runtime_buff_effect(buff_entry):
     return _merge_effect_dict(effect_data, fixed_effect)
 
 
+# 動的パターンはコンパイル済みの正規表現で試す
+_COMPILED_PATTERNS = [(re.compile(entry["pattern"]), entry["generator"]) for entry in DYNAMIC_PATTERNS]
+
+# バフ名 -> 効果定義（all_buff_data から作る索引）。all_buff_data の読み込み時に作り直す。
+_name_index = {"source": None, "count": -1, "effects": {}}
+
+# 動的パターンの解決結果（名前 -> 効果定義 or None）の LRU
+_DYNAMIC_CACHE_SIZE = 1024
+_dynamic_cache = OrderedDict()
+
+# 図鑑が未 publish の間に get_buff_by_id が読んだキャッシュファイルの中身
+_cache_file_catalog = {"data": None}
+
+
+def rebuild_buff_name_index():
+    """all_buff_data からバフ名の索引を作り直す（バフ図鑑の読み込み・更新時に呼ぶ）。"""
+    try:
+        from extensions import all_buff_data
+    except ImportError:
+        all_buff_data = {}
+    effects = {}
+    for b_data in all_buff_data.values():
+        name = b_data.get('name')
+        if name in effects:
+            continue
+        # 効果データ(effect)のコピーにフレーバー・説明文を足したもの
+        eff = b_data.get('effect', {}).copy()
+        if b_data.get('flavor'):
+            eff['flavor'] = b_data['flavor']
+        if b_data.get('description'):
+            eff['description'] = b_data['description']
+        effects[name] = eff
+    _name_index["source"] = all_buff_data
+    _name_index["count"] = len(all_buff_data)
+    _name_index["effects"] = effects
+    _dynamic_cache.clear()
+    return effects
+
+
+def _buff_name_index():
+    source = _name_index["source"]
+    if source is None or _name_index["count"] != len(source):
+        return rebuild_buff_name_index()
+    return _name_index["effects"]
+
+
+def _dynamic_buff_effect(buff_name):
+    try:
+        effect = _dynamic_cache[buff_name]
+    except KeyError:
+        pass
+    else:
+        _dynamic_cache.move_to_end(buff_name)
+        return effect
+    effect = None
+    if isinstance(buff_name, str):
+        for pattern, generator in _COMPILED_PATTERNS:
+            match = pattern.match(buff_name)
+            if match:
+                effect = generator(match)
+                break
+    _dynamic_cache[buff_name] = effect
+    if len(_dynamic_cache) > _DYNAMIC_CACHE_SIZE:
+        _dynamic_cache.popitem(last=False)
+    return effect
+
+
 def get_buff_effect(buff_name):
-    """バフ名から効果定義を取得する（静的 -> スプレッドシート -> 動的 の順で検索）"""
+    """バフ名から効果定義を取得する（静的 -> スプレッドシート -> 動的 の順で検索）
+
+    返す辞書は共有物なので書き換えないこと（変更する場合はコピーする）。
+    """
     # 1. 静的定義にあればそれを返す
     if buff_name in STATIC_BUFFS:
         return STATIC_BUFFS[buff_name]
 
     # 2. スプレッドシートから読み込んだバフ定義を確認
-    # extensionsからのインポートは関数内で行い循環参照を避ける
-    try:
-        from extensions import all_buff_data
-        for b_data in all_buff_data.values():
-            if b_data.get('name') == buff_name:
-                # 効果データ(effect)のコピーを作成
-                eff = b_data.get('effect', {}).copy()
-                # フレーバーテキストがあれば追加
-                if b_data.get('flavor'):
-                    eff['flavor'] = b_data['flavor']
-                # 説明文もあれば追加
-                if b_data.get('description'):
-                    eff['description'] = b_data['description']
-                return eff
-    except ImportError:
-        pass
+    effect = _buff_name_index().get(buff_name)
+    if effect is not None:
+        return effect
 
     # 3. なければパターンマッチを試行
-    for entry in DYNAMIC_PATTERNS:
-        match = re.match(entry["pattern"], buff_name)
-        if match:
-            return entry["generator"](match)
+    return _dynamic_buff_effect(buff_name)
 
-    return None
 
-# get_buff_by_id はスキル評価のホットパスから高頻度で呼ばれるため、
-# カタログJSONをメモリにキャッシュし、ファイル更新(mtime変化)時のみ再読込する。
-_buff_catalog_cache = {"mtime": None, "data": None}
+# get_buff_by_id はスキル評価のホットパスから高頻度で呼ばれるため、ファイルは見ずに
+# catalog_registry に登録済みのバフ図鑑を引く（更新はローダーの publish で反映される）。
+def _read_buff_catalog_cache():
+    """図鑑が未 publish のときに読むキャッシュファイルの中身（publish はしない）。"""
+    if _cache_file_catalog["data"] is None:
+        from manager.cache_paths import (
+            BUFF_CATALOG_CACHE_FILE,
+            LEGACY_BUFF_CATALOG_CACHE_FILE,
+            load_json_cache,
+        )
+
+        data = load_json_cache(BUFF_CATALOG_CACHE_FILE, legacy_paths=[LEGACY_BUFF_CATALOG_CACHE_FILE])
+        if not isinstance(data, dict):
+            return None
+        _cache_file_catalog["data"] = data
+    return _cache_file_catalog["data"]
 
 
 def get_buff_by_id(buff_id):
     """
     バフIDからバフ情報を取得する
-    (buff_catalog_cache.json を参照)
+    (catalog_registry のバフ図鑑を参照。未読み込みなら buff_catalog_cache.json を読むだけで、
+    図鑑の publish や all_buff_data の更新はしない)
     """
-    from manager.cache_paths import (
-        BUFF_CATALOG_CACHE_FILE,
-        LEGACY_BUFF_CATALOG_CACHE_FILE,
-        load_json_cache,
-    )
-
     try:
-        try:
-            mtime = os.path.getmtime(BUFF_CATALOG_CACHE_FILE)
-        except OSError:
-            mtime = None
-        if _buff_catalog_cache["data"] is None or _buff_catalog_cache["mtime"] != mtime:
-            data = load_json_cache(
-                BUFF_CATALOG_CACHE_FILE,
-                legacy_paths=[LEGACY_BUFF_CATALOG_CACHE_FILE],
-            )
-            if not isinstance(data, dict):
-                print(f"[WARNING] get_buff_by_id: Cache file not found at {BUFF_CATALOG_CACHE_FILE}")
-                return None
-            _buff_catalog_cache["mtime"] = mtime
-            _buff_catalog_cache["data"] = data
-        return _buff_catalog_cache["data"].get(buff_id)
+        data = catalog_registry.peek(catalog_registry.BUFFS)
+        if data is None:
+            data = _read_buff_catalog_cache()
+        if not isinstance(data, dict):
+            print("[WARNING] get_buff_by_id: buff catalog is not loaded")
+            return None
+        return data.get(buff_id)
     except Exception as e:
         print(f"[ERROR] get_buff_by_id: Failed to load cache: {e}")
         return None
@@ -6,6 +6,7 @@
 import csv
 import json
 import requests
+from manager import catalog_registry
 from manager.cache_paths import (
     BUFF_CATALOG_CACHE_FILE,
     LEGACY_BUFF_CATALOG_CACHE_FILE,
@@ -25,6 +26,9 @@ class BuffCatalogLoader:
 
     def __init__(self):
         self.buffs = {}
+        # 遅延読み込み（get_buff_by_id など）ではネットワークに出ずキャッシュだけを読む
+        catalog_registry.register_source(catalog_registry.BUFFS, self.load_from_cache)
+        catalog_registry.on_change(self._on_catalog_change)
 
     def fetch_from_csv(self):
         """
@@ -116,6 +120,18 @@ class BuffCatalogLoader:
             print(f"[ERROR] バフ図鑑キャッシュの読み込みに失敗: {e}")
             return {}
 
+    def _on_catalog_change(self, name, version, replaced):
+        """publish されたバフ図鑑を extensions.all_buff_data と名前索引に反映"""
+        if name != catalog_registry.BUFFS:
+            return
+        from extensions import all_buff_data  # 遅延インポートで循環参照回避
+        from manager.buff_catalog import rebuild_buff_name_index
+
+        self.buffs = catalog_registry.peek(catalog_registry.BUFFS) or {}
+        all_buff_data.clear()
+        all_buff_data.update(self.buffs)
+        rebuild_buff_name_index()
+
     def refresh(self):
         """
         CSVからデータを取得し、キャッシュを更新
@@ -126,33 +142,24 @@ class BuffCatalogLoader:
         buffs = self.fetch_from_csv()
         if buffs:
             self.save_to_cache(buffs)
-            self.buffs = buffs
+            catalog_registry.publish(catalog_registry.BUFFS, buffs)
         return buffs
 
     def load_buffs(self):
         """
-        バフ図鑑データを読み込み（キャッシュ優先、なければフェッチ）
+        バフ図鑑データを読み込み（読み込み済みならそれを返す。キャッシュ優先、なければフェッチ）
 
         Returns:
             dict: バフデータ辞書
         """
-        from extensions import all_buff_data  # 遅延インポートで循環参照回避
-
-        # キャッシュから読み込み
-        self.buffs = self.load_from_cache()
-
-        # キャッシュがなければCSVから取得
-        if not self.buffs:
+        buffs = catalog_registry.get(catalog_registry.BUFFS)
+        if buffs is None:
             print("[INFO] キャッシュが見つかりません。CSVから取得します...")
-            self.buffs = self.fetch_from_csv()
-            if self.buffs:
-                self.save_to_cache(self.buffs)
-
-        # extensions.all_buff_data に反映
-        all_buff_data.clear()
-        all_buff_data.update(self.buffs)
-
-        return self.buffs
+            buffs = self.fetch_from_csv()
+            if buffs:
+                self.save_to_cache(buffs)
+                catalog_registry.publish(catalog_registry.BUFFS, buffs)
+        return buffs or {}
 
     def get_buff(self, buff_name):
         """
@@ -0,0 +1,113 @@
+"""データカタログの登録簿と版番号。
+
+スキル・アイテム・輝化スキル・特殊パッシブ・バフ図鑑・用語辞書・召喚テンプレートの
+各ローダーは、読み込み・再取得のたびに publish で中身を登録する。publish のたびに
+全体の版（version()）が1つ進み、そのカタログの版として記録される。
+
+参照側はファイルの mtime を見ずに get で引く。まだ登録されていないカタログは
+register_source で登録した読み込み関数で初回だけ読む。カタログに依存するキャッシュは
+版をキーにするか、on_change のリスナーで作り直す（クライアントへの通知もこれを使う）。
+
+別プロセス（python app.py --update）が書き換えたキャッシュファイルは、reload で
+読み直すまで反映されない。
+"""
+import threading
+
+from manager.logs import setup_logger
+
+logger = setup_logger(__name__)
+
+SKILLS = 'skills'
+ITEMS = 'items'
+RADIANCE = 'radiance'
+PASSIVES = 'passives'
+BUFFS = 'buffs'
+GLOSSARY = 'glossary'
+SUMMON_TEMPLATES = 'summon_templates'
+
+# name -> 登録済みの中身
+_catalogs = {}
+# name -> 最後に publish されたときの全体の版
+_catalog_versions = {}
+# name -> 未登録時・reload 時に呼ぶ読み込み関数（中身を返す。読めなければ空）
+_sources = {}
+# listener(name, version, replaced)
+_listeners = []
+_version = 0
+_guard = threading.RLock()
+
+
+def version(name=None):
+    """全体の版（name を渡すとそのカタログが最後に更新された版、未登録なら 0）。"""
+    if name is None:
+        return _version
+    return _catalog_versions.get(name, 0)
+
+
+def snapshot():
+    """クライアントへ渡す版情報。"""
+    return {'version': _version, 'catalogs': dict(_catalog_versions)}
+
+
+def register_source(name, loader):
+    _sources[name] = loader
+
+
+def on_change(listener):
+    if listener not in _listeners:
+        _listeners.append(listener)
+    return listener
+
+
+def publish(name, data):
+    """カタログ name の中身を data に差し替え、全体の版を進める。新しい版を返す。"""
+    global _version
+    with _guard:
+        replaced = name in _catalogs
+        _version += 1
+        _catalogs[name] = data
+        _catalog_versions[name] = _version
+        new_version = _version
+    for listener in list(_listeners):
+        try:
+            listener(name, new_version, replaced)
+        except Exception as e:
+            logger.warning(f"[catalog] listener failed for {name}: {e}")
+    return new_version
+
+
+def peek(name):
+    """登録済みの中身（未登録なら None。読み込みはしない）。"""
+    return _catalogs.get(name)
+
+
+def get(name, default=None):
+    """カタログ name の中身。未登録なら読み込み関数で読んで登録する（読めなければ default）。"""
+    data = _catalogs.get(name)
+    if data is not None:
+        return data
+    loader = _sources.get(name)
+    if loader is None:
+        return default
+    with _guard:
+        data = _catalogs.get(name)
+        if data is None:
+            data = loader()
+            if data:
+                publish(name, data)
+    return data if data else default
+
+
+def reload(names=None):
+    """読み込み関数でカタログを読み直して publish する。読み直せた name のリストを返す。"""
+    reloaded = []
+    for name in list(names or _sources):
+        loader = _sources.get(name)
+        if loader is None:
+            continue
+        with _guard:
+            data = loader()
+            if data:
+                publish(name, data)
+                reloaded.append(name)
+    return reloaded
@@ -1,12 +1,81 @@
+"""名前付きの排他ロック（file_lock）。
+
+プロセス内はキーごとの FIFO で待たせる（順番が来るまで Event で眠り、ポーリングしない）。
+複数プロセスで動かす場合は LOCK_BACKEND で、プロセス内の順番を取ったあとに
+取るプロセス間ロックを選ぶ。
+
+  LOCK_BACKEND=memory    … プロセス内のみ（既定。workers=1 の構成）
+  LOCK_BACKEND=fcntl     … locks/ 配下のファイルに flock。保持プロセスが落ちれば OS が解放する
+  LOCK_BACKEND=postgres  … pg_advisory_xact_lock。待ちは PostgreSQL 側の待ち行列、
+                           接続が切れれば解放される（app context 外・非PostgreSQLでは memory）
+  LOCK_LEASE_SECONDS     … 保持の期限（既定 30）。期限を過ぎた保持者の後ろの待ち手は
+                           解放を待たずに引き継ぐ（解放し忘れ・ハングで詰まらないように）
+
+取得・競合・タイムアウト・期限切れの件数と待ち時間は get_lock_metrics で参照できる。
+"""
+import contextlib
+import itertools
 import os
+import threading
 import time
-import contextlib
+import zlib
+from collections import deque
+
 from manager.logs import setup_logger
 
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
 logger = setup_logger(__name__)
 
 LOCK_DIR = 'locks'
 
+
+def _env_number(name, default):
+    try:
+        return float(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return float(default)
+
+
+_BACKEND = str(os.environ.get('LOCK_BACKEND') or 'memory').strip().lower()
+_LEASE_SECONDS = _env_number('LOCK_LEASE_SECONDS', 30)
+# fcntl のプロセス間競合時だけ使う再試行間隔（秒、倍々で伸ばす）
+_FCNTL_BACKOFF = (0.01, 0.2)
+
+
+class _KeyState:
+    __slots__ = ('waiters', 'token', 'expires_at')
+
+    def __init__(self):
+        self.waiters = deque()
+        self.token = None
+        self.expires_at = 0.0
+
+
+# lock_name -> _KeyState（保持中・待ちのあるキーだけ持つ）
+_keys = {}
+_guard = threading.Lock()
+_tokens = itertools.count(1)
+
+_metrics = {
+    'acquired': 0, 'contended': 0, 'timeouts': 0, 'expired': 0,
+    'wait_ms_total': 0.0, 'max_wait_ms': 0.0, 'max_held_ms': 0.0,
+}
+
+
+def get_lock_metrics():
+    metrics = dict(_metrics)
+    metrics['avg_wait_ms'] = metrics['wait_ms_total'] / metrics['acquired'] if metrics['acquired'] else 0.0
+    metrics['backend'] = _BACKEND
+    with _guard:
+        metrics['held'] = sum(1 for state in _keys.values() if state.token is not None)
+        metrics['waiting'] = sum(len(state.waiters) for state in _keys.values())
+    return metrics
+
+
 def ensure_lock_dir():
     if not os.path.exists(LOCK_DIR):
         try:
@@ -14,41 +83,158 @@ def ensure_lock_dir():
         except OSError:
             pass
 
+
+def _grant(state, lease):
+    state.token = next(_tokens)
+    state.expires_at = time.monotonic() + lease
+    return state.token
+
+
+def _wake_head(lock_name, state):
+    if state.waiters:
+        state.waiters[0].set()
+    elif state.token is None:
+        _keys.pop(lock_name, None)
+
+
+def _acquire_local(lock_name, timeout, lease):
+    """プロセス内の順番を取る。保持トークンを返す。"""
+    deadline = time.monotonic() + timeout
+    with _guard:
+        state = _keys.get(lock_name)
+        if state is None:
+            state = _keys[lock_name] = _KeyState()
+        if state.token is None and not state.waiters:
+            return _grant(state, lease)
+        ticket = threading.Event()
+        state.waiters.append(ticket)
+    _metrics['contended'] += 1
+
+    while True:
+        with _guard:
+            now = time.monotonic()
+            if state.waiters[0] is ticket:
+                if state.token is None:
+                    state.waiters.popleft()
+                    return _grant(state, lease)
+                if now >= state.expires_at:
+                    _metrics['expired'] += 1
+                    logger.warning(f"[LOCK] Lease expired for {lock_name}; handing over to next waiter")
+                    state.waiters.popleft()
+                    return _grant(state, lease)
+            if now >= deadline:
+                was_head = state.waiters[0] is ticket
+                state.waiters.remove(ticket)
+                if was_head:
+                    _wake_head(lock_name, state)
+                _metrics['timeouts'] += 1
+                raise TimeoutError(f"Could not acquire lock for {lock_name}")
+            wake_at = deadline
+            if state.token is not None and state.waiters[0] is ticket:
+                wake_at = min(wake_at, state.expires_at)
+        ticket.wait(max(wake_at - now, 0.0))
+        ticket.clear()
+
+
+def _release_local(lock_name, token):
+    with _guard:
+        state = _keys.get(lock_name)
+        if state is None or state.token != token:
+            # 期限切れで次の待ち手へ引き継がれたあと。
+            logger.warning(f"[LOCK] Released {lock_name} after its lease had been handed over")
+            return
+        state.token = None
+        _wake_head(lock_name, state)
+
+
 @contextlib.contextmanager
-def file_lock(lock_name, timeout=5):
-    """
-    ファイルベースの簡易排他ロック
-    :param lock_name: ロック識別子 (例: room_name)
-    :param timeout: ロック取得のタイムアウト秒数
-    """
+def _fcntl_lock(lock_name, deadline):
     ensure_lock_dir()
-    lock_path = os.path.join(LOCK_DIR, f"{lock_name}.lock")
-    start_time = time.time()
-    acquired = False
-
+    fd = os.open(os.path.join(LOCK_DIR, f"{lock_name}.lock"), os.O_CREAT | os.O_RDWR)
     try:
+        delay = _FCNTL_BACKOFF[0]
         while True:
             try:
-                # O_CREAT | O_EXCL でアトミックにファイル作成
-                # 既に存在する場合は FileExistsError (OSError) が発生
-                fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_RDWR)
-                os.close(fd)
-                acquired = True
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
                 break
-            except OSError:
-                # ロックファイルが存在する場合
-                if time.time() - start_time > timeout:
-                    logger.warning(f"[LOCK] Timeout expanding lock for {lock_name}")
-                    # タイムアウト時はロック取得失敗として処理するか、強制削除するか
-                    # ここでは安全のため例外を投げる
+            except BlockingIOError:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    _metrics['timeouts'] += 1
                     raise TimeoutError(f"Could not acquire lock for {lock_name}")
-                time.sleep(0.1)
+                time.sleep(min(delay, remaining))
+                delay = min(delay * 2, _FCNTL_BACKOFF[1])
+        try:
+            yield
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+    finally:
+        # ファイルは消さない（消すと別プロセスが別 inode をロックしてしまう）。
+        os.close(fd)
 
-        yield True
 
-    finally:
-        if acquired:
+def _postgres_engine():
+    try:
+        from flask import has_app_context
+        if not has_app_context():
+            return None
+        from extensions import db
+        engine = db.engine
+    except Exception:
+        return None
+    return engine if engine.dialect.name == 'postgresql' else None
+
+
+@contextlib.contextmanager
+def _postgres_lock(lock_name, deadline):
+    engine = _postgres_engine()
+    if engine is None:
+        yield
+        return
+    from sqlalchemy import text
+    from sqlalchemy.exc import OperationalError
+    key = zlib.crc32(f"gemtrpg:{lock_name}".encode('utf-8'))
+    timeout_ms = max(1, int((deadline - time.monotonic()) * 1000))
+    # トランザクション終了（またはセッション切断）でロックが外れる。
+    with engine.connect() as conn, conn.begin():
+        conn.execute(text("SELECT set_config('lock_timeout', :ms, true)"), {'ms': f"{timeout_ms}ms"})
+        try:
+            conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {'key': key})
+        except OperationalError as e:
+            _metrics['timeouts'] += 1
+            raise TimeoutError(f"Could not acquire lock for {lock_name}") from e
+        yield
+
+
+def _process_lock(lock_name, deadline):
+    if _BACKEND == 'fcntl' and fcntl is not None:
+        return _fcntl_lock(lock_name, deadline)
+    if _BACKEND == 'postgres':
+        return _postgres_lock(lock_name, deadline)
+    return contextlib.nullcontext()
+
+
+@contextlib.contextmanager
+def file_lock(lock_name, timeout=5, lease=None):
+    """
+    名前付きの排他ロック
+    :param lock_name: ロック識別子 (例: room_name)
+    :param timeout: ロック取得のタイムアウト秒数（超えたら TimeoutError）
+    :param lease: 保持の期限秒数（既定は LOCK_LEASE_SECONDS）
+    """
+    started = time.monotonic()
+    deadline = started + timeout
+    token = _acquire_local(lock_name, timeout, _LEASE_SECONDS if lease is None else lease)
+    try:
+        with _process_lock(lock_name, deadline):
+            acquired = time.monotonic()
+            wait_ms = (acquired - started) * 1000.0
+            _metrics['acquired'] += 1
+            _metrics['wait_ms_total'] += wait_ms
+            _metrics['max_wait_ms'] = max(_metrics['max_wait_ms'], wait_ms)
             try:
-                os.remove(lock_path)
-            except OSError:
-                pass
+                yield True
+            finally:
+                _metrics['max_held_ms'] = max(_metrics['max_held_ms'], (time.monotonic() - acquired) * 1000.0)
+    finally:
+        _release_local(lock_name, token)
@@ -5,14 +5,25 @@ import logging
 import os
 import sys
 import time
+from datetime import datetime
 from dotenv import load_dotenv
+from sqlalchemy.orm.attributes import flag_modified
 
 # パフォーマンス計測（PERF_LOG=1 のときのみ DB 書込時間を出力）
 _PERF_LOG = os.environ.get('PERF_LOG') == '1'
 
+# セクション行の保存形式。'zlib'（既定）は payload 列へ形式番号付きで圧縮保存、
+# 'json' は従来通り data 列へ JSON のまま保存する。読み込みはどちらの行も読める。
+_SECTION_STORAGE = os.environ.get('ROOM_STATE_STORAGE', 'zlib').strip().lower()
+
 # ★ extensions から db と all_skill_data をインポートするように変更
 from extensions import db, all_skill_data
-from models import Room
+from models import Room, RoomStateJournal, RoomStateSection
+from manager.room_sections import (
+    ALL_SECTIONS, CORE_SECTION, encode_section, merge_sections, normalize_sections, pack_section,
+    split_state, unpack_section,
+)
+from manager import catalog_registry, skill_catalog
 from manager.cache_paths import (
     SKILLS_CACHE_FILE,
     LEGACY_SKILLS_CACHE_FILE,
@@ -154,6 +165,8 @@ def fetch_and_save_sheets_data():
     # 最後に本物の all_skill_data を更新
     all_skill_data.clear()
     all_skill_data.update(temp_skill_data)
+    skill_catalog.rebuild(all_skill_data)
+    catalog_registry.publish(catalog_registry.SKILLS, all_skill_data)
     # === ▲▲▲ 修正ここまで ▲▲▲
 
     try:
@@ -174,6 +187,8 @@ def load_skills_from_cache():
         # === ▼▼▼ 修正: 辞書の中身を更新する ▼▼▼
         all_skill_data.clear()
         all_skill_data.update(data)
+        skill_catalog.rebuild(all_skill_data)
+        catalog_registry.publish(catalog_registry.SKILLS, all_skill_data)
         # === ▲▲▲ 修正ここまで ▲▲▲
 
         return all_skill_data
@@ -183,15 +198,144 @@ def load_skills_from_cache():
 
 # === ▼▼▼ DB対応: ルームの読み書き ▼▼▼ ===
 
+# room.id -> {section: digest}。最後にコミットできたセクション内容のハッシュで、
+# 一致するセクションは書き直さない。同名ルームの作り直しで取り違えないよう id で持つ。
+_section_digests = {}
+
+
+def _section_rows_by_room(room_ids):
+    rows = {}
+    if not room_ids:
+        return rows
+    query = (
+        db.session.query(
+            RoomStateSection.room_id, RoomStateSection.section,
+            RoomStateSection.data, RoomStateSection.payload,
+        )
+        .filter(RoomStateSection.room_id.in_(list(room_ids)))
+    )
+    for room_id, section, data, payload in query:
+        if payload is not None:
+            data = unpack_section(payload)
+        rows.setdefault(room_id, []).append((section, data))
+    return rows
+
+
+def load_room_data(room):
+    """Room 行（core または移行前の全量）とセクション行からルーム状態を組み立てる。"""
+    rows = _section_rows_by_room([room.id]).get(room.id, [])
+    return merge_sections(room.data, rows)
+
+
+def load_rooms_data(rooms):
+    """複数ルーム分を {room.id: state} で返す（セクション行は1クエリでまとめて引く）。"""
+    rooms = list(rooms)
+    section_rows = _section_rows_by_room([r.id for r in rooms])
+    return {r.id: merge_sections(r.data, section_rows.get(r.id, [])) for r in rooms}
+
+
+def _section_columns(part, encoded):
+    """保存形式に応じた {data, payload}。片方は必ず None にして古い形式を残さない。"""
+    if _SECTION_STORAGE == 'json':
+        return {'data': part, 'payload': None}
+    return {'data': None, 'payload': pack_section(encoded)}
+
+
+def _upsert_section(room_id, section, part, encoded, now):
+    columns = _section_columns(part, encoded)
+    result = db.session.execute(
+        db.update(RoomStateSection)
+        .where(RoomStateSection.room_id == room_id, RoomStateSection.section == section)
+        .values(updated_at=now, **columns)
+    )
+    if not result.rowcount:
+        db.session.add(RoomStateSection(room_id=room_id, section=section, updated_at=now, **columns))
+
+
+def _wanted_sections(room_id, sections):
+    """(既知digest, 書き込み候補)。このプロセスで未書込のルームは全セクションが候補。"""
+    known = _section_digests.get(room_id)
+    return known, (normalize_sections(sections) if known is not None else set(ALL_SECTIONS))
+
+
+def _write_section_rows(room_id, parts, wanted, known):
+    written = {}
+    now = datetime.utcnow()
+    for section in wanted:
+        if section == CORE_SECTION:
+            continue
+        part = parts.get(section, {})
+        encoded, digest = encode_section(part)
+        if known is not None and known.get(section) == digest:
+            continue
+        _upsert_section(room_id, section, part, encoded, now)
+        written[section] = digest
+        if known is not None:
+            # コミットを確認するまでは既知の内容として扱わない。
+            known.pop(section, None)
+    return written
+
+
+def write_room_sections(room, room_state, sections=None):
+    """変更のあったセクションだけを書く（commit は呼び出し側）。
+
+    sections は書き込み候補（None は全部）。候補でも前回コミット時と内容が
+    同じセクションは飛ばす。このプロセスでまだ一度も書いていないルームは
+    全セクションを書き、Room.data を core だけの形へ移行する。
+    戻り値の {section: digest} は commit 成功後に remember_section_digests へ渡す。
+    """
+    known, wanted = _wanted_sections(room.id, sections)
+    parts = split_state(room_state, wanted)
+    written = {}
+    if CORE_SECTION in wanted:
+        _encoded, digest = encode_section(parts[CORE_SECTION])
+        if known is None or known.get(CORE_SECTION) != digest:
+            room.data = parts[CORE_SECTION]
+            # ★ Explicitly mark as modified for JSON field changes
+            flag_modified(room, "data")
+            written[CORE_SECTION] = digest
+            if known is not None:
+                known.pop(CORE_SECTION, None)
+    written.update(_write_section_rows(room.id, parts, wanted, known))
+    return written
+
+
+def update_room_state(room_name, room_state, sections=None):
+    """既存ルームへ変更セクションを書く（commit は呼び出し側）。
+
+    UPDATE rooms SET data=:core WHERE name=:name RETURNING id の1文で
+    存在確認と core（小さな値だけ）の書き込みを兼ねるので、事前の SELECT は要らない。
+    ルームが無ければ None、あれば (room_id, {section: digest}) を返す。
+    """
+    parts = split_state(room_state)
+    core = parts[CORE_SECTION]
+    room_id = db.session.execute(
+        db.update(Room)
+        .where(Room.name == room_name)
+        .values(data=core)
+        .returning(Room.id)
+        .execution_options(synchronize_session=False)
+    ).scalar()
+    if room_id is None:
+        return None
+    known, wanted = _wanted_sections(room_id, sections)
+    written = {CORE_SECTION: encode_section(core)[1]}
+    if known is not None:
+        known.pop(CORE_SECTION, None)
+    written.update(_write_section_rows(room_id, parts, wanted, known))
+    return room_id, written
+
+
+def remember_section_digests(room_id, written):
+    _section_digests.setdefault(room_id, {}).update(written or {})
+
+
 def read_saved_rooms():
     """DBから全ルームを取得して辞書形式で返す"""
     try:
         rooms = Room.query.all()
-        rooms_data = {}
-        for r in rooms:
-            # DBのJSONデータをそのまま辞書として展開
-            rooms_data[r.name] = r.data
-        return rooms_data
+        states = load_rooms_data(rooms)
+        return {r.name: states[r.id] for r in rooms}
     except Exception as e:
         print(f"[ERROR] DB Read Error: {e}")
         return {}
@@ -203,7 +347,7 @@ def read_saved_room(room_name):
     """
     try:
         room = Room.query.filter_by(name=room_name).first()
-        return room.data if room else None
+        return load_room_data(room) if room else None
     except Exception as e:
         print(f"[ERROR] DB Read Error ({room_name}): {e}")
         try:
@@ -272,30 +416,34 @@ def read_saved_rooms_with_owners():
             pass
         return []
 
-def save_room_to_db(room_name, room_state, update_only=False):
+def save_room_to_db(room_name, room_state, update_only=False, sections=None):
     """特定のルームをDBに保存（新規作成 or 更新）。
 
     update_only=True のときは既存ルームの更新のみ行い、存在しなければ作成しない。
     デバウンス自動保存が削除直後のルームを gm_pin_hash 等を欠落させたまま
     復活させる事故を防ぐために使う。
+    sections を渡すとそのセクション（room_sections 参照）だけを書き込み候補にする。
     """
     _t0 = time.perf_counter() if _PERF_LOG else None
     try:
-        room = Room.query.filter_by(name=room_name).first()
-        if room:
-            room.data = room_state
-            # ★ Explicitly mark as modified for JSON field changes
-            from sqlalchemy.orm.attributes import flag_modified
-            flag_modified(room, "data")
-        elif update_only:
-            return False
-        else:
-            new_room = Room(name=room_name, data=room_state)
-            db.session.add(new_room)
+        result = update_room_state(room_name, room_state, sections)
+        if result is None:
+            if update_only:
+                db.session.rollback()
+                return False
+            room = Room(name=room_name, data={})
+            db.session.add(room)
+            db.session.flush()
+            result = (room.id, write_room_sections(room, room_state))
 
+        room_id, written = result
         db.session.commit()
+        remember_section_digests(room_id, written)
         if _t0 is not None:
-            logging.info("[PERF] save_room_to_db %s %.0fms", room_name, (time.perf_counter() - _t0) * 1000.0)
+            logging.info(
+                "[PERF] save_room_to_db %s %.0fms sections=%s",
+                room_name, (time.perf_counter() - _t0) * 1000.0, ",".join(sorted(written)) or "-",
+            )
         return True
     except Exception as e:
         db.session.rollback()
@@ -307,6 +455,9 @@ def delete_room_from_db(room_name):
     try:
         room = Room.query.filter_by(name=room_name).first()
         if room:
+            RoomStateSection.query.filter_by(room_id=room.id).delete()
+            RoomStateJournal.query.filter_by(room_id=room.id).delete()
+            _section_digests.pop(room.id, None)
             db.session.delete(room)
             db.session.commit()
             return True
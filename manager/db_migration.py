@@ -134,6 +134,33 @@ def run_auto_migration(app):
                     db.session.rollback()
                     logging.error(f"Migration Query Failed (room_members active index): {e}")
 
+            # request_logs のカーソル取得（room_id, log_id の降順走査）用。
+            if inspector.has_table('room_log_archives'):
+                try:
+                    db.session.execute(text(
+                        "CREATE INDEX IF NOT EXISTS ix_room_log_archives_room_log_id "
+                        "ON room_log_archives (room_id, log_id)"
+                    ))
+                    db.session.commit()
+                except Exception as e:
+                    db.session.rollback()
+                    logging.error(f"Migration Query Failed (room_log_archives log_id index): {e}")
+
+            # room_state_sections.payload（圧縮保存）。既存の JSON 行は次回書き込み時に移行される。
+            if inspector.has_table('room_state_sections'):
+                section_columns = [c['name'] for c in inspector.get_columns('room_state_sections')]
+                if 'payload' not in section_columns:
+                    logging.info("Run Auto Migration: Adding 'payload' column to room_state_sections")
+                    blob_type = 'BYTEA' if is_postgres else 'BLOB'
+                    try:
+                        db.session.execute(text(f"ALTER TABLE room_state_sections ADD COLUMN payload {blob_type}"))
+                        db.session.commit()
+                        logging.info("Auto Migration Completed: 'payload' column added.")
+                    except Exception as e:
+                        db.session.rollback()
+                        logging.error(f"Migration Query Failed: {e}")
+                        raise
+
             # image_registryテーブルが存在するか確認
             if not inspector.has_table('image_registry'):
                 return
@@ -1,12 +1,47 @@
 """
 ダイスロール処理モジュール
+
+ダイスコマンドは文字列ごとに一度だけ解析して DiceExpression にし（LRU キャッシュ）、
+ロールのたびには出目を振って式木を評価するだけにする。式の評価に eval は使わない。
 """
-import re
+import ast
+import operator
 import random
+import re
+from functools import lru_cache
+
 from manager.logs import setup_logger
 
+try:
+    import numpy as _np
+except ImportError:  # NumPy は任意（無ければ sample_totals は list を返す）
+    _np = None
+
 logger = setup_logger(__name__)
 
+_COMPILE_CACHE_SIZE = 1024
+
+_SKILL_NAME_RE = re.compile(r'【.*?】')
+_DICE_RE = re.compile(r'(\d+)d(\d+)')
+_CONSTANT_RE = re.compile(r'([+-]?)(\d+d\d+|\d+)')
+_UNSAFE_CHARS_RE = re.compile(r'[^-\d()/*+.]')
+
+_BIN_OPS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Pow: operator.pow,
+}
+_UNARY_OPS = {
+    ast.USub: operator.neg,
+    ast.UAdd: operator.pos,
+}
+# 配列のまま評価しても Python の数値と同じ結果になる演算
+_ARRAY_SAFE_OPS = (ast.Add, ast.Sub, ast.Mult, ast.USub, ast.UAdd)
+
+
 def _resolve_term_sign(expr, start_index):
     i = int(start_index) - 1
     while i >= 0 and expr[i].isspace():
@@ -16,6 +51,237 @@ def _resolve_term_sign(expr, start_index):
     return 1
 
 
+def _random_rolls(num_dice, num_faces):
+    if num_faces < 1:
+        return [0] * num_dice
+    return [random.randint(1, num_faces) for _ in range(num_dice)]
+
+
+class _InvalidExpression(Exception):
+    pass
+
+
+def _compile_node(node, array_safe):
+    """ast のノードを値リストを受け取る関数にする。未対応の構文は _InvalidExpression。"""
+    if isinstance(node, ast.Expression):
+        return _compile_node(node.body, array_safe)
+    if isinstance(node, ast.Constant) and type(node.value) in (int, float):
+        value = node.value
+        return (lambda _values: value), array_safe
+    if isinstance(node, ast.Name) and node.id.startswith('_d'):
+        index = int(node.id[2:])
+        return (lambda values: values[index]), array_safe
+    if isinstance(node, ast.BinOp) and type(node.op) in _BIN_OPS:
+        op = _BIN_OPS[type(node.op)]
+        left, array_safe = _compile_node(node.left, array_safe and isinstance(node.op, _ARRAY_SAFE_OPS))
+        right, array_safe = _compile_node(node.right, array_safe)
+        return (lambda values: op(left(values), right(values))), array_safe
+    if isinstance(node, ast.UnaryOp) and type(node.op) in _UNARY_OPS:
+        op = _UNARY_OPS[type(node.op)]
+        operand, array_safe = _compile_node(node.operand, array_safe)
+        return (lambda values: op(operand(values))), array_safe
+    raise _InvalidExpression(f"unsupported expression: {ast.dump(node)}")
+
+
+@lru_cache(maxsize=_COMPILE_CACHE_SIZE)
+def _compile_arithmetic(text):
+    """数字・演算子・括弧だけの式を (評価関数, 配列で評価できるか) にする。
+
+    解析できない式は (None, (例外クラス, args)) を返す（eval と同じく評価時に失敗扱い）。
+    例外オブジェクトそのものをキャッシュすると、投げ直すたびに traceback が伸びて
+    フレームを抱えたまま残るので、毎回作り直せる形で持つ。
+    """
+    try:
+        return _compile_node(ast.parse(text, mode='eval'), True)
+    except (SyntaxError, ValueError, _InvalidExpression) as exc:
+        return None, (type(exc), exc.args)
+
+
+class DiceTerm:
+    __slots__ = ('num', 'faces', 'sign', 'raw')
+
+    def __init__(self, num, faces, sign, raw):
+        self.num = num
+        self.faces = faces
+        self.sign = sign
+        self.raw = raw
+
+
+class DiceExpression:
+    """解析済みのダイス式。出目を振る関数を渡して何度でも評価できる。
+
+    ここから返す結果は毎回新しい dict なので書き換えてよいが、
+    DiceExpression 自体は共有物なので書き換えないこと。
+    """
+
+    __slots__ = (
+        'expression', 'terms', '_text_parts', '_sanitized_parts',
+        '_evaluator', '_array_safe', 'constant_total', '_constant_terms',
+    )
+
+    def __init__(self, expression):
+        self.expression = expression
+        matches = list(_DICE_RE.finditer(expression))
+        self.terms = tuple(
+            DiceTerm(int(m.group(1)), int(m.group(2)), _resolve_term_sign(expression, m.start()), m.group(0))
+            for m in matches
+        )
+        bounds = [0]
+        for m in matches:
+            bounds.extend((m.start(), m.end()))
+        bounds.append(len(expression))
+        self._text_parts = tuple(expression[bounds[i]:bounds[i + 1]] for i in range(0, len(bounds), 2))
+        self._sanitized_parts = tuple(_UNSAFE_CHARS_RE.sub('', part) for part in self._text_parts)
+
+        # 出目の合計が前後の数字とつながらなければ、合計を変数にした式を一度だけ解析しておく
+        isolated = all(
+            not (self._sanitized_parts[i][-1:].isdigit() or self._sanitized_parts[i][-1:] == '.'
+                 or self._sanitized_parts[i + 1][:1].isdigit() or self._sanitized_parts[i + 1][:1] == '.')
+            for i in range(len(self.terms))
+        )
+        if isolated:
+            placeholders = [f'_d{i}' for i in range(len(self.terms))]
+            self._evaluator, self._array_safe = _compile_arithmetic(self._join(self._sanitized_parts, placeholders))
+        else:
+            self._evaluator, self._array_safe = None, False
+
+        constant_terms = []
+        for token in _CONSTANT_RE.finditer(expression.replace(' ', '')):
+            sign_raw = token.group(1)
+            raw_value = token.group(2)
+            if 'd' in raw_value:
+                continue
+            constant_terms.append({
+                "raw": f"{sign_raw}{raw_value}",
+                "value": (-1 if sign_raw == '-' else 1) * int(raw_value),
+            })
+        self._constant_terms = tuple(constant_terms)
+        self.constant_total = sum(row["value"] for row in constant_terms)
+
+    @staticmethod
+    def _join(parts, fillers):
+        out = [parts[0]]
+        for filler, part in zip(fillers, parts[1:]):
+            out.append(filler)
+            out.append(part)
+        return ''.join(out)
+
+    def _evaluate(self, sums):
+        """出目の合計から最終値を出す。失敗したら例外をそのまま投げる。"""
+        if self._evaluator is not None:
+            return self._evaluator(sums)
+        evaluator, error = _compile_arithmetic(self._join(self._sanitized_parts, [str(s) for s in sums]))
+        if evaluator is None:
+            error_type, error_args = error
+            raise error_type(*error_args)
+        return evaluator(())
+
+    def total(self, sums):
+        """出目の合計だけから最終値を出す（詳細文字列を作らない高速版）。失敗時は 0。"""
+        try:
+            return self._evaluate(sums)
+        except Exception:
+            return 0
+
+    def roll(self, roll_fn=_random_rolls, on_error=None):
+        """ダイスを振って roll_dice と同じ形の結果を返す。
+
+        roll_fn(num_dice, num_faces) は出目のリストを返す。元の実装に合わせて
+        後ろのダイス項から振る。on_error(calc_str, exc) は評価失敗時に呼ぶ。
+        """
+        count = len(self.terms)
+        sums = [0] * count
+        roll_texts = [''] * count
+        dice_total = 0
+        dice_terms = []
+        for index in range(count - 1, -1, -1):
+            term = self.terms[index]
+            rolls = roll_fn(term.num, term.faces)
+            roll_sum = sum(rolls)
+            sums[index] = roll_sum
+            roll_texts[index] = f"({'+'.join(map(str, rolls))})"
+            dice_total += term.sign * int(roll_sum)
+            dice_terms.append({
+                "sign": term.sign,
+                "num": term.num,
+                "faces": term.faces,
+                "rolls": rolls,
+                "sum": int(roll_sum),
+                "raw": term.raw,
+            })
+
+        sum_texts = [str(s) for s in sums]
+        sanitized = self._join(self._sanitized_parts, sum_texts)
+        try:
+            total = self._evaluate(sums)
+        except Exception as e:
+            if on_error is not None:
+                on_error(self._join(self._text_parts, sum_texts), e)
+            total = 0
+
+        return {
+            "total": total,
+            "details": self._join(self._text_parts, roll_texts),
+            "breakdown": {
+                "expression": self.expression,
+                "sanitized_expression": sanitized,
+                "dice_total": int(dice_total),
+                "constant_total": int(self.constant_total),
+                "final_total": int(total),
+                "dice_terms": list(reversed(dice_terms)),
+                "constant_terms": [dict(row) for row in self._constant_terms],
+            }
+        }
+
+    def sample_totals(self, samples, rng=None):
+        """samples 回振った最終値を返す（モンテカルロ用）。
+
+        NumPy があり式が和・差・積だけなら出目を配列でまとめて振り ndarray を返す。
+        それ以外は list を返す。rng は numpy.random.Generator（NumPy 使用時）か
+        random.Random（それ以外）を渡せる。
+        """
+        samples = max(0, int(samples))
+        if _np is not None and self._evaluator is not None and self._array_safe:
+            gen = rng if isinstance(rng, _np.random.Generator) else _np.random.default_rng()
+            sums = []
+            for term in self.terms:
+                if term.faces < 1 or term.num <= 0:
+                    sums.append(_np.zeros(samples, dtype=_np.int64))
+                else:
+                    sums.append(gen.integers(1, term.faces + 1, size=(samples, term.num)).sum(axis=1))
+            result = self._evaluator(sums)
+            if _np.isscalar(result):
+                return _np.full(samples, result)
+            return result
+
+        randint = (rng if isinstance(rng, random.Random) else random).randint
+        faces = [(term.num, term.faces) for term in self.terms]
+        totals = []
+        for _ in range(samples):
+            sums = [
+                sum(randint(1, f) for _ in range(n)) if f >= 1 else 0
+                for n, f in faces
+            ]
+            totals.append(self.total(sums))
+        return totals
+
+
+@lru_cache(maxsize=_COMPILE_CACHE_SIZE)
+def compile_dice(expression):
+    """計算部分（スキル名を除いた式）を DiceExpression にする。"""
+    return DiceExpression(expression)
+
+
+@lru_cache(maxsize=_COMPILE_CACHE_SIZE)
+def compile_command(cmd_str):
+    """ダイスコマンド文字列（【スキル名】付きでもよい）を DiceExpression にする。"""
+    return compile_dice(_SKILL_NAME_RE.sub('', cmd_str).strip())
+
+
+def _log_eval_error(calc_str, exc):
+    logger.error(f"Failed to evaluate '{calc_str}': {exc}")
+
+
 def roll_dice(cmd_str):
     """
     ダイスコマンド文字列を解析してロールを実行する
@@ -33,83 +299,14 @@ def roll_dice(cmd_str):
         >>> roll_dice("5+2d6 【攻撃】")
         {"total": 14, "details": "5+(3+6)"}
     """
-    # スキル名部分（【...】）を除去
-    calc_str = re.sub(r'【.*?】', '', cmd_str).strip()
-    details_str = calc_str
-    original_calc = calc_str
-
-    dice_total = 0
-    dice_terms = []
-
-    # ダイス表記を検索 (例: 2d6, 1d4)
-    dice_regex = r'(\d+)d(\d+)'
-    matches = list(re.finditer(dice_regex, original_calc))
-
-    # 逆順で処理（文字列置換のインデックスずれ防止）
-    for match in reversed(matches):
-        num_dice = int(match.group(1))
-        num_faces = int(match.group(2))
-        sign = _resolve_term_sign(original_calc, match.start())
-
-        if num_faces < 1:
-            rolls = [0] * num_dice
-        else:
-            rolls = [random.randint(1, num_faces) for _ in range(num_dice)]
-
-        roll_sum = sum(rolls)
-        roll_details = f"({'+'.join(map(str, rolls))})"
-
-        # 文字列を置換
-        start, end = match.start(), match.end()
-        details_str = details_str[:start] + roll_details + details_str[end:]
-        calc_str = calc_str[:start] + str(roll_sum) + calc_str[end:]
-        dice_total += sign * int(roll_sum)
-        dice_terms.append({
-            "sign": sign,
-            "num": num_dice,
-            "faces": num_faces,
-            "rolls": rolls,
-            "sum": int(roll_sum),
-            "raw": match.group(0),
-        })
-
-    # 最終計算（安全な文字のみ評価）
-    try:
-        # 数字、演算子、括弧のみを残す
-        sanitized = re.sub(r'[^-\d()/*+.]', '', calc_str)
-        total = eval(sanitized)
-    except Exception as e:
-        logger.error(f"Failed to evaluate '{calc_str}': {e}")
-        total = 0
-
-    constant_total = 0
-    constant_terms = []
-    for token in re.finditer(r'([+-]?)(\d+d\d+|\d+)', original_calc.replace(' ', '')):
-        sign_raw = token.group(1)
-        raw_value = token.group(2)
-        sign = -1 if sign_raw == '-' else 1
-        if 'd' in raw_value:
-            continue
-        try:
-            value = sign * int(raw_value)
-        except Exception:
-            continue
-        constant_total += value
-        constant_terms.append({
-            "raw": f"{sign_raw}{raw_value}",
-            "value": value,
-        })
-
-    return {
-        "total": total,
-        "details": details_str,
-        "breakdown": {
-            "expression": original_calc,
-            "sanitized_expression": sanitized if 'sanitized' in locals() else "",
-            "dice_total": int(dice_total),
-            "constant_total": int(constant_total),
-            "final_total": int(total),
-            "dice_terms": list(reversed(dice_terms)),
-            "constant_terms": constant_terms,
-        }
-    }
+    return compile_command(cmd_str).roll(on_error=_log_eval_error)
+
+
+def roll_dice_many(cmd_strs):
+    """複数のダイスコマンドをまとめて振る。結果は roll_dice と同じ形のリスト。"""
+    return [compile_command(cmd_str).roll(on_error=_log_eval_error) for cmd_str in cmd_strs]
+
+
+def sample_dice_totals(cmd_str, samples, rng=None):
+    """1 つのダイスコマンドを samples 回振った最終値（DiceExpression.sample_totals 参照）。"""
+    return compile_command(cmd_str).sample_totals(samples, rng=rng)
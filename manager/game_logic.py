@@ -66,16 +66,18 @@ def _stable_get_status_value(char_obj, status_name):
             primary = fn(char_obj, status_name)
         except Exception:
             primary = None
-        fallback = _fallback_get_status_value(char_obj, status_name)
         try:
             primary_int = int(primary)
         except Exception:
             primary_int = primary
         # Prefer fallback only when the injected helper misses existing state/param values.
+        # fallback は states を線形に探すので、必要なとき（None か 0）だけ求める。
         if primary is None:
-            return fallback
-        if isinstance(primary_int, int) and primary_int == 0 and fallback != 0:
-            return fallback
+            return _fallback_get_status_value(char_obj, status_name)
+        if isinstance(primary_int, int) and primary_int == 0:
+            fallback = _fallback_get_status_value(char_obj, status_name)
+            if fallback != 0:
+                return fallback
         return primary_int
     return _fallback_get_status_value(char_obj, status_name)
 
@@ -84,6 +86,17 @@ def get_status_value(char_obj, status_name):
     return _stable_get_status_value(char_obj, status_name)
 
 
+def _exact_state_row(mod, char_obj, states, status_name):
+    """name が status_name と一致する最初の states 行。"""
+    find = getattr(mod, "_find_state_row", None)
+    if callable(find):
+        # 正規化名で最初に当たる行の名前が一致していれば、それが完全一致の最初の行
+        row = find(char_obj, status_name)
+        if isinstance(row, dict) and row.get("name") == status_name:
+            return row
+    return next((s for s in states if isinstance(s, dict) and s.get("name") == status_name), None)
+
+
 def _stable_set_status_value(char_obj, status_name, value):
     mod = _utils_module()
     fn = getattr(mod, "set_status_value", None) if mod else None
@@ -104,7 +117,7 @@ def _stable_set_status_value(char_obj, status_name, value):
         if not isinstance(states, list):
             states = []
             char_obj["states"] = states
-        hit = next((s for s in states if isinstance(s, dict) and s.get("name") == status_name), None)
+        hit = _exact_state_row(mod, char_obj, states, status_name)
         if hit is None:
             states.append({"name": status_name, "value": expected})
         else:
@@ -366,9 +379,6 @@ def process_skill_effects(
 
     get_simulated_char = session.get_simulated_char
 
-    # Original hit target (before per-effect target remapping like target=self).
-    original_sim_target = get_simulated_char(target) if target else None
-    session.original_sim_target = original_sim_target
 
     _resolve_buff_count_local = _skill_effect_helpers.resolve_buff_count
     _find_sim_buff = _skill_effect_helpers.find_sim_buff
@@ -389,6 +399,7 @@ def process_skill_effects(
             return
 
         sim_actor = get_simulated_char(actor)
+        original_sim_target = session.original_sim_target
         sim_target = original_sim_target if isinstance(original_sim_target, dict) else get_simulated_char(target)
         if not isinstance(sim_actor, dict) or not isinstance(sim_target, dict):
             return
@@ -6,6 +6,7 @@ from io import StringIO
 
 import requests
 
+from manager import catalog_registry
 from manager.cache_paths import (
     GLOSSARY_CACHE_FILE,
     LEGACY_GLOSSARY_CACHE_FILE,
@@ -151,6 +152,7 @@ class GlossaryCatalogLoader:
                 all_glossary_data.update(terms)
             except Exception:
                 pass
+            catalog_registry.publish(catalog_registry.GLOSSARY, terms)
         return terms
 
     def load_terms(self):
@@ -165,6 +167,8 @@ class GlossaryCatalogLoader:
 
         all_glossary_data.clear()
         all_glossary_data.update(self.terms)
+        if self.terms:
+            catalog_registry.publish(catalog_registry.GLOSSARY, self.terms)
         return self.terms
 
     def get_term(self, term_id):
@@ -2,6 +2,7 @@ import requests
 import csv
 import json
 from io import StringIO
+from manager import catalog_registry
 from manager.logs import setup_logger
 from manager.cache_paths import (
     ITEMS_CACHE_FILE,
@@ -18,7 +19,7 @@ class ItemLoader:
     """アイテムのCSV URL読み込み"""
 
     def __init__(self):
-        self._cache = None
+        catalog_registry.register_source(catalog_registry.ITEMS, self._load_source)
 
     def fetch_from_csv(self):
         """CSV URLからアイテムを取得"""
@@ -62,7 +63,6 @@ class ItemLoader:
                     continue
 
             logger.info(f"{len(items)} 件のアイテムを読み込みました")
-            self._cache = items
 
             # キャッシュに保存
             self._save_cache(items)
@@ -92,21 +92,23 @@ class ItemLoader:
             logger.error(f"キャッシュ読み込みエラー: {e}")
             return None
 
-    def load_items(self, force_refresh=False):
-        """アイテムをロード（キャッシュ優先）"""
-        if self._cache is not None and not force_refresh:
-            return self._cache
+    def _load_source(self):
+        """キャッシュファイル（無ければ CSV URL）から読む"""
+        cached = self._load_cache()
+        if cached:
+            logger.info(f"キャッシュから {len(cached)} 件のアイテムを読み込みました")
+            return cached
+        return self.fetch_from_csv()
 
-        # まずキャッシュを試す
+    def load_items(self, force_refresh=False):
+        """アイテムをロード（読み込み済みならカタログ登録簿のものを返す）"""
         if not force_refresh:
-            cached = self._load_cache()
-            if cached:
-                self._cache = cached
-                logger.info(f"キャッシュから {len(cached)} 件のアイテムを読み込みました")
-                return cached
+            return catalog_registry.get(catalog_registry.ITEMS, {})
 
-        # キャッシュがない場合はCSV URLから取得
-        return self.fetch_from_csv()
+        items = self.fetch_from_csv()
+        if items:
+            catalog_registry.publish(catalog_registry.ITEMS, items)
+        return items
 
     def get_item(self, item_id):
         """特定のアイテムを取得"""
@@ -272,6 +272,28 @@ def normalize_skill_rule_object(rule_obj, *, source_path="rule_data", strict=PHA
     return out
 
 
+def select_skill_rule_source(skill_data):
+    for key in SKILL_RULE_SOURCE_KEYS:
+        if key not in skill_data:
+            continue
+        raw = skill_data.get(key)
+        if raw in [None, ""]:
+            continue
+        return raw, key
+
+    # fallback scan: keep compatibility with legacy sheets embedding JSON in unknown column keys
+    for raw in skill_data.values():
+        if not isinstance(raw, str):
+            continue
+        text = raw.strip()
+        if not text.startswith("{"):
+            continue
+        if ('"effects"' not in text) and ('"cost"' not in text) and ('"tags"' not in text):
+            continue
+        return raw, "embedded_json"
+    return None, None
+
+
 def extract_and_normalize_skill_rule_data(
     skill_data,
     *,
@@ -281,32 +303,7 @@ def extract_and_normalize_skill_rule_data(
     if not isinstance(skill_data, dict):
         return {"schema": SCHEMA_SKILL_RULE_V2, "effects": [], "cost": []}
 
-    source_raw = None
-    source_key = None
-    for key in SKILL_RULE_SOURCE_KEYS:
-        if key not in skill_data:
-            continue
-        raw = skill_data.get(key)
-        if raw in [None, ""]:
-            continue
-        source_raw = raw
-        source_key = key
-        break
-
-    if source_raw is None:
-        # fallback scan: keep compatibility with legacy sheets embedding JSON in unknown column keys
-        for raw in skill_data.values():
-            if not isinstance(raw, str):
-                continue
-            text = raw.strip()
-            if not text.startswith("{"):
-                continue
-            if ('"effects"' not in text) and ('"cost"' not in text) and ('"tags"' not in text):
-                continue
-            source_raw = raw
-            source_key = "embedded_json"
-            break
-
+    source_raw, source_key = select_skill_rule_source(skill_data)
     if source_raw is None:
         row = {"schema": SCHEMA_SKILL_RULE_V2, "effects": [], "cost": []}
         append_audit_verbose(
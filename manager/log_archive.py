@@ -2,6 +2,8 @@
 from datetime import datetime, timezone
 import json
 
+from sqlalchemy import func, insert
+
 from extensions import db
 from manager.logs import setup_logger
 from models import Room, RoomLogArchive
@@ -22,9 +24,41 @@ def _normalize_log_payload(log):
     return dict(log) if isinstance(log, dict) else {"message": str(log or "")}
 
 
-def archive_room_logs(room_name, logs):
+def _archive_values(room_id, room_name, row):
+    return {
+        "room_id": room_id,
+        "room_name": room_name,
+        "log_id": _as_int_or_none(row.get("log_id")),
+        "timestamp_ms": _as_int_or_none(row.get("timestamp")),
+        "log_type": str(row.get("type") or "")[:50] or None,
+        "user_name": str(row.get("user") or "")[:100] or None,
+        "secret": bool(row.get("secret", False)),
+        "message": str(row.get("message") or ""),
+        "payload": row,
+    }
+
+
+def insert_archive_rows(room_id, room_name, logs):
+    """Bulk-insert archive rows inside the caller's transaction (no commit, no rollback).
+
+    Returns the number of rows written. Errors propagate so that a batched
+    room flush can roll back every room in the transaction together.
+    """
+    rows = [_normalize_log_payload(log) for log in (logs or [])]
+    if rows:
+        db.session.execute(
+            insert(RoomLogArchive),
+            [_archive_values(room_id, room_name, row) for row in rows],
+        )
+    return len(rows)
+
+
+def archive_room_logs(room_name, logs, commit=True):
     """Persist old logs before in-memory trimming.
 
+    Rows are written with a single bulk INSERT. With commit=False the caller
+    owns the transaction.
+
     Returns True when there is nothing to archive or archival succeeds. Returns
     False when the room no longer exists or DB persistence fails.
     """
@@ -32,25 +66,15 @@ def archive_room_logs(room_name, logs):
     if not rows:
         return True
 
-    room = Room.query.filter_by(name=room_name).first()
+    room = db.session.query(Room.id, Room.name).filter_by(name=room_name).first()
     if room is None:
         logger.warning("[LogArchive] room not found; skip archive room=%s count=%d", room_name, len(rows))
         return False
 
     try:
-        for row in rows:
-            db.session.add(RoomLogArchive(
-                room_id=room.id,
-                room_name=room.name,
-                log_id=_as_int_or_none(row.get("log_id")),
-                timestamp_ms=_as_int_or_none(row.get("timestamp")),
-                log_type=str(row.get("type") or "")[:50] or None,
-                user_name=str(row.get("user") or "")[:100] or None,
-                secret=bool(row.get("secret", False)),
-                message=str(row.get("message") or ""),
-                payload=row,
-            ))
-        db.session.commit()
+        insert_archive_rows(room.id, room.name, rows)
+        if commit:
+            db.session.commit()
         return True
     except Exception as exc:
         db.session.rollback()
@@ -75,6 +99,44 @@ def get_archived_room_logs(room_name):
     return [row.to_log_dict() for row in rows]
 
 
+def _archive_query_for_room(room_name):
+    return (
+        RoomLogArchive.query
+        .join(Room, Room.id == RoomLogArchive.room_id)
+        .filter(Room.name == room_name, RoomLogArchive.log_id.isnot(None))
+    )
+
+
+def get_last_archived_log_id(room_name):
+    """Return the highest archived log_id for the room, or None when nothing is archived."""
+    value = (
+        db.session.query(func.max(RoomLogArchive.log_id))
+        .join(Room, Room.id == RoomLogArchive.room_id)
+        .filter(Room.name == room_name)
+        .scalar()
+    )
+    return _as_int_or_none(value)
+
+
+def page_archived_logs(room_name, before_log_id=None, after_log_id=None, limit=100):
+    """Return up to ``limit`` archived logs just below ``before_log_id`` (oldest first).
+
+    ``after_log_id`` excludes rows at or below it (logs cleared by the GM).
+    Cursor paging walks the (room_id, log_id) index, so a page costs the
+    same no matter how long the room history is.
+    """
+    limit = max(0, int(limit or 0))
+    if limit <= 0:
+        return []
+    query = _archive_query_for_room(room_name)
+    if before_log_id is not None:
+        query = query.filter(RoomLogArchive.log_id < int(before_log_id))
+    if after_log_id:
+        query = query.filter(RoomLogArchive.log_id > int(after_log_id))
+    rows = query.order_by(RoomLogArchive.log_id.desc()).limit(limit).all()
+    return [row.to_log_dict() for row in reversed(rows)]
+
+
 def _log_sort_key(log):
     if not isinstance(log, dict):
         return (0, 0)
@@ -17,10 +17,13 @@ from models import User, Room, RoomMember
 
 def _iter_room_states():
     """(Room, state dict) を列挙する。メモリ上の状態を優先し、無ければDBのdata。"""
-    for room in Room.query.all():
+    from manager.data_manager import load_rooms_data
+    rooms = Room.query.all()
+    saved_states = load_rooms_data(r for r in rooms if not active_room_states.get(r.name))
+    for room in rooms:
         state = active_room_states.get(room.name)
         if not state:
-            state = room.data or {}
+            state = saved_states.get(room.id) or {}
         yield room, (state or {})
 
 
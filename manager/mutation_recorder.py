@@ -0,0 +1,57 @@
+"""キャラクター書き換えの記録。
+
+タイミング効果の前後で全キャラクターをスナップショットして比べる代わりに、
+ステータス・バフの更新関数が「これから書き換えるキャラクター」を record_touch で
+報告し、記録中のレコーダーは最初に報告された時点のスナップショットだけを控える。
+後で変化を見るのは報告されたキャラクターだけで済む。
+
+レコーダーはスレッド（eventlet / gevent ではグリーンスレッド）ごとに積むので、
+並行する解決処理どうしは互いの書き換えを拾わない。
+"""
+import threading
+
+_local = threading.local()
+
+
+class MutationRecorder:
+    """with ブロックの間に報告されたキャラクターの変更前スナップショットを持つ。"""
+
+    def __init__(self, snapshot):
+        self._snapshot = snapshot
+        # id(char) -> (char, 変更前スナップショット)
+        self._before = {}
+
+    def __enter__(self):
+        stack = getattr(_local, 'stack', None)
+        if stack is None:
+            stack = _local.stack = []
+        stack.append(self)
+        return self
+
+    def __exit__(self, *_exc):
+        stack = getattr(_local, 'stack', None) or []
+        if self in stack:
+            stack.remove(self)
+        return False
+
+    def touch(self, char):
+        if isinstance(char, dict) and id(char) not in self._before:
+            self._before[id(char)] = (char, self._snapshot(char))
+
+    def before(self, char):
+        """報告済みなら変更前スナップショット、未報告なら None。"""
+        entry = self._before.get(id(char))
+        if entry is None or entry[0] is not char:
+            return None
+        return entry[1]
+
+    def __len__(self):
+        return len(self._before)
+
+
+def record_touch(char):
+    """char をこれから書き換える。記録中のレコーダーすべてに知らせる。"""
+    stack = getattr(_local, 'stack', None)
+    if stack:
+        for recorder in stack:
+            recorder.touch(char)
@@ -2,6 +2,7 @@ import requests
 import csv
 import json
 from io import StringIO
+from manager import catalog_registry
 from manager.logs import setup_logger
 from manager.cache_paths import (
     PASSIVES_CACHE_FILE,
@@ -18,7 +19,7 @@ class PassiveLoader:
     """特殊パッシブのCSV URL読み込み"""
 
     def __init__(self):
-        self._cache = None
+        catalog_registry.register_source(catalog_registry.PASSIVES, self._load_source)
 
     def fetch_from_csv(self):
         """CSV URLから特殊パッシブを取得"""
@@ -56,7 +57,6 @@ class PassiveLoader:
                     continue
 
             logger.info(f"{len(passives)} 件の特殊パッシブを読み込みました")
-            self._cache = passives
 
             # キャッシュに保存
             self._save_cache(passives)
@@ -86,21 +86,23 @@ class PassiveLoader:
             logger.error(f"キャッシュ読み込みエラー: {e}")
             return None
 
-    def load_passives(self, force_refresh=False):
-        """特殊パッシブをロード（キャッシュ優先）"""
-        if self._cache is not None and not force_refresh:
-            return self._cache
+    def _load_source(self):
+        """キャッシュファイル（無ければ CSV URL）から読む"""
+        cached = self._load_cache()
+        if cached:
+            logger.info(f"キャッシュから {len(cached)} 件の特殊パッシブを読み込みました")
+            return cached
+        return self.fetch_from_csv()
 
-        # まずキャッシュを試す
+    def load_passives(self, force_refresh=False):
+        """特殊パッシブをロード（読み込み済みならカタログ登録簿のものを返す）"""
         if not force_refresh:
-            cached = self._load_cache()
-            if cached:
-                self._cache = cached
-                logger.info(f"キャッシュから {len(cached)} 件の特殊パッシブを読み込みました")
-                return cached
+            return catalog_registry.get(catalog_registry.PASSIVES, {})
 
-        # キャッシュがない場合はCSV URLから取得
-        return self.fetch_from_csv()
+        passives = self.fetch_from_csv()
+        if passives:
+            catalog_registry.publish(catalog_registry.PASSIVES, passives)
+        return passives
 
     def get_passive(self, passive_id):
         """特定のパッシブを取得"""
@@ -0,0 +1,108 @@
+"""Socket.IO 配信ペイロードの文字列化キャッシュ。
+
+socketio.emit は渡された dict を emit のたびに JSON 化する。入室・再同期が
+集中すると、変わっていない同じルームを接続数だけ文字列化し直すことになるので、
+配信用の JSON 文字列を EncodedPayload に持たせてルーム単位で使い回す。
+
+EncodedPayload は dict のサブクラスで、サーバ側からは従来通り dict として読める。
+Packet の json モジュールを SocketJSON に差し替えると（app.init_extensions）、
+EncodedPayload は保持している文字列がそのまま埋め込まれる。差し替えていない
+環境でも通常の dict として正しく JSON 化される。
+
+キャッシュのキーは state の id・版番号・状態の世代・logs の世代で、引くだけなら
+state を文字列化しない（入室・再接続が集中しても、文字列化は変更後の最初の1回だけ）。
+状態の世代は save_specific_room_state と state_sync.advance_state が touch_state で、
+logs の世代は追記・消去のたびに touch_logs で進める。保存も配信もしない書き換えは
+次の保存・配信までキャッシュに反映されない。
+"""
+import json
+
+from manager.perf_counters import count_perf
+
+
+def encode(value):
+    return json.dumps(value, ensure_ascii=False, default=str, separators=(',', ':'))
+
+
+class EncodedPayload(dict):
+    """JSON 文字列化済みのペイロード（encoded に文字列を持つ dict）。"""
+    __slots__ = ('encoded',)
+
+    def __init__(self, value, encoded=None):
+        super().__init__(value)
+        self.encoded = encode(value) if encoded is None else encoded
+
+
+def append_fields(encoded_object, fields):
+    """JSON オブジェクト文字列の末尾へ [(キー, JSON文字列)] を足した文字列を返す。"""
+    if not fields:
+        return encoded_object
+    extra = ','.join(f'{json.dumps(key, ensure_ascii=False)}:{text}' for key, text in fields)
+    body = encoded_object[:-1]
+    return f"{body}{',' if body != '{' else ''}{extra}}}"
+
+
+class SocketJSON:
+    """python-socketio の Packet.json に使う json モジュール互換の差し替え。"""
+
+    @staticmethod
+    def dumps(obj, *args, **kwargs):
+        if isinstance(obj, EncodedPayload):
+            return obj.encoded
+        if isinstance(obj, list) and any(isinstance(item, EncodedPayload) for item in obj):
+            return '[' + ','.join(
+                item.encoded if isinstance(item, EncodedPayload) else json.dumps(item, *args, **kwargs)
+                for item in obj
+            ) + ']'
+        return json.dumps(obj, *args, **kwargs)
+
+    @staticmethod
+    def loads(*args, **kwargs):
+        return json.loads(*args, **kwargs)
+
+
+# room_name -> {'logs': int, 'state': int, 'views': {view: (key, value)}}
+_rooms = {}
+
+
+def _room(room_name):
+    entry = _rooms.get(room_name)
+    if entry is None:
+        entry = _rooms[room_name] = {'logs': 0, 'state': 0, 'views': {}}
+    return entry
+
+
+def touch_logs(room_name):
+    """ログを追記・消去したあとに呼ぶ。"""
+    _room(room_name)['logs'] += 1
+
+
+def logs_generation(room_name):
+    return _room(room_name)['logs']
+
+
+def touch_state(room_name):
+    """ルーム状態を書き換えたあと（保存要求・配信の版確定時）に呼ぶ。"""
+    _room(room_name)['state'] += 1
+
+
+def state_generation(room_name):
+    return _room(room_name)['state']
+
+
+def lookup(room_name, view, key):
+    cached = _room(room_name)['views'].get(view)
+    if cached is not None and cached[0] == key:
+        count_perf('payload_cache_hits')
+        return cached[1]
+    return None
+
+
+def store(room_name, view, key, value):
+    count_perf('payload_cache_misses')
+    _room(room_name)['views'][view] = (key, value)
+    return value
+
+
+def discard(room_name):
+    _rooms.pop(room_name, None)
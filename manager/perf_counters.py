@@ -0,0 +1,73 @@
+"""イベント単位の軽量カウンタ（PERF_LOG=1 のときのみ集計・出力）。
+
+Flask-SocketIO はイベントごとに request context を張るため、flask.g に積んだ
+値はそのイベント（HTTP なら1リクエスト）の間だけ生きる。teardown_request で
+
+    [PERF] counters socket join_room get_room_state=12 room_state_loads=1 db_queries=3
+
+のように出力するので、ホットパスの呼び出し回数やDBクエリ数の増減を
+Render の Logs で "[PERF] counters" を絞り込んで確認できる。
+"""
+import logging
+import os
+
+from flask import g, has_app_context, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+_PERF_LOG = os.environ.get('PERF_LOG') == '1'
+_query_listener_installed = False
+
+
+def is_enabled():
+    return _PERF_LOG
+
+
+def count_perf(name, amount=1):
+    """現在のイベントのカウンタ name を加算する（無効時・コンテキスト外は何もしない）。"""
+    if not _PERF_LOG or not has_app_context():
+        return
+    counters = g.get('_perf_counters')
+    if counters is None:
+        counters = {}
+        g._perf_counters = counters
+    counters[name] = counters.get(name, 0) + amount
+
+
+def get_perf_counters():
+    """現在のイベントで集計中のカウンタのコピーを返す。"""
+    if not has_app_context():
+        return {}
+    return dict(g.get('_perf_counters') or {})
+
+
+def _count_db_query(*_args, **_kwargs):
+    count_perf('db_queries')
+
+
+def _event_label():
+    if not has_request_context():
+        return 'background'
+    socket_event = getattr(request, 'event', None)
+    if isinstance(socket_event, dict) and socket_event.get('message'):
+        return f"socket {socket_event['message']}"
+    return f"{request.method} {request.path}"
+
+
+def _report_counters(_exc=None):
+    counters = g.pop('_perf_counters', None)
+    if not counters:
+        return
+    detail = ' '.join(f"{key}={value}" for key, value in sorted(counters.items()))
+    logging.info("[PERF] counters %s %s", _event_label(), detail)
+
+
+def install_perf_counters(flask_app):
+    """DBクエリ数の計測とイベント終了時の出力を登録する（PERF_LOG=1 のときのみ）。"""
+    global _query_listener_installed
+    if not _PERF_LOG:
+        return
+    if not _query_listener_installed:
+        event.listen(Engine, 'before_cursor_execute', _count_db_query)
+        _query_listener_installed = True
+    flask_app.teardown_request(_report_counters)
@@ -2,6 +2,7 @@ import requests
 import csv
 import json
 from io import StringIO
+from manager import catalog_registry
 from manager.logs import setup_logger
 from manager.character_tags import normalize_tag_ids
 from manager.cache_paths import (
@@ -43,7 +44,7 @@ class RadianceSkillLoader:
     """輝化スキルのCSV URL読み込み"""
 
     def __init__(self):
-        self._cache = None
+        catalog_registry.register_source(catalog_registry.RADIANCE, self._load_source)
 
     def fetch_from_csv(self):
         """CSV URLから輝化スキルを取得"""
@@ -90,7 +91,6 @@ class RadianceSkillLoader:
                     continue
 
             logger.info(f"{len(skills)} 件の輝化スキルを読み込みました")
-            self._cache = skills
 
             # キャッシュに保存
             self._save_cache(skills)
@@ -120,21 +120,23 @@ class RadianceSkillLoader:
             logger.error(f"キャッシュ読み込みエラー: {e}")
             return None
 
-    def load_skills(self, force_refresh=False):
-        """輝化スキルをロード（キャッシュ優先）"""
-        if self._cache is not None and not force_refresh:
-            return self._cache
+    def _load_source(self):
+        """キャッシュファイル（無ければ CSV URL）から読む"""
+        cached = self._load_cache()
+        if cached:
+            logger.info(f"キャッシュから {len(cached)} 件の輝化スキルを読み込みました")
+            return cached
+        return self.fetch_from_csv()
 
-        # まずキャッシュを試す
+    def load_skills(self, force_refresh=False):
+        """輝化スキルをロード（読み込み済みならカタログ登録簿のものを返す）"""
         if not force_refresh:
-            cached = self._load_cache()
-            if cached:
-                self._cache = cached
-                logger.info(f"キャッシュから {len(cached)} 件の輝化スキルを読み込みました")
-                return cached
+            return catalog_registry.get(catalog_registry.RADIANCE, {})
 
-        # キャッシュがない場合はCSV URLから取得
-        return self.fetch_from_csv()
+        skills = self.fetch_from_csv()
+        if skills:
+            catalog_registry.publish(catalog_registry.RADIANCE, skills)
+        return skills
 
     def get_skill(self, skill_id):
         """特定のスキルを取得"""
@@ -291,4 +291,8 @@ def transfer_owner(room_name, new_owner_id, *, acting_user_id=None, commit=True)
     room.owner_id = new_owner_id
     if commit:
         db.session.commit()
+    # get_room_state は owner_id をロード時にしか DB から読まないため、
+    # メモリ上のルーム状態へも反映する。循環インポート回避のため遅延インポート。
+    from manager.room_manager import refresh_room_owner
+    refresh_room_owner(room.name, new_owner_id)
     return True
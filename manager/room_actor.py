@@ -0,0 +1,182 @@
+"""ルーム単位の直列実行キュー（メールボックス）。
+
+状態を書き換えるソケットイベントは room_command でルームごとの FIFO に並び、
+先頭のものだけが実行される。同じルームのイベントは到着順に1つずつ進み、
+別ルームは互いに待たない。eventlet が DB 呼び出しや emit で途中で切り替わっても、
+同じルームの別ハンドラが割り込んで state を書き換えることはない。
+
+実行はイベントを受けたスレッド（green thread）のまま行い、順番を待つ間は
+Event で眠る（ポーリング・タイムアウト再試行はしない）。request / session /
+DB セッションはそのハンドラのものをそのまま使える。実行中のハンドラから
+同じルームのコマンドを呼んだ場合は入れ子としてそのまま実行する。
+
+  ROOM_ACTOR=0 … 直列化を無効にする（既定は有効）
+
+キューの深さ・待ち時間・実行時間は get_actor_metrics で参照でき、PERF_LOG=1 の
+ときはコマンドごとに [PERF] room_command を出力する。
+"""
+import functools
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from extensions import user_sids
+from manager.logs import setup_logger
+
+logger = setup_logger(__name__)
+
+_ENABLED = os.environ.get('ROOM_ACTOR', '1') != '0'
+_PERF_LOG = os.environ.get('PERF_LOG') == '1'
+
+
+class _Mailbox:
+    __slots__ = ('waiters', 'owner', 'nested')
+
+    def __init__(self):
+        # 先頭が実行中のコマンド。各要素は順番が来たら set される Event。
+        self.waiters = deque()
+        self.owner = None
+        self.nested = 0
+
+
+# room_name -> _Mailbox（待ち・実行中のコマンドがあるルームだけ持つ）
+_mailboxes = {}
+_guard = threading.Lock()
+
+_metrics = {
+    'commands': 0, 'nested': 0, 'max_depth': 0,
+    'wait_ms_total': 0.0, 'max_wait_ms': 0.0, 'run_ms_total': 0.0, 'max_run_ms': 0.0,
+}
+# コマンド名 -> {'count', 'total_ms', 'max_ms'}（待ち時間を含む所要時間）
+_command_metrics = {}
+
+
+def queue_depths():
+    """ルームごとの待ち・実行中コマンド数。"""
+    with _guard:
+        return {room_name: len(box.waiters) for room_name, box in _mailboxes.items()}
+
+
+def get_actor_metrics():
+    metrics = dict(_metrics)
+    count = metrics['commands']
+    metrics['avg_wait_ms'] = metrics['wait_ms_total'] / count if count else 0.0
+    metrics['avg_run_ms'] = metrics['run_ms_total'] / count if count else 0.0
+    metrics['queues'] = queue_depths()
+    metrics['by_command'] = {name: dict(entry) for name, entry in _command_metrics.items()}
+    return metrics
+
+
+def _record(room_name, name, depth, wait_ms, run_ms):
+    _metrics['commands'] += 1
+    _metrics['max_depth'] = max(_metrics['max_depth'], depth)
+    _metrics['wait_ms_total'] += wait_ms
+    _metrics['max_wait_ms'] = max(_metrics['max_wait_ms'], wait_ms)
+    _metrics['run_ms_total'] += run_ms
+    _metrics['max_run_ms'] = max(_metrics['max_run_ms'], run_ms)
+    entry = _command_metrics.setdefault(name, {'count': 0, 'total_ms': 0.0, 'max_ms': 0.0})
+    entry['count'] += 1
+    entry['total_ms'] += wait_ms + run_ms
+    entry['max_ms'] = max(entry['max_ms'], wait_ms + run_ms)
+    if _PERF_LOG:
+        logger.info(
+            "[PERF] room_command room=%s command=%s depth=%d wait=%.1fms run=%.1fms",
+            room_name, name, depth, wait_ms, run_ms,
+        )
+
+
+@contextmanager
+def room_turn(room_name, name='-'):
+    """room_name の順番が来るまで待ち、ブロックの間そのルームを専有する。"""
+    if not _ENABLED or not room_name:
+        yield
+        return
+    me = threading.get_ident()
+    with _guard:
+        box = _mailboxes.get(room_name)
+        if box is None:
+            box = _mailboxes[room_name] = _Mailbox()
+        if box.owner == me:
+            box.nested += 1
+            ticket = None
+        else:
+            ticket = threading.Event()
+            box.waiters.append(ticket)
+            depth = len(box.waiters)
+            if depth == 1:
+                ticket.set()
+    if ticket is None:
+        _metrics['nested'] += 1
+        try:
+            yield
+        finally:
+            with _guard:
+                box.nested -= 1
+        return
+
+    queued_at = time.perf_counter()
+    try:
+        ticket.wait()
+    except BaseException:
+        # 待っている間に green thread ごと止められた場合は列から抜ける。
+        with _guard:
+            was_head = box.waiters and box.waiters[0] is ticket
+            box.waiters.remove(ticket)
+            if was_head and box.waiters:
+                box.waiters[0].set()
+            elif not box.waiters:
+                _mailboxes.pop(room_name, None)
+        raise
+    with _guard:
+        box.owner = me
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        finished = time.perf_counter()
+        with _guard:
+            box.owner = None
+            box.waiters.popleft()
+            if box.waiters:
+                box.waiters[0].set()
+            else:
+                _mailboxes.pop(room_name, None)
+        _record(room_name, name, depth, (started - queued_at) * 1000.0, (finished - started) * 1000.0)
+
+
+def run_in_room(room_name, fn, *args, **kwargs):
+    """fn を room_name のキューに並べて実行し、戻り値を返す。"""
+    with room_turn(room_name, getattr(fn, '__name__', '-')):
+        return fn(*args, **kwargs)
+
+
+def _command_room(args):
+    """ソケットイベントの対象ルーム。payload の room を優先し、無ければ在室中のルーム。
+
+    ハンドラは payload の room を書き換えるので、在室中のルームを優先すると
+    別ルーム宛てのイベントが違うキューに並んでしまう。
+    """
+    data = args[0] if args and isinstance(args[0], dict) else {}
+    room_name = data.get('room') or data.get('room_id')
+    if isinstance(room_name, str) and room_name.strip():
+        return room_name.strip()
+    try:
+        from flask import request
+        sid = request.sid
+    except Exception:
+        sid = None
+    return (user_sids.get(sid) or {}).get('room') if sid else None
+
+
+def room_command(handler):
+    """状態を書き換えるソケットイベントハンドラをルームのキュー経由で実行する。
+
+    @socketio.on の直下に付ける。
+    """
+    @functools.wraps(handler)
+    def wrapper(*args, **kwargs):
+        with room_turn(_command_room(args), handler.__name__):
+            return handler(*args, **kwargs)
+    return wrapper
@@ -0,0 +1,216 @@
+"""ルーム状態の変更ジャーナル（先行書き込みログ）。
+
+save_specific_room_state が呼ばれるたびに、前回記録した内容からの差分を
+セクションごとの JSON Patch（state_sync.diff_state）として seq 付きで積み、
+短い間隔で room_state_journal へ追記する。全セクションを書き直す
+スナップショット（従来のデバウンス保存）はその分間隔を空けられる。
+
+スナップショットは core に _journal_seq（含んでいる最後の seq）を持ち、
+それ以前のジャーナル行は同じトランザクションで削除する。ロード時は
+_journal_seq より新しい行を順に再適用してから hydrate する。
+logs はアーカイブ行が正本なのでジャーナルには含めない（ジャーナルの書き込みと
+同じトランザクションでアーカイブへ書く。room_manager 参照）。
+
+  ROOM_JOURNAL=1                 … ジャーナルを有効にする（既定は無効）
+  ROOM_JOURNAL_FLUSH_SECONDS     … ジャーナル追記の待ち時間（既定 0.2）
+  ROOM_SNAPSHOT_SECONDS          … 有効時のスナップショット間隔（既定 60）
+  ROOM_SNAPSHOT_EVERY            … この件数たまったら間隔を待たずにスナップショット（既定 200）
+
+無効時も、残っているジャーナル行の再適用と次回スナップショットでの削除は行う。
+"""
+import json
+import os
+import threading
+from datetime import datetime
+
+from extensions import db
+from models import Room, RoomStateJournal
+from manager.room_sections import encode_section, split_state
+from manager.state_sync import apply_state_patch, diff_state
+
+
+def _env_number(name, default, cast=float):
+    try:
+        return cast(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return cast(default)
+
+
+_JOURNAL_ENABLED = os.environ.get('ROOM_JOURNAL') == '1'
+_JOURNAL_FLUSH_SECONDS = _env_number('ROOM_JOURNAL_FLUSH_SECONDS', 0.2)
+_SNAPSHOT_SECONDS = _env_number('ROOM_SNAPSHOT_SECONDS', 60)
+_SNAPSHOT_EVERY = _env_number('ROOM_SNAPSHOT_EVERY', 200, int)
+
+JOURNAL_SEQ_KEY = '_journal_seq'
+_EXCLUDED_KEYS = ('logs', JOURNAL_SEQ_KEY)
+
+# room_name -> {section: (digest, 正規化済み内容)}。最後にジャーナルへ記録した内容。
+_bases = {}
+# room_name -> 最後に割り当てた seq
+_seqs = {}
+# room_name -> [{'seq': int, 'ops': {section: [op, ...]}}]（DB未書込）
+_pending = {}
+# room_name -> 前回スナップショット以降に積んだ件数
+_since_snapshot = {}
+_lock = threading.Lock()
+
+
+def journal_enabled():
+    return _JOURNAL_ENABLED
+
+
+def journal_flush_delay():
+    return _JOURNAL_FLUSH_SECONDS
+
+
+def snapshot_delay(default):
+    """スナップショット（全セクション保存）までの待ち時間。"""
+    return _SNAPSHOT_SECONDS if _JOURNAL_ENABLED else default
+
+
+def snapshot_due():
+    """どこかのルームで、間隔を待たずにスナップショットを取るべき件数がたまったか。"""
+    return _JOURNAL_ENABLED and any(count >= _SNAPSHOT_EVERY for count in _since_snapshot.values())
+
+
+def has_pending():
+    return bool(_pending)
+
+
+def _section_parts(state, sections=None):
+    view = {key: value for key, value in state.items() if key not in _EXCLUDED_KEYS}
+    return split_state(view, sections)
+
+
+def _diff_sections(room_name, state, sections):
+    base = _bases.setdefault(room_name, {})
+    changes = {}
+    for section, part in _section_parts(state, sections).items():
+        encoded, digest = encode_section(part)
+        previous = base.get(section)
+        if previous is not None and previous[0] == digest:
+            continue
+        normalized = json.loads(encoded)
+        if previous is None:
+            ops = [{"op": "replace", "path": "", "value": normalized}]
+        else:
+            ops = diff_state(previous[1], normalized)
+        base[section] = (digest, normalized)
+        if ops:
+            changes[section] = ops
+    return changes
+
+
+def record_change(room_name, state, sections=None):
+    """state の変更（sections 指定時はその分だけ）を積む。積んだときは seq を返す。"""
+    if not _JOURNAL_ENABLED or not isinstance(state, dict):
+        return None
+    with _lock:
+        changes = _diff_sections(room_name, state, sections)
+        if not changes:
+            return None
+        seq = _seqs.get(room_name, 0) + 1
+        _seqs[room_name] = seq
+        _pending.setdefault(room_name, []).append({'seq': seq, 'ops': changes})
+        _since_snapshot[room_name] = _since_snapshot.get(room_name, 0) + 1
+        return seq
+
+
+def take_pending():
+    """DB未書込のジャーナルを取り出す（{room_name: [entry, ...]}）。"""
+    with _lock:
+        batches = dict(_pending)
+        _pending.clear()
+    return batches
+
+
+def requeue(batches):
+    """書き込みに失敗したジャーナルを先頭へ戻す。"""
+    with _lock:
+        for room_name, entries in batches.items():
+            _pending[room_name] = list(entries) + _pending.get(room_name, [])
+
+
+def insert_entries(room_id, entries):
+    """ジャーナル行を追加する（commit は呼び出し側）。"""
+    if not entries:
+        return
+    now = datetime.utcnow()
+    db.session.execute(
+        db.insert(RoomStateJournal),
+        [{'room_id': room_id, 'seq': entry['seq'], 'ops': entry['ops'], 'created_at': now} for entry in entries],
+    )
+
+
+def snapshot_marker(room_name, state):
+    """スナップショット直前に呼ぶ。記録済みの内容を state に揃え、含まれる最後の seq を返す。
+
+    ジャーナルを使っていないルームは None（_journal_seq を書かない）。
+    """
+    if _JOURNAL_ENABLED:
+        record_change(room_name, state)
+    return _seqs.get(room_name)
+
+
+def compact(room_id, seq):
+    """スナップショットに含まれた分のジャーナル行を削除する（commit は呼び出し側）。"""
+    db.session.execute(
+        db.delete(RoomStateJournal)
+        .where(RoomStateJournal.room_id == room_id, RoomStateJournal.seq <= seq)
+    )
+
+
+def snapshot_committed(room_name, seq):
+    """スナップショットのコミット後に、それに含まれる未書込ジャーナルを捨てる。"""
+    with _lock:
+        entries = [entry for entry in _pending.get(room_name, []) if entry['seq'] > seq]
+        if entries:
+            _pending[room_name] = entries
+            _since_snapshot[room_name] = len(entries)
+        else:
+            _pending.pop(room_name, None)
+            _since_snapshot.pop(room_name, None)
+        if not _JOURNAL_ENABLED and _seqs.get(room_name) == seq:
+            # 無効化前の残りを片付け終えたら以後は _journal_seq を書かない。
+            _seqs.pop(room_name, None)
+
+
+def replay_journal(room_name, state):
+    """DBから読んだ state にスナップショット以後のジャーナルを再適用する。適用件数を返す。"""
+    marker = state.pop(JOURNAL_SEQ_KEY, None) or 0
+    rows = (
+        db.session.query(RoomStateJournal.seq, RoomStateJournal.ops)
+        .join(Room, Room.id == RoomStateJournal.room_id)
+        .filter(Room.name == room_name, RoomStateJournal.seq > marker)
+        .order_by(RoomStateJournal.seq)
+        .all()
+    )
+    last = marker
+    if rows:
+        parts = _section_parts(state)
+        for seq, ops in rows:
+            for section, section_ops in (ops or {}).items():
+                parts[section] = apply_state_patch(parts.get(section, {}), section_ops)
+            last = seq
+        kept = {key: state[key] for key in _EXCLUDED_KEYS if key in state}
+        state.clear()
+        for part in parts.values():
+            state.update(part)
+        state.update(kept)
+    with _lock:
+        if last or _JOURNAL_ENABLED:
+            _seqs[room_name] = last
+        if _JOURNAL_ENABLED:
+            # 以後の差分の基準にする（最初の記録がセクション全量にならないように）。
+            _bases[room_name] = {}
+            _diff_sections(room_name, state, None)
+    return len(rows)
+
+
+def forget(room_name):
+    """ルームの削除・退避時にジャーナルのメモリ上の状態を捨てる。"""
+    with _lock:
+        _bases.pop(room_name, None)
+        _seqs.pop(room_name, None)
+        _pending.pop(room_name, None)
+        _since_snapshot.pop(room_name, None)
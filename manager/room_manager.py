@@ -11,16 +11,26 @@ from flask import current_app
 # パフォーマンス計測（PERF_LOG=1 のときのみ state_updated のペイロードサイズを出力）
 _PERF_LOG = os.environ.get('PERF_LOG') == '1'
 
-from extensions import socketio, active_room_states, user_sids
-from manager.data_manager import read_saved_room, save_room_to_db
+from extensions import db, socketio, active_room_states, user_sids
+from manager.data_manager import read_saved_room, remember_section_digests, update_room_state
+from manager.state_sync import (
+    SNAPSHOT_EXCLUDED_KEYS, advance_state, build_patch_payload, discard_room_sync, encode_snapshot,
+    get_state_version, has_patch_subscribers, has_unsynced_changes, patch_subscriber_sids, state_patch_room,
+    versioned_payload,
+)
 from manager.utils import (
     set_status_value, get_status_value, apply_buff, remove_buff,
-    normalize_status_name, normalize_character_labels,
+    normalize_status_name, normalize_character_labels, invalidate_stat_index, invalidate_buff_stat_mods,
 )
 from models import Room
-from manager.log_archive import archive_room_logs
+from manager.log_archive import get_last_archived_log_id, insert_archive_rows, page_archived_logs
+from manager import payload_cache, room_journal, state_views
+from manager.mutation_recorder import record_touch
+from manager.perf_counters import count_perf
+from manager.room_sections import ALL_SECTIONS, normalize_sections
 from manager.game_logic import process_on_death
 from manager.battle.damage_context import with_damage_type
+from manager.battle.skill_access import invalidate_usable_skills
 from manager.logs import setup_logger
 
 try:
@@ -211,77 +221,62 @@ def emit_select_resolve_events(room_name, to_sid=None, include_round_started=Fal
         )
 
 
-def get_room_state(room_name):
-    if room_name in active_room_states:
-        state = active_room_states[room_name]
-    else:
-        room_data = read_saved_room(room_name)
-        if isinstance(room_data, dict):
-            state = room_data
-            if 'logs' not in state:
-                state['logs'] = []
-            if '_log_seq' not in state:
-                state['_log_seq'] = len(state['logs'])
-
-
-            if 'active_match' not in state:
-                state['active_match'] = {
-                    "is_active": False,
-                    "match_type": None,
-                    "attacker_id": None, "defender_id": None,
-                    "targets": [],
-                    "attacker_data": {}, "defender_data": {}
-                }
-            if 'character_owners' not in state:
-                state['character_owners'] = {}
-
-            active_room_states[room_name] = state
-        else:
-            state = {
-                "characters": [],
-                "timeline": [],
-                "round": 0,
-                "logs": [],
-                "_log_seq": 0,
-                "battle_state": {},
-                "map_data": {
-                    "width": 20,
-                    "height": 15,
-                    "gridSize": 64,
-                    "backgroundImage": None
-                },
-                "character_owners": {},
-                "active_match": {
-                    "is_active": False,
-                    "match_type": None,
-                    "attacker_id": None,
-                    "defender_id": None,
-                    "targets": [],
-                    "attacker_data": {},
-                    "defender_data": {},
-                },
-                "mode": "battle",
-                "exploration": {
-                    "backgroundImage": None,
-                    "tachie_locations": {}
-                },
-                "battle_mode": 'pvp',
-                "ai_target_arrows": []
-            }
-            active_room_states[room_name] = state
+def _default_active_match():
+    return {
+        "is_active": False,
+        "match_type": None,
+        "attacker_id": None,
+        "defender_id": None,
+        "targets": [],
+        "attacker_data": {},
+        "defender_data": {},
+    }
+
+
+def _new_room_state():
+    return {
+        "characters": [],
+        "timeline": [],
+        "round": 0,
+        "logs": [],
+        "_log_seq": 0,
+        "battle_state": {},
+        "map_data": {
+            "width": 20,
+            "height": 15,
+            "gridSize": 64,
+            "backgroundImage": None
+        },
+        "character_owners": {},
+        "active_match": _default_active_match(),
+        "mode": "battle",
+        "exploration": {
+            "backgroundImage": None,
+            "tachie_locations": {}
+        },
+        "battle_mode": 'pvp',
+        "ai_target_arrows": []
+    }
+
+
+# 既定キー補完・レガシー移行を済ませた state オブジェクト（room_name -> state）。
+# get_room_state はここに登録済みの同一オブジェクトなら辞書引きだけで返す。
+# active_room_states へ新しい dict が直接代入された場合は同一性が崩れるので
+# 次回アクセス時に一度だけ補完し直す。
+_hydrated_states = {}
 
+
+def _hydrate_room_state(room_name, state):
+    """ロード時に一度だけ行う既定値補完・移行・owner_id の取得。"""
+    if 'logs' not in state:
+        # Room.data には logs を保存しないため、直近分はアーカイブから戻す。
+        state['logs'] = _load_recent_logs(room_name, state)
+    if '_log_seq' not in state:
+        state['_log_seq'] = max([len(state['logs'])] + [_log_id_of(log) for log in state['logs']])
     if 'character_owners' not in state:
         state['character_owners'] = {}
     if 'active_match' not in state:
-        state['active_match'] = {
-            "is_active": False,
-            "match_type": None,
-            "attacker_id": None,
-            "defender_id": None,
-            "targets": [],
-            "attacker_data": {},
-            "defender_data": {},
-        }
+        state['active_match'] = _default_active_match()
     if 'battle_mode' not in state:
         state['battle_mode'] = 'pvp'
     if 'ai_target_arrows' not in state:
@@ -295,12 +290,11 @@ def get_room_state(room_name):
         }
     if 'battle_state' not in state:
         state['battle_state'] = {}
-    if '_log_seq' not in state:
-        state['_log_seq'] = len(state.get('logs', []))
 
     _ensure_battle_only_defaults(state)
 
-
+    # owner_id はここでだけ DB から取得し、以後は transfer_owner 等が
+    # refresh_room_owner でメモリ上の値を更新する。
     try:
         room_db = Room.query.filter_by(name=room_name).first()
         if room_db:
@@ -323,8 +317,48 @@ def get_room_state(room_name):
     # Normalize legacy mojibake labels in-memory so clients receive canonical names.
     for char in state.get('characters', []):
         normalize_character_labels(char)
+    _hydrated_states[room_name] = state
+
+
+def get_room_state(room_name):
+    _touch_room(room_name)
+    count_perf('get_room_state')
+    state = active_room_states.get(room_name)
+    if state is None:
+        count_perf('room_state_loads')
+        room_data = read_saved_room(room_name)
+        if isinstance(room_data, dict):
+            _replay_room_journal(room_name, room_data)
+        state = room_data if isinstance(room_data, dict) else _new_room_state()
+        active_room_states[room_name] = state
+        if isinstance(room_data, dict):
+            _ensure_evict_worker()
+    elif _hydrated_states.get(room_name) is state:
+        return state
+    _hydrate_room_state(room_name, state)
     return state
 
+
+def _replay_room_journal(room_name, state):
+    """スナップショット以後のジャーナルを再適用し、あればスナップショットを取り直す。"""
+    try:
+        replayed = room_journal.replay_journal(room_name, state)
+    except Exception as e:
+        logger.error(f"[ERROR] Journal replay failed: {room_name}: {e}")
+        return
+    if replayed:
+        logger.info(f"[INFO] Replayed {replayed} journal entries: {room_name}")
+        _mark_room_dirty(room_name)
+        _schedule_flush()
+
+
+def refresh_room_owner(room_name, owner_id):
+    """Room.owner_id の変更をメモリ上のルーム状態へ反映する。"""
+    state = active_room_states.get(room_name)
+    if isinstance(state, dict):
+        state['owner_id'] = owner_id
+        payload_cache.touch_state(room_name)
+
 # === ▼▼▼ DB保存のデバウンス（ライトビハインド） ▼▼▼ ===
 # アクション毎にルーム全状態をDBへ同期コミットすると、eventlet単一ワーカー上で
 # 書込のたびに他リクエストが待たされる。短い間隔で発生する保存要求をまとめ、
@@ -333,11 +367,17 @@ def get_room_state(room_name):
 _SAVE_DEBOUNCE_SECONDS = 2.0
 _SAVE_MAX_RETRIES = 1
 _dirty_rooms = set()
+# room_name -> 書き込み候補のセクション（room_sections）。未登録のダーティルームは全セクション。
+_dirty_sections = {}
 _save_retry_counts = {}
 _flush_scheduled = False
 _shutdown_in_progress = False
 _flush_lock = threading.Lock()
 _app_ref = None
+# room_name -> メモリから切り離したがまだDBへ書いていないログ（古い順）
+_pending_log_archives = {}
+# room_name -> アーカイブ済みの最大 log_id（None はアーカイブ行なし）。未登録なら DB から引く。
+_archived_log_ids = {}
 
 
 def _resolve_app():
@@ -353,42 +393,223 @@ def _resolve_app():
 def discard_pending_save(room_name):
     """保留中の保存要求を破棄する（ルーム削除時など）。
 
-    削除後にフラッシュが走って save_room_to_db でルームを復活させるのを防ぐ。
+    削除後にフラッシュが走って消えたルームへ書き込もうとするのを防ぐ。
     """
     _dirty_rooms.discard(room_name)
+    _dirty_sections.pop(room_name, None)
     _save_retry_counts.pop(room_name, None)
+    _pending_log_archives.pop(room_name, None)
+    _archived_log_ids.pop(room_name, None)
+    room_journal.forget(room_name)
+
+
+def get_pending_log_archives(room_name):
+    """トリム済みでまだアーカイブ未書込のログ。"""
+    return list(_pending_log_archives.get(room_name) or [])
+
+
+def _requeue_log_archives(room_name, rows):
+    _pending_log_archives[room_name] = list(rows) + _pending_log_archives.get(room_name, [])
 
 
-def _room_exists_for_save(room_name):
+def _log_id_of(log):
     try:
-        return Room.query.filter_by(name=room_name).first() is not None
+        return int(log.get('log_id') or 0) if isinstance(log, dict) else 0
+    except (TypeError, ValueError):
+        return 0
+
+
+def _archived_log_watermark(room_name):
+    if room_name not in _archived_log_ids:
+        _archived_log_ids[room_name] = get_last_archived_log_id(room_name)
+    return _archived_log_ids[room_name]
+
+
+def _collect_unpersisted_logs(room_name, state, pending=None):
+    """まだ RoomLogArchive に書いていないログ（古い順）。
+
+    ログはメモリ上の state['logs'] に追記され、DB 側はアーカイブ行が正本になる。
+    アーカイブ済み最大 log_id より新しいものだけを拾うので、resolve_trace の
+    ように state['logs'] へ直接追記する経路も取りこぼさない。
+    """
+    if pending is None:
+        pending = _pending_log_archives.get(room_name) or []
+    logs = state.get('logs') if isinstance(state, dict) else None
+    rows = list(pending) + (list(logs) if isinstance(logs, list) else [])
+    watermark = _archived_log_watermark(room_name)
+    if watermark is None:
+        return rows
+    return [row for row in rows if _log_id_of(row) > watermark]
+
+
+def _advance_log_watermark(room_name, rows):
+    if rows:
+        watermark = _archived_log_ids.get(room_name) or 0
+        _archived_log_ids[room_name] = max([watermark] + [_log_id_of(row) for row in rows])
+
+
+def get_unpersisted_room_logs(room_name):
+    """アーカイブ未書込のログ（エクスポート時にアーカイブ分へ補う）。"""
+    return _collect_unpersisted_logs(room_name, active_room_states.get(room_name))
+
+
+def _persisted_room_state(state):
+    """Room.data へ書く形。logs はアーカイブ行として別に保存する。"""
+    return {key: value for key, value in state.items() if key != 'logs'}
+
+
+def _mark_room_dirty(room_name, sections=None):
+    if sections is None or (room_name in _dirty_rooms and room_name not in _dirty_sections):
+        _dirty_sections[room_name] = set(ALL_SECTIONS)
+    else:
+        _dirty_sections.setdefault(room_name, set()).update(normalize_sections(sections))
+    _dirty_rooms.add(room_name)
+
+
+def _take_dirty_sections(room_name):
+    """保存するセクションを取り出す（None は全セクション）。"""
+    _dirty_rooms.discard(room_name)
+    return _dirty_sections.pop(room_name, None)
+
+
+def _write_rooms(entries):
+    """[(room_name, state, sections)] を1トランザクションで書き込む（要app_context）。
+
+    ルームごとに UPDATE rooms ... RETURNING id の1文で存在確認と core の書き込みを
+    済ませ、変更セクションと未アーカイブのログ行を足して最後に1回だけ commit する。
+    ジャーナルを使っているルームは全セクションを候補にし、含めた分のジャーナル行を消す。
+    戻り値は {room_name: True（保存）/ None（ルームが消えていた）}。
+    失敗時は rollback し、切り離し済みのログを保留へ戻してから例外を送出する。
+    """
+    outcomes = {}
+    popped = {}
+    written = {}
+    try:
+        for room_name, state, sections in entries:
+            pending = _pending_log_archives.pop(room_name, None) or []
+            popped[room_name] = pending
+            persisted = _persisted_room_state(state)
+            marker = room_journal.snapshot_marker(room_name, persisted)
+            if marker is not None:
+                persisted[room_journal.JOURNAL_SEQ_KEY] = marker
+                sections = None
+            result = update_room_state(room_name, persisted, sections)
+            if result is None:
+                # 削除済み等。update_only 相当で作成はせず、保留ログも捨てる。
+                outcomes[room_name] = None
+                popped[room_name] = []
+                continue
+            room_id, section_digests = result
+            rows = _collect_unpersisted_logs(room_name, state, pending)
+            insert_archive_rows(room_id, room_name, rows)
+            if marker is not None:
+                room_journal.compact(room_id, marker)
+            written[room_name] = (room_id, section_digests, rows, marker)
+            outcomes[room_name] = True
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        for room_name, pending in popped.items():
+            if pending:
+                _requeue_log_archives(room_name, pending)
+        raise
+
+    for room_name, (room_id, section_digests, rows, marker) in written.items():
+        remember_section_digests(room_id, section_digests)
+        _advance_log_watermark(room_name, rows)
+        if marker is not None:
+            room_journal.snapshot_committed(room_name, marker)
+    return outcomes
+
+
+def _save_room_with_archives(room_name, state, sections=None):
+    """1ルーム分を _write_rooms で保存する。保存できたときだけ True。"""
+    try:
+        return _write_rooms([(room_name, state, sections)]).get(room_name) is True
     except Exception as exc:
-        logger.error(f"[ERROR] Auto-save room existence check failed: {room_name}: {exc}")
+        logger.error(f"[ERROR] Room save failed: {room_name}: {exc}")
         return False
 
 
+# フラッシュ1回ごとの所要時間・ルーム数・再試行の累計（get_flush_metrics で参照）。
+_flush_metrics = {
+    'flushes': 0, 'rooms': 0, 'saved': 0, 'missing': 0, 'failed': 0,
+    'retries': 0, 'fallbacks': 0, 'total_ms': 0.0, 'last_ms': 0.0, 'max_ms': 0.0,
+}
+
+
+def get_flush_metrics():
+    metrics = dict(_flush_metrics)
+    metrics['avg_ms'] = metrics['total_ms'] / metrics['flushes'] if metrics['flushes'] else 0.0
+    return metrics
+
+
+def _record_flush(counts, elapsed_ms, fallback):
+    _flush_metrics['flushes'] += 1
+    for key, value in counts.items():
+        _flush_metrics[key] += value
+    _flush_metrics['fallbacks'] += int(fallback)
+    _flush_metrics['total_ms'] += elapsed_ms
+    _flush_metrics['last_ms'] = elapsed_ms
+    _flush_metrics['max_ms'] = max(_flush_metrics['max_ms'], elapsed_ms)
+    if _PERF_LOG:
+        logger.info(
+            "[PERF] room_flush rooms=%d saved=%d missing=%d failed=%d retries=%d fallback=%s %.0fms",
+            counts['rooms'], counts['saved'], counts['missing'], counts['failed'], counts['retries'],
+            'yes' if fallback else 'no', elapsed_ms,
+        )
+
+
 def _flush_dirty_rooms_locked():
-    """現在ダーティなルームをまとめてDBへ書き込む（要app_context）。"""
-    rooms = list(_dirty_rooms)
-    _dirty_rooms.difference_update(rooms)
-    for room_name in rooms:
-        state = active_room_states.get(room_name)
-        if state is None:
+    """現在ダーティなルームをまとめて1トランザクションでDBへ書き込む（要app_context）。
+
+    まとめた書き込みが失敗したら、どのルームが原因でも他を巻き込まないよう
+    ルームごとの書き込みへ切り替える。
+    """
+    started = time.perf_counter()
+    entries = []
+    for room_name in list(_dirty_rooms):
+        sections = _take_dirty_sections(room_name)
+        if active_room_states.get(room_name) is None:
             # 削除済み等。復活させない。
+            _pending_log_archives.pop(room_name, None)
             continue
-        if not _room_exists_for_save(room_name):
-            # 削除済み等。update_onlyでも作成はしないが、ここで明示的に止める。
+        entries.append((room_name, active_room_states[room_name], sections))
+    if not entries:
+        return
+
+    fallback = False
+    try:
+        outcomes = _write_rooms(entries)
+    except Exception as exc:
+        fallback = len(entries) > 1
+        logger.error(f"[ERROR] Auto-save transaction failed ({len(entries)} rooms): {exc}")
+        outcomes = {}
+        for entry in (entries if fallback else []):
+            try:
+                outcomes.update(_write_rooms([entry]))
+            except Exception as room_exc:
+                logger.error(f"[ERROR] Auto-save failed: {entry[0]}: {room_exc}")
+
+    counts = {'rooms': len(entries), 'saved': 0, 'missing': 0, 'failed': 0, 'retries': 0}
+    for room_name, _state, sections in entries:
+        outcome = outcomes.get(room_name, False)
+        if outcome is True:
+            counts['saved'] += 1
             _save_retry_counts.pop(room_name, None)
-            logger.warning(f"[WARN] Auto-save skipped because room no longer exists: {room_name}")
             continue
-        if save_room_to_db(room_name, state, update_only=True):
+        if outcome is None:
+            counts['missing'] += 1
             _save_retry_counts.pop(room_name, None)
+            logger.warning(f"[WARN] Auto-save skipped because room no longer exists: {room_name}")
             continue
 
+        counts['failed'] += 1
         retry_count = _save_retry_counts.get(room_name, 0)
         if retry_count < _SAVE_MAX_RETRIES and active_room_states.get(room_name) is not None:
+            counts['retries'] += 1
             _save_retry_counts[room_name] = retry_count + 1
-            _dirty_rooms.add(room_name)
+            _mark_room_dirty(room_name, sections)
             logger.error(
                 f"[ERROR] Auto-save failed; retry scheduled: {room_name} "
                 f"({retry_count + 1}/{_SAVE_MAX_RETRIES})"
@@ -396,6 +617,7 @@ def _flush_dirty_rooms_locked():
         else:
             _save_retry_counts.pop(room_name, None)
             logger.error(f"[ERROR] Auto-save failed after retries: {room_name}")
+    _record_flush(counts, (time.perf_counter() - started) * 1000.0, fallback)
 
 
 def _flush_dirty_rooms_once():
@@ -420,7 +642,12 @@ def _flush_within_context():
 def _flush_worker():
     global _flush_scheduled
     try:
-        socketio.sleep(_SAVE_DEBOUNCE_SECONDS)
+        # ジャーナル有効時は間隔を延ばし、件数がたまったらそこで打ち切る。
+        deadline = time.monotonic() + room_journal.snapshot_delay(_SAVE_DEBOUNCE_SECONDS)
+        while True:
+            socketio.sleep(min(_SAVE_DEBOUNCE_SECONDS, max(0.0, deadline - time.monotonic())))
+            if time.monotonic() >= deadline or room_journal.snapshot_due():
+                break
         _flush_within_context()
     except Exception as e:
         logger.error(f"[ERROR] debounced flush worker failed: {e}")
@@ -445,10 +672,77 @@ def _schedule_flush():
         _flush_within_context()
 
 
+_journal_flush_scheduled = False
+
+
+def _flush_journal_locked():
+    """積まれたジャーナルと未アーカイブのログを1トランザクションで追記する（要app_context）。"""
+    batches = room_journal.take_pending()
+    if not batches:
+        return True
+    popped = {}
+    archived = {}
+    try:
+        room_ids = dict(db.session.query(Room.name, Room.id).filter(Room.name.in_(list(batches))).all())
+        for room_name, entries in batches.items():
+            room_id = room_ids.get(room_name)
+            if room_id is None:
+                continue  # 削除済み
+            room_journal.insert_entries(room_id, entries)
+            pending = _pending_log_archives.pop(room_name, None) or []
+            popped[room_name] = pending
+            rows = _collect_unpersisted_logs(room_name, active_room_states.get(room_name), pending)
+            insert_archive_rows(room_id, room_name, rows)
+            archived[room_name] = rows
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        room_journal.requeue(batches)
+        for room_name, pending in popped.items():
+            if pending:
+                _requeue_log_archives(room_name, pending)
+        logger.error(f"[ERROR] Journal append failed ({len(batches)} rooms): {e}")
+        return False
+    for room_name, rows in archived.items():
+        _advance_log_watermark(room_name, rows)
+    return True
+
+
+def _journal_worker():
+    global _journal_flush_scheduled
+    try:
+        socketio.sleep(room_journal.journal_flush_delay())
+        app = _resolve_app()
+        if app is not None:
+            with app.app_context(), _flush_lock:
+                _flush_journal_locked()
+    except Exception as e:
+        logger.error(f"[ERROR] journal flush worker failed: {e}")
+    finally:
+        _journal_flush_scheduled = False
+    if room_journal.has_pending() and not _shutdown_in_progress:
+        _schedule_journal_flush()
+
+
+def _schedule_journal_flush():
+    global _journal_flush_scheduled
+    if _shutdown_in_progress or _journal_flush_scheduled:
+        return
+    _journal_flush_scheduled = True
+    try:
+        socketio.start_background_task(_journal_worker)
+    except Exception as e:
+        # ジャーナルは次のスナップショットにも含まれるので、ここでは待つだけにする。
+        _journal_flush_scheduled = False
+        logger.error(f"[ERROR] could not schedule journal flush: {e}")
+
+
 def flush_pending_saves():
     """保留中の保存を即時に同期フラッシュする（シャットダウン時等）。"""
     global _shutdown_in_progress
     _shutdown_in_progress = True
+    # 保存失敗で取り残されたアーカイブ待ちログも最後に書き込みを試みる。
+    _dirty_rooms.update(_pending_log_archives)
     if not _dirty_rooms:
         return
     try:
@@ -464,12 +758,18 @@ atexit.register(flush_pending_saves)
 def flush_room_state_now(room_name):
     """指定ルームの保留保存を即時フラッシュする。"""
     if room_name:
-        _dirty_rooms.add(room_name)
+        _mark_room_dirty(room_name)
     return _flush_within_context()
 
 
-def save_specific_room_state(room_name, immediate=False):
-    """ルーム状態の永続化を要求する（通常はデバウンスして後でまとめて保存）。"""
+def save_specific_room_state(room_name, immediate=False, sections=None):
+    """ルーム状態の永続化を要求する（通常はデバウンスして後でまとめて保存）。
+
+    sections に変更したセクション（'characters' / 'battle_state' / 'presets' など、
+    room_sections.SECTION_KEYS 参照）を渡すと、フラッシュ時にそれ以外を書かない。
+    省略時は全セクションが候補だが、内容の変わっていないセクションは書かれない。
+    ROOM_JOURNAL=1 のときは変更分をジャーナルにも積む（manager.room_journal）。
+    """
     global _app_ref
     state = active_room_states.get(room_name)
     if not state:
@@ -479,7 +779,10 @@ def save_specific_room_state(room_name, immediate=False):
             _app_ref = current_app._get_current_object()
         except RuntimeError:
             _app_ref = None
-    _dirty_rooms.add(room_name)
+    _mark_room_dirty(room_name, sections)
+    payload_cache.touch_state(room_name)
+    if room_journal.record_change(room_name, state, sections) is not None:
+        _schedule_journal_flush()
     if immediate:
         return flush_room_state_now(room_name)
     _schedule_flush()
@@ -487,24 +790,385 @@ def save_specific_room_state(room_name, immediate=False):
 # === ▲▲▲ DB保存のデバウンスここまで ▲▲▲ ===
 
 
-def trim_room_logs_with_archive(room_name, state, limit=500):
-    """古いログをアーカイブしてから、メモリ上のログを最新limit件へ絞る。"""
+# === ▼▼▼ メモリ上のルーム状態の退避（アイドル/LRU） ▼▼▼ ===
+# active_room_states はルームを読み込むたびに増える一方なので、誰も在室して
+# いないルームを定期的にDBへ書き出してからメモリから外す。次にアクセスされた
+# ときは get_room_state が read_saved_room から読み直す。
+#   ROOM_IDLE_EVICT_SECONDS … 最終アクセスからこの秒数を過ぎた無人ルームを退避（既定 1800、0で無効）
+#   ROOM_CACHE_MAX_ROOMS    … メモリに保持するルーム数の上限（既定 0 = 無制限）
+#   ROOM_CACHE_MAX_BYTES    … 保持ルームのJSON換算サイズ合計の上限（既定 0 = 無制限）
+def _env_number(name, default, cast=float):
+    try:
+        return cast(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return cast(default)
+
+
+_ROOM_IDLE_EVICT_SECONDS = _env_number('ROOM_IDLE_EVICT_SECONDS', 1800)
+_ROOM_CACHE_MAX_ROOMS = _env_number('ROOM_CACHE_MAX_ROOMS', 0, int)
+_ROOM_CACHE_MAX_BYTES = _env_number('ROOM_CACHE_MAX_BYTES', 0, int)
+_EVICT_SWEEP_SECONDS = 60.0
+_room_last_access = {}
+_evict_worker_started = False
+
+
+def _touch_room(room_name):
+    _room_last_access[room_name] = time.monotonic()
+
+
+def forget_room_state(room_name):
+    """ルームのメモリ上の状態と付随キャッシュを破棄する（削除・退避時）。"""
+    state = active_room_states.pop(room_name, None)
+    # キャラクター単位のキャッシュはキャラクター dict を掴んでいるので一緒に外す
+    for char in (state or {}).get('characters') or ():
+        invalidate_stat_index(char)
+        invalidate_buff_stat_mods(char)
+        invalidate_usable_skills(char)
+    _hydrated_states.pop(room_name, None)
+    _room_last_access.pop(room_name, None)
+    _archived_log_ids.pop(room_name, None)
+    room_journal.forget(room_name)
+    discard_room_sync(room_name)
+
+
+def _occupied_rooms():
+    return {info.get('room') for info in user_sids.values() if info.get('room')}
+
+
+def _estimate_room_bytes(state):
+    try:
+        return len(json.dumps(state, ensure_ascii=False, default=str))
+    except Exception:
+        return 0
+
+
+def _evict_room_locked(room_name):
+    """在室者のいないルームを保存してからメモリから外す。成功時 True。"""
+    state = active_room_states.get(room_name)
+    if state is None:
+        _room_last_access.pop(room_name, None)
+        return False
+    touched_at = _room_last_access.get(room_name)
+    if room_name in _dirty_rooms or _needs_log_flush(room_name, state):
+        sections = _take_dirty_sections(room_name)
+        if not _save_room_with_archives(room_name, state, sections):
+            _mark_room_dirty(room_name, sections)
+            logger.warning(f"[WARN] Room eviction skipped because save failed: {room_name}")
+            return False
+        _save_retry_counts.pop(room_name, None)
+    # 保存中(yield中)に誰かが触った/入室したルームは退避しない。
+    if (
+        _room_last_access.get(room_name) != touched_at
+        or room_name in _dirty_rooms
+        or room_name in _pending_log_archives
+        or room_name in _occupied_rooms()
+        or active_room_states.get(room_name) is not state
+    ):
+        return False
+    forget_room_state(room_name)
+    logger.info(f"[INFO] Evicted idle room state from memory: {room_name}")
+    return True
+
+
+def _needs_log_flush(room_name, state):
+    if room_name in _pending_log_archives:
+        return True
+    try:
+        return bool(_collect_unpersisted_logs(room_name, state))
+    except Exception:
+        db.session.rollback()
+        return True
+
+
+def _select_rooms_to_evict(now=None):
+    now = time.monotonic() if now is None else now
+    occupied = _occupied_rooms()
+    candidates = sorted(
+        (name for name in active_room_states if name not in occupied),
+        key=lambda name: _room_last_access.get(name, 0.0),
+    )
+    selected = []
+    if _ROOM_IDLE_EVICT_SECONDS > 0:
+        selected = [
+            name for name in candidates
+            if now - _room_last_access.get(name, 0.0) >= _ROOM_IDLE_EVICT_SECONDS
+        ]
+    remaining = [name for name in candidates if name not in selected]
+
+    room_count = len(active_room_states) - len(selected)
+    if _ROOM_CACHE_MAX_ROOMS > 0:
+        while room_count > _ROOM_CACHE_MAX_ROOMS and remaining:
+            selected.append(remaining.pop(0))
+            room_count -= 1
+
+    if _ROOM_CACHE_MAX_BYTES > 0:
+        sizes = {
+            name: _estimate_room_bytes(state)
+            for name, state in active_room_states.items()
+            if name not in selected
+        }
+        total = sum(sizes.values())
+        while total > _ROOM_CACHE_MAX_BYTES and remaining:
+            name = remaining.pop(0)
+            selected.append(name)
+            total -= sizes.get(name, 0)
+    return selected
+
+
+def evict_idle_rooms(now=None):
+    """アイドル・予算超過のルームを退避し、退避したルーム名の一覧を返す（要app_context）。"""
+    evicted = []
+    with _flush_lock:
+        for room_name in _select_rooms_to_evict(now):
+            if _evict_room_locked(room_name):
+                evicted.append(room_name)
+    return evicted
+
+
+def _evict_worker():
+    global _evict_worker_started
+    try:
+        while not _shutdown_in_progress:
+            socketio.sleep(_EVICT_SWEEP_SECONDS)
+            app = _resolve_app()
+            if app is None:
+                continue
+            try:
+                with app.app_context():
+                    evict_idle_rooms()
+            except Exception as e:
+                logger.error(f"[ERROR] room eviction sweep failed: {e}")
+    finally:
+        _evict_worker_started = False
+
+
+def _ensure_evict_worker():
+    global _evict_worker_started
+    if _evict_worker_started or _shutdown_in_progress:
+        return
+    if _ROOM_IDLE_EVICT_SECONDS <= 0 and _ROOM_CACHE_MAX_ROOMS <= 0 and _ROOM_CACHE_MAX_BYTES <= 0:
+        return
+    if _resolve_app() is None:
+        return
+    _evict_worker_started = True
+    try:
+        socketio.start_background_task(_evict_worker)
+    except Exception as e:
+        _evict_worker_started = False
+        logger.error(f"[ERROR] could not start room eviction worker: {e}")
+# === ▲▲▲ メモリ上のルーム状態の退避ここまで ▲▲▲ ===
+
+
+# メモリ上のログは limit 件を基本とし、limit + _LOG_ARCHIVE_CHUNK 件を超えた時点で
+# 古い分をまとめて切り離す（ヒステリシス）。1件ごとにアーカイブすると
+# ログ追加のたびにDB往復が発生するため。
+_LOG_ARCHIVE_CHUNK = 100
+
+
+def trim_room_logs_with_archive(room_name, state, limit=500, chunk=_LOG_ARCHIVE_CHUNK):
+    """ログが limit + chunk 件を超えたら最新 limit 件を残し、古いログをアーカイブ待ちへ移す。
+
+    アーカイブ行の一括INSERTとcommitはデバウンス保存のフラッシュで
+    ルーム状態と同じトランザクションで行うため、呼び出し元ではDBに触れない。
+    """
     if not isinstance(state, dict):
         return False
     logs = state.get('logs')
-    if not isinstance(logs, list) or len(logs) <= limit:
+    if not isinstance(logs, list) or len(logs) <= limit + max(0, int(chunk or 0)):
         return True
     overflow_logs = logs[:-limit]
+    _pending_log_archives.setdefault(room_name, []).extend(overflow_logs)
+    state['logs'] = logs[-limit:]
+    payload_cache.touch_logs(room_name)
+    save_specific_room_state(room_name)
+    return True
+
+
+# request_logs 1回で返す最大件数。
+_LOG_PAGE_MAX = 200
+_RECENT_LOG_LIMIT = 500
+
+
+def _log_floor(state):
+    """GM がログをクリアした時点の log_id。これ以下は表示対象外。"""
     try:
-        archived = archive_room_logs(room_name, overflow_logs)
+        return int(state.get('_log_floor') or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+def _load_recent_logs(room_name, state):
+    try:
+        return page_archived_logs(room_name, after_log_id=_log_floor(state), limit=_RECENT_LOG_LIMIT)
     except Exception as exc:
-        archived = False
-        logger.error(f"[ERROR] Log archive failed before trim room={room_name}: {exc}")
-    if archived:
-        state['logs'] = logs[-limit:]
-        return True
-    logger.error(f"[ERROR] Log trim skipped because archive failed room={room_name}")
-    return False
+        logger.error(f"[ERROR] Recent log load failed: {room_name}: {exc}")
+        try:
+            db.session.rollback()
+        except Exception:
+            pass
+        return []
+
+
+def page_room_logs(room_name, before_log_id=None, limit=100, view=state_views.GM_VIEW, username=None):
+    """before_log_id より古いログを新しい側から最大 limit 件、古い順で返す。
+
+    メモリ上のログ（未アーカイブ分を含む）で足りない分だけ
+    RoomLogArchive を log_id のカーソルで引く。view / username を渡すと
+    その閲覧者から見えないシークレットのログを伏せる。
+    """
+    state = get_room_state(room_name)
+    try:
+        limit = max(1, min(int(limit or 100), _LOG_PAGE_MAX))
+    except (TypeError, ValueError):
+        limit = 100
+    try:
+        before = int(before_log_id) if before_log_id not in (None, '') else None
+    except (TypeError, ValueError):
+        before = None
+    floor = _log_floor(state)
+
+    in_memory = get_pending_log_archives(room_name) + list(state.get('logs') or [])
+    page = [
+        log for log in in_memory
+        if _log_id_of(log) > floor and (before is None or _log_id_of(log) < before)
+    ]
+    has_more = len(page) > limit
+    page = page[-limit:]
+    need = limit - len(page)
+    if need > 0:
+        cursor = _log_id_of(page[0]) if page else before
+        older = page_archived_logs(room_name, before_log_id=cursor, after_log_id=floor, limit=need + 1)
+        has_more = len(older) > need
+        page = older[-need:] + page
+    return {
+        "room": room_name,
+        "logs": state_views.logs_for_view(page, view, username),
+        "has_more": has_more,
+        "next_before_log_id": _log_id_of(page[0]) if page else None,
+    }
+
+
+def clear_room_logs(room_name):
+    """表示中のログを消す。アーカイブ（エクスポート用の履歴）は残す。"""
+    state = get_room_state(room_name)
+    # 未アーカイブ分は次のフラッシュで書けるよう保留へ移してから消す。
+    _pending_log_archives.setdefault(room_name, []).extend(state.get('logs') or [])
+    state['logs'] = []
+    state['_log_floor'] = int(state.get('_log_seq') or 0)
+    payload_cache.touch_logs(room_name)
+    _safe_emit('logs_cleared', {"room": room_name, "log_floor": state['_log_floor']}, to=room_name)
+
+
+def _logs_text(room_name, state, view=state_views.GM_VIEW, username=None):
+    logs = state.get('logs')
+    key = (payload_cache.logs_generation(room_name), id(logs), len(logs or ()))
+    name = 'logs' if view == state_views.GM_VIEW else f"logs:{view}:{username or ''}"
+    text = payload_cache.lookup(room_name, name, key)
+    if text is None:
+        visible = state_views.logs_for_view(logs, view, username)
+        text = payload_cache.store(room_name, name, key, payload_cache.encode(visible))
+    return text
+
+
+def _state_payload(
+    room_name, state, version, encoded=None, compact=False, view=state_views.GM_VIEW, username=None, fresh=False,
+):
+    """versioned_payload と同内容の EncodedPayload を返す。
+
+    encoded は snapshot_view(state) の JSON 文字列（advance_state の結果があれば渡す。
+    None ならキャッシュに無いときだけ文字列化する）。全量版は logs 等の文字列を末尾に足す。
+    view / username は全量版の logs の見せ方（state_views 参照）。
+    state・版・状態の世代（payload_cache.touch_state）が前回と同じなら前回作ったものを返す。
+    fresh=True ならキャッシュを見ずに作り直す（作ったものはキャッシュに入れる）。
+    """
+    if compact:
+        cache_name = 'compact'
+    elif view == state_views.GM_VIEW:
+        cache_name = 'full'
+    else:
+        cache_name = f"full:{view}:{username or ''}"
+    key = (id(state), version, payload_cache.state_generation(room_name))
+    if not compact:
+        key += (payload_cache.logs_generation(room_name), id(state.get('logs')), state.get('_log_seq'))
+    cached = None if fresh else payload_cache.lookup(room_name, cache_name, key)
+    if cached is not None:
+        return cached
+    if encoded is None:
+        encoded = encode_snapshot(state)
+    value = versioned_payload(state, version, compact=compact)
+    fields = []
+    if not compact:
+        if 'logs' in value:
+            value['logs'] = state_views.logs_for_view(value['logs'], view, username)
+        fields = [
+            (name, _logs_text(room_name, state, view, username) if name == 'logs' else payload_cache.encode(state[name]))
+            for name in SNAPSHOT_EXCLUDED_KEYS if name in state
+        ]
+    fields.append(('state_version', str(int(version))))
+    payload = payload_cache.EncodedPayload(value, payload_cache.append_fields(encoded, fields))
+    return payload_cache.store(room_name, cache_name, key, payload)
+
+
+def _snapshot_view(state, to_sid):
+    """to_sid 宛て全量の (view, username)。伏せるログが無ければ GM 版を共用する。"""
+    view, username = state_views.viewer_of(to_sid)
+    senders = state_views.secret_senders(state.get('logs'))
+    if view == state_views.GM_VIEW or not senders:
+        return state_views.GM_VIEW, None
+    return view, (username if username in senders else None)
+
+
+def _emit_role_views(room_name, state, result, full, senders, patch_sids):
+    """シークレットのログがあるとき、全量を GM・プレイヤー・投稿者別に送る。"""
+    own = state_views.player_sids(room_name, senders)
+    skip = list(patch_sids)
+    _safe_emit('state_updated', full, to=state_views.role_room(room_name, state_views.GM_VIEW), skip_sid=skip or None)
+    player = _state_payload(room_name, state, result['version'], result['encoded'], view=state_views.PLAYER_VIEW)
+    _safe_emit(
+        'state_updated', player,
+        to=state_views.role_room(room_name, state_views.PLAYER_VIEW), skip_sid=(skip + list(own)) or None,
+    )
+    for sid, username in own.items():
+        if sid not in skip:
+            payload = _state_payload(
+                room_name, state, result['version'], result['encoded'],
+                view=state_views.PLAYER_VIEW, username=username,
+            )
+            _safe_emit('state_updated', payload, to=sid)
+
+
+def _emit_to_patch_subscribers(room_name, state, result, skip_sid=None):
+    """差分購読者へ state_patch、差分が作れない/全量より大きい場合は全量を送る。"""
+    ops = result.get('ops')
+    target = state_patch_room(room_name)
+    if ops is None or result['patch_size'] >= result['snapshot_size']:
+        payload = _state_payload(room_name, state, result['version'], result['encoded'], compact=True)
+        _safe_emit('state_updated', payload, to=target, skip_sid=skip_sid)
+    elif ops:
+        _safe_emit('state_patch', build_patch_payload(room_name, result), to=target, skip_sid=skip_sid)
+
+
+def build_state_snapshot_payload(room_name, state, to_sid=None):
+    """入室・再同期用の版番号付き全量スナップショットを返す。
+
+    直前の配信以降に溜まった変更があれば先に差分購読者へ流して版を確定させ、
+    受信者が次の state_patch をそのまま適用できるようにする。
+    差分購読クライアント宛ては logs を含めない（request_logs で取得させる）。
+    差分購読クライアント宛ては、前回から保存・配信が無ければ文字列化せずにペイロードを使い回す
+    （保存を経ない書き換えも次の配信の state_patch で届く）。従来クライアントは以後の差分を受けないので、
+    毎回 state から作り直す。
+    """
+    compact = bool((user_sids.get(to_sid) or {}).get('state_patch')) if to_sid else False
+    encoded = None
+    if has_patch_subscribers(room_name) and has_unsynced_changes(room_name):
+        result = advance_state(room_name, state, track_snapshot=True)
+        _emit_to_patch_subscribers(room_name, state, result, skip_sid=to_sid)
+        encoded = result['encoded']
+    view, username = _snapshot_view(state, to_sid) if to_sid else (state_views.GM_VIEW, None)
+    return _state_payload(
+        room_name, state, get_state_version(room_name), encoded, compact, view, username,
+        fresh=not compact and encoded is None,
+    )
 
 
 def broadcast_state_update(room_name):
@@ -516,17 +1180,30 @@ def broadcast_state_update(room_name):
                 if char['id'] in owners:
                     char['owner_id'] = owners[char['id']]
 
+        patch_sids = patch_subscriber_sids(room_name)
+        result = advance_state(room_name, state, track_snapshot=bool(patch_sids))
+        full = _state_payload(room_name, state, result['version'], result['encoded'])
+
         if _PERF_LOG:
             try:
-                size = len(json.dumps(state, ensure_ascii=False, default=str))
                 logger.info(
-                    "[PERF] state_updated room=%s size=%dB logs=%d chars=%d",
-                    room_name, size, len(state.get('logs', [])), len(state.get('characters', [])),
+                    "[PERF] state_updated room=%s version=%d size=%dB patch=%s logs=%d chars=%d",
+                    room_name, result['version'], len(full.encoded),
+                    f"{result['patch_size']}B" if result['patch_size'] is not None else "-",
+                    len(state.get('logs', [])), len(state.get('characters', [])),
                 )
             except Exception:
                 pass
 
-        _safe_emit('state_updated', state, to=room_name)
+        senders = state_views.secret_senders(state.get('logs'))
+        if senders:
+            _emit_role_views(room_name, state, result, full, senders, patch_sids)
+        elif patch_sids:
+            _safe_emit('state_updated', full, to=room_name, skip_sid=patch_sids)
+        else:
+            _safe_emit('state_updated', full, to=room_name)
+        if patch_sids:
+            _emit_to_patch_subscribers(room_name, state, result)
 
         # Additive emit for new Select->Resolve flow (same room path as legacy state_updated).
         try:
@@ -561,10 +1238,20 @@ def broadcast_log(room_name, message, type='info', user=None, secret=False, save
         log_data["user"] = _normalize_log_text(user)
 
     state['logs'].append(log_data)
+    payload_cache.touch_logs(room_name)
 
     trim_room_logs_with_archive(room_name, state, limit=500)
 
-    _safe_emit('new_log', log_data, to=room_name)
+    if secret:
+        # GM と投稿者には本文、他のプレイヤーには伏せた版を送る。
+        own = list(state_views.player_sids(room_name, {log_data.get('user')}))
+        _safe_emit('new_log', log_data, to=[state_views.role_room(room_name, state_views.GM_VIEW)] + own)
+        _safe_emit(
+            'new_log', state_views.mask_log(log_data),
+            to=state_views.role_room(room_name, state_views.PLAYER_VIEW), skip_sid=own or None,
+        )
+    else:
+        _safe_emit('new_log', log_data, to=room_name)
 
     if save:
         save_specific_room_state(room_name)
@@ -598,11 +1285,11 @@ def get_user_info_from_sid(sid):
     if has_app_context():
         info['is_app_admin'] = is_user_management_admin(uid)
     if info['is_app_admin']:
-        info['attribute'] = 'GM'
+        state_views.set_sid_attribute(sid, 'GM')
     elif room and uid:
         role = get_membership_role(uid, room)
         if role is not None:
-            info['attribute'] = 'GM' if role in GM_ROLES else 'Player'
+            state_views.set_sid_attribute(sid, 'GM' if role in GM_ROLES else 'Player')
     return info
 
 def is_authorized_for_character(room_name, char_id, username, attribute):
@@ -675,10 +1362,12 @@ def _update_char_stat(
     damage_context=None,
 ):
     stat_name = normalize_status_name(stat_name)
+    record_touch(char)
     normalize_character_labels(char)
     username = _normalize_log_text(username)
     old_value = None
     log_message = ""
+    died = False
 
     if stat_name == 'HP':
         old_value = char['hp']
@@ -696,7 +1385,7 @@ def _update_char_stat(
         if char['hp'] <= 0:
             char['x'] = -1; char['y'] = -1
             log_message += " [戦闘不能/未配置へ移動]"
-            _handle_character_death_transition(
+            died = _handle_character_death_transition(
                 room_name,
                 char,
                 old_value,
@@ -791,3 +1480,6 @@ def _update_char_stat(
 
     if (not suppress_log) and log_message and (str(old_value) != str(new_value) or is_new or is_delete):
         broadcast_log(room_name, _normalize_log_text(log_message), 'state-change', save=save)
+    if save:
+        # 戦闘不能処理は timeline 等にも及ぶため全セクションを候補にする。
+        save_specific_room_state(room_name, sections=None if died else ('characters',))
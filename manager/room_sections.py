@@ -0,0 +1,108 @@
+"""ルーム状態の永続化セクション定義。
+
+Room.data へルーム状態を丸ごと書き直す代わりに、大きく独立して変わる部分を
+セクションに分け、変更のあったセクションだけを room_state_sections へ書く。
+どのセクションにも属さないキー（round / mode / play_mode などの小さな値）は
+core として従来通り Room.data に残すので、一覧表示の JSON パス抽出はそのまま使える。
+logs は RoomLogArchive の行が正本で、デバウンス保存はアーカイブ後に logs を
+取り除いた state を渡す（移行前の Room.data にある logs は core のまま残る）。
+
+セクション行は先頭1バイトに形式番号を持つバイナリ（payload 列）で保存できる。
+形式番号の無い JSON 列（data）だけの行もそのまま読める。
+"""
+import hashlib
+import json
+import zlib
+
+CORE_SECTION = 'core'
+
+# セクション名 -> そのセクションに属するトップレベルキー
+SECTION_KEYS = {
+    'characters': ('characters', 'character_owners'),
+    'battle_state': (
+        'battle_state', 'timeline', 'active_match', 'ai_target_arrows',
+        'turn_char_id', 'turn_entry_id', 'is_round_ended',
+    ),
+    'battle_only': ('battle_only',),
+    'map': ('map_data', 'battle_map_data', 'exploration'),
+    'presets': ('presets',),
+}
+
+ALL_SECTIONS = frozenset(SECTION_KEYS) | {CORE_SECTION}
+
+_KEY_TO_SECTION = {key: section for section, keys in SECTION_KEYS.items() for key in keys}
+
+
+def section_of_key(key):
+    return _KEY_TO_SECTION.get(key, CORE_SECTION)
+
+
+def normalize_sections(sections):
+    """None は全セクション。未知の名前は core 扱いにする。"""
+    if sections is None:
+        return set(ALL_SECTIONS)
+    if isinstance(sections, str):
+        sections = (sections,)
+    return {section if section in ALL_SECTIONS else CORE_SECTION for section in sections}
+
+
+def split_state(state, sections=None):
+    """state を {section: {key: value}} に分ける（sections 指定時はその分だけ）。"""
+    wanted = normalize_sections(sections)
+    parts = {section: {} for section in wanted}
+    for key, value in (state or {}).items():
+        section = section_of_key(key)
+        if section in parts:
+            parts[section][key] = value
+    return parts
+
+
+def merge_sections(core_data, section_rows):
+    """Room.data（core または移行前の全量）へ各セクション行を重ねて state を復元する。
+
+    セクション行が存在するセクションは行の内容が正で、Room.data 側に残る
+    同セクションのキーは捨てる（移行前の全量 Room.data の古い値を拾わないため）。
+    """
+    merged = dict(core_data) if isinstance(core_data, dict) else {}
+    for section, data in section_rows:
+        for key in SECTION_KEYS.get(section, ()):
+            merged.pop(key, None)
+        if isinstance(data, dict):
+            merged.update(data)
+    return merged
+
+
+def encode_section(part):
+    """書き込み要否の判定用に (正規化JSON文字列, digest) を返す。"""
+    encoded = json.dumps(part, ensure_ascii=False, default=str, separators=(',', ':'))
+    return encoded, hashlib.sha1(encoded.encode('utf-8')).hexdigest()
+
+
+# payload 先頭バイトの形式番号
+FORMAT_JSON = 0x00   # UTF-8 の compact JSON
+FORMAT_ZLIB = 0x01   # zlib 圧縮した compact JSON
+
+# これより小さいセクションは圧縮しても縮まらないので素の JSON で持つ。
+_COMPRESS_MIN_BYTES = 512
+_ZLIB_LEVEL = 6
+
+
+def pack_section(encoded):
+    """encode_section の JSON 文字列を payload（形式番号 + 本体）にする。"""
+    raw = encoded.encode('utf-8')
+    if len(raw) >= _COMPRESS_MIN_BYTES:
+        return bytes((FORMAT_ZLIB,)) + zlib.compress(raw, _ZLIB_LEVEL)
+    return bytes((FORMAT_JSON,)) + raw
+
+
+def unpack_section(payload):
+    """payload からセクション内容（dict）を戻す。未知の形式は ValueError。"""
+    payload = bytes(payload)
+    if not payload:
+        return {}
+    fmt, body = payload[0], payload[1:]
+    if fmt == FORMAT_ZLIB:
+        body = zlib.decompress(body)
+    elif fmt != FORMAT_JSON:
+        raise ValueError(f"unknown room section format: {fmt}")
+    return json.loads(body.decode('utf-8'))
@@ -0,0 +1,84 @@
+"""ルーム単位のワーカー分割（シャーディング）。
+
+active_room_states / user_sids はプロセスメモリにあるため、複数ワーカーで動かすときは
+ルームごとに担当ワーカーを1つに決める。担当はルーム名のコンシステントハッシュで
+決まり、ワーカー数を増減しても移るルームは一部で済む。
+
+担当外のルームへ join_room されたワーカーは shard_redirect で担当ワーカーの接続先を
+返し、クライアントはそちらへ接続し直す。ワーカーをまたぐ emit は Socket.IO の
+メッセージキュー（manager.socket_queue）経由で届く。
+
+  ROOM_SHARDS        … ワーカー（シャード）数。1 なら分割しない（既定）
+  ROOM_SHARD_INDEX   … このワーカーの番号（0 始まり）
+  ROOM_SHARD_URLS    … 各シャードの Socket.IO 接続先（カンマ区切り、番号順）。
+                       同一ホストでポートを分けると Cookie（セッション）を共有できる
+"""
+import bisect
+import hashlib
+import os
+
+_VIRTUAL_NODES = 64
+
+
+def _env_int(name, default):
+    try:
+        return int(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def _hash(value):
+    return int.from_bytes(hashlib.md5(value.encode('utf-8')).digest()[:8], 'big')
+
+
+class ShardRing:
+    """シャード番号をリング上に仮想ノードとして並べたコンシステントハッシュ。"""
+
+    def __init__(self, shard_count, virtual_nodes=_VIRTUAL_NODES):
+        self.shard_count = max(1, int(shard_count))
+        points = sorted(
+            (_hash(f"shard-{shard}#{replica}"), shard)
+            for shard in range(self.shard_count)
+            for replica in range(virtual_nodes)
+        )
+        self._hashes = [point for point, _shard in points]
+        self._shards = [shard for _point, shard in points]
+
+    def owner(self, key):
+        if self.shard_count == 1:
+            return 0
+        index = bisect.bisect(self._hashes, _hash(str(key))) % len(self._hashes)
+        return self._shards[index]
+
+
+_SHARD_COUNT = max(1, _env_int('ROOM_SHARDS', 1))
+_SHARD_INDEX = _env_int('ROOM_SHARD_INDEX', 0)
+_SHARD_URLS = [url.strip() for url in str(os.environ.get('ROOM_SHARD_URLS') or '').split(',') if url.strip()]
+_ring = ShardRing(_SHARD_COUNT)
+
+
+def sharding_enabled():
+    return _SHARD_COUNT > 1
+
+
+def local_shard():
+    return _SHARD_INDEX
+
+
+def owner_of(room_name):
+    """room_name を担当するシャード番号。"""
+    return _ring.owner(room_name)
+
+
+def is_local_room(room_name):
+    return not sharding_enabled() or owner_of(room_name) == _SHARD_INDEX
+
+
+def shard_url(shard):
+    return _SHARD_URLS[shard] if 0 <= shard < len(_SHARD_URLS) else None
+
+
+def redirect_payload(room_name):
+    """担当外ルームへの join_room に返す shard_redirect の内容。"""
+    shard = owner_of(room_name)
+    return {'room': room_name, 'shard': shard, 'url': shard_url(shard)}
@@ -1,7 +1,6 @@
 from __future__ import annotations
 
 import copy
-import re
 from contextlib import contextmanager
 from types import SimpleNamespace
 from typing import Callable, Literal
@@ -13,6 +12,7 @@ from manager.battle import resolve_auto_runtime
 from manager.battle import wide_solver
 from manager.battle.battle_ai import ai_suggest_skill
 from manager.battle.system_skills import ensure_system_skills_registered
+from manager.dice_roller import compile_dice
 from manager.sim.reporting import (
     BattleReport,
     battle_summary_from_characters,
@@ -32,15 +32,6 @@ RollMode = Literal["random", "low", "median", "high"]
 AllyTargetPolicy = Literal["first_alive_enemy", "lowest_hp_enemy"]
 
 
-def _resolve_term_sign(expr, start_index):
-    i = int(start_index) - 1
-    while i >= 0 and expr[i].isspace():
-        i -= 1
-    if i >= 0 and expr[i] == "-":
-        return -1
-    return 1
-
-
 def _median_die_value(faces: int) -> int:
     if faces <= 1:
         return max(0, faces)
@@ -65,72 +56,14 @@ def build_deterministic_roll_dice(roll_mode: RollMode):
     if roll_mode not in {"low", "median", "high"}:
         raise ValueError("roll_mode must be one of: low, median, high")
 
+    def _rolls(num_dice, faces):
+        return _rolls_for_mode(num_dice, faces, roll_mode)
+
     def _roll_dice(cmd_str):
         raw_cmd = str(cmd_str or "").strip()
-        calc_str = raw_cmd.split()[0] if raw_cmd else ""
-        details_str = calc_str
-        original_calc = calc_str
-
-        dice_total = 0
-        dice_terms = []
-        matches = list(re.finditer(r"(\d+)d(\d+)", original_calc))
-
-        for match in reversed(matches):
-            num_dice = int(match.group(1))
-            num_faces = int(match.group(2))
-            sign = _resolve_term_sign(original_calc, match.start())
-            rolls = _rolls_for_mode(num_dice, num_faces, roll_mode)
-            roll_sum = sum(rolls)
-            roll_details = f"({'+'.join(map(str, rolls))})"
-
-            start, end = match.start(), match.end()
-            details_str = details_str[:start] + roll_details + details_str[end:]
-            calc_str = calc_str[:start] + str(roll_sum) + calc_str[end:]
-            dice_total += sign * int(roll_sum)
-            dice_terms.append({
-                "sign": sign,
-                "num": num_dice,
-                "faces": num_faces,
-                "rolls": rolls,
-                "sum": int(roll_sum),
-                "raw": match.group(0),
-            })
-
-        sanitized = re.sub(r"[^-\d()/*+.]", "", calc_str)
-        try:
-            total = eval(sanitized)
-        except Exception:
-            total = 0
-
-        constant_total = 0
-        constant_terms = []
-        for token in re.finditer(r"([+-]?)(\d+d\d+|\d+)", original_calc.replace(" ", "")):
-            sign_raw = token.group(1)
-            raw_value = token.group(2)
-            sign = -1 if sign_raw == "-" else 1
-            if "d" in raw_value:
-                continue
-            try:
-                value = sign * int(raw_value)
-            except Exception:
-                continue
-            constant_total += value
-            constant_terms.append({"raw": f"{sign_raw}{raw_value}", "value": value})
-
-        return {
-            "total": total,
-            "details": details_str,
-            "breakdown": {
-                "expression": original_calc,
-                "sanitized_expression": sanitized,
-                "dice_total": int(dice_total),
-                "constant_total": int(constant_total),
-                "final_total": int(total),
-                "dice_terms": list(reversed(dice_terms)),
-                "constant_terms": constant_terms,
-                "roll_mode": roll_mode,
-            },
-        }
+        result = compile_dice(raw_cmd.split()[0] if raw_cmd else "").roll(_rolls)
+        result["breakdown"]["roll_mode"] = roll_mode
+        return result
 
     return _roll_dice
 
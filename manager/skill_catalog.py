@@ -0,0 +1,426 @@
+"""スキル定義のコンパイル済みカタログ。
+
+特記処理などのルール JSON は、これまで参照のたびに json.loads と正規化
+（extract_and_normalize_skill_rule_data）をやり直していた。ここでは文字列の内容を
+キーにパース・正規化を一度だけ行い、スキル定義ごとにタグ・コスト・広域種別・
+対象範囲などをまとめた CompiledSkill を持つ。
+
+ここから返す dict / list / CompiledSkill は共有物なので書き換えないこと。
+効果処理のように受け取った dict を書き換える側へは rule_data_copy / fresh_effects で
+コピーを渡す（バフ付与は effect の data をそのままキャラクターへ載せて書き換える）。
+
+スキル定義の dict は読み取り専用として扱う。CompiledSkill は dict ごとに作るため、
+同じ dict を書き換えた場合は invalidate を呼ぶ。スキル読み込み時は rebuild で作り直す。
+"""
+import copy
+import json
+
+from manager import catalog_registry
+from manager.json_rule_v2 import extract_and_normalize_skill_rule_data, select_skill_rule_source
+from manager.logs import setup_logger
+
+logger = setup_logger(__name__)
+
+# 各キャッシュの上限（超えたら空にして作り直す）
+_MAX_ENTRIES = 4096
+
+# (ルール文字列, strict) -> (正規化済みルール, コピー用 JSON 文字列 or None)
+_rules = {}
+# JSON 文字列 -> パース結果（dict でなければ None）
+_objects = {}
+# id(skill_data) -> CompiledSkill
+_records = {}
+
+_metrics = {'rule_hits': 0, 'rule_misses': 0, 'object_hits': 0, 'object_misses': 0, 'compiled': 0}
+
+_MISSING = object()
+
+
+def get_catalog_metrics():
+    metrics = dict(_metrics)
+    metrics['rules'] = len(_rules)
+    metrics['objects'] = len(_objects)
+    metrics['records'] = len(_records)
+    return metrics
+
+
+def _remember(cache, key, value):
+    if len(cache) >= _MAX_ENTRIES:
+        cache.clear()
+    cache[key] = value
+
+
+def clear():
+    """パース結果とレコードをすべて捨てる（バフカタログ更新時など）。"""
+    _rules.clear()
+    _objects.clear()
+    _records.clear()
+
+
+@catalog_registry.on_change
+def _on_catalog_change(name, version, replaced):
+    # 正規化済みルールはバフ名を解決済みなので、バフ図鑑の差し替えで作り直させる
+    if name == catalog_registry.BUFFS:
+        clear()
+
+
+def invalidate(skill_data):
+    _records.pop(id(skill_data), None)
+
+
+def rebuild(skills):
+    """スキル定義一式を読み込み直したときに呼ぶ。全スキルを先にコンパイルしておく。"""
+    clear()
+    for skill_data in (skills or {}).values():
+        if isinstance(skill_data, dict):
+            compiled_skill(skill_data)
+    logger.info(f"[skill_catalog] compiled {len(_records)} skills")
+
+
+# --- ルール JSON -------------------------------------------------------------
+
+def _normalize(skill_data, strict):
+    skill_id = str(skill_data.get('id', '') or '').strip()
+    return extract_and_normalize_skill_rule_data(skill_data, skill_id=skill_id, strict=strict)
+
+
+def _copy_text(rule):
+    # JSON を往復させても同じ値に戻るときだけ json.loads でコピーする（deepcopy より速い）。
+    try:
+        text = json.dumps(rule, ensure_ascii=False)
+    except (TypeError, ValueError):
+        return None
+    return text if json.loads(text) == rule else None
+
+
+def _cached_rule(skill_data, strict, raise_on_error):
+    raw, _key = select_skill_rule_source(skill_data)
+    if raw is not None and not isinstance(raw, str):
+        # dict のルールはそのまま（正規化側で deepcopy される）
+        return None
+    key = (raw, bool(strict))
+    entry = _rules.get(key)
+    if entry is not None:
+        _metrics['rule_hits'] += 1
+        return entry
+    _metrics['rule_misses'] += 1
+    try:
+        rule = _normalize(skill_data, strict)
+    except Exception:
+        # 壊れたルールは覚えない（監査ログ・例外は毎回元の経路で出す）
+        if raise_on_error:
+            raise
+        return {}, None
+    entry = (rule, _copy_text(rule))
+    _remember(_rules, key, entry)
+    return entry
+
+
+def shared_rule_data(skill_data, *, strict=True, raise_on_error=False):
+    """正規化済みルール（共有・読み取り専用）。失敗時は {}（raise_on_error なら送出）。"""
+    if not isinstance(skill_data, dict):
+        return extract_and_normalize_skill_rule_data(skill_data)
+    entry = _cached_rule(skill_data, strict, raise_on_error)
+    if entry is None:
+        try:
+            return _normalize(skill_data, strict)
+        except Exception:
+            if raise_on_error:
+                raise
+            return {}
+    return entry[0]
+
+
+def rule_data_copy(skill_data, *, strict=True, raise_on_error=False):
+    """正規化済みルールの書き換えてよいコピー。"""
+    if not isinstance(skill_data, dict):
+        return extract_and_normalize_skill_rule_data(skill_data)
+    entry = _cached_rule(skill_data, strict, raise_on_error)
+    if entry is None:
+        try:
+            return _normalize(skill_data, strict)
+        except Exception:
+            if raise_on_error:
+                raise
+            return {}
+    rule, text = entry
+    return json.loads(text) if text is not None else copy.deepcopy(rule)
+
+
+def parsed_object(raw):
+    """JSON オブジェクト文字列のパース結果（共有・読み取り専用）。dict でなければ None。"""
+    if not isinstance(raw, str):
+        return None
+    text = raw.strip()
+    if not text:
+        return None
+    obj = _objects.get(text, _MISSING)
+    if obj is not _MISSING:
+        _metrics['object_hits'] += 1
+        return obj
+    _metrics['object_misses'] += 1
+    try:
+        obj = json.loads(text)
+    except Exception:
+        obj = None
+    if not isinstance(obj, dict):
+        obj = None
+    _remember(_objects, text, obj)
+    return obj
+
+
+def fresh_effects(raw, timing=None):
+    """JSON 文字列の effects を効果処理へ渡すためのコピーで返す。
+
+    timing を指定すると、その timing の効果が1つも無いときはコピーせず [] を返す。
+    """
+    obj = parsed_object(raw)
+    if obj is None:
+        return []
+    effects = obj.get('effects', [])
+    if not effects:
+        return []
+    if timing is not None and isinstance(effects, list):
+        if not any(isinstance(e, dict) and e.get('timing') == timing for e in effects):
+            return []
+    return _tree_copy(effects)
+
+
+def _tree_copy(value):
+    # パース結果は dict / list / スカラーだけなので、文字列を読み直さずに木をたどってコピーする
+    if isinstance(value, dict):
+        return {k: _tree_copy(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_tree_copy(v) for v in value]
+    return value
+
+
+# --- 広域種別・対象範囲（宣言時の判定） ----------------------------------------
+
+_SELF_TARGET_TAGS = {'self_target', 'target_self', '自分対象', '自身対象', '自己対象'}
+_ALLY_TARGET_TAGS = {
+    'ally_target', 'target_ally', '味方対象', '味方指定', '同じチーム対象', '同じチーム指定',
+    '同陣営', '同陣営対象', '同陣営指定',
+}
+_ANY_TARGET_TAGS = {'any_target', 'target_any', '全体対象', '任意対象', '対象自由'}
+_ENEMY_TARGET_TAGS = {
+    'enemy_target', 'target_enemy', '敵対象', '相手チーム対象', '相手チーム指定', '相手陣営対象', '相手陣営指定',
+}
+
+_MASS_TEXT_KEYS = [
+    'category',
+    'distance',
+    '分類',
+    'カテゴリ',
+    '射程',
+    '距離',
+    '対象',
+    'target_scope',
+    'target',
+    'target_type',
+    'targeting',
+    'mass_type',
+]
+
+
+def coerce_mass_type(raw_value):
+    text = str(raw_value or '').strip().lower()
+    if not text:
+        return None
+    if text in ['mass_summation', 'summation', 'sum']:
+        return 'mass_summation'
+    if text in ['mass_individual', 'individual']:
+        return 'mass_individual'
+    return None
+
+
+def infer_mass_type_from_text(text):
+    merged = str(text or '').lower()
+    if not merged:
+        return None
+
+    if (
+        'mass_summation' in merged
+        or 'summation' in merged
+        or 'sum' in merged
+        or '合算' in merged
+        or '総和' in merged
+    ):
+        return 'mass_summation'
+
+    if (
+        'mass_individual' in merged
+        or 'individual' in merged
+        or '個別' in merged
+        or '単体' in merged
+    ):
+        return 'mass_individual'
+
+    if '広域' in merged:
+        return 'mass_individual'
+    return None
+
+
+def normalize_target_scope(raw_value, default='enemy'):
+    text = str(raw_value or '').strip().lower()
+    if text in ['', 'default', 'auto']:
+        return str(default or 'enemy')
+    if text in ['self', 'self_only', 'caster', '自分', '自分対象', '自身', '自己対象']:
+        return 'self'
+    if text in [
+        'enemy', 'enemies', 'foe', 'opponent', 'opponents',
+        '敵', '敵側', '敵対', 'opposing_team', '相手チーム', '相手チーム対象', '相手チーム指定',
+        '相手陣営', '相手陣営対象', '相手陣営指定',
+    ]:
+        return 'enemy'
+    if text in [
+        'ally', 'allies', 'friend', 'friends',
+        '味方', '味方全員', '味方全体', '同じチーム', '同じチーム対象', '同じチーム指定', 'same_team',
+        '同陣営', '同陣営対象', '同陣営指定',
+    ]:
+        return 'ally'
+    if text in ['any', 'all', 'both', '全体', 'all_targets']:
+        return 'any'
+    return str(default or 'enemy')
+
+
+def intent_skill_tags(skill_data, rule_data):
+    """宣言時に見るタグ（定義の tags のあとに、未出のルール側 tags を足す）。"""
+    tags = list(skill_data.get('tags', []))
+    for t in rule_data.get('tags', []) if isinstance(rule_data, dict) else []:
+        if t not in tags:
+            tags.append(t)
+    return tags
+
+
+def _infer_mass_type(skill_data, rule_data, intent_tags):
+    direct_candidates = [
+        skill_data.get('mass_type'),
+        skill_data.get('target_type'),
+        skill_data.get('targeting'),
+        skill_data.get('targetType'),
+        rule_data.get('mass_type'),
+        rule_data.get('target_type'),
+        rule_data.get('targeting'),
+        rule_data.get('targetType'),
+    ]
+    for raw in direct_candidates:
+        coerced = coerce_mass_type(raw)
+        if coerced:
+            return coerced
+
+    merged_parts = list(intent_tags)
+    rule_tags = rule_data.get('tags', [])
+    if isinstance(rule_tags, list):
+        merged_parts.extend(rule_tags)
+    for key in _MASS_TEXT_KEYS:
+        if isinstance(skill_data.get(key), str):
+            merged_parts.append(skill_data.get(key))
+        if isinstance(rule_data.get(key), str):
+            merged_parts.append(rule_data.get(key))
+
+    merged = ' '.join(str(v or '').lower() for v in merged_parts)
+    return infer_mass_type_from_text(merged)
+
+
+def _infer_target_scope(skill_data, rule_data, intent_tags):
+    candidates = [
+        skill_data.get('target_scope'),
+        skill_data.get('targetScope'),
+        skill_data.get('target_team'),
+        skill_data.get('targetTeam'),
+        rule_data.get('target_scope'),
+        rule_data.get('targetScope'),
+        rule_data.get('target_team'),
+        rule_data.get('targetTeam'),
+    ]
+    for raw in candidates:
+        if raw not in [None, '']:
+            return normalize_target_scope(raw, default='enemy')
+
+    normalized = {str(t or '').strip().lower() for t in intent_tags if str(t or '').strip()}
+    if any(t.lower() in normalized for t in _ANY_TARGET_TAGS):
+        return 'any'
+    if any(t.lower() in normalized for t in _SELF_TARGET_TAGS):
+        return 'self'
+    if any(t.lower() in normalized for t in _ALLY_TARGET_TAGS):
+        return 'ally'
+    if any(t.lower() in normalized for t in _ENEMY_TARGET_TAGS):
+        return 'enemy'
+    return 'enemy'
+
+
+# --- スキルごとのレコード ------------------------------------------------------
+
+def _clean_tags(raw):
+    if not isinstance(raw, list):
+        return []
+    return [str(v).strip() for v in raw if str(v).strip()]
+
+
+class CompiledSkill:
+    """1スキル分のコンパイル結果（共有・読み取り専用）。
+
+    rule_data      正規化済みルール（strict、失敗時は {}）
+    tags           定義の tags とルールの tags（前後空白除去、空は除く）
+    lowered_tags   tags を小文字にしたもの
+    cost           コスト行（定義の cost があればそれ、無ければルールの cost）
+    effect_timings ルールの effects に含まれる timing
+    mass_type      広域種別（mass_summation / mass_individual / None）
+    target_scope   対象範囲（self / ally / enemy / any）
+    """
+    __slots__ = (
+        'skill_id', 'owner', 'rule_data', 'tags', 'lowered_tags', 'cost',
+        'effect_timings', 'mass_type', 'target_scope',
+    )
+
+    def __init__(self, skill_data):
+        rule_data = shared_rule_data(skill_data)
+        if not isinstance(rule_data, dict):
+            rule_data = {}
+        tags = tuple(_clean_tags(skill_data.get('tags', [])) + _clean_tags(rule_data.get('tags')))
+        direct_cost = skill_data.get('cost')
+        if isinstance(direct_cost, list):
+            cost = tuple(direct_cost)
+        else:
+            rule_cost = rule_data.get('cost', [])
+            cost = tuple(rule_cost) if isinstance(rule_cost, list) else ()
+        effects = rule_data.get('effects', [])
+        timings = frozenset(
+            e.get('timing') for e in (effects if isinstance(effects, list) else [])
+            if isinstance(e, dict) and e.get('timing')
+        )
+        intent_tags = intent_skill_tags(skill_data, rule_data)
+        values = {
+            'skill_id': str(skill_data.get('id') or skill_data.get('スキルID') or '').strip(),
+            'owner': skill_data,
+            'rule_data': rule_data,
+            'tags': tags,
+            'lowered_tags': tuple(t.lower() for t in tags),
+            'cost': cost,
+            'effect_timings': timings,
+            'mass_type': _infer_mass_type(skill_data, rule_data, intent_tags),
+            'target_scope': _infer_target_scope(skill_data, rule_data, intent_tags),
+        }
+        for name, value in values.items():
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError('CompiledSkill is read-only')
+
+    def __repr__(self):
+        return f"CompiledSkill({self.skill_id!r})"
+
+
+def compiled_skill(skill_data):
+    """skill_data の CompiledSkill。skill_data が dict でなければ None。"""
+    if not isinstance(skill_data, dict):
+        return None
+    record = _records.get(id(skill_data))
+    if record is not None and record.owner is skill_data:
+        return record
+    record = CompiledSkill(skill_data)
+    _metrics['compiled'] += 1
+    if skill_data:
+        _remember(_records, id(skill_data), record)
+    return record
@@ -1,7 +1,6 @@
 """
 スキル効果適用ロジックモジュール
 """
-import json
 import logging
 from manager.game_logic import process_skill_effects, get_status_value, apply_buff, remove_buff
 from manager.room_manager import _update_char_stat, broadcast_log
@@ -11,6 +10,7 @@ from manager.battle.damage_context import build_damage_context
 from manager.summons.service import apply_summon_change
 from manager.granted_skills.service import apply_grant_skill_change
 from manager.bleed_logic import consume_bleed_maintenance_stack
+from manager.skill_catalog import fresh_effects
 
 logger = logging.getLogger(__name__)
 
@@ -44,15 +44,16 @@ def apply_skill_effects_bidirectional(
 
     logger.debug(f"[apply_skill_effects_bidirectional] Called: winner={winner_side}, a_char={a_char['name'] if a_char else None}, d_char={d_char['name'] if d_char else None}")
 
+    # 効果処理は effect を書き換えるので、カタログからコピーを受け取る
     if a_skill:
         try:
-            effects_a = json.loads(a_skill.get('特記処理', '{}')).get("effects", [])
+            effects_a = fresh_effects(a_skill.get('特記処理', '{}'))
         except:
             pass
 
     if d_skill:
         try:
-            effects_d = json.loads(d_skill.get('特記処理', '{}')).get("effects", [])
+            effects_d = fresh_effects(d_skill.get('特記処理', '{}'))
         except:
             pass
 
@@ -0,0 +1,58 @@
+"""ワーカー間の Socket.IO メッセージキュー設定。
+
+SOCKETIO_MESSAGE_QUEUE に接続先を指定すると、emit がメッセージキュー経由で
+他ワーカーへも届く（manager.room_shards 参照）。
+
+  SOCKETIO_MESSAGE_QUEUE=redis://... / amqp://... … Flask-SocketIO の message_queue にそのまま渡す
+  SOCKETIO_MESSAGE_QUEUE=local                    … 同一プロセス内の LocalQueueManager（テスト・開発用）
+  SOCKETIO_CHANNEL                                … チャンネル名（既定 gemtrpg）
+"""
+import json
+import os
+import queue
+
+import socketio
+
+_LOCAL_SCHEMES = ('local', 'local://')
+
+
+class LocalQueueManager(socketio.PubSubManager):
+    """プロセス内のキューで PubSubManager を動かす代用品。
+
+    同じチャンネルの LocalQueueManager 同士が、別サーバ（ワーカー）と同じように
+    メッセージを受け取る。メッセージは実際のバックエンドと同様に JSON を経由させる。
+    """
+    name = 'local'
+    _channels = {}
+
+    def __init__(self, channel='socketio', write_only=False, logger=None, json=None):
+        super().__init__(channel=channel, write_only=write_only, logger=logger, json=json)
+        self._inbox = queue.Queue()
+        if not write_only:
+            self._channels.setdefault(channel, []).append(self._inbox)
+
+    def _publish(self, data):
+        message = json.dumps(data, ensure_ascii=False, default=str)
+        for inbox in list(self._channels.get(self.channel, ())):
+            if inbox is not self._inbox:
+                inbox.put(message)
+
+    def _listen(self):
+        while True:
+            yield self._inbox.get()
+
+    def close(self):
+        inboxes = self._channels.get(self.channel, [])
+        if self._inbox in inboxes:
+            inboxes.remove(self._inbox)
+
+
+def message_queue_options():
+    """socketio.init_app へ渡す追加引数（未設定なら空）。"""
+    url = str(os.environ.get('SOCKETIO_MESSAGE_QUEUE') or '').strip()
+    if not url:
+        return {}
+    channel = str(os.environ.get('SOCKETIO_CHANNEL') or 'gemtrpg').strip()
+    if url in _LOCAL_SCHEMES:
+        return {'client_manager': LocalQueueManager(channel=channel)}
+    return {'message_queue': url, 'channel': channel}
@@ -0,0 +1,243 @@
+"""ルーム状態の版管理と差分（JSON Patch 形式）生成。
+
+state_updated で毎回ルーム全体を送る代わりに、ルームごとに単調増加する
+state_version と直前に配信したスナップショットを保持し、変更点だけを
+state_patch として配信する。差分を受け取れるのは join_room で
+``state_patch: true`` を申告したクライアントのみで、それ以外は従来通り
+state_updated（全量）を受け取る。
+
+差分の op は RFC 6902 の add / remove / replace のみを使い、path は
+JSON Pointer（RFC 6901）で表す。
+
+差分購読クライアントへのスナップショット・差分には logs を含めない。
+ログは new_log で逐次届き、過去分は request_logs でカーソル取得する。
+"""
+import json
+
+from extensions import user_sids
+from manager import payload_cache
+
+STATE_PATCH_ROOM_SUFFIX = "::state_patch"
+
+# 長さの変わったリストは要素ごとの差分がこの割合を超えたら丸ごと置換する。
+_LIST_REPLACE_RATIO = 0.5
+
+# 差分購読クライアント向けのスナップショットから外すキー。
+SNAPSHOT_EXCLUDED_KEYS = ("logs", "_log_seq")
+
+# room_name -> {"version": int, "snapshot": dict | None, "encoded": str | None,
+#               "generation": 最後に advance_state したときの payload_cache.state_generation}
+_room_sync = {}
+
+
+def state_patch_room(room_name):
+    """差分購読クライアントが参加する Socket.IO サブルーム名。"""
+    return f"{room_name}{STATE_PATCH_ROOM_SUFFIX}"
+
+
+def get_state_version(room_name):
+    entry = _room_sync.get(room_name)
+    return entry["version"] if entry else 0
+
+
+def discard_room_sync(room_name):
+    """ルーム削除・メモリ解放時に版情報とスナップショットを破棄する。"""
+    _room_sync.pop(room_name, None)
+    payload_cache.discard(room_name)
+
+
+def has_unsynced_changes(room_name):
+    """最後の advance_state 以降に保存要求（書き換え）があった、または差分の基準が無い。"""
+    entry = _room_sync.get(room_name)
+    if not entry or entry.get("snapshot") is None:
+        return True
+    return entry.get("generation") != payload_cache.state_generation(room_name)
+
+
+def patch_subscriber_sids(room_name):
+    """join_room で差分受信を申告した、当該ルーム在室中の SID 一覧。"""
+    return [
+        sid for sid, info in user_sids.items()
+        if info.get("room") == room_name and info.get("state_patch")
+    ]
+
+
+def has_patch_subscribers(room_name):
+    return bool(patch_subscriber_sids(room_name))
+
+
+def encode_state(state):
+    """クライアントに届く形へ正規化したコピーと、そのJSON文字列長を返す。"""
+    encoded = json.dumps(state, ensure_ascii=False, default=str, separators=(",", ":"))
+    return json.loads(encoded), len(encoded)
+
+
+def encode_snapshot(state):
+    """snapshot_view(state) の JSON 文字列（配信・差分判定の両方でこれを使い回す）。"""
+    return payload_cache.encode(snapshot_view(state))
+
+
+def snapshot_view(state):
+    """差分購読クライアントに見せる形（logs 等を除いた浅いコピー）。"""
+    return {key: value for key, value in state.items() if key not in SNAPSHOT_EXCLUDED_KEYS}
+
+
+def _escape_pointer_token(token):
+    return str(token).replace("~", "~0").replace("/", "~1")
+
+
+def _unescape_pointer_token(token):
+    return token.replace("~1", "/").replace("~0", "~")
+
+
+def _same_scalar(old, new):
+    # True == 1 を等価扱いしないよう型も比較する。
+    return type(old) is type(new) and old == new
+
+
+def _diff_list(old, new, path, ops):
+    common = min(len(old), len(new))
+    sub_ops = []
+    for index in range(common):
+        _diff_value(old[index], new[index], f"{path}/{index}", sub_ops)
+    if len(old) != len(new) and len(sub_ops) > max(1, len(new)) * _LIST_REPLACE_RATIO:
+        ops.append({"op": "replace", "path": path, "value": new})
+        return
+    ops.extend(sub_ops)
+    for index in range(len(old) - 1, common - 1, -1):
+        ops.append({"op": "remove", "path": f"{path}/{index}"})
+    for value in new[common:]:
+        ops.append({"op": "add", "path": f"{path}/-", "value": value})
+
+
+def _diff_value(old, new, path, ops):
+    if isinstance(old, dict) and isinstance(new, dict):
+        for key in old:
+            if key not in new:
+                ops.append({"op": "remove", "path": f"{path}/{_escape_pointer_token(key)}"})
+        for key, value in new.items():
+            child = f"{path}/{_escape_pointer_token(key)}"
+            if key not in old:
+                ops.append({"op": "add", "path": child, "value": value})
+            else:
+                _diff_value(old[key], value, child, ops)
+        return
+    if isinstance(old, list) and isinstance(new, list):
+        _diff_list(old, new, path, ops)
+        return
+    if not _same_scalar(old, new):
+        ops.append({"op": "replace", "path": path, "value": new})
+
+
+def diff_state(old, new):
+    """old -> new の JSON Patch op リストを返す（どちらも encode_state 済みを想定）。"""
+    ops = []
+    _diff_value(old, new, "", ops)
+    return ops
+
+
+def apply_state_patch(doc, ops):
+    """JSON Patch を doc に適用して返す（サーバ側テスト・検証用）。"""
+    for op in ops or []:
+        path = op.get("path", "")
+        if path == "":
+            doc = op.get("value")
+            continue
+        tokens = [_unescape_pointer_token(t) for t in path.split("/")[1:]]
+        parent = doc
+        for token in tokens[:-1]:
+            parent = parent[int(token)] if isinstance(parent, list) else parent[token]
+        last = tokens[-1]
+        kind = op.get("op")
+        if isinstance(parent, list):
+            if kind == "remove":
+                parent.pop(int(last))
+            elif last == "-":
+                parent.append(op.get("value"))
+            elif kind == "add":
+                parent.insert(int(last), op.get("value"))
+            else:
+                parent[int(last)] = op.get("value")
+        elif kind == "remove":
+            parent.pop(last, None)
+        else:
+            parent[last] = op.get("value")
+    return doc
+
+
+def advance_state(room_name, state, track_snapshot=True):
+    """現在の state を新しい版として登録し、配信内容を返す。
+
+    戻り値は dict:
+      version / base_version: 新旧の版番号
+      encoded / snapshot_size: snapshot_view の JSON 文字列とその長さ
+      snapshot: 正規化済み全量（track_snapshot=False のときは None）
+      ops / patch_encoded / patch_size: 直前スナップショットからの差分とその JSON
+        （作れない場合は None）
+
+    差分が空なら版を進めない。文字列が前回と同じなら差分計算も省く。
+    track_snapshot=False のときは差分購読者が居ないとみなしてスナップショットを
+    保持せず（メモリ節約）、従来通り毎回版を進める。
+    """
+    entry = _room_sync.setdefault(room_name, {"version": 0, "snapshot": None, "encoded": None})
+    base_version = entry["version"]
+    encoded = encode_snapshot(state)
+    payload_cache.touch_state(room_name)
+    entry["generation"] = payload_cache.state_generation(room_name)
+    unchanged = entry.get("encoded") == encoded
+    entry["encoded"] = encoded
+    result = {
+        "version": base_version,
+        "base_version": base_version,
+        "encoded": encoded,
+        "snapshot": None,
+        "snapshot_size": len(encoded),
+        "ops": None,
+        "patch_encoded": None,
+        "patch_size": None,
+    }
+    if not track_snapshot:
+        entry["version"] = result["version"] = base_version + 1
+        entry["snapshot"] = None
+        return result
+
+    previous = entry["snapshot"]
+    if previous is not None and unchanged:
+        snapshot, ops = previous, []
+    else:
+        snapshot = json.loads(encoded)
+        ops = diff_state(previous, snapshot) if previous is not None else None
+    if ops is not None:
+        result["patch_encoded"] = payload_cache.encode(ops)
+        result["patch_size"] = len(result["patch_encoded"])
+    if ops is None or ops:
+        entry["version"] = result["version"] = base_version + 1
+
+    entry["snapshot"] = result["snapshot"] = snapshot
+    result["ops"] = ops
+    return result
+
+
+def versioned_payload(state, version, compact=False):
+    """state_updated 用に版番号を付けた浅いコピーを返す（元の state は汚さない）。
+
+    compact=True は差分購読クライアント向けで、logs 等を含めない。
+    """
+    payload = snapshot_view(state) if compact else dict(state)
+    payload["state_version"] = version
+    return payload
+
+
+def build_patch_payload(room_name, result):
+    payload = {
+        "room": room_name,
+        "base_version": result["base_version"],
+        "version": result["version"],
+        "ops": result["ops"],
+    }
+    if result.get("patch_encoded") is None:
+        return payload
+    head = payload_cache.encode({key: value for key, value in payload.items() if key != "ops"})
+    return payload_cache.EncodedPayload(
+        payload, payload_cache.append_fields(head, [("ops", result["patch_encoded"])]),
+    )
@@ -0,0 +1,101 @@
+"""GM / プレイヤー別の配信ビュー。
+
+シークレットダイスのログは従来クライアント側で伏せていたため、プレイヤーにも
+本文がそのまま届いていた。配信時にサーバ側でビューを分け、GM 用（無加工）と
+プレイヤー用（他人のシークレットを伏せたもの）をそれぞれ1回だけ文字列化して
+ロール別の Socket.IO サブルームへ送る。シークレットを投稿したプレイヤーには
+自分の分だけ見えるビューを個別に送る（その人数分だけ余分に作る）。
+
+ビューで変わるのは logs だけで、差分購読（compact）向けのスナップショットは
+logs を含まないので全員共通のまま。hidden_skills 等のキャラクター情報は
+操作 UI がそのまま使うため、ここでは落とさない。
+"""
+from extensions import socketio, user_sids
+from manager.auth import GM_ATTRIBUTE
+
+GM_VIEW = 'gm'
+PLAYER_VIEW = 'player'
+
+SECRET_LOG_MESSAGE = '（シークレットダイス）'
+
+
+def role_room(room_name, view):
+    """ビューごとのクライアントが参加する Socket.IO サブルーム名。"""
+    return f"{room_name}::{view}"
+
+
+def view_for_attribute(attribute):
+    return GM_VIEW if attribute == GM_ATTRIBUTE else PLAYER_VIEW
+
+
+def set_sid_attribute(sid, attribute):
+    """sid の属性を書き換え、在室中ならロール別サブルームも付け替える。
+
+    属性だけ変えると、降格した GM が GM 用サブルームに残って伏せていないログを
+    受け取り続けるので、属性を変えるときは必ずこれを通す。
+    """
+    info = user_sids.get(sid)
+    if info is None:
+        return
+    old_view = view_for_attribute(info.get('attribute'))
+    info['attribute'] = attribute
+    new_view = view_for_attribute(attribute)
+    room_name = info.get('room')
+    server = getattr(socketio, 'server', None)
+    if not room_name or old_view == new_view or server is None:
+        return
+    try:
+        server.leave_room(sid, role_room(room_name, old_view), namespace='/')
+        server.enter_room(sid, role_room(room_name, new_view), namespace='/')
+    except (KeyError, ValueError):
+        # 切断済みの sid（次の join_room でサブルームに入り直す）
+        pass
+
+
+def viewer_of(sid):
+    """sid の (view, username)。不明な sid はプレイヤー扱い。"""
+    info = user_sids.get(sid) or {}
+    return view_for_attribute(info.get('attribute')), info.get('username')
+
+
+def is_hidden_from(log, view, username=None):
+    if view == GM_VIEW or not isinstance(log, dict) or not log.get('secret'):
+        return False
+    return not username or log.get('user') != username
+
+
+def mask_log(log):
+    masked = dict(log)
+    masked['message'] = SECRET_LOG_MESSAGE
+    masked['masked'] = True
+    return masked
+
+
+def logs_for_view(logs, view, username=None):
+    """view から見える logs を返す。伏せるものが無ければ元のリストをそのまま返す。"""
+    if not logs or view == GM_VIEW:
+        return logs
+    if not any(is_hidden_from(log, view, username) for log in logs):
+        return logs
+    return [mask_log(log) if is_hidden_from(log, view, username) else log for log in logs]
+
+
+def secret_senders(logs):
+    """シークレットのログを投稿したユーザー名の集合。"""
+    return {
+        log.get('user') for log in logs or ()
+        if isinstance(log, dict) and log.get('secret') and log.get('user')
+    }
+
+
+def player_sids(room_name, usernames):
+    """room_name に居るプレイヤーのうち usernames に該当する sid -> username。"""
+    if not usernames:
+        return {}
+    return {
+        sid: info.get('username')
+        for sid, info in list(user_sids.items())
+        if info.get('room') == room_name
+        and info.get('username') in usernames
+        and view_for_attribute(info.get('attribute')) == PLAYER_VIEW
+    }
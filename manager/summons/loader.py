@@ -8,6 +8,7 @@ from io import StringIO
 
 import requests
 
+from manager import catalog_registry
 from manager.cache_paths import (
     SUMMON_TEMPLATES_CACHE_FILE,
     LEGACY_SUMMON_TEMPLATES_CACHE_FILE,
@@ -216,17 +217,29 @@ def refresh_summon_templates():
     templates = fetch_summon_templates_from_csv()
     if templates:
         save_json_cache(SUMMON_TEMPLATES_CACHE_FILE, templates)
+        catalog_registry.publish(catalog_registry.SUMMON_TEMPLATES, templates)
     return templates
 
 
+def _load_summon_templates_source():
+    data = load_json_cache(
+        SUMMON_TEMPLATES_CACHE_FILE,
+        legacy_paths=[LEGACY_SUMMON_TEMPLATES_CACHE_FILE],
+    ) or {}
+    if not isinstance(data, dict):
+        logger.warning("summon templates cache is not dict: %s", type(data))
+        return {}
+    return data
+
+
+catalog_registry.register_source(catalog_registry.SUMMON_TEMPLATES, _load_summon_templates_source)
+
+
 def load_summon_templates(force_refresh: bool = False):
     if force_refresh:
         data = refresh_summon_templates()
     else:
-        data = load_json_cache(
-            SUMMON_TEMPLATES_CACHE_FILE,
-            legacy_paths=[LEGACY_SUMMON_TEMPLATES_CACHE_FILE],
-        ) or {}
+        data = catalog_registry.get(catalog_registry.SUMMON_TEMPLATES)
         if not data:
             data = refresh_summon_templates()
     if not isinstance(data, dict):
@@ -165,6 +165,9 @@ def delete_user(user_id):
         
         db.session.delete(user)
         db.session.commit()
+        from manager.room_manager import refresh_room_owner
+        for r in rooms:
+            refresh_room_owner(r.name, None)
         return True
     return False
 
@@ -175,14 +178,16 @@ def get_user_owned_items(user_id):
     room_list = [{"name": r.name} for r in rooms]
     
     # 2. 所有キャラクターの取得 (全ルームを走査)
+    from manager.data_manager import load_rooms_data
     char_list = []
     all_rooms = Room.query.all()
+    saved_states = load_rooms_data(r for r in all_rooms if not active_room_states.get(r.name))
     
     for r in all_rooms:
         # 稼働中の状態があればそれを優先、なければDBの保存データを使用
         state = active_room_states.get(r.name)
         if not state:
-            state = r.data
+            state = saved_states.get(r.id)
             
         if state and 'characters' in state:
             for char in state['characters']:
@@ -208,12 +213,16 @@ def transfer_ownership(old_id, new_id):
         r.owner_id = new_id
     
     # 2. キャラクターの所有権移動 (全ルームのJSONデータを走査)
+    from manager.data_manager import load_rooms_data, remember_section_digests, write_room_sections
+    from manager.room_manager import save_specific_room_state
     all_rooms = Room.query.all()
+    saved_states = load_rooms_data(r for r in all_rooms if r.name not in active_room_states)
     updated_count = 0
+    written_sections = {}
     
     for r in all_rooms:
         # メモリ上で稼働中ならそちらを優先、なければDBデータ
-        state = active_room_states.get(r.name, r.data)
+        state = active_room_states.get(r.name, saved_states.get(r.id))
         if not state: continue
         
         changed = False
@@ -227,10 +236,16 @@ def transfer_ownership(old_id, new_id):
                     updated_count += 1
         
         if changed:
-            # DBとメモリの両方を更新
-            r.data = state 
+            # 稼働中のルームは通常の保存経路へ、それ以外は characters セクションだけ書く
             if r.name in active_room_states:
-                active_room_states[r.name] = state
+                save_specific_room_state(r.name, sections=('characters',))
+            else:
+                written_sections[r.id] = write_room_sections(r, state, ('characters',))
                 
     db.session.commit()
+    for room_id, written in written_sections.items():
+        remember_section_digests(room_id, written)
+    from manager.room_manager import refresh_room_owner
+    for r in rooms:
+        refresh_room_owner(r.name, new_id)
     return updated_count
@@ -3,6 +3,8 @@ import re
 from functools import wraps
 from flask import jsonify, session
 from extensions import db
+from manager import catalog_registry
+from manager.mutation_recorder import record_touch
 from manager.logs import setup_logger
 
 logger = setup_logger(__name__)
@@ -248,6 +250,7 @@ def normalize_character_labels(char_obj):
         for row in params:
             if isinstance(row, dict) and "label" in row:
                 row["label"] = normalize_status_name(row.get("label"))
+    invalidate_stat_index(char_obj)
 
     buffs = char_obj.get("special_buffs", [])
     if isinstance(buffs, list):
@@ -258,6 +261,126 @@ def normalize_character_labels(char_obj):
             if isinstance(row.get("data"), dict) and row["data"].get("name"):
                 row["data"]["name"] = normalize_buff_name(row["data"].get("name"))
 
+# キャラクターごとのステータス索引（正規化名 -> params / states の行）。
+# キャラクター dict は JSON のまま保つため、索引は id(char_obj) をキーにここで持つ。
+# params / states のリスト差し替え・行の追加削除は参照時に長さと同一性で検出して作り直す。
+# 値の書き換えは行をそのまま読むので索引に影響しない。行の差し替え・名前の書き換えは
+# 参照時に検出する（索引に無い名前は現在のリストを走査して確かめてから None を返す）。
+# 索引はキャラクター dict を掴むので、ルームをメモリから外すときは room_manager が捨てる。
+_STAT_INDEX_MAX_ENTRIES = 4096
+_stat_indexes = {}
+_stat_index_metrics = {'hits': 0, 'builds': 0}
+
+
+class _StatIndex:
+    __slots__ = ('owner', 'params', 'params_len', 'states', 'states_len', 'param_rows', 'state_rows')
+
+
+def get_stat_index_metrics():
+    metrics = dict(_stat_index_metrics)
+    metrics['entries'] = len(_stat_indexes)
+    return metrics
+
+
+def invalidate_stat_index(char_obj=None):
+    """ステータス索引を捨てる（char_obj を省略すると全キャラクター分）。"""
+    if char_obj is None:
+        _stat_indexes.clear()
+    else:
+        _stat_indexes.pop(id(char_obj), None)
+
+
+def _index_rows(rows, key):
+    index = {}
+    for pos, row in enumerate(rows or ()):
+        if not isinstance(row, dict):
+            continue
+        raw = row.get(key)
+        index.setdefault(normalize_status_name(raw), (pos, row, raw))
+    return index
+
+
+def _build_stat_index(char_obj, params, states):
+    entry = _StatIndex()
+    entry.owner = char_obj
+    entry.params = params
+    entry.params_len = len(params) if params else 0
+    entry.states = states
+    entry.states_len = len(states) if states else 0
+    entry.param_rows = _index_rows(params, 'label')
+    entry.state_rows = _index_rows(states, 'name')
+    if len(_stat_indexes) >= _STAT_INDEX_MAX_ENTRIES:
+        _stat_indexes.clear()
+    _stat_indexes[id(char_obj)] = entry
+    _stat_index_metrics['builds'] += 1
+    return entry
+
+
+def _stat_index(char_obj):
+    params = char_obj.get('params')
+    states = char_obj.get('states')
+    entry = _stat_indexes.get(id(char_obj))
+    if (
+        entry is None
+        or entry.owner is not char_obj
+        or entry.params is not params
+        or entry.states is not states
+        or entry.params_len != (len(params) if params else 0)
+        or entry.states_len != (len(states) if states else 0)
+    ):
+        return _build_stat_index(char_obj, params, states)
+    _stat_index_metrics['hits'] += 1
+    return entry
+
+
+def _current_row(rows, hit, key, status_name):
+    if hit is None:
+        # 索引に無くても、同じ長さのまま行を差し替えた・名前を書き換えた可能性がある
+        stale = any(
+            isinstance(row, dict) and normalize_status_name(row.get(key)) == status_name
+            for row in rows or ()
+        )
+        return None, not stale
+    pos, row, raw = hit
+    return row, rows[pos] is row and row.get(key) == raw
+
+
+def _stat_rows(char_obj, status_name):
+    """正規化名 status_name に当たる最初の (params の行, states の行)。無ければ None。"""
+    for _ in range(2):
+        entry = _stat_index(char_obj)
+        param, param_ok = _current_row(entry.params, entry.param_rows.get(status_name), 'label', status_name)
+        state, state_ok = _current_row(entry.states, entry.state_rows.get(status_name), 'name', status_name)
+        if param_ok and state_ok:
+            return param, state
+        # 行の差し替え・名前の書き換えを検出したので作り直して引き直す
+        invalidate_stat_index(char_obj)
+    return None, None
+
+
+def _find_state_row(char_obj, status_name):
+    return _stat_rows(char_obj, normalize_status_name(status_name))[1]
+
+
+def _param_base_value(char_obj, status_name, row):
+    """params の行 row（status_name に当たる最初の行）から値を引く。(値, 見つかったか) を返す。"""
+    if row is None:
+        return 0, False
+    try:
+        return int(row.get('value', 0)), True
+    except ValueError:
+        pass
+    # 先頭の行が数値でなければ、従来どおり後続の同名行を探す
+    for param in char_obj.get('params', []):
+        if param is row or normalize_status_name(param.get('label')) != status_name:
+            continue
+        try:
+            return int(param.get('value', 0)), True
+        except ValueError:
+            pass
+    return 0, False
+
+
 def get_status_value(char_obj, status_name):
     """キャラクターから特定のステータス値を取得する（バフ補正込み）"""
     if not char_obj: return 0
@@ -277,15 +400,7 @@ def get_status_value(char_obj, status_name):
     # ★ 追加: 行動回数のデフォルト値は 1
     if status_name == '行動回数':
         # paramsになくてもデフォルトで1を返す (その後バフ補正が乗る)
-        val = 0
-        found = False
-        for param in char_obj.get('params', []):
-            if normalize_status_name(param.get('label')) == status_name:
-                try:
-                    val = int(param.get('value', 0))
-                    found = True
-                    break
-                except ValueError: pass
+        val, found = _param_base_value(char_obj, status_name, _stat_rows(char_obj, status_name)[0])
         if not found:
             val = 1
 
@@ -293,22 +408,13 @@ def get_status_value(char_obj, status_name):
         buff_mod = get_buff_stat_mod(char_obj, status_name)
         return max(1, val + buff_mod) # 最低1回は保証
 
-    base_value = 0
-    found = False
-
     # 1. params (固定値) から検索
-    for param in char_obj.get('params', []):
-        if normalize_status_name(param.get('label')) == status_name:
-            try:
-                base_value = int(param.get('value', 0))
-                found = True
-                break
-            except ValueError: pass
+    param, state = _stat_rows(char_obj, status_name)
+    base_value, found = _param_base_value(char_obj, status_name, param)
 
     # 2. states (変動値) から検索 (paramsになかった場合のみ、または優先度定義によるが現状はparams優先の実装だったためそれに倣う)
     #    ただし元のコードはparamsで見つかればreturnしていたため、同名のものがある場合はparams優先
     if not found:
-        state = next((s for s in char_obj.get('states', []) if normalize_status_name(s.get('name')) == status_name), None)
         if state:
             try:
                 base_value = int(state.get('value', 0))
@@ -324,6 +430,7 @@ def get_status_value(char_obj, status_name):
 def set_status_value(char_obj, status_name, new_value):
     """キャラクターの特定のステータス値を設定する (0未満ガード付き)"""
     if not char_obj: return
+    record_touch(char_obj)
     status_name = normalize_status_name(status_name)
     safe_new_value = max(0, int(new_value))
 
@@ -334,22 +441,21 @@ def set_status_value(char_obj, status_name, new_value):
         char_obj['mp'] = safe_new_value
         return
 
-    state = next((s for s in char_obj.get('states', []) if normalize_status_name(s.get('name')) == status_name), None)
+    param, state = _stat_rows(char_obj, status_name)
     if state:
-        state['name'] = status_name
+        if state.get('name') != status_name:
+            state['name'] = status_name
+            invalidate_stat_index(char_obj)
         state['value'] = safe_new_value
     else:
         # Check params if not in states
         # paramsの値を更新することで、get_status_valueがparams優先で取得する挙動と整合させる
-        updated_param = False
-        for param in char_obj.get('params', []):
-            if normalize_status_name(param.get('label')) == status_name:
+        if param:
+            if param.get('label') != status_name:
                 param['label'] = status_name
-                param['value'] = str(safe_new_value)
-                updated_param = True
-                break
-
-        if not updated_param:
+                invalidate_stat_index(char_obj)
+            param['value'] = str(safe_new_value)
+        else:
             if 'states' not in char_obj: char_obj['states'] = []
             char_obj['states'].append({"name": status_name, "value": safe_new_value})
 
@@ -372,11 +478,13 @@ from manager.buff_apply import apply_buff
 def remove_buff(char_obj, buff_name):
     """バフを削除する"""
     if not char_obj or 'special_buffs' not in char_obj: return
+    record_touch(char_obj)
     buff_name = normalize_buff_name(buff_name)
     char_obj['special_buffs'] = [
         b for b in char_obj['special_buffs']
         if normalize_buff_name(b.get('name')) != buff_name
     ]
+    invalidate_buff_stat_mods(char_obj)
 
 
 def clear_newly_applied_flags(state_or_characters):
@@ -463,37 +571,91 @@ def _get_stack_resource_stat_bonus(buff, stat_name):
     return stack_count // 10
 
 
-def get_buff_stat_mod(char_obj, stat_name):
-    """
-    キャラクターのバフから特定のステータス補正値の合計を取得
+# キャラクターごとのバフ補正の集計表（正規化ステータス名 -> 補正値の合計。パッシブ込み）。
+# 威力・ダメージ計算の最内ループから呼ばれるため、バフ行の並び・ディレイ・スタック数・
+# stat_mods の差し替え・パッシブ・カタログの版が変わったときだけ作り直す。
+# apply_buff / remove_buff / ラウンド終了時のディレイ経過では明示的に捨てる
+# （既存行の stat_mods を直接書き換えた場合も invalidate_buff_stat_mods を呼ぶ）。
+_buff_mod_tables = {}
+_buff_mod_metrics = {'hits': 0, 'builds': 0}
 
-    Args:
-        char_obj (dict): キャラクターオブジェクト
-        stat_name (str): ステータス名（例: "基礎威力", "物理補正"）
 
-    Returns:
-        int: 補正値の合計
-    """
-    stat_name = normalize_status_name(stat_name)
-    if not char_obj or 'special_buffs' not in char_obj:
-        return 0
+class _BuffModTable:
+    __slots__ = ('owner', 'signature', 'rows', 'mods')
 
-    total_mod = 0
-    for buff in char_obj.get('special_buffs', []):
+
+def get_buff_mod_metrics():
+    metrics = dict(_buff_mod_metrics)
+    metrics['entries'] = len(_buff_mod_tables)
+    return metrics
+
+
+def invalidate_buff_stat_mods(char_obj=None):
+    """バフ補正の集計表を捨てる（char_obj を省略すると全キャラクター分）。"""
+    if char_obj is None:
+        _buff_mod_tables.clear()
+    else:
+        _buff_mod_tables.pop(id(char_obj), None)
+
+
+def _buff_row_signature(buff):
+    if not isinstance(buff, dict):
+        return id(buff)
+    data = buff.get('data')
+    if isinstance(data, dict):
+        data_part = (id(data), id(data.get('stat_mods')), data.get('count'), data.get(STACK_RESOURCE_VARIANT_KEY))
+    else:
+        data_part = None
+    return (
+        id(buff), buff.get('name'), buff.get('delay', 0), buff.get('count'),
+        buff.get(STACK_RESOURCE_VARIANT_KEY), id(buff.get('stat_mods')), data_part,
+    )
+
+
+def _buff_mod_signature(char_obj, buffs):
+    passives = char_obj.get('SPassive')
+    return (
+        catalog_registry.version(catalog_registry.BUFFS),
+        catalog_registry.version(catalog_registry.PASSIVES),
+        tuple(passives) if isinstance(passives, list) else passives,
+        tuple(_buff_row_signature(buff) for buff in buffs),
+    )
+
+
+def _add_stat_mods(mods, stat_mods, buff_name=None):
+    normalized_mods = {normalize_status_name(k): v for k, v in stat_mods.items()}
+    for stat_name, value in normalized_mods.items():
+        try:
+            mod_value = int(value)
+        except (ValueError, TypeError):
+            if buff_name is not None:
+                logger.warning(f"バフ '{buff_name}' の stat_mods['{stat_name}'] が不正: {value}")
+            continue
+        mods[stat_name] = mods.get(stat_name, 0) + mod_value
+
+
+def _build_buff_stat_mods(char_obj, buffs):
+    from manager.buff_catalog import resolve_runtime_buff_effect
+
+    mods = {}
+    stack_stats = (normalize_status_name("魔法補正"), normalize_status_name("物理補正"))
+    for buff in buffs:
         # ディレイ中のバフは無効
         if buff.get('delay', 0) > 0:
             continue
 
-        total_mod += _get_stack_resource_stat_bonus(buff, stat_name)
+        for stat_name in stack_stats:
+            bonus = _get_stack_resource_stat_bonus(buff, stat_name)
+            if bonus:
+                mods[stat_name] = mods.get(stat_name, 0) + bonus
 
         # stat_modsを取得 (トップレベル or data内)
         stat_mods = buff.get('stat_mods')
-        if not stat_mods and 'data' in buff:
+        if not stat_mods and isinstance(buff.get('data'), dict):
             stat_mods = buff['data'].get('stat_mods')
 
         # キャッシュされていない場合、または動的パターンの可能性がある場合は解決を試みる
         if not stat_mods:
-            from manager.buff_catalog import resolve_runtime_buff_effect
             effect_data = resolve_runtime_buff_effect(buff)
             if effect_data:
                 stat_mods = effect_data.get('stat_mods')
@@ -501,33 +663,61 @@ def get_buff_stat_mod(char_obj, stat_name):
         if not isinstance(stat_mods, dict):
             # stat_modsが辞書でない場合はスキップ
             continue
+        _add_stat_mods(mods, stat_mods, buff_name=normalize_buff_name(buff.get('name')))
+
+    for stat_name, value in _passive_stat_mods(char_obj).items():
+        mods[stat_name] = mods.get(stat_name, 0) + value
+    return mods
+
+
+def _buff_stat_mods(char_obj):
+    buffs = char_obj.get('special_buffs') or []
+    if not buffs and not char_obj.get('SPassive'):
+        return {}
+    signature = _buff_mod_signature(char_obj, buffs)
+    entry = _buff_mod_tables.get(id(char_obj))
+    if entry is not None and entry.owner is char_obj and entry.signature == signature:
+        _buff_mod_metrics['hits'] += 1
+        return entry.mods
+    entry = _BuffModTable()
+    entry.owner = char_obj
+    entry.signature = signature
+    # 行を保持して id の再利用で署名が一致してしまうのを防ぐ
+    entry.rows = tuple(buffs)
+    entry.mods = _build_buff_stat_mods(char_obj, buffs)
+    if len(_buff_mod_tables) >= _STAT_INDEX_MAX_ENTRIES:
+        _buff_mod_tables.clear()
+    _buff_mod_tables[id(char_obj)] = entry
+    _buff_mod_metrics['builds'] += 1
+    return entry.mods
 
-        normalized_mods = {normalize_status_name(k): v for k, v in stat_mods.items()}
-        if stat_name in normalized_mods:
-            try:
-                mod_value = int(normalized_mods[stat_name])
-                total_mod += mod_value
-            except (ValueError, TypeError) as e:
-                logger.warning(
-                    f"バフ '{normalize_buff_name(buff.get('name'))}' の stat_mods['{stat_name}'] が不正: {normalized_mods.get(stat_name)}"
-                )
-                continue
-
-    return total_mod + get_passive_stat_mod(char_obj, stat_name)
 
-def get_passive_stat_mod(char_obj, stat_name):
+def get_buff_stat_mod(char_obj, stat_name):
     """
-    キャラクターのパッシブスキル(SPassive)から特定のステータス補正値の合計を取得
+    キャラクターのバフから特定のステータス補正値の合計を取得
+
+    Args:
+        char_obj (dict): キャラクターオブジェクト
+        stat_name (str): ステータス名（例: "基礎威力", "物理補正"）
+
+    Returns:
+        int: 補正値の合計
     """
     stat_name = normalize_status_name(stat_name)
-    if not char_obj or 'SPassive' not in char_obj:
+    if not char_obj or 'special_buffs' not in char_obj:
         return 0
-
-    total_mod = 0
+    return _buff_stat_mods(char_obj).get(stat_name, 0)
+
+def _passive_stat_mods(char_obj):
+    """SPassive の stat_mods を正規化ステータス名ごとに合計する"""
+    mods = {}
+    passive_ids = char_obj.get('SPassive')
+    if not passive_ids:
+        return mods
     from manager.passives.loader import passive_loader
     passives_cache = passive_loader.load_passives() or {}
 
-    for passive_id in char_obj.get('SPassive', []):
+    for passive_id in passive_ids:
         passive_data = passives_cache.get(passive_id)
         if not passive_data:
             continue
@@ -535,15 +725,18 @@ def get_passive_stat_mod(char_obj, stat_name):
         # effect または effect.stat_mods を取得
         effect = passive_data.get('effect', {})
         stat_mods = effect.get('stat_mods', {})
+        _add_stat_mods(mods, stat_mods or {})
+    return mods
 
-        normalized_mods = {normalize_status_name(k): v for k, v in (stat_mods or {}).items()}
-        if stat_name in normalized_mods:
-             try:
-                mod_value = int(normalized_mods[stat_name])
-                total_mod += mod_value
-             except (ValueError, TypeError):
-                continue
-    return total_mod
+
+def get_passive_stat_mod(char_obj, stat_name):
+    """
+    キャラクターのパッシブスキル(SPassive)から特定のステータス補正値の合計を取得
+    """
+    stat_name = normalize_status_name(stat_name)
+    if not char_obj or 'SPassive' not in char_obj:
+        return 0
+    return _passive_stat_mods(char_obj).get(stat_name, 0)
 
 
 def apply_passive_effect_buffs(char_obj):
@@ -625,6 +818,7 @@ def apply_passive_effect_buffs(char_obj):
         rebuilt_buffs.append(buff_payload)
 
     char_obj['special_buffs'] = rebuilt_buffs
+    invalidate_buff_stat_mods(char_obj)
     return char_obj
 
 def get_buff_stat_mod_details(char_obj, stat_name):
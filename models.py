@@ -51,6 +51,46 @@ class Room(db.Model):
         return f'<Room {self.name}>'
 
 
+class RoomStateSection(db.Model):
+    """ルーム状態のうち大きなセクション（characters / battle_state 等）を個別に保存するテーブル。
+
+    変更のあったセクションだけを書き直すため。小さな値は Room.data（core）に残る。
+    内容は payload（形式番号付きバイナリ。manager.room_sections.pack_section）か
+    data（JSON。移行前の行と ROOM_STATE_STORAGE=json の場合）のどちらかに入る。
+    """
+    __tablename__ = 'room_state_sections'
+
+    id = db.Column(db.Integer, primary_key=True)
+    room_id = db.Column(db.Integer, db.ForeignKey('rooms.id', ondelete='CASCADE'), nullable=False, index=True)
+    section = db.Column(db.String(32), nullable=False)
+    data = db.Column(db.JSON, default=dict)
+    payload = db.Column(db.LargeBinary, nullable=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        db.UniqueConstraint('room_id', 'section', name='uq_room_state_sections_room_section'),
+    )
+
+
+class RoomStateJournal(db.Model):
+    """ルーム状態の変更を順番に追記するジャーナル（manager.room_journal）。
+
+    ops は {section: JSON Patch op リスト}。スナップショット（Room.data / セクション行）の
+    _journal_seq 以前の行は保存時に削除され、それより新しい行はロード時に再適用される。
+    """
+    __tablename__ = 'room_state_journal'
+
+    id = db.Column(db.Integer, primary_key=True)
+    room_id = db.Column(db.Integer, db.ForeignKey('rooms.id', ondelete='CASCADE'), nullable=False)
+    seq = db.Column(db.Integer, nullable=False)
+    ops = db.Column(db.JSON, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        db.UniqueConstraint('room_id', 'seq', name='uq_room_state_journal_room_seq'),
+    )
+
+
 class RoomLogArchive(db.Model):
     """切り捨て前のルームログを長期保全するテーブル。"""
     __tablename__ = 'room_log_archives'
@@ -69,6 +109,7 @@ class RoomLogArchive(db.Model):
 
     __table_args__ = (
         db.Index('ix_room_log_archives_room_time', 'room_id', 'timestamp_ms', 'log_id'),
+        db.Index('ix_room_log_archives_room_log_id', 'room_id', 'log_id'),
     )
 
     def to_log_dict(self):
@@ -4,7 +4,7 @@ list_rooms / load_room / create_room / delete_room / save_room /
 enter_room / leave_room_context / get_room_users / room_grant_gm /
 room_revoke_gm / room_remove_member / room_transfer_owner /
 join_room_by_code / room_set_join_code / room_clear_join_code /
-room_update_settings を担う。
+room_update_settings / room_logs_page を担う。
 """
 
 from flask import Blueprint, Response, jsonify, request, session
@@ -20,7 +20,7 @@ from manager.auth import (
     verify_room_gm_key,
 )
 from manager.room_manager import get_room_state
-from manager.data_manager import save_room_to_db, delete_room_from_db
+from manager.data_manager import delete_room_from_db
 from manager.user_manager import is_user_management_admin
 from manager.utils import session_required
 
@@ -101,6 +101,32 @@ def list_rooms():
     })
 
 
+def _remote_room_response(room_name):
+    """別ワーカーが担当するルームなら 409 と担当ワーカーの接続先を返す（担当なら None）。
+
+    ルーム状態と user_sids は担当ワーカーのメモリにしか正本が無いので、
+    それらを読み書きする HTTP ルートは担当ワーカーで処理させる。
+    """
+    from manager.room_shards import is_local_room, redirect_payload
+    if is_local_room(room_name):
+        return None
+    return jsonify({
+        "error": "このルームは別のワーカーが担当しています",
+        "shard_redirect": redirect_payload(room_name),
+    }), 409
+
+
+def _state_for_viewer(room_name, state, user_id):
+    """GM 以外には他人のシークレットのログを伏せた浅いコピーを返す。"""
+    from manager.room_access import has_room_role, GM_ROLES
+    from manager.state_views import PLAYER_VIEW, logs_for_view
+    logs = state.get('logs')
+    if not logs or has_room_role(user_id, room_name, GM_ROLES, app_admin=is_user_management_admin(user_id)):
+        return state
+    visible = logs_for_view(logs, PLAYER_VIEW, session.get('username'))
+    return state if visible is logs else {**state, 'logs': visible}
+
+
 @room_bp.route('/load_room', methods=['GET'])
 @session_required
 def load_room():
@@ -118,8 +144,14 @@ def load_room():
         app_admin=is_user_management_admin(user_id),
     ):
         return jsonify({"error": "このルームにアクセスする権限がありません"}), 403
+    from manager.room_shards import is_local_room
+    if not is_local_room(room_name):
+        # 別ワーカーが担当するルームはメモリに載せず保存済みの内容を返す
+        # （入室後は担当ワーカーからの state_updated で最新になる）。
+        from manager.data_manager import read_saved_room
+        return jsonify(_state_for_viewer(room_name, read_saved_room(room_name) or {}, user_id))
     state = get_room_state(room_name)
-    return jsonify(state)
+    return jsonify(_state_for_viewer(room_name, state, user_id))
 
 
 @room_bp.route('/create_room', methods=['POST'])
@@ -132,6 +164,9 @@ def create_room():
         return jsonify({"error": "No name"}), 400
     if not is_valid_gm_pin(gm_pin):
         return jsonify({"error": "GM PINは4桁の数字で入力してください"}), 400
+    remote = _remote_room_response(room_name)
+    if remote:
+        return remote
 
     # DBに存在するかチェック
     if Room.query.filter_by(name=room_name).first():
@@ -153,7 +188,7 @@ def create_room():
     active_room_states[room_name] = new_state
 
     # ▼▼▼ 修正: Room作成時に owner_id を保存 ▼▼▼
-    # save_room_to_db はデータ保存用なので、ここでは Roomモデルを直接作って owner_id を入れる
+    # 保存経路はデータ保存用なので、ここでは Roomモデルを直接作って owner_id を入れる
     new_room = Room(
         name=room_name,
         data=new_state,
@@ -190,12 +225,15 @@ def delete_room():
     # GM PIN/マスターキーでロビー操作を認証する。
     if not is_user_management_admin(session.get('user_id')) and not verify_room_gm_key(room, gm_key):
         return jsonify({"error": "GM PINまたはマスターキーが正しくありません"}), 403
+    remote = _remote_room_response(room_name)
+    if remote:
+        return remote
 
     # DB削除の前に保留中の自動保存を破棄しメモリからも除去する。
     # 削除後にデバウンスのフラッシュが走ってルームを復活させる事故を防ぐ。
-    from manager.room_manager import discard_pending_save
+    from manager.room_manager import discard_pending_save, forget_room_state
     discard_pending_save(room_name)
-    active_room_states.pop(room_name, None)
+    forget_room_state(room_name)
 
     if delete_room_from_db(room_name):
         return jsonify({"message": "Deleted"})
@@ -220,8 +258,13 @@ def save_room_route():
         app_admin=is_user_management_admin(user_id),
     ):
         return jsonify({"error": "このルームを更新する権限がありません"}), 403
+    remote = _remote_room_response(room_name)
+    if remote:
+        return remote
     active_room_states[room_name] = state
-    save_room_to_db(room_name, state)
+    # ログのアーカイブとセクション単位の書き込みを通常の保存経路に任せる。
+    from manager.room_manager import save_specific_room_state
+    save_specific_room_state(room_name, immediate=True)
     return jsonify({"message": "Saved"})
 
 
@@ -244,19 +287,58 @@ def room_export_logs():
         app_admin=is_user_management_admin(user_id),
     ):
         return jsonify({"error": "GM権限が必要です"}), 403
+    remote = _remote_room_response(room_name)
+    if remote:
+        return remote
 
     state = get_room_state(room_name)
     if not isinstance(state, dict):
         return jsonify({"error": "Room not found"}), 404
 
     from manager.log_archive import build_room_log_export
-    exported = build_room_log_export(room_name, state.get('logs', []), export_format)
+    from manager.room_manager import get_unpersisted_room_logs
+    exported = build_room_log_export(room_name, get_unpersisted_room_logs(room_name), export_format)
     response = Response(exported['content'], content_type=exported['content_type'])
     response.headers['Content-Disposition'] = f'attachment; filename="{exported["filename"]}"'
     response.headers['X-Log-Count'] = str(exported.get('count', 0))
     return response
 
 
+@room_bp.route('/api/room/logs', methods=['GET'])
+@session_required
+def room_logs_page():
+    """ログを log_id カーソルで古い方へ辿る（request_logs の HTTP 版）。"""
+    room_name = str(request.args.get('room_name') or request.args.get('room') or '').strip()
+    if not room_name:
+        return jsonify({"error": "room_name が必要です"}), 400
+
+    from manager.room_access import user_can_access_room
+    user_id = session.get('user_id')
+    if not user_can_access_room(
+        user_id,
+        room_name,
+        app_admin=is_user_management_admin(user_id),
+    ):
+        return jsonify({"error": "このルームを閲覧する権限がありません"}), 403
+    remote = _remote_room_response(room_name)
+    if remote:
+        return remote
+    if not Room.query.filter_by(name=room_name).first():
+        return jsonify({"error": "Room not found"}), 404
+
+    from manager.room_access import has_room_role, GM_ROLES
+    from manager.room_manager import page_room_logs
+    from manager.state_views import GM_VIEW, PLAYER_VIEW
+    is_gm = has_room_role(user_id, room_name, GM_ROLES, app_admin=is_user_management_admin(user_id))
+    return jsonify(page_room_logs(
+        room_name,
+        before_log_id=request.args.get('before_log_id'),
+        limit=request.args.get('limit'),
+        view=GM_VIEW if is_gm else PLAYER_VIEW,
+        username=session.get('username'),
+    ))
+
+
 # ---- ルームメンバー管理（owner専用）----
 
 def _require_room_owner(room_name):
@@ -276,14 +358,15 @@ def _sync_room_member_session(room_name, target_user_id):
     """role変更を既存Socket(user_sids)へ反映する（再ログイン不要。best-effort）。"""
     from manager.room_access import resolve_room_role, GM_ROLES
     from extensions import user_sids
+    from manager.state_views import set_sid_attribute
     role = resolve_room_role(target_user_id, room_name)
-    for info in user_sids.values():
+    for sid, info in list(user_sids.items()):
         if info.get('user_id') == target_user_id and info.get('room') == room_name:
-            info['attribute'] = (
+            set_sid_attribute(sid, (
                 GM_ATTRIBUTE
                 if info.get('is_app_admin') or role in GM_ROLES
                 else PLAYER_ATTRIBUTE
-            )
+            ))
     try:
         from manager.room_manager import broadcast_user_list
         broadcast_user_list(room_name)
@@ -308,6 +391,9 @@ def room_grant_gm():
     denied = _require_room_owner(room_name)
     if denied:
         return denied
+    remote = _remote_room_response(room_name)
+    if remote:
+        return remote
     if User.query.get(target_user_id) is None:
         return jsonify({"error": "User not found"}), 404
     set_room_role(room_name, target_user_id, GM, granted_by=session.get('user_id'))
@@ -325,6 +411,9 @@ def room_revoke_gm():
     denied = _require_room_owner(room_name)
     if denied:
         return denied
+    remote = _remote_room_response(room_name)
+    if remote:
+        return remote
     set_room_role(room_name, target_user_id, PLAYER, granted_by=session.get('user_id'))
     _sync_room_member_session(room_name, target_user_id)
     return jsonify({"message": "GMを解除しました", "user_id": target_user_id, "role": PLAYER})
@@ -340,6 +429,9 @@ def room_remove_member():
     denied = _require_room_owner(room_name)
     if denied:
         return denied
+    remote = _remote_room_response(room_name)
+    if remote:
+        return remote
     try:
         ok = revoke_membership(room_name, target_user_id)
     except ValueError as e:
@@ -360,6 +452,9 @@ def room_transfer_owner():
     denied = _require_room_owner(room_name)
     if denied:
         return denied
+    remote = _remote_room_response(room_name)
+    if remote:
+        return remote
     if User.query.get(target_user_id) is None:
         return jsonify({"error": "User not found"}), 404
     if not transfer_owner(room_name, target_user_id, acting_user_id=session.get('user_id')):
@@ -515,6 +610,9 @@ def get_room_users():
     room_name = request.args.get('room')
     if not room_name:
         return jsonify({"error": "Room name required"}), 400
+    remote = _remote_room_response(room_name)
+    if remote:
+        return remote
 
     # user_sidsから該当ルームのユーザーを抽出
     room_users = []
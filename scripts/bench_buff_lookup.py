@@ -0,0 +1,96 @@
+"""get_buff_effect（名前索引 + 動的パターン LRU）と従来の線形探索を比べるベンチマーク。
+
+バフ図鑑キャッシュ（無ければ合成データ）を all_buff_data に載せ、図鑑のバフ名・
+動的パターン名（_Atk3 など）・どれにも当たらない名前を混ぜて引いた 1 回あたりの時間を出す。
+
+    python scripts/bench_buff_lookup.py --repeat 200
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import re
+import sys
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+os.environ.setdefault("GEMTRPG_SKIP_IMPORT_STARTUP", "1")
+
+from extensions import all_buff_data  # noqa: E402
+from manager import buff_catalog  # noqa: E402
+from manager.cache_paths import BUFF_CATALOG_CACHE_FILE, LEGACY_BUFF_CATALOG_CACHE_FILE, load_json_cache  # noqa: E402
+
+
+def legacy_get_buff_effect(buff_name):
+    """索引導入前の get_buff_effect（比較用）。"""
+    if buff_name in buff_catalog.STATIC_BUFFS:
+        return buff_catalog.STATIC_BUFFS[buff_name]
+    for b_data in all_buff_data.values():
+        if b_data.get('name') == buff_name:
+            eff = b_data.get('effect', {}).copy()
+            if b_data.get('flavor'):
+                eff['flavor'] = b_data['flavor']
+            if b_data.get('description'):
+                eff['description'] = b_data['description']
+            return eff
+    for entry in buff_catalog.DYNAMIC_PATTERNS:
+        match = re.match(entry["pattern"], buff_name)
+        if match:
+            return entry["generator"](match)
+    return None
+
+
+def _load_catalog(synthetic):
+    data = load_json_cache(BUFF_CATALOG_CACHE_FILE, legacy_paths=[LEGACY_BUFF_CATALOG_CACHE_FILE]) or {}
+    if not data:
+        data = {
+            f"Bu-{n:03d}": {"id": f"Bu-{n:03d}", "name": f"バフ{n}", "effect": {"stat_mods": {"物理補正": n % 3}},
+                            "description": f"説明{n}", "flavor": ""}
+            for n in range(synthetic)
+        }
+    all_buff_data.clear()
+    all_buff_data.update(data)
+    buff_catalog.rebuild_buff_name_index()
+
+
+def _names():
+    catalog_names = [row.get("name") for row in all_buff_data.values() if row.get("name")]
+    dynamic = [f"試験_{suffix}{n}" for suffix in ("Atk", "DefDown", "Phys", "DaCut", "BleedReact") for n in (1, 2, 3)]
+    missing = ["存在しないバフ", "未知_Xyz1"]
+    return catalog_names + dynamic + missing + list(buff_catalog.STATIC_BUFFS)
+
+
+def _bench(fn, names, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for name in names:
+            fn(name)
+    return (time.perf_counter() - started) / (repeat * len(names)) * 1e6
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--synthetic", type=int, default=120, help="キャッシュが無いときの合成バフ数")
+    args = parser.parse_args(argv)
+
+    _load_catalog(args.synthetic)
+    names = _names()
+    for name in names:
+        if legacy_get_buff_effect(name) != buff_catalog.get_buff_effect(name):
+            raise SystemExit(f"mismatch: {name}")
+
+    legacy = _bench(legacy_get_buff_effect, names, args.repeat)
+    indexed = _bench(buff_catalog.get_buff_effect, names, args.repeat)
+    print(f"buffs={len(all_buff_data)} names={len(names)} repeat={args.repeat}")
+    print(f"legacy  {legacy:8.2f} us/lookup")
+    print(f"indexed {indexed:8.2f} us/lookup  ({legacy / indexed if indexed else 0:.1f}x)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,112 @@
+"""roll_dice を式キャッシュあり（現行）／従来の正規表現＋eval で比べるベンチマーク。
+
+戦闘で使うようなダイスコマンドを繰り返し振り、1 回あたりの時間を出す。
+sample_dice_totals による 1 式の一括サンプリングも測る。
+
+    python scripts/bench_dice_roller.py --repeat 20000 --samples 100000
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+os.environ.setdefault("GEMTRPG_SKIP_IMPORT_STARTUP", "1")
+
+from manager import dice_roller  # noqa: E402
+
+COMMANDS = ["1d6", "5+2d6+1d4 【攻撃】", "3-1d6+2", "(1d6+2)*2", "2d6/2", "10+3d8-1d4"]
+
+
+def legacy_roll_dice(cmd_str):
+    """式キャッシュ導入前の roll_dice（比較用）。毎回正規表現で分解して eval する。"""
+    calc_str = re.sub(r'【.*?】', '', cmd_str).strip()
+    details_str = calc_str
+    original_calc = calc_str
+    dice_total = 0
+    dice_terms = []
+    for match in reversed(list(re.finditer(r'(\d+)d(\d+)', original_calc))):
+        num_dice, num_faces = int(match.group(1)), int(match.group(2))
+        sign = dice_roller._resolve_term_sign(original_calc, match.start())
+        rolls = [0] * num_dice if num_faces < 1 else [random.randint(1, num_faces) for _ in range(num_dice)]
+        roll_sum = sum(rolls)
+        start, end = match.start(), match.end()
+        details_str = details_str[:start] + f"({'+'.join(map(str, rolls))})" + details_str[end:]
+        calc_str = calc_str[:start] + str(roll_sum) + calc_str[end:]
+        dice_total += sign * roll_sum
+        dice_terms.append({"sign": sign, "num": num_dice, "faces": num_faces, "rolls": rolls, "sum": roll_sum, "raw": match.group(0)})
+    sanitized = re.sub(r'[^-\d()/*+.]', '', calc_str)
+    try:
+        total = eval(sanitized)
+    except Exception:
+        total = 0
+    constant_terms = []
+    for token in re.finditer(r'([+-]?)(\d+d\d+|\d+)', original_calc.replace(' ', '')):
+        if 'd' in token.group(2):
+            continue
+        constant_terms.append({"raw": token.group(0), "value": (-1 if token.group(1) == '-' else 1) * int(token.group(2))})
+    return {
+        "total": total,
+        "details": details_str,
+        "breakdown": {
+            "expression": original_calc,
+            "sanitized_expression": sanitized,
+            "dice_total": int(dice_total),
+            "constant_total": sum(row["value"] for row in constant_terms),
+            "final_total": int(total),
+            "dice_terms": list(reversed(dice_terms)),
+            "constant_terms": constant_terms,
+        },
+    }
+
+
+def _run(roll_fn, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for cmd in COMMANDS:
+            roll_fn(cmd)
+    return (time.perf_counter() - started) / (repeat * len(COMMANDS)) * 1e6
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20000)
+    parser.add_argument("--samples", type=int, default=100000, help="sample_dice_totals のサンプル数")
+    parser.add_argument("--rounds", type=int, default=3, help="測定回数（最小値を採る）")
+    args = parser.parse_args(argv)
+
+    for cmd in COMMANDS:
+        random.seed(7)
+        expected = legacy_roll_dice(cmd)
+        random.seed(7)
+        assert dice_roller.roll_dice(cmd) == expected, cmd
+
+    legacy = min(_run(legacy_roll_dice, args.repeat) for _ in range(args.rounds))
+    compiled = min(_run(dice_roller.roll_dice, args.repeat) for _ in range(args.rounds))
+
+    def _sample():
+        started = time.perf_counter()
+        dice_roller.sample_dice_totals("10+3d8-1d4", args.samples)
+        return (time.perf_counter() - started) * 1e3
+
+    sampled = min(_sample() for _ in range(args.rounds))
+    looped = min(_run(legacy_roll_dice, 1) for _ in range(args.rounds)) * args.samples / 1e3
+
+    print(f"commands={len(COMMANDS)} numpy={'yes' if dice_roller._np is not None else 'no'}")
+    print(f"legacy   {legacy:8.2f} us/roll")
+    print(f"compiled {compiled:8.2f} us/roll  ({legacy / compiled if compiled else 0:.1f}x)")
+    print(f"samples={args.samples}: sample_dice_totals {sampled:8.1f} ms  (legacy loop ~{looped:8.1f} ms)")
+    print(f"cache: {dice_roller.compile_command.cache_info()}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,158 @@
+"""ルーム状態の保存形式（JSON / zlib 圧縮 payload）を比較するベンチマーク。
+
+代表的なルーム（キャラクターのコマンド文・プリセット・戦闘専用記録・解決トレース）を
+合成し、一時 SQLite へ save_room_to_db / read_saved_room した時間と行サイズを出す。
+
+    python scripts/bench_room_storage.py --characters 40 --repeat 20
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+os.environ.setdefault("GEMTRPG_SKIP_IMPORT_STARTUP", "1")
+os.environ.setdefault("GEMTRPG_DISABLE_DEFAULT_APP", "1")
+
+from sqlalchemy import func  # noqa: E402
+
+from app import create_app  # noqa: E402
+from extensions import db  # noqa: E402
+from manager import data_manager  # noqa: E402
+from models import Room, RoomStateSection  # noqa: E402
+
+
+def _character(index):
+    commands = "\n".join(
+        f"【S-{index:02d}{n:02d}】 {2 + n % 3}d6+{n} 威力+{n} [追加ダメージ] 出血{n % 4}"
+        for n in range(12)
+    )
+    return {
+        "id": f"char_{index}",
+        "name": f"キャラクター{index}",
+        "type": "ally" if index % 2 else "enemy",
+        "hp": 80, "maxHp": 80, "mp": 20, "maxMp": 20,
+        "x": index % 20, "y": index // 20,
+        "commands": commands,
+        "params": [{"label": label, "value": str(index % 7)} for label in ("物理補正", "魔法補正", "速度", "行動回数")],
+        "states": [{"name": name, "value": index % 5} for name in ("FP", "出血", "破裂", "亀裂", "戦慄", "荊棘")],
+        "special_buffs": [
+            {"name": f"バフ{n}", "buff_id": f"Bu-{n:02d}", "lasting": 2, "delay": 0, "data": {"stat": "物理補正", "value": 1}}
+            for n in range(4)
+        ],
+        "SPassive": [f"Pa-{n:02d}" for n in range(5)],
+        "hidden_skills": [],
+    }
+
+
+def build_room_state(characters=40):
+    chars = [_character(i) for i in range(characters)]
+    return {
+        "characters": chars,
+        "character_owners": {c["id"]: f"user-{i % 4}" for i, c in enumerate(chars)},
+        "timeline": [{"id": f"entry_{c['id']}", "char_id": c["id"], "speed": i % 13} for i, c in enumerate(chars)],
+        "battle_state": {
+            "phase": "resolve_mass",
+            "slots": {f"slot_{i}": {"actor_id": c["id"], "initiative": i % 13} for i, c in enumerate(chars)},
+            "intents": {f"slot_{i}": {"skill_id": f"S-{i:02d}00", "target": {"type": "single_slot", "slot_id": f"slot_{(i + 1) % characters}"}} for i in range(characters)},
+            "resolve": {
+                "trace": [
+                    {"step": n, "kind": "clash", "attacker": f"char_{n % characters}", "rolls": {"power": n % 17, "command": f"2d6+{n % 5}"},
+                     "outcome": "attacker_win" if n % 3 else "defender_win", "notes": "出血+1 / 破裂+2"}
+                    for n in range(200)
+                ],
+            },
+        },
+        "battle_only": {
+            "records": [{"round": r, "winner": "ally" if r % 2 else "enemy", "summary": "戦闘記録 " * 10} for r in range(60)],
+            "ally_entries": [{"preset_id": f"bo_{i}"} for i in range(6)],
+        },
+        "map_data": {"width": 30, "height": 20, "gridSize": 64, "backgroundImage": "/static/images/map.png"},
+        "presets": {
+            f"preset_{n}": [{"name": f"プリセット{n}", "commands": chars[n % characters]["commands"]}]
+            for n in range(30)
+        },
+        "round": 4,
+        "mode": "battle",
+        "play_mode": "normal",
+    }
+
+
+def _stored_bytes(room_name):
+    room = Room.query.filter_by(name=room_name).first()
+    core = db.session.query(func.length(func.cast(Room.data, db.Text))).filter(Room.id == room.id).scalar() or 0
+    sections = 0
+    for data_len, payload_len in db.session.query(
+        func.length(func.cast(RoomStateSection.data, db.Text)), func.length(RoomStateSection.payload),
+    ).filter(RoomStateSection.room_id == room.id):
+        sections += payload_len if payload_len is not None else (data_len or 0)
+    return core, sections
+
+
+def run(storage, state, repeat):
+    data_manager._SECTION_STORAGE = storage
+    room_name = f"bench-{storage}"
+    write_ms = []
+    read_ms = []
+    for _ in range(repeat):
+        # 前回の digest を忘れさせて毎回全セクションを書かせる。
+        data_manager._section_digests.clear()
+        started = time.perf_counter()
+        data_manager.save_room_to_db(room_name, state)
+        write_ms.append((time.perf_counter() - started) * 1000.0)
+        db.session.expire_all()
+        started = time.perf_counter()
+        loaded = data_manager.read_saved_room(room_name)
+        read_ms.append((time.perf_counter() - started) * 1000.0)
+    assert loaded == state
+    core, sections = _stored_bytes(room_name)
+    return {
+        "storage": storage,
+        "write_ms": sorted(write_ms)[len(write_ms) // 2],
+        "read_ms": sorted(read_ms)[len(read_ms) // 2],
+        "core_bytes": core,
+        "section_bytes": sections,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--characters", type=int, default=40)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    state = build_room_state(args.characters)
+    with tempfile.TemporaryDirectory() as tmp:
+        app = create_app(
+            config={
+                "TESTING": True,
+                "SQLALCHEMY_DATABASE_URI": f"sqlite:///{(Path(tmp) / 'bench.db').as_posix()}",
+                "SQLALCHEMY_ENGINE_OPTIONS": {},
+            },
+            run_startup=False,
+            register_sockets=False,
+        )
+        with app.app_context():
+            db.create_all()
+            results = [run(storage, state, max(1, args.repeat)) for storage in ("json", "zlib")]
+            db.session.remove()
+
+    print(f"characters={args.characters} repeat={args.repeat} (median)")
+    print(f"{'storage':<8} {'write_ms':>9} {'read_ms':>8} {'core_B':>8} {'sections_B':>11}")
+    for row in results:
+        print(
+            f"{row['storage']:<8} {row['write_ms']:>9.2f} {row['read_ms']:>8.2f} "
+            f"{row['core_bytes']:>8} {row['section_bytes']:>11}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,193 @@
+"""calculate_skill_preview をステータス索引・バフ補正集計表あり／なし（従来の線形探索）で比べるベンチマーク。
+
+スキルキャッシュ（無ければ合成スキル）を使い、params / states / バフを持たせた
+キャラクター同士で全スキルのプレビューを出す 1 回あたりの時間を出す。
+get_status_value 単体（バフなしのキャラクター）の時間も出す。
+
+    python scripts/bench_skill_preview.py --repeat 20
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+os.environ.setdefault("GEMTRPG_SKIP_IMPORT_STARTUP", "1")
+
+from manager import utils  # noqa: E402
+from manager.cache_paths import LEGACY_SKILLS_CACHE_FILE, SKILLS_CACHE_FILE, load_json_cache  # noqa: E402
+from manager.game_logic import calculate_skill_preview  # noqa: E402
+from manager.buff_catalog import resolve_runtime_buff_effect  # noqa: E402
+from manager.utils import _get_stack_resource_stat_bonus, get_passive_stat_mod, normalize_status_name  # noqa: E402
+
+
+def legacy_get_buff_stat_mod(char_obj, stat_name):
+    """集計表導入前の get_buff_stat_mod（比較用）。"""
+    stat_name = normalize_status_name(stat_name)
+    if not char_obj or 'special_buffs' not in char_obj:
+        return 0
+    total_mod = 0
+    for buff in char_obj.get('special_buffs', []):
+        if buff.get('delay', 0) > 0:
+            continue
+        total_mod += _get_stack_resource_stat_bonus(buff, stat_name)
+        stat_mods = buff.get('stat_mods')
+        if not stat_mods and 'data' in buff:
+            stat_mods = buff['data'].get('stat_mods')
+        if not stat_mods:
+            effect_data = resolve_runtime_buff_effect(buff)
+            if effect_data:
+                stat_mods = effect_data.get('stat_mods')
+        if not isinstance(stat_mods, dict):
+            continue
+        normalized_mods = {normalize_status_name(k): v for k, v in stat_mods.items()}
+        if stat_name in normalized_mods:
+            try:
+                total_mod += int(normalized_mods[stat_name])
+            except (ValueError, TypeError):
+                continue
+    return total_mod + get_passive_stat_mod(char_obj, stat_name)
+
+
+def legacy_get_status_value(char_obj, status_name):
+    """索引導入前の get_status_value（比較用）。"""
+    if not char_obj: return 0
+    status_name = normalize_status_name(status_name)
+    if status_name == 'HP': return int(char_obj.get('hp', 0))
+    if status_name == 'MP': return int(char_obj.get('mp', 0))
+    if status_name == '速度値':
+        total_speed = char_obj.get('totalSpeed')
+        return int(total_speed) if total_speed is not None else 0
+    if status_name == '行動回数':
+        val, found = 0, False
+        for param in char_obj.get('params', []):
+            if normalize_status_name(param.get('label')) == status_name:
+                try:
+                    val, found = int(param.get('value', 0)), True
+                    break
+                except ValueError: pass
+        if not found:
+            val = 1
+        return max(1, val + legacy_get_buff_stat_mod(char_obj, status_name))
+    base_value, found = 0, False
+    for param in char_obj.get('params', []):
+        if normalize_status_name(param.get('label')) == status_name:
+            try:
+                base_value, found = int(param.get('value', 0)), True
+                break
+            except ValueError: pass
+    if not found:
+        state = next((s for s in char_obj.get('states', []) if normalize_status_name(s.get('name')) == status_name), None)
+        if state:
+            try:
+                base_value = int(state.get('value', 0))
+            except ValueError: pass
+    return base_value + legacy_get_buff_stat_mod(char_obj, status_name)
+
+
+def _char(char_id, team):
+    params = [{"label": label, "value": str(value)} for label, value in (
+        ("筋力", 4), ("生命力", 3), ("器用さ", 2), ("敏捷性", 5), ("知力", 1), ("精神力", 2),
+        ("速度", 6), ("物理補正", 3), ("魔法補正", 2), ("行動回数", 1),
+    )]
+    states = [{"name": name, "value": value} for name, value in (
+        ("FP", 3), ("出血", 2), ("破裂", 1), ("亀裂", 0), ("戦慄", 1), ("荊棘", 0),
+        ("凝魔", 0), ("蓄力", 2), ("混乱", 0), ("麻痺", 0), ("睡眠", 0), ("凍結", 0),
+    )]
+    buffs = [
+        {"name": "鉄壁", "stat_mods": {"物理補正": 1}, "lasting": 2},
+        {"name": "試験_Atk2", "lasting": 1},
+        {"name": "試験_DaIn1", "lasting": 3},
+    ]
+    return {
+        "id": char_id, "name": char_id, "type": team, "hp": 60, "maxHp": 60, "mp": 20, "maxMp": 20,
+        "params": params, "states": states, "special_buffs": buffs,
+    }
+
+
+def _skills(limit):
+    data = load_json_cache(SKILLS_CACHE_FILE, legacy_paths=[LEGACY_SKILLS_CACHE_FILE]) or {}
+    skills = [skill for skill in data.values() if isinstance(skill, dict) and skill.get("基礎威力") is not None]
+    if not skills:
+        rule = {"power_bonus": [{"source": "target", "param": "出血", "operator": "PER_N_BONUS", "per_N": 1, "value": 1}]}
+        skills = [
+            {"スキルID": f"S-{n:02d}", "基礎威力": str(n % 5), "ダイス威力": "+1d6", "分類": "物理",
+             "特記処理": json.dumps(rule, ensure_ascii=False)}
+            for n in range(30)
+        ]
+    return skills[:limit]
+
+
+def _run(skills, actor, target, repeat):
+    context = {"characters": [actor, target]}
+    usable = []
+    for skill in skills:
+        try:
+            calculate_skill_preview(actor, target, skill, context=context)
+            usable.append(skill)
+        except Exception:
+            continue
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for skill in usable:
+            calculate_skill_preview(actor, target, skill, context=context)
+    return (time.perf_counter() - started) / (repeat * max(1, len(usable))) * 1e6, len(usable)
+
+
+def _run_lookups(char_obj, repeat):
+    names = [row["label"] for row in char_obj["params"]] + [row["name"] for row in char_obj["states"]] + ["未設定"]
+    started = time.perf_counter()
+    for _ in range(repeat * 20):
+        for name in names:
+            utils.get_status_value(char_obj, name)
+    return (time.perf_counter() - started) / (repeat * 20 * len(names)) * 1e6
+
+
+def _measure(skills, repeat, rounds):
+    """rounds 回測って最小値を返す（他プロセスの揺れを避ける）。"""
+    previews, lookups = [], []
+    for _ in range(rounds):
+        actor, target = _char("A1", "ally"), _char("E1", "enemy")
+        preview, count = _run(skills, actor, target, repeat)
+        bare = _char("B1", "ally")
+        bare["special_buffs"] = []
+        previews.append(preview)
+        lookups.append(_run_lookups(bare, repeat))
+    return min(previews), min(lookups), count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--limit", type=int, default=200, help="プレビューするスキル数の上限")
+    parser.add_argument("--rounds", type=int, default=3, help="測定回数（最小値を採る）")
+    args = parser.parse_args(argv)
+
+    skills = _skills(args.limit)
+
+    indexed_fns = (utils.get_status_value, utils.get_buff_stat_mod)
+    utils.get_status_value, utils.get_buff_stat_mod = legacy_get_status_value, legacy_get_buff_stat_mod
+    try:
+        legacy, legacy_lookup, count = _measure(skills, args.repeat, args.rounds)
+    finally:
+        utils.get_status_value, utils.get_buff_stat_mod = indexed_fns
+    indexed, indexed_lookup, _ = _measure(skills, args.repeat, args.rounds)
+
+    print(f"skills={count} repeat={args.repeat}")
+    print(f"legacy  {legacy:9.1f} us/preview  {legacy_lookup:6.2f} us/lookup")
+    print(f"indexed {indexed:9.1f} us/preview  {indexed_lookup:6.2f} us/lookup"
+          f"  ({legacy / indexed if indexed else 0:.2f}x / {legacy_lookup / indexed_lookup if indexed_lookup else 0:.2f}x)")
+    print(f"stat index: {utils.get_stat_index_metrics()}")
+    print(f"buff mods:  {utils.get_buff_mod_metrics()}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
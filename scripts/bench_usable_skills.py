@@ -0,0 +1,120 @@
+"""select/resolve ペイロードの usable_skill_ids 構築をメモ化あり／なし（従来の毎回評価）で比べるベンチマーク。
+
+スキルキャッシュ（無ければ合成スキル）から各キャラクターにスキルを持たせた部屋を作り、
+全スロット分の usable_skill_ids を作る 1 回あたりの時間を出す。
+フィールド効果の制約行も 1 つ載せておく。
+
+    python scripts/bench_usable_skills.py --chars 24 --skills 12
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+os.environ.setdefault("GEMTRPG_SKIP_IMPORT_STARTUP", "1")
+
+from manager.battle import select_resolve_state, skill_access  # noqa: E402
+from manager.battle.system_skills import SYS_STRUGGLE_ID  # noqa: E402
+from manager.cache_paths import LEGACY_SKILLS_CACHE_FILE, SKILLS_CACHE_FILE, load_json_cache  # noqa: E402
+
+
+def legacy_list_regular_usable_skill_ids(char, allow_instant=False, room_state=None, battle_state=None, slot_id=None):
+    """メモ化導入前の list_regular_usable_skill_ids（比較用）。スキルごとに制約を 2 回集め直す。"""
+    skill_access._command_skill_ids.clear()
+    usable = []
+    for skill_id in skill_access._normalize_skill_ids(char):
+        if skill_id == SYS_STRUGGLE_ID:
+            continue
+        ev = skill_access.evaluate_skill_access(
+            char, skill_id, room_state=room_state, battle_state=battle_state,
+            slot_id=slot_id, allow_instant=allow_instant,
+        )
+        skill_access.get_effective_skill_cost(
+            char, skill_id, room_state=room_state, battle_state=battle_state, slot_id=slot_id,
+        )
+        if ev.get("usable", False):
+            usable.append(skill_id)
+    return usable
+
+
+def _skill_ids(limit):
+    data = load_json_cache(SKILLS_CACHE_FILE, legacy_paths=[LEGACY_SKILLS_CACHE_FILE]) or {}
+    skill_ids = [sid for sid, skill in data.items() if isinstance(skill, dict)]
+    if skill_ids:
+        skill_access.all_skill_data.update(data)
+        return skill_ids
+    for n in range(limit * 4):
+        sid = f"B-{n:03d}"
+        skill_access.all_skill_data[sid] = {
+            "id": sid,
+            "rule_data": {"schema": "skill_json_rule_v2", "cost": [{"type": "FP" if n % 2 else "MP", "value": 1 + n % 3}]},
+        }
+        skill_ids.append(sid)
+    return skill_ids
+
+
+def _room(chars, skills_per_char, skill_ids):
+    characters, slots = [], {}
+    for n in range(chars):
+        loadout = [skill_ids[(n * 7 + k) % len(skill_ids)] for k in range(skills_per_char)]
+        char_id = f"C{n:02d}"
+        characters.append({
+            "id": char_id, "name": char_id, "type": "enemy" if n % 2 else "ally", "hp": 50, "mp": 5,
+            "commands": " ".join(f"【{sid} 技{k}】" for k, sid in enumerate(loadout)),
+            "params": [{"label": "速度", "value": "4"}],
+            "states": [{"name": "FP", "value": 3}],
+            "special_buffs": [], "flags": {},
+        })
+        for k in range(2):
+            slots[f"{char_id}:{k}"] = {"actor_id": char_id}
+    battle_state = {
+        "slots": slots,
+        "field_effects": [{"id": "f1", "mode": "add_cost", "match": {"cost_types": ["MP"]}, "add_cost": [{"type": "MP", "value": 1}]}],
+    }
+    return {"characters": characters}, battle_state
+
+
+def _run(room_state, battle_state, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        select_resolve_state._build_usable_skill_ids(room_state, battle_state)
+    return (time.perf_counter() - started) / repeat * 1e3
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chars", type=int, default=24)
+    parser.add_argument("--skills", type=int, default=12, help="1 キャラクターあたりのスキル数")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--rounds", type=int, default=3, help="測定回数（最小値を採る）")
+    args = parser.parse_args(argv)
+
+    skill_ids = _skill_ids(args.skills)
+    room_state, battle_state = _room(args.chars, args.skills, skill_ids)
+    expected = select_resolve_state._build_usable_skill_ids(room_state, battle_state)
+
+    memoized_fn = select_resolve_state.list_regular_usable_skill_ids
+    select_resolve_state.list_regular_usable_skill_ids = legacy_list_regular_usable_skill_ids
+    try:
+        assert select_resolve_state._build_usable_skill_ids(room_state, battle_state) == expected
+        legacy = min(_run(room_state, battle_state, args.repeat) for _ in range(args.rounds))
+    finally:
+        select_resolve_state.list_regular_usable_skill_ids = memoized_fn
+    memoized = min(_run(room_state, battle_state, args.repeat) for _ in range(args.rounds))
+
+    print(f"chars={args.chars} skills/char={args.skills} slots={len(battle_state['slots'])}")
+    print(f"legacy   {legacy:8.2f} ms/payload")
+    print(f"memoized {memoized:8.2f} ms/payload  ({legacy / memoized if memoized else 0:.1f}x)")
+    print(f"metrics: {skill_access.get_usable_skill_metrics()}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -34,6 +34,7 @@ const CLASSIC_SCRIPTS = [
   'js/buff_data.js',
   'js/common/glossary_ui.js',
   'js/common/log_core.js',
+  'js/common/state_sync.js',
   'js/common/char_json.js',
   'js/sound_fx.js',
   'js/legacy_globals.js',
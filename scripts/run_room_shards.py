@@ -0,0 +1,66 @@
+"""ルーム分割モードで gunicorn をシャード数だけ起動する。
+
+各シャードは PORT+番号 で待ち受け、同じメッセージキューを共有する。
+
+    SOCKETIO_MESSAGE_QUEUE=redis://localhost:6379/0 \\
+    python scripts/run_room_shards.py --shards 4 --public-url http://example.com
+
+--public-url の各ポート（PORT+番号）がクライアントの接続先（ROOM_SHARD_URLS）になる。
+Ctrl+C で全シャードを止める。
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import signal
+import subprocess
+import sys
+from pathlib import Path
+from urllib.parse import urlsplit
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+
+
+def shard_urls(public_url, base_port, shards):
+    parts = urlsplit(public_url)
+    return [f"{parts.scheme}://{parts.hostname}:{base_port + index}" for index in range(shards)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--shards", type=int, default=2)
+    parser.add_argument("--port", type=int, default=int(os.environ.get("PORT", "10000")))
+    parser.add_argument("--public-url", default="http://127.0.0.1")
+    parser.add_argument("--app", default="app:app")
+    args = parser.parse_args(argv)
+
+    if not os.environ.get("SOCKETIO_MESSAGE_QUEUE"):
+        parser.error("SOCKETIO_MESSAGE_QUEUE を設定してください（シャード間の emit に使う）")
+    shards = max(1, args.shards)
+    urls = ",".join(shard_urls(args.public_url, args.port, shards))
+    processes = []
+    for index in range(shards):
+        env = dict(os.environ)
+        env.update({
+            "PORT": str(args.port),
+            "ROOM_SHARDS": str(shards),
+            "ROOM_SHARD_INDEX": str(index),
+            "ROOM_SHARD_URLS": urls,
+        })
+        processes.append(subprocess.Popen(
+            [sys.executable, "-m", "gunicorn", "-c", "gunicorn_config.py", args.app],
+            cwd=ROOT_DIR, env=env,
+        ))
+        print(f"shard {index}: port {args.port + index}")
+    try:
+        return max(process.wait() for process in processes)
+    except KeyboardInterrupt:
+        for process in processes:
+            process.send_signal(signal.SIGTERM)
+        for process in processes:
+            process.wait()
+        return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,187 @@
+/* static/js/common/state_sync.js */
+// state_patch（差分配信）の受信側。
+// サーバーは join_room で state_patch: true を申告したクライアントにだけ、
+// ルーム状態の変更点を JSON Patch（add / remove / replace）で送る。
+// ここで直前の全量を保持してパッチを適用し、既存の state_updated 購読者へ
+// 全量として再配送するため、各画面の描画コードは従来のまま動く。
+// 版ずれ（base_version 不一致）を検知したら request_state_snapshot で全量を取り直す。
+// state_patch 申告クライアント宛ての全量/差分には logs が含まれないため、
+// request_logs でカーソル取得したログと new_log で届くログをここで保持し、
+// 再配送する state.logs に同じ配列を差し込む（logToBattleLog の push もこの配列に入る）。
+
+const StateSync = (() => {
+    let attachedSocket = null;
+    let currentVersion = null;
+    let baseState = null;
+    let resyncPending = false;
+    let logCache = [];
+    let logRoom = null;
+    let logsHasMore = false;
+    let logsRequestPending = false;
+    const LOG_PAGE_SIZE = 200;
+
+    const cloneState = (value) => {
+        if (typeof structuredClone === 'function') return structuredClone(value);
+        return JSON.parse(JSON.stringify(value));
+    };
+
+    const unescapeToken = (token) => token.replace(/~1/g, '/').replace(/~0/g, '~');
+
+    const applyOp = (doc, op) => {
+        const path = String(op.path || '');
+        if (path === '') return op.value;
+        const tokens = path.split('/').slice(1).map(unescapeToken);
+        let parent = doc;
+        for (let i = 0; i < tokens.length - 1; i += 1) {
+            parent = Array.isArray(parent) ? parent[Number(tokens[i])] : parent[tokens[i]];
+        }
+        const last = tokens[tokens.length - 1];
+        if (Array.isArray(parent)) {
+            if (op.op === 'remove') parent.splice(Number(last), 1);
+            else if (last === '-') parent.push(op.value);
+            else if (op.op === 'add') parent.splice(Number(last), 0, op.value);
+            else parent[Number(last)] = op.value;
+        } else if (op.op === 'remove') {
+            delete parent[last];
+        } else {
+            parent[last] = op.value;
+        }
+        return doc;
+    };
+
+    const currentRoom = () => ((typeof currentRoomName !== 'undefined') ? currentRoomName : null);
+
+    const requestSnapshot = () => {
+        if (!attachedSocket || resyncPending) return;
+        const room = currentRoom();
+        if (!room) return;
+        resyncPending = true;
+        currentVersion = null;
+        attachedSocket.emit('request_state_snapshot', { room });
+    };
+
+    const rememberSnapshot = (state) => {
+        if (!state || typeof state !== 'object') return;
+        resyncPending = false;
+        if (typeof state.state_version === 'number') {
+            currentVersion = state.state_version;
+            baseState = cloneState(state);
+        } else {
+            // 版なしの全量は以後のパッチの基準にできない。
+            currentVersion = null;
+            baseState = null;
+        }
+    };
+
+    const requestLogs = (beforeLogId) => {
+        const room = currentRoom();
+        if (!attachedSocket || !room || logsRequestPending) return false;
+        logsRequestPending = true;
+        attachedSocket.emit('request_logs', {
+            room,
+            before_log_id: (beforeLogId === undefined) ? null : beforeLogId,
+            limit: LOG_PAGE_SIZE,
+        });
+        return true;
+    };
+
+    // logs を含まない全量（差分購読者向け）に保持中のログ配列を差し込む。
+    const attachLogs = (state) => {
+        if (!state || typeof state !== 'object' || Array.isArray(state.logs)) return;
+        if (typeof state.state_version !== 'number') return;
+        const room = currentRoom();
+        if (logRoom !== room) {
+            logRoom = room;
+            logCache = [];
+            logsHasMore = false;
+            logsRequestPending = false;
+            requestLogs(null);
+        }
+        state.logs = logCache;
+    };
+
+    const dispatchState = (state) => {
+        const listeners = attachedSocket.listeners('state_updated') || [];
+        listeners.forEach((listener) => {
+            try {
+                const next = cloneState(state);
+                next.logs = logCache;
+                listener(next);
+            } catch (e) {
+                console.error('[StateSync] state_updated listener failed', e);
+            }
+        });
+    };
+
+    const handlePatch = (patch) => {
+        if (!patch || !Array.isArray(patch.ops)) return;
+        if (baseState === null || currentVersion !== patch.base_version) {
+            requestSnapshot();
+            return;
+        }
+        try {
+            let next = baseState;
+            patch.ops.forEach((op) => { next = applyOp(next, op); });
+            next.state_version = patch.version;
+            baseState = next;
+            currentVersion = patch.version;
+        } catch (e) {
+            console.warn('[StateSync] patch apply failed, requesting snapshot', e);
+            requestSnapshot();
+            return;
+        }
+        dispatchState(baseState);
+    };
+
+    const mergeLogPage = (page) => {
+        if (!page || page.room !== logRoom || !Array.isArray(page.logs)) return;
+        logsRequestPending = false;
+        logsHasMore = !!page.has_more;
+        const known = new Set(logCache.map((log) => log && log.log_id).filter((id) => id != null));
+        const older = page.logs.filter((log) => log && !known.has(log.log_id));
+        if (older.length === 0) return;
+        // 同一配列を保ったまま取り込む（battleState.logs と共有しているため）。
+        logCache.unshift(...older);
+        logCache.sort((a, b) => (Number(a && a.log_id) || 0) - (Number(b && b.log_id) || 0));
+        if (baseState) dispatchState(baseState);
+    };
+
+    const clearLogs = (payload) => {
+        if (!payload || payload.room !== logRoom) return;
+        logCache.length = 0;
+        logsHasMore = false;
+        if (baseState) dispatchState(baseState);
+    };
+
+    const requestOlderLogs = () => {
+        if (!logsHasMore) return false;
+        const oldest = logCache.find((log) => log && log.log_id != null);
+        return requestLogs(oldest ? oldest.log_id : null);
+    };
+
+    const attach = (socket) => {
+        if (!socket || attachedSocket === socket || typeof socket.onAny !== 'function') return false;
+        attachedSocket = socket;
+        currentVersion = null;
+        baseState = null;
+        // onAny は個別リスナーの off() の影響を受けないため、
+        // 各画面が state_updated を付け替えても全量の記録が途切れない。
+        socket.onAny((eventName, payload) => {
+            if (eventName === 'state_updated') {
+                rememberSnapshot(payload);
+                attachLogs(payload);
+            } else if (eventName === 'state_patch') handlePatch(payload);
+            else if (eventName === 'logs_page') mergeLogPage(payload);
+            else if (eventName === 'logs_cleared') clearLogs(payload);
+        });
+        return true;
+    };
+
+    const isSupported = () => !!attachedSocket;
+
+    const hasOlderLogs = () => logsHasMore;
+
+    return { attach, isSupported, applyOp, requestOlderLogs, hasOlderLogs };
+})();
+
+window.StateSync = StateSync;
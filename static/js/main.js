@@ -9,6 +9,10 @@ let currentUsername = null;
 let currentUserAttribute = null;
 let currentRoomUserList = [];
 let socketInitInFlight = false;
+// ルーム担当ワーカーへの接続先（shard_redirect で切り替わる）と、切り替え後に送り直す join_room
+let socketBaseUrl = API_BASE_URL;
+let lastJoinPayload = null;
+let pendingShardJoin = null;
 let entryRequestInFlight = false;
 let currentUserId = null; // ★追加: ユーザーID (UUID)
 let currentUserIsAppAdmin = false;
@@ -248,7 +252,15 @@ const tabButtons = document.querySelectorAll('.tab-button');
 // --- 2. APIフェッチ ---
 async function fetchWithSession(url, options = {}) {
     options.credentials = 'include';
-    const response = await fetch(API_BASE_URL + url, options);
+    let response = await fetch(API_BASE_URL + url, options);
+    if (response.status === 409) {
+        // ルームを担当するワーカーが別なら、そちらへ一度だけ送り直す
+        const data = await response.clone().json().catch(() => null);
+        const redirect = data && data.shard_redirect;
+        if (redirect && redirect.url) {
+            response = await fetch(redirect.url + url, options);
+        }
+    }
     if (response.status === 401) {
         console.warn('Authentication error (401). Redirecting to entry portal.');
         showEntryPortal();
@@ -976,12 +988,14 @@ async function joinRoom(roomName, initialState = null, entryOptions = null, know
         }
         battleState = initialState;
         currentRoomName = roomName;
-        socket.emit('join_room', {
+        lastJoinPayload = {
             room: currentRoomName,
             username: currentUsername,
             role: roomEntry.role || currentUserAttribute,
-            gm_pin: roomEntry.gmPin || ''
-        });
+            gm_pin: roomEntry.gmPin || '',
+            state_patch: !!(window.StateSync && window.StateSync.isSupported())
+        };
+        socket.emit('join_room', lastJoinPayload);
         entryPortal.style.display = 'none';
         roomPortal.style.display = 'none';
         mainAppContainer.style.display = 'block';
@@ -1023,8 +1037,11 @@ function initializeSocketIO() {
         return;
     }
     socketInitInFlight = true;
-    socket = io(API_BASE_URL, { withCredentials: true });
+    socket = io(socketBaseUrl, { withCredentials: true });
     window.socket = socket; // ★追加: グローバルに公開（SocketClient用）
+    if (window.StateSync && typeof window.StateSync.attach === 'function') {
+        window.StateSync.attach(socket);
+    }
 
     const registerAppSocketHandler = (eventName, handler) => {
         if (
@@ -1043,14 +1060,40 @@ function initializeSocketIO() {
         if (window.SocketClient && typeof window.SocketClient.initialize === 'function') {
             window.SocketClient.initialize();
         }
+        if (pendingShardJoin) {
+            const payload = pendingShardJoin;
+            pendingShardJoin = null;
+            socket.emit('join_room', payload);
+            return;
+        }
         showRoomPortal();
     });
     socket.on('disconnect', () => {
         socketInitInFlight = false;
+        if (pendingShardJoin) return;
         console.warn('WebSocket サーバーから切断されました。');
         alert('サーバーとの接続が切れました。ページをリロードします。');
         location.reload();
     });
+    // ルームを担当するワーカーが別の場合は、そのワーカーへ接続し直して入室し直す。
+    socket.on('shard_redirect', (data) => {
+        if (!data || !data.url || !lastJoinPayload) {
+            alert('このルームを担当するサーバーに接続できませんでした。');
+            showRoomPortal();
+            return;
+        }
+        pendingShardJoin = lastJoinPayload;
+        socketBaseUrl = data.url;
+        const previous = socket;
+        socket = null;
+        socketInitInFlight = false;
+        previous.disconnect();
+        initializeSocketIO();
+    });
+    // サーバー側でカタログが差し替わったら、該当するものだけ取り直す
+    socket.on('catalog_updated', (data) => {
+        if (data && data.name) loadCatalogData([data.name]);
+    });
     // match_error is handled in tab_visual_battle.js
     registerAppSocketHandler('state_updated', (newState) => {
 
@@ -1255,20 +1298,9 @@ async function checkSessionStatus() {
     }
 }
 
-window.addEventListener('DOMContentLoaded', () => {
-    checkSessionStatus();
-
-    if (window.Glossary && typeof window.Glossary.initOnce === 'function') {
-        window.Glossary.initOnce();
-    }
-
-    // ★ Phase 5: アイテムデータを読み込み
-    if (typeof loadItemData === 'function') {
-        loadItemData();
-    }
-
-    // ★追加: 全スキルデータを読み込み (フィルタリング用)
-    fetch('/api/get_skill_data')
+// サーバー側のカタログ名 -> 読み込み処理（catalog_updated で差し替わったものだけ取り直す）
+const CATALOG_LOADERS = {
+    skills: () => fetch('/api/get_skill_data')
         .then(res => res.json())
         .then(data => {
             window.allSkillData = data;
@@ -1276,11 +1308,9 @@ window.addEventListener('DOMContentLoaded', () => {
         })
         .catch(err => {
             console.error('[ERROR] スキルデータの読み込みに失敗:', err);
-            window.allSkillData = {};
-        });
-
-    // ★ Phase 6: 輝化スキルデータをグローバルに読み込み
-    fetch('/api/get_radiance_data')
+            window.allSkillData = window.allSkillData || {};
+        }),
+    radiance: () => fetch('/api/get_radiance_data')
         .then(res => res.json())
         .then(data => {
             window.radianceSkillData = data;
@@ -1288,11 +1318,9 @@ window.addEventListener('DOMContentLoaded', () => {
         })
         .catch(err => {
             console.error('[ERROR] 輝化スキルデータの読み込みに失敗:', err);
-            window.radianceSkillData = {};
-        });
-
-    // ★ Phase 7: 特殊パッシブデータをグローバルに読み込み
-    fetch('/api/get_passive_data')
+            window.radianceSkillData = window.radianceSkillData || {};
+        }),
+    passives: () => fetch('/api/get_passive_data')
         .then(res => res.json())
         .then(data => {
             window.allPassiveData = data;
@@ -1300,10 +1328,9 @@ window.addEventListener('DOMContentLoaded', () => {
         })
         .catch(err => {
             console.error('[ERROR] 特殊パッシブデータの読み込みに失敗:', err);
-            window.allPassiveData = {};
-        });
-
-    fetch('/api/get_buff_data')
+            window.allPassiveData = window.allPassiveData || {};
+        }),
+    buffs: () => fetch('/api/get_buff_data')
         .then(res => res.json())
         .then(data => {
             window.buffCatalogData = data;
@@ -1311,8 +1338,30 @@ window.addEventListener('DOMContentLoaded', () => {
         })
         .catch(err => {
             console.error('[ERROR] バフ図鑑データの読み込みに失敗:', err);
-            window.buffCatalogData = {};
-        });
+            window.buffCatalogData = window.buffCatalogData || {};
+        }),
+    items: () => (typeof loadItemData === 'function' ? loadItemData() : Promise.resolve()),
+};
+
+function loadCatalogData(names) {
+    (names || Object.keys(CATALOG_LOADERS)).forEach((name) => {
+        const loader = CATALOG_LOADERS[name];
+        if (loader) loader();
+    });
+}
+
+window.addEventListener('DOMContentLoaded', () => {
+    checkSessionStatus();
+
+    if (window.Glossary && typeof window.Glossary.initOnce === 'function') {
+        window.Glossary.initOnce();
+    }
+
+    // ★ Phase 5: アイテムデータを読み込み
+    loadCatalogData(['items']);
+
+    // ★追加: スキル・輝化スキル・特殊パッシブ・バフ図鑑をグローバルに読み込み
+    loadCatalogData(['skills', 'radiance', 'passives', 'buffs']);
 
     const homeBtn = document.getElementById('home-portal-btn');
     if (homeBtn) {
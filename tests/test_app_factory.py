@@ -18,7 +18,7 @@ def test_create_app_without_startup_registers_http_routes():
 
     routes = {rule.rule for rule in test_app.url_map.iter_rules()}
 
-    assert len(test_app.url_map._rules) == 58
+    assert len(test_app.url_map._rules) == 59
     assert "/" in routes
     assert "/healthz" in routes
     assert "/api/get_session_user" in routes
@@ -41,6 +41,7 @@ def test_create_app_without_startup_registers_http_routes():
     assert "/api/join_room_by_code" in routes
     assert "/api/room/set_join_code" in routes
     assert "/api/room/export_logs" in routes
+    assert "/api/room/logs" in routes
     # 計画36 Phase 1: 持ちキャラCRUD
     assert "/api/owned_characters" in routes
     assert "/api/owned_characters/<character_id>" in routes
@@ -1,6 +1,25 @@
+import pytest
+
 from manager.game_logic import compute_damage_multipliers, check_condition
 
 
+@pytest.fixture
+def buff_catalog(monkeypatch):
+    """バフ図鑑を差し替える（テスト後に all_buff_data と名前索引を戻す）。"""
+    from extensions import all_buff_data
+    from manager import catalog_registry
+    from manager.buff_catalog import rebuild_buff_name_index
+    from manager.buffs.loader import buff_catalog_loader  # noqa: F401  図鑑の publish を all_buff_data へ反映させる
+
+    monkeypatch.setattr(catalog_registry, "_catalogs", dict(catalog_registry._catalogs))
+    monkeypatch.setattr(catalog_registry, "_catalog_versions", dict(catalog_registry._catalog_versions))
+    saved_buffs = dict(all_buff_data)
+    yield lambda buffs: catalog_registry.publish(catalog_registry.BUFFS, buffs)
+    all_buff_data.clear()
+    all_buff_data.update(saved_buffs)
+    rebuild_buff_name_index()
+
+
 def test_compute_damage_multipliers_combines_outgoing_and_incoming():
     attacker = {
         "special_buffs": [
@@ -70,3 +89,17 @@ def test_compute_damage_multipliers_honors_outgoing_condition():
     result_miss = compute_damage_multipliers(attacker, defender_without_slow)
     assert round(float(result_miss["outgoing"]), 4) == 1.0
     assert round(float(result_miss["final"]), 4) == 1.0
+
+
+def test_confusion_multiplier_with_buff_catalog_loaded(buff_catalog):
+    buff_catalog({
+        "Bu-02": {
+            "id": "Bu-02",
+            "name": "混乱",
+            "effect": {"type": "plugin", "name": "confusion", "category": "debuff", "damage_multiplier": 1.5},
+        },
+    })
+    result = compute_damage_multipliers(None, {"special_buffs": [{"name": "混乱", "buff_id": "Bu-02"}]})
+    # 固定の 1.5 倍と図鑑の damage_multiplier の両方が掛かる（従来どおり）
+    assert round(float(result["incoming"]), 4) == 2.25
+    assert result["incoming_logs"] == ["混乱", "混乱"]
@@ -0,0 +1,51 @@
+import os
+
+os.environ["GEMTRPG_SKIP_IMPORT_STARTUP"] = "1"
+
+import pytest
+
+from extensions import all_buff_data
+from manager import buff_catalog
+
+
+@pytest.fixture(autouse=True)
+def catalog_rows():
+    saved = dict(all_buff_data)
+    all_buff_data.clear()
+    all_buff_data.update({
+        "Bu-90": {"id": "Bu-90", "name": "鉄壁", "effect": {"stat_mods": {"物理補正": 2}}, "description": "守りを固める"},
+        "Bu-91": {"id": "Bu-91", "name": "鉄壁", "effect": {"stat_mods": {"物理補正": 9}}},
+    })
+    buff_catalog.rebuild_buff_name_index()
+    yield
+    all_buff_data.clear()
+    all_buff_data.update(saved)
+    buff_catalog.rebuild_buff_name_index()
+
+
+def test_catalog_name_lookup_uses_first_row_and_is_shared():
+    effect = buff_catalog.get_buff_effect("鉄壁")
+
+    assert effect == {"stat_mods": {"物理補正": 2}, "description": "守りを固める"}
+    assert buff_catalog.get_buff_effect("鉄壁") is effect
+    assert "description" not in all_buff_data["Bu-90"]["effect"]
+
+
+def test_dynamic_patterns_are_cached_and_bounded(monkeypatch):
+    monkeypatch.setattr(buff_catalog, "_DYNAMIC_CACHE_SIZE", 2)
+
+    first = buff_catalog.get_buff_effect("試験_AtkDown3")
+    assert first["power_bonus"][0]["value"] == -3
+    assert buff_catalog.get_buff_effect("試験_AtkDown3") is first
+    assert buff_catalog.get_buff_effect("未知のバフ") is None
+
+    buff_catalog.get_buff_effect("試験_Phys1")
+    buff_catalog.get_buff_effect("試験_Mag1")
+    assert "試験_AtkDown3" not in buff_catalog._dynamic_cache
+    assert len(buff_catalog._dynamic_cache) == 2
+
+
+def test_index_follows_catalog_reload():
+    all_buff_data["Bu-92"] = {"id": "Bu-92", "name": "試験_Atk5", "effect": {"stat_mods": {"速度": 1}}}
+
+    assert buff_catalog.get_buff_effect("試験_Atk5") == {"stat_mods": {"速度": 1}}
@@ -0,0 +1,49 @@
+import os
+
+os.environ["GEMTRPG_SKIP_IMPORT_STARTUP"] = "1"
+
+from manager import utils
+from manager.utils import apply_buff, get_buff_stat_mod, remove_buff
+
+
+def _char():
+    return {
+        "params": [],
+        "states": [],
+        "special_buffs": [
+            {"name": "鉄壁", "stat_mods": {"物理補正": 2, "魔法補正": "x"}, "delay": 0, "lasting": 2},
+            {"name": "遅効", "data": {"stat_mods": {"基礎威力": 3}}, "delay": 1, "lasting": 2},
+            {"name": "蓄力", "buff_id": "Bu-30", "count": 25, "delay": 0, "lasting": -1},
+        ],
+    }
+
+
+def test_table_is_built_once_and_sums_all_sources():
+    char = _char()
+    builds = utils.get_buff_mod_metrics()["builds"]
+
+    assert get_buff_stat_mod(char, "物理補正") == 4
+    assert get_buff_stat_mod(char, "魔法補正") == 0
+    assert get_buff_stat_mod(char, "基礎威力") == 0
+    assert utils.get_buff_mod_metrics()["builds"] == builds + 1
+
+
+def test_delay_count_and_buff_changes_rebuild_table():
+    char = _char()
+    assert get_buff_stat_mod(char, "基礎威力") == 0
+
+    char["special_buffs"][1]["delay"] = 0
+    assert get_buff_stat_mod(char, "基礎威力") == 3
+
+    char["special_buffs"][2]["count"] = 40
+    assert get_buff_stat_mod(char, "物理補正") == 6
+
+    remove_buff(char, "鉄壁")
+    assert get_buff_stat_mod(char, "物理補正") == 4
+
+    apply_buff(char, "守護", 2, 0, data={"stat_mods": {"物理補正": 1}})
+    assert get_buff_stat_mod(char, "物理補正") == 5
+
+    char["special_buffs"][-1]["stat_mods"]["物理補正"] = 3
+    utils.invalidate_buff_stat_mods(char)
+    assert get_buff_stat_mod(char, "物理補正") == 7
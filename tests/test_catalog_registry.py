@@ -0,0 +1,111 @@
+import os
+
+os.environ["GEMTRPG_SKIP_IMPORT_STARTUP"] = "1"
+
+import pytest
+
+from extensions import all_buff_data
+from manager import buff_catalog, catalog_registry, skill_catalog
+from manager.buffs.loader import buff_catalog_loader
+
+
+@pytest.fixture(autouse=True)
+def isolated_registry():
+    saved = (
+        dict(catalog_registry._catalogs),
+        dict(catalog_registry._catalog_versions),
+        dict(catalog_registry._sources),
+        list(catalog_registry._listeners),
+    )
+    saved_buffs = dict(all_buff_data)
+    yield
+    catalog_registry._catalogs.clear()
+    catalog_registry._catalogs.update(saved[0])
+    catalog_registry._catalog_versions.clear()
+    catalog_registry._catalog_versions.update(saved[1])
+    catalog_registry._sources.clear()
+    catalog_registry._sources.update(saved[2])
+    catalog_registry._listeners[:] = saved[3]
+    all_buff_data.clear()
+    all_buff_data.update(saved_buffs)
+    buff_catalog.rebuild_buff_name_index()
+
+
+def test_publish_bumps_version_and_notifies_listeners():
+    seen = []
+    catalog_registry.on_change(lambda name, version, replaced: seen.append((name, version, replaced)))
+    before = catalog_registry.version()
+
+    first = catalog_registry.publish("test_catalog", {"a": 1})
+    second = catalog_registry.publish("test_catalog", {"a": 2})
+
+    assert first == before + 1 and second == before + 2
+    assert catalog_registry.version("test_catalog") == second
+    assert catalog_registry.snapshot()["catalogs"]["test_catalog"] == second
+    assert [entry for entry in seen if entry[0] == "test_catalog"] == [
+        ("test_catalog", first, False),
+        ("test_catalog", second, True),
+    ]
+
+
+def test_source_is_read_once_until_reload():
+    calls = []
+
+    def source():
+        calls.append(1)
+        return {"row": len(calls)}
+
+    catalog_registry.register_source("test_lazy", source)
+
+    assert catalog_registry.get("test_lazy") == {"row": 1}
+    assert catalog_registry.get("test_lazy") == {"row": 1}
+    assert catalog_registry.reload(["test_lazy"]) == ["test_lazy"]
+    assert catalog_registry.get("test_lazy") == {"row": 2}
+    assert len(calls) == 2
+
+    catalog_registry.register_source("test_empty", dict)
+    assert catalog_registry.get("test_empty", {}) == {}
+    assert catalog_registry.peek("test_empty") is None
+
+
+def test_buff_publish_updates_lookups_without_stat(monkeypatch):
+    def fail_stat(*_args, **_kwargs):
+        raise AssertionError("catalog lookups must not stat cache files")
+
+    monkeypatch.setattr(os.path, "getmtime", fail_stat)
+    monkeypatch.setattr(buff_catalog_loader, "fetch_from_csv", lambda: {
+        "Bu-T1": {"id": "Bu-T1", "name": "試験加護", "effect": {"stat_mods": {"速度": 2}}},
+    })
+    monkeypatch.setattr(buff_catalog_loader, "save_to_cache", lambda _buffs: None)
+    skill_catalog._objects["sentinel"] = None
+
+    buff_catalog_loader.refresh()
+
+    assert buff_catalog.get_buff_by_id("Bu-T1")["name"] == "試験加護"
+    assert buff_catalog.get_buff_effect("試験加護") == {"stat_mods": {"速度": 2}}
+    assert set(all_buff_data) == {"Bu-T1"}
+    assert buff_catalog_loader.load_buffs() is catalog_registry.peek(catalog_registry.BUFFS)
+    assert "sentinel" not in skill_catalog._objects
+
+
+def test_reload_catalogs_requires_app_admin(monkeypatch):
+    from types import SimpleNamespace
+
+    from events import socket_main
+    from extensions import user_sids
+
+    emits, reloads = [], []
+    monkeypatch.setattr(socket_main, "request", SimpleNamespace(sid="sid-owner"))
+    monkeypatch.setattr(socket_main, "session", {})
+    monkeypatch.setattr(socket_main, "emit", lambda event, payload=None, **_kw: emits.append(event))
+    monkeypatch.setattr(catalog_registry, "reload", lambda names=None: reloads.append(names) or [])
+    monkeypatch.setattr(socket_main, "is_user_management_admin", lambda user_id: user_id == "admin")
+    monkeypatch.setitem(user_sids, "sid-owner", {"user_id": "owner", "attribute": "GM", "room": "R1"})
+
+    # ルームの GM（オーナー）ではプロセス全体の読み直しはできない
+    socket_main.handle_reload_catalogs({})
+    assert emits == ["error"] and reloads == []
+
+    user_sids["sid-owner"]["user_id"] = "admin"
+    socket_main.handle_reload_catalogs({})
+    assert emits == ["error", "catalogs_reloaded"] and reloads == [None]
@@ -0,0 +1,117 @@
+import os
+
+os.environ["GEMTRPG_SKIP_IMPORT_STARTUP"] = "1"
+
+import random
+import re
+
+from manager import dice_roller
+from manager.sim.battle_runner import build_deterministic_roll_dice
+
+
+def _legacy_roll_dice(cmd_str):
+    """eval を使っていた頃の roll_dice（比較用）。"""
+    calc_str = re.sub(r'【.*?】', '', cmd_str).strip()
+    details_str = calc_str
+    original_calc = calc_str
+    dice_total = 0
+    dice_terms = []
+    for match in reversed(list(re.finditer(r'(\d+)d(\d+)', original_calc))):
+        num_dice, num_faces = int(match.group(1)), int(match.group(2))
+        sign = dice_roller._resolve_term_sign(original_calc, match.start())
+        rolls = [0] * num_dice if num_faces < 1 else [random.randint(1, num_faces) for _ in range(num_dice)]
+        roll_sum = sum(rolls)
+        start, end = match.start(), match.end()
+        details_str = details_str[:start] + f"({'+'.join(map(str, rolls))})" + details_str[end:]
+        calc_str = calc_str[:start] + str(roll_sum) + calc_str[end:]
+        dice_total += sign * roll_sum
+        dice_terms.append({"sign": sign, "num": num_dice, "faces": num_faces, "rolls": rolls, "sum": roll_sum, "raw": match.group(0)})
+    sanitized = re.sub(r'[^-\d()/*+.]', '', calc_str)
+    try:
+        total = eval(sanitized)
+    except Exception:
+        total = 0
+    constant_terms = []
+    for token in re.finditer(r'([+-]?)(\d+d\d+|\d+)', original_calc.replace(' ', '')):
+        if 'd' in token.group(2):
+            continue
+        constant_terms.append({"raw": token.group(0), "value": (-1 if token.group(1) == '-' else 1) * int(token.group(2))})
+    return {
+        "total": total,
+        "details": details_str,
+        "breakdown": {
+            "expression": original_calc,
+            "sanitized_expression": sanitized,
+            "dice_total": int(dice_total),
+            "constant_total": sum(row["value"] for row in constant_terms),
+            "final_total": int(total),
+            "dice_terms": list(reversed(dice_terms)),
+            "constant_terms": constant_terms,
+        },
+    }
+
+
+COMMANDS = [
+    "5+2d6+1d4 【攻撃】",
+    "1d6",
+    "3 - 1d6 + 2",
+    "-2d6-1d4",
+    "(1d6+2)*2",
+    "2d6/2",
+    "2d6//3",
+    "10-(1d6-1d4)",
+    "1d0+3",
+    "0d6+1",
+    "物理 1d6+2",
+    "1d6 2",
+    "31d6",
+    "1d6/0",
+    "5+",
+    "",
+    "【技のみ】",
+]
+
+
+def test_compiled_roll_matches_legacy_eval():
+    for seed in range(20):
+        for cmd in COMMANDS:
+            random.seed(seed)
+            expected = _legacy_roll_dice(cmd)
+            random.seed(seed)
+            assert dice_roller.roll_dice(cmd) == expected, cmd
+
+
+def test_batch_apis_and_sim_roller_share_compiled_expressions():
+    random.seed(3)
+    many = dice_roller.roll_dice_many(["1d6", "2d6+1"])
+    random.seed(3)
+    assert many == [dice_roller.roll_dice("1d6"), dice_roller.roll_dice("2d6+1")]
+    assert dice_roller.compile_command("2d6+1 【技】") is dice_roller.compile_dice("2d6+1")
+
+    totals = list(dice_roller.sample_dice_totals("2d6+1", 500, rng=random.Random(1)))
+    assert len(totals) == 500
+    assert min(totals) >= 3 and max(totals) <= 13
+    assert list(dice_roller.sample_dice_totals("1d6/0", 3, rng=random.Random(1))) == [0, 0, 0]
+
+    high = build_deterministic_roll_dice("high")("2d6+1d4-1 【技】")
+    assert high["total"] == 15
+    assert high["details"] == "(6+6)+(4)-1"
+    assert high["breakdown"]["roll_mode"] == "high"
+    assert "roll_mode" not in dice_roller.compile_dice("2d6+1d4-1").roll(lambda n, f: [1] * n)["breakdown"]
+
+
+def test_malformed_command_does_not_grow_cached_traceback():
+    errors = []
+    expression = dice_roller.compile_dice("1d1+")
+    for _ in range(50):
+        assert expression.roll(on_error=lambda _calc, exc: errors.append(exc))["total"] == 0
+
+    assert len({id(exc) for exc in errors}) == len(errors)
+    depths = set()
+    for exc in errors:
+        depth, tb = 0, exc.__traceback__
+        while tb is not None:
+            depth, tb = depth + 1, tb.tb_next
+        depths.add(depth)
+    assert len(depths) == 1 and max(depths) <= 3
+    assert str(errors[-1]) == str(errors[0])
@@ -0,0 +1,63 @@
+import os
+
+os.environ["GEMTRPG_SKIP_IMPORT_STARTUP"] = "1"
+
+from manager.battle.effect_handlers.session import EffectSession, simulate_char
+from manager.game_logic import process_skill_effects
+
+
+def _char(char_id, team):
+    return {
+        "id": char_id,
+        "name": char_id,
+        "type": team,
+        "hp": 30,
+        "mp": 10,
+        "commands": "1d6 【S-01 斬撃】",
+        "inventory": {"I-01": 2},
+        "params": [{"label": "物理補正", "value": "2"}],
+        "states": [{"name": "出血", "value": 1}],
+        "special_buffs": [{"name": "鉄壁", "data": {"stat_mods": {"物理補正": 1}}}],
+        "flags": {},
+    }
+
+
+def test_simulated_char_copies_only_writable_fields():
+    real = _char("A1", "ally")
+    sim = simulate_char(real)
+
+    assert sim == real
+    assert sim["inventory"] is real["inventory"]
+    assert sim["states"] is not real["states"]
+    assert sim["states"][0] is not real["states"][0]
+    assert sim["special_buffs"][0]["data"] is not real["special_buffs"][0]["data"]
+
+    sim["hp"] = 1
+    sim["states"][0]["value"] = 9
+    sim["flags"]["x"] = True
+    assert real["hp"] == 30
+    assert real["states"][0]["value"] == 1
+    assert real["flags"] == {}
+
+
+def test_session_copies_target_only_when_touched():
+    actor, target = _char("A1", "ally"), _char("E1", "enemy")
+    session = EffectSession(actor, target, "HIT", None, 0, None, None)
+
+    assert session.simulated_chars == {}
+    assert session.original_sim_target is session.get_simulated_char(target)
+    assert list(session.simulated_chars) == ["E1"]
+
+
+def test_process_skill_effects_leaves_real_characters_untouched():
+    actor, target = _char("A1", "ally"), _char("E1", "enemy")
+    effects = [
+        {"timing": "HIT", "type": "APPLY_STATE", "target": "target", "state_name": "出血", "value": 2},
+        {"timing": "END_ROUND", "type": "APPLY_STATE", "target": "self", "state_name": "FP", "value": 1},
+    ]
+
+    _bonus, _logs, changes = process_skill_effects(effects, "HIT", actor, target)
+
+    assert (target, "APPLY_STATE", "出血", 2) in changes
+    assert target["states"] == [{"name": "出血", "value": 1}]
+    assert actor["states"] == [{"name": "出血", "value": 1}]
@@ -0,0 +1,86 @@
+import os
+
+os.environ["GEMTRPG_SKIP_IMPORT_STARTUP"] = "1"
+
+import threading
+import time
+
+import pytest
+
+from manager.core import lock_manager
+
+
+@pytest.fixture(autouse=True)
+def clean_locks(monkeypatch, tmp_path):
+    monkeypatch.setattr(lock_manager, "LOCK_DIR", str(tmp_path / "locks"))
+    lock_manager._keys.clear()
+    yield
+    lock_manager._keys.clear()
+
+
+def _wait_for_waiters(name, count):
+    while len(getattr(lock_manager._keys.get(name), "waiters", ())) < count:
+        time.sleep(0.001)
+
+
+def test_waiters_acquire_in_arrival_order():
+    order = []
+
+    def worker(label):
+        with lock_manager.file_lock("duel_exec_R1", timeout=2):
+            order.append(label)
+
+    threads = []
+    with lock_manager.file_lock("duel_exec_R1", timeout=1):
+        for index, label in enumerate(("a", "b", "c")):
+            thread = threading.Thread(target=worker, args=(label,))
+            thread.start()
+            threads.append(thread)
+            _wait_for_waiters("duel_exec_R1", index + 1)
+        # 別キーは待たされない。
+        with lock_manager.file_lock("duel_exec_R2", timeout=0.1):
+            pass
+    for thread in threads:
+        thread.join(2)
+
+    assert order == ["a", "b", "c"]
+    assert lock_manager._keys == {}
+
+
+def test_timeout_raises_and_leaves_queue_usable():
+    before = lock_manager.get_lock_metrics()["timeouts"]
+    with lock_manager.file_lock("k", timeout=1):
+        with pytest.raises(TimeoutError):
+            with lock_manager.file_lock("k", timeout=0.05):
+                pass
+    assert lock_manager.get_lock_metrics()["timeouts"] == before + 1
+    with lock_manager.file_lock("k", timeout=0.05):
+        pass
+
+
+def test_expired_lease_is_handed_to_next_waiter():
+    acquired = threading.Event()
+
+    def waiter():
+        with lock_manager.file_lock("k", timeout=2):
+            acquired.set()
+
+    holder = lock_manager.file_lock("k", timeout=1, lease=0.05)
+    holder.__enter__()
+    thread = threading.Thread(target=waiter)
+    thread.start()
+    assert acquired.wait(2)
+    thread.join(2)
+    # 期限切れ後の解放は引き継いだ側のロックを外さない。
+    holder.__exit__(None, None, None)
+    assert lock_manager.get_lock_metrics()["expired"] >= 1
+
+
+@pytest.mark.skipif(lock_manager.fcntl is None, reason="fcntl が無い環境")
+def test_fcntl_backend_does_not_leave_blocking_files(monkeypatch):
+    monkeypatch.setattr(lock_manager, "_BACKEND", "fcntl")
+    with lock_manager.file_lock("duel_exec_R1", timeout=0.5):
+        pass
+    # ロックファイルが残っていても保持者がいなければすぐ取れる。
+    with lock_manager.file_lock("duel_exec_R1", timeout=0.05):
+        pass
@@ -0,0 +1,60 @@
+import os
+
+os.environ["GEMTRPG_SKIP_IMPORT_STARTUP"] = "1"
+
+from manager.battle import core as battle_core
+from manager.mutation_recorder import MutationRecorder, record_touch
+from manager.utils import set_status_value
+
+
+def _char(char_id, team):
+    return {
+        "id": char_id,
+        "name": char_id,
+        "type": team,
+        "hp": 30,
+        "maxHp": 30,
+        "mp": 10,
+        "params": [],
+        "states": [{"name": "FP", "value": 0}, {"name": "出血", "value": 0}],
+        "special_buffs": [],
+        "flags": {},
+    }
+
+
+def test_recorder_snapshots_only_reported_characters():
+    snapshots = []
+    a, b = _char("A1", "ally"), _char("E1", "enemy")
+
+    outer = MutationRecorder(lambda char: snapshots.append(char["id"]) or {"hp": char["hp"]})
+    with outer:
+        inner = MutationRecorder(lambda char: {"hp": char["hp"]})
+        with inner:
+            a["hp"] = 5
+            set_status_value(b, "HP", 3)
+        record_touch(b)
+    record_touch(a)
+
+    assert snapshots == ["E1"]
+    assert outer.before(b) == {"hp": 30}
+    assert outer.before(a) is None
+    assert inner.before(b) == {"hp": 30}
+    assert len(outer) == 1
+
+
+def test_timing_pass_reports_changes_of_touched_characters(monkeypatch):
+    monkeypatch.setattr(battle_core, "broadcast_log", lambda *_args, **_kwargs: None)
+    monkeypatch.setattr(battle_core, "_update_char_stat", lambda _room, char, name, value, **_kwargs: set_status_value(char, name, value))
+    actor, target = _char("A1", "ally"), _char("E1", "enemy")
+    bystanders = [_char(f"X{n}", "enemy") for n in range(10)]
+    state = {"characters": [actor, target, *bystanders], "timeline": []}
+    rule = {"effects": [{"timing": "HIT", "type": "APPLY_STATE", "target": "target", "state_name": "出血", "value": 2}]}
+    skill = {"id": "S-T1", "rule_data": rule}
+
+    result = battle_core._run_skill_timing_effects("room_t", state, actor, target, skill, "HIT")
+
+    assert result["statuses"] == [
+        {"target_id": "E1", "name": "出血", "before": 0, "after": 2, "delta": 2},
+    ]
+    assert result["damage"] == [] and result["flags"] == []
+    assert target["states"][1]["value"] == 2
@@ -18,7 +18,7 @@ def _patch_common(monkeypatch, state, user_info):
     emits = []
     monkeypatch.setattr(socket_char, "request", SimpleNamespace(sid="sid_test"))
     monkeypatch.setattr(socket_char, "get_room_state", lambda _room: state)
-    monkeypatch.setattr(socket_char, "save_specific_room_state", lambda _room: True)
+    monkeypatch.setattr(socket_char, "save_specific_room_state", lambda _room, **_kw: True)
     monkeypatch.setattr(socket_char, "broadcast_log", lambda *_args, **_kwargs: None)
     monkeypatch.setattr(socket_char, "broadcast_state_update", lambda *_args, **_kwargs: None)
     monkeypatch.setattr(socket_char, "get_user_info_from_sid", lambda _sid: user_info)
@@ -0,0 +1,34 @@
+import os
+
+os.environ["GEMTRPG_SKIP_IMPORT_STARTUP"] = "1"
+
+from manager.battle import core as battle_core
+import manager.battle.resolve_auto_runtime as resolve_runtime
+import manager.battle.resolve_auto_single_phase as single_phase
+from manager.battle.resolve_context import ResolveRuntime
+
+
+def test_runtime_binds_services_once_and_helpers_lazily(monkeypatch):
+    rooms = []
+    monkeypatch.setattr(battle_core, "get_room_state", lambda room: rooms.append(room) or {})
+    rt = ResolveRuntime.from_core(roll_dice=lambda *_args: {"total": 3})
+
+    monkeypatch.setattr(battle_core, "get_room_state", lambda _room: None)
+    assert rt.get_room_state("room_a") == {}
+    assert rooms == ["room_a"]
+    assert rt.roll_dice("1d6")["total"] == 3
+    assert rt.logger is battle_core.logger
+    assert rt._resolve_clash_by_existing_logic is battle_core._resolve_clash_by_existing_logic
+    assert "_resolve_clash_by_existing_logic" in vars(rt)
+
+
+def test_resolve_uses_given_runtime_without_touching_module_globals():
+    before = set(vars(single_phase))
+    seen = []
+    rt = ResolveRuntime.from_core(get_room_state=lambda room: seen.append(room) or None)
+
+    resolve_runtime.run_select_resolve_auto("room_b", "battle_b", runtime=rt)
+
+    assert seen == ["room_b"]
+    assert set(vars(single_phase)) == before
+    assert not hasattr(resolve_runtime, "get_room_state")
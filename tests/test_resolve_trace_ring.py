@@ -0,0 +1,56 @@
+import os
+
+os.environ["GEMTRPG_SKIP_IMPORT_STARTUP"] = "1"
+
+from types import SimpleNamespace
+
+from manager.battle import core as battle_core
+from manager.battle import resolve_trace_runtime as trace_runtime
+
+
+def _patch_room(monkeypatch):
+    room_state = {"logs": [], "characters": []}
+    monkeypatch.setattr(battle_core, "get_room_state", lambda _room: room_state)
+    monkeypatch.setattr(battle_core, "socketio", SimpleNamespace(emit=lambda *_args, **_kwargs: None))
+    monkeypatch.setattr(battle_core, "save_specific_room_state", lambda *_args, **_kwargs: True)
+    monkeypatch.setattr(trace_runtime, "trim_room_logs_with_archive", lambda *_args, **_kwargs: True)
+    return room_state
+
+
+def test_trace_ring_keeps_step_numbering(monkeypatch):
+    _patch_room(monkeypatch)
+    battle_state = {"round": 1, "phase": "resolve_single", "slots": {}, "resolve": {"trace": []}}
+    total = trace_runtime.TRACE_RING_LIMIT + trace_runtime.TRACE_RING_CHUNK + 5
+
+    for _ in range(total):
+        battle_core._append_trace("room_t", "battle_t", battle_state, "one_sided", "A_slot")
+
+    trace = battle_state["resolve"]["trace"]
+    assert len(trace) <= trace_runtime.TRACE_RING_LIMIT + trace_runtime.TRACE_RING_CHUNK
+    assert trace[-1]["step"] == total
+    assert [row["step"] for row in trace] == list(range(total - len(trace) + 1, total + 1))
+    assert trace_runtime.trace_step_count(trace) == total
+
+
+def test_persisted_keys_are_round_scoped(monkeypatch):
+    room_state = _patch_room(monkeypatch)
+    battle_state = {"round": 2, "phase": "resolve_single", "resolve": {}}
+    entry = {"step": 1, "step_index": 0, "timestamp": 10, "kind": "clash", "attacker_slot_id": "A", "defender_slot_id": "B"}
+
+    battle_core._emit_battle_trace("room_t", "battle_t", battle_state, entry)
+    battle_core._emit_battle_trace("room_t", "battle_t", battle_state, entry)
+    resolve = battle_state["resolve"]
+    assert len(room_state["logs"]) == 1
+    assert resolve["persisted_trace_round"] == 2
+    assert resolve["persisted_trace_log_keys"] == ["0|clash|A|B|10"]
+
+    # 保存済みのリストから読み直しても重複しない
+    battle_state["resolve"] = {**resolve, "persisted_trace_log_keys": list(resolve["persisted_trace_log_keys"])}
+    battle_core._emit_battle_trace("room_t", "battle_t", battle_state, entry)
+    assert len(room_state["logs"]) == 1
+
+    battle_state["round"] = 3
+    battle_core._emit_battle_trace("room_t", "battle_t", battle_state, entry)
+    assert len(room_state["logs"]) == 2
+    assert battle_state["resolve"]["persisted_trace_round"] == 3
+    assert battle_state["resolve"]["persisted_trace_log_keys"] == ["0|clash|A|B|10"]
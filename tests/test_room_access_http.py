@@ -122,6 +122,20 @@ def test_load_room_allowed_after_enter_room(client):
     assert resp.status_code == 200
 
 
+def test_load_room_masks_secret_logs_for_players(client):
+    from manager import room_access as ra
+    ra.ensure_membership(Room.query.filter_by(name="R1").first().id, "player-1", ra.PLAYER)
+    active_room_states["R1"] = {"characters": [], "logs": [
+        {"log_id": 1, "message": "1d100 → 42", "secret": True, "user": "owner"},
+    ]}
+    _login(client, "player-1", "player")
+    client.post("/api/enter_room", json={"room_name": "R1"})
+    assert client.get("/load_room?name=R1").get_json()["logs"][0]["message"] == "（シークレットダイス）"
+
+    _login(client, "owner-1", "owner")
+    assert client.get("/load_room?name=R1").get_json()["logs"][0]["message"] == "1d100 → 42"
+
+
 def test_load_room_requires_name(client):
     _login(client, "owner-1", "owner")
     resp = client.get("/load_room")
@@ -0,0 +1,122 @@
+import os
+
+os.environ["GEMTRPG_SKIP_IMPORT_STARTUP"] = "1"
+
+import threading
+import time
+
+import pytest
+
+from extensions import user_sids
+from manager import room_actor
+
+
+@pytest.fixture(autouse=True)
+def clean_actor():
+    user_sids.clear()
+    room_actor._mailboxes.clear()
+    room_actor._command_metrics.clear()
+    yield
+    user_sids.clear()
+    room_actor._mailboxes.clear()
+    room_actor._command_metrics.clear()
+
+
+def test_commands_for_one_room_run_in_arrival_order():
+    order = []
+    release = threading.Event()
+
+    def first():
+        order.append("first:start")
+        release.wait(2)
+        order.append("first:end")
+
+    def later(name):
+        order.append(name)
+
+    threads = [threading.Thread(target=room_actor.run_in_room, args=("R1", first))]
+    threads[0].start()
+    while room_actor.queue_depths().get("R1") != 1:
+        time.sleep(0.001)
+    for name in ("second", "third"):
+        thread = threading.Thread(target=room_actor.run_in_room, args=("R1", later, name))
+        thread.start()
+        threads.append(thread)
+        while room_actor.queue_depths().get("R1", 0) < len(threads):
+            time.sleep(0.001)
+
+    # 別ルームは R1 の実行中でも待たされない。
+    assert room_actor.run_in_room("R2", lambda: "other") == "other"
+    assert order == ["first:start"]
+
+    release.set()
+    for thread in threads:
+        thread.join(2)
+    assert order == ["first:start", "first:end", "second", "third"]
+    assert room_actor.queue_depths() == {}
+    assert room_actor.get_actor_metrics()["by_command"]["later"]["count"] == 2
+
+
+def test_nested_command_for_same_room_runs_inline():
+    def outer():
+        with room_actor.room_turn("R1"):
+            return room_actor.run_in_room("R1", lambda: "inner")
+
+    assert room_actor.run_in_room("R1", outer) == "inner"
+    assert room_actor.queue_depths() == {}
+
+
+def test_failing_command_releases_the_room():
+    def boom():
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        room_actor.run_in_room("R1", boom)
+    assert room_actor.run_in_room("R1", lambda: 1) == 1
+
+
+def test_room_command_uses_payload_room_outside_socket_context():
+    seen = []
+
+    @room_actor.room_command
+    def handler(data):
+        seen.append(room_actor.queue_depths())
+        return data["room"]
+
+    assert handler({"room": "R9"}) == "R9"
+    assert seen == [{"R9": 1}]
+    assert handler.__name__ == "handler"
+
+
+def test_room_command_prefers_payload_room_over_current_room(monkeypatch):
+    import flask
+    from types import SimpleNamespace
+
+    monkeypatch.setattr(flask, "request", SimpleNamespace(sid="sid-1"))
+    user_sids["sid-1"] = {"room": "R1"}
+    seen = []
+
+    @room_actor.room_command
+    def handler(data):
+        seen.append(room_actor.queue_depths())
+
+    handler({"room": "R2"})
+    handler({})
+    assert seen == [{"R2": 1}, {"R1": 1}]
+
+
+def test_room_state_socket_handlers_go_through_the_mailbox():
+    from events import socket_battle_only, socket_exploration, socket_items, socket_room_presets, socket_wide_calculate
+    from events.battle import wide_routes
+
+    handlers = [
+        socket_battle_only.handle_bo_draft_update,
+        socket_battle_only.handle_bo_start_battle,
+        socket_battle_only.handle_bo_select_stage_preset,
+        wide_routes.on_execute_synced_wide_match,
+        socket_exploration.handle_update_tachie_location,
+        socket_items.handle_use_item,
+        socket_room_presets.handle_room_apply_stage_preset,
+        socket_wide_calculate.handle_calculate_wide_skill,
+    ]
+    assert all(hasattr(handler, "__wrapped__") for handler in handlers)
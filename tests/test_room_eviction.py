@@ -0,0 +1,126 @@
+import os
+
+os.environ["GEMTRPG_SKIP_IMPORT_STARTUP"] = "1"
+
+import pytest
+
+from app import create_app
+from extensions import active_room_states, db, user_sids
+from models import Room
+from manager import room_manager, utils
+from manager.battle import skill_access
+
+
+@pytest.fixture
+def app_ctx(tmp_path):
+    db_path = tmp_path / "room_eviction.db"
+    test_app = create_app(
+        config={
+            "TESTING": True,
+            "SQLALCHEMY_DATABASE_URI": f"sqlite:///{db_path.as_posix()}",
+            "SQLALCHEMY_ENGINE_OPTIONS": {},
+        },
+        run_startup=False,
+        register_sockets=False,
+    )
+    with test_app.app_context():
+        db.create_all()
+        for name in ("R1", "R2", "R3"):
+            db.session.add(Room(name=name, data={"logs": [], "round": 0}))
+        db.session.commit()
+        yield test_app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture(autouse=True)
+def clear_runtime_state(monkeypatch):
+    monkeypatch.setattr(room_manager, "_ensure_evict_worker", lambda: None)
+    active_room_states.clear()
+    user_sids.clear()
+    room_manager._dirty_rooms.clear()
+    room_manager._save_retry_counts.clear()
+    room_manager._room_last_access.clear()
+    yield
+    active_room_states.clear()
+    user_sids.clear()
+    room_manager._dirty_rooms.clear()
+    room_manager._save_retry_counts.clear()
+    room_manager._room_last_access.clear()
+
+
+def _load(room_name, accessed_at):
+    state = room_manager.get_room_state(room_name)
+    room_manager._room_last_access[room_name] = accessed_at
+    return state
+
+
+def test_idle_room_is_saved_then_evicted(app_ctx, monkeypatch):
+    monkeypatch.setattr(room_manager, "_ROOM_IDLE_EVICT_SECONDS", 100)
+    state = _load("R1", accessed_at=0.0)
+    state["round"] = 7
+    room_manager._dirty_rooms.add("R1")
+
+    assert room_manager.evict_idle_rooms(now=500.0) == ["R1"]
+
+    assert "R1" not in active_room_states
+    assert "R1" not in room_manager._dirty_rooms
+    db.session.expire_all()
+    assert Room.query.filter_by(name="R1").first().data["round"] == 7
+    assert room_manager.get_room_state("R1")["round"] == 7
+
+
+def test_evicted_room_releases_character_caches(app_ctx, monkeypatch):
+    monkeypatch.setattr(room_manager, "_ROOM_IDLE_EVICT_SECONDS", 100)
+    state = _load("R1", accessed_at=0.0)
+    char = {
+        "id": "c1",
+        "params": [{"label": "速度", "value": "3"}],
+        "states": [],
+        "special_buffs": [{"name": "加速", "data": {"stat_mods": {"速度": 1}}}],
+    }
+    state["characters"] = [char]
+    utils.get_status_value(char, "速度")
+    utils.get_buff_stat_mod(char, "速度")
+    skill_access._usable_memos[(id(char), None, False)] = skill_access._UsableMemo(char, (), (), (), ())
+
+    assert room_manager.evict_idle_rooms(now=500.0) == ["R1"]
+
+    assert id(char) not in utils._stat_indexes
+    assert id(char) not in utils._buff_mod_tables
+    assert (id(char), None, False) not in skill_access._usable_memos
+
+
+def test_room_with_connected_sid_is_kept(app_ctx, monkeypatch):
+    monkeypatch.setattr(room_manager, "_ROOM_IDLE_EVICT_SECONDS", 100)
+    _load("R1", accessed_at=0.0)
+    user_sids["sid-1"] = {"room": "R1"}
+
+    assert room_manager.evict_idle_rooms(now=500.0) == []
+    assert "R1" in active_room_states
+
+
+def test_failed_save_keeps_room_in_memory(app_ctx, monkeypatch):
+    monkeypatch.setattr(room_manager, "_ROOM_IDLE_EVICT_SECONDS", 100)
+    def fail(*_a, **_kw):
+        raise RuntimeError("db down")
+
+    monkeypatch.setattr(room_manager, "update_room_state", fail)
+    _load("R1", accessed_at=0.0)
+    room_manager._dirty_rooms.add("R1")
+
+    assert room_manager.evict_idle_rooms(now=500.0) == []
+    assert "R1" in active_room_states
+    assert "R1" in room_manager._dirty_rooms
+
+
+def test_room_budget_evicts_least_recently_used_first(app_ctx, monkeypatch):
+    monkeypatch.setattr(room_manager, "_ROOM_IDLE_EVICT_SECONDS", 0)
+    monkeypatch.setattr(room_manager, "_ROOM_CACHE_MAX_ROOMS", 1)
+    _load("R1", accessed_at=30.0)
+    _load("R2", accessed_at=10.0)
+    _load("R3", accessed_at=20.0)
+    user_sids["sid-2"] = {"room": "R2"}
+
+    assert room_manager.evict_idle_rooms(now=40.0) == ["R3", "R1"]
+    assert list(active_room_states) == ["R2"]
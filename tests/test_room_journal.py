@@ -0,0 +1,134 @@
+import os
+
+os.environ["GEMTRPG_SKIP_IMPORT_STARTUP"] = "1"
+
+import pytest
+
+from app import create_app
+from extensions import active_room_states, db
+from models import Room, RoomLogArchive, RoomStateJournal
+from manager import data_manager, room_journal, room_manager
+
+
+def _clear_runtime():
+    active_room_states.clear()
+    room_manager._hydrated_states.clear()
+    room_manager._dirty_rooms.clear()
+    room_manager._dirty_sections.clear()
+    room_manager._pending_log_archives.clear()
+    room_manager._archived_log_ids.clear()
+    data_manager._section_digests.clear()
+    for cache in (room_journal._bases, room_journal._seqs, room_journal._pending, room_journal._since_snapshot):
+        cache.clear()
+
+
+@pytest.fixture
+def app_ctx(tmp_path, monkeypatch):
+    monkeypatch.setattr(room_journal, "_JOURNAL_ENABLED", True)
+    monkeypatch.setattr(room_manager, "_ensure_evict_worker", lambda: None)
+    monkeypatch.setattr(room_manager, "_schedule_flush", lambda: None)
+    monkeypatch.setattr(room_manager, "_schedule_journal_flush", lambda: None)
+    db_path = tmp_path / "room_journal.db"
+    test_app = create_app(
+        config={
+            "TESTING": True,
+            "SQLALCHEMY_DATABASE_URI": f"sqlite:///{db_path.as_posix()}",
+            "SQLALCHEMY_ENGINE_OPTIONS": {},
+        },
+        run_startup=False,
+        register_sockets=False,
+    )
+    with test_app.app_context():
+        db.create_all()
+        db.session.add(Room(name="R1", data={"characters": [{"id": "c1", "name": "A", "hp": 10}], "round": 1}))
+        db.session.commit()
+        _clear_runtime()
+        yield test_app
+        db.session.remove()
+        db.drop_all()
+    _clear_runtime()
+
+
+def _crash():
+    """保留中のスナップショットを書かずにプロセスが落ちた状態にする。"""
+    _clear_runtime()
+    db.session.expire_all()
+
+
+def test_journal_is_replayed_after_crash(app_ctx):
+    state = room_manager.get_room_state("R1")
+    state["characters"][0]["hp"] = 7
+    room_manager.save_specific_room_state("R1", sections=("characters",))
+    room_manager.broadcast_log("R1", "hit", save=True)
+    state["round"] = 2
+    room_manager.save_specific_room_state("R1")
+    assert room_manager._flush_journal_locked()
+
+    assert RoomStateJournal.query.count() == 3
+    assert [row.message for row in RoomLogArchive.query.all()] == ["hit"]
+
+    _crash()
+    restored = room_manager.get_room_state("R1")
+    assert restored["characters"][0]["hp"] == 7
+    assert restored["round"] == 2
+    assert [log["message"] for log in restored["logs"]] == ["hit"]
+    assert "_journal_seq" not in restored
+    # 再適用した分はスナップショットを取り直す。
+    assert "R1" in room_manager._dirty_rooms
+
+
+def test_snapshot_compacts_journal(app_ctx):
+    state = room_manager.get_room_state("R1")
+    state["characters"][0]["hp"] = 5
+    room_manager.save_specific_room_state("R1", sections=("characters",))
+    assert room_manager._flush_journal_locked()
+    # スナップショット直前の未記録の変更も含めて揃える。
+    state["round"] = 3
+    room_manager._flush_dirty_rooms_once()
+
+    assert RoomStateJournal.query.count() == 0
+    assert room_journal._pending == {}
+    db.session.expire_all()
+    assert Room.query.filter_by(name="R1").first().data["_journal_seq"] == 2
+
+    _crash()
+    restored = room_manager.get_room_state("R1")
+    assert restored["characters"][0]["hp"] == 5
+    assert restored["round"] == 3
+    assert "R1" not in room_manager._dirty_rooms
+
+    restored["characters"][0]["hp"] = 1
+    room_manager.save_specific_room_state("R1", sections=("characters",))
+    assert room_journal._pending["R1"][0]["seq"] == 3
+    assert room_journal._pending["R1"][0]["ops"] == {
+        "characters": [{"op": "replace", "path": "/characters/0/hp", "value": 1}],
+    }
+
+
+def test_snapshot_is_due_after_configured_number_of_entries(app_ctx, monkeypatch):
+    monkeypatch.setattr(room_journal, "_SNAPSHOT_EVERY", 2)
+    state = room_manager.get_room_state("R1")
+    state["round"] = 2
+    room_manager.save_specific_room_state("R1")
+    assert not room_journal.snapshot_due()
+    room_manager.save_specific_room_state("R1")  # 変更なしは積まない
+    assert not room_journal.snapshot_due()
+    state["round"] = 3
+    room_manager.save_specific_room_state("R1")
+    assert room_journal.snapshot_due()
+
+    room_manager._flush_dirty_rooms_once()
+    assert not room_journal.snapshot_due()
+
+
+def test_failed_journal_append_is_requeued(app_ctx, monkeypatch):
+    state = room_manager.get_room_state("R1")
+    state["round"] = 2
+    room_manager.save_specific_room_state("R1")
+
+    def fail(*_args, **_kwargs):
+        raise RuntimeError("db down")
+
+    monkeypatch.setattr(room_journal, "insert_entries", fail)
+    assert room_manager._flush_journal_locked() is False
+    assert [entry["seq"] for entry in room_journal._pending["R1"]] == [1]
@@ -46,10 +46,14 @@ def clear_runtime_state():
     active_room_states.clear()
     room_manager._dirty_rooms.clear()
     room_manager._save_retry_counts.clear()
+    room_manager._pending_log_archives.clear()
+    room_manager._archived_log_ids.clear()
     yield
     active_room_states.clear()
     room_manager._dirty_rooms.clear()
     room_manager._save_retry_counts.clear()
+    room_manager._pending_log_archives.clear()
+    room_manager._archived_log_ids.clear()
 
 
 def _login(client, user_id, username):
@@ -60,25 +64,133 @@ def _login(client, user_id, username):
         sess["auth_version"] = 1
 
 
-def test_broadcast_log_archives_overflow_before_trimming(app_ctx, monkeypatch):
+def test_broadcast_log_archives_overflow_in_chunks_on_flush(app_ctx, monkeypatch):
     state = {
         "logs": [
             {"log_id": i, "timestamp": i * 1000, "message": f"log-{i}", "type": "chat", "secret": False}
-            for i in range(1, 501)
+            for i in range(1, 600)
         ],
-        "_log_seq": 500,
+        "_log_seq": 599,
     }
     active_room_states["R1"] = state
     monkeypatch.setattr(room_manager, "_safe_emit", lambda *_args, **_kwargs: None)
+    monkeypatch.setattr(room_manager, "_schedule_flush", lambda: None)
 
-    room_manager.broadcast_log("R1", "log-501", "chat", save=False)
+    # 高水位(500+100)以下ではトリムもアーカイブもしない。
+    room_manager.broadcast_log("R1", "log-600", "chat", save=False)
+    assert len(state["logs"]) == 600
+    assert room_manager.get_pending_log_archives("R1") == []
+
+    room_manager.broadcast_log("R1", "log-601", "chat", save=False)
 
     assert len(state["logs"]) == 500
-    assert state["logs"][0]["log_id"] == 2
-    archived = RoomLogArchive.query.filter_by(room_name="R1").all()
-    assert len(archived) == 1
-    assert archived[0].log_id == 1
+    assert state["logs"][0]["log_id"] == 102
+    # commit はフラッシュまで遅延される。
+    assert RoomLogArchive.query.filter_by(room_name="R1").count() == 0
+    assert "R1" in room_manager._dirty_rooms
+
+    room_manager._flush_dirty_rooms_once()
+
+    # 切り離した分もメモリ上の分もアーカイブ行が正本になり、Room.data には logs を含めない。
+    archived = RoomLogArchive.query.filter_by(room_name="R1").order_by(RoomLogArchive.log_id).all()
+    assert [row.log_id for row in archived] == list(range(1, 602))
     assert archived[0].message == "log-1"
+    assert room_manager.get_pending_log_archives("R1") == []
+    db.session.expire_all()
+    saved = Room.query.filter_by(name="R1").first().data
+    assert "logs" not in saved
+    assert saved["_log_seq"] == 601
+
+
+def test_failed_flush_keeps_pending_log_archives(app_ctx, monkeypatch):
+    state = {"logs": [{"log_id": i, "message": f"log-{i}"} for i in range(1, 611)], "_log_seq": 610}
+    active_room_states["R1"] = state
+    monkeypatch.setattr(room_manager, "_schedule_flush", lambda: None)
+
+    def fail(*_args, **_kwargs):
+        raise RuntimeError("db down")
+
+    monkeypatch.setattr(room_manager, "update_room_state", fail)
+
+    room_manager.trim_room_logs_with_archive("R1", state)
+    room_manager._flush_dirty_rooms_once()
+
+    assert RoomLogArchive.query.filter_by(room_name="R1").count() == 0
+    assert len(room_manager.get_pending_log_archives("R1")) == 110
+
+
+def _chat_logs(first, last):
+    return [
+        {"log_id": i, "timestamp": i * 1000, "message": f"log-{i}", "type": "chat", "secret": False}
+        for i in range(first, last + 1)
+    ]
+
+
+def test_reload_restores_recent_logs_from_archive(app_ctx, monkeypatch):
+    monkeypatch.setattr(room_manager, "_schedule_flush", lambda: None)
+    active_room_states["R1"] = {"logs": _chat_logs(1, 3), "_log_seq": 3}
+    room_manager._dirty_rooms.add("R1")
+    room_manager._flush_dirty_rooms_once()
+
+    # 追記分だけが次のフラッシュで書かれる。
+    active_room_states["R1"]["logs"].extend(_chat_logs(4, 4))
+    active_room_states["R1"]["_log_seq"] = 4
+    room_manager._dirty_rooms.add("R1")
+    room_manager._flush_dirty_rooms_once()
+    assert RoomLogArchive.query.filter_by(room_name="R1").count() == 4
+
+    room_manager.forget_room_state("R1")
+    state = room_manager.get_room_state("R1")
+
+    assert [log["log_id"] for log in state["logs"]] == [1, 2, 3, 4]
+    assert state["_log_seq"] == 4
+
+
+def test_page_room_logs_walks_memory_then_archive(app_ctx, monkeypatch):
+    monkeypatch.setattr(room_manager, "_schedule_flush", lambda: None)
+    active_room_states["R1"] = {"logs": _chat_logs(1, 10), "_log_seq": 10}
+    room_manager._dirty_rooms.add("R1")
+    room_manager._flush_dirty_rooms_once()
+    active_room_states["R1"]["logs"] = _chat_logs(7, 12)
+
+    first = room_manager.page_room_logs("R1", limit=4)
+    second = room_manager.page_room_logs("R1", before_log_id=first["next_before_log_id"], limit=4)
+    third = room_manager.page_room_logs("R1", before_log_id=second["next_before_log_id"], limit=4)
+
+    assert [log["log_id"] for log in first["logs"]] == [9, 10, 11, 12]
+    assert first["has_more"] is True
+    assert [log["log_id"] for log in second["logs"]] == [5, 6, 7, 8]
+    assert [log["log_id"] for log in third["logs"]] == [1, 2, 3, 4]
+    assert third["has_more"] is False
+
+
+def test_cleared_logs_are_hidden_from_paging_but_kept_for_export(app_ctx, monkeypatch):
+    monkeypatch.setattr(room_manager, "_schedule_flush", lambda: None)
+    emitted = []
+    monkeypatch.setattr(room_manager, "_safe_emit", lambda event, payload, **_kw: emitted.append((event, payload)))
+    active_room_states["R1"] = {"logs": _chat_logs(1, 3), "_log_seq": 3}
+
+    room_manager.clear_room_logs("R1")
+    room_manager.broadcast_log("R1", "after", "chat", save=False)
+    room_manager._dirty_rooms.add("R1")
+    room_manager._flush_dirty_rooms_once()
+
+    assert [log["message"] for log in room_manager.page_room_logs("R1")["logs"]] == ["after"]
+    assert RoomLogArchive.query.filter_by(room_name="R1").count() == 4
+    assert emitted[0] == ("logs_cleared", {"room": "R1", "log_floor": 3})
+
+
+def test_logs_endpoint_pages_for_members(app_ctx):
+    active_room_states["R1"] = {"logs": _chat_logs(1, 5), "_log_seq": 5}
+    client = app_ctx.test_client()
+    _login(client, "player-1", "player")
+
+    response = client.get("/api/room/logs?room_name=R1&before_log_id=4&limit=2")
+
+    assert response.status_code == 200
+    payload = response.get_json()
+    assert [log["log_id"] for log in payload["logs"]] == [2, 3]
+    assert payload["next_before_log_id"] == 2
 
 
 def test_export_logs_requires_gm(app_ctx):
@@ -122,11 +234,15 @@ def test_failed_debounced_save_is_retried_once(app_ctx, monkeypatch):
     active_room_states["R1"] = {"logs": []}
     calls = []
 
-    def fake_save(room_name, state, update_only=False):
-        calls.append((room_name, update_only))
-        return len(calls) > 1
+    real_update = room_manager.update_room_state
 
-    monkeypatch.setattr(room_manager, "save_room_to_db", fake_save)
+    def flaky_update(room_name, state, sections=None):
+        calls.append(room_name)
+        if len(calls) == 1:
+            raise RuntimeError("db down")
+        return real_update(room_name, state, sections)
+
+    monkeypatch.setattr(room_manager, "update_room_state", flaky_update)
 
     room_manager._dirty_rooms.add("R1")
     room_manager._flush_dirty_rooms_once()
@@ -136,16 +252,14 @@ def test_failed_debounced_save_is_retried_once(app_ctx, monkeypatch):
     room_manager._flush_dirty_rooms_once()
     assert "R1" not in room_manager._dirty_rooms
     assert "R1" not in room_manager._save_retry_counts
-    assert calls == [("R1", True), ("R1", True)]
+    assert calls == ["R1", "R1"]
 
 
 def test_debounced_save_does_not_recreate_deleted_room(app_ctx, monkeypatch):
     active_room_states["Missing"] = {"logs": []}
-    calls = []
-    monkeypatch.setattr(room_manager, "save_room_to_db", lambda *args, **kwargs: calls.append(args) or True)
 
     room_manager._dirty_rooms.add("Missing")
     room_manager._flush_dirty_rooms_once()
 
-    assert calls == []
+    assert Room.query.filter_by(name="Missing").count() == 0
     assert "Missing" not in room_manager._dirty_rooms
@@ -0,0 +1,141 @@
+import os
+
+os.environ["GEMTRPG_SKIP_IMPORT_STARTUP"] = "1"
+
+import json
+from types import SimpleNamespace
+
+from events import socket_main
+from manager import room_shards, socket_queue
+
+
+def test_ring_spreads_rooms_and_moves_few_on_resize():
+    rooms = [f"room-{n}" for n in range(2000)]
+    three = room_shards.ShardRing(3)
+    four = room_shards.ShardRing(4)
+
+    counts = [0, 0, 0]
+    for room in rooms:
+        counts[three.owner(room)] += 1
+    assert min(counts) > len(rooms) / 3 * 0.6
+
+    moved = sum(1 for room in rooms if three.owner(room) != four.owner(room))
+    # 4台目へ移る分（約1/4）だけが動き、既存シャード間では動かない。
+    assert moved < len(rooms) * 0.4
+    assert all(four.owner(room) == 3 for room in rooms if three.owner(room) != four.owner(room))
+
+
+def test_single_shard_owns_every_room(monkeypatch):
+    assert room_shards.is_local_room("anything")
+    monkeypatch.setattr(room_shards, "_SHARD_COUNT", 2)
+    monkeypatch.setattr(room_shards, "_ring", room_shards.ShardRing(2))
+    monkeypatch.setattr(room_shards, "_SHARD_URLS", ["http://h:10000", "http://h:10001"])
+    room = next(f"r{n}" for n in range(100) if room_shards.owner_of(f"r{n}") == 1)
+    assert not room_shards.is_local_room(room)
+    assert room_shards.redirect_payload(room) == {"room": room, "shard": 1, "url": "http://h:10001"}
+
+
+def test_join_room_for_remote_room_redirects(monkeypatch):
+    emits = []
+    monkeypatch.setattr(socket_main, "request", SimpleNamespace(sid="sid-1"))
+    monkeypatch.setattr(socket_main, "session", {"username": "u", "user_id": "u1"})
+    monkeypatch.setattr(socket_main, "emit", lambda event, payload=None, to=None: emits.append((event, payload, to)))
+    monkeypatch.setattr(socket_main, "is_local_room", lambda _room: False)
+    monkeypatch.setattr(socket_main, "redirect_payload", lambda room: {"room": room, "shard": 1, "url": "http://h:10001"})
+    monkeypatch.setattr(socket_main, "join_room", lambda *_a, **_kw: (_ for _ in ()).throw(AssertionError("joined")))
+
+    socket_main.handle_join_room({"room": "R1"})
+
+    assert emits == [("shard_redirect", {"room": "R1", "shard": 1, "url": "http://h:10001"}, "sid-1")]
+
+
+def test_local_queue_delivers_to_other_managers_only():
+    first = socket_queue.LocalQueueManager(channel="test-shards")
+    second = socket_queue.LocalQueueManager(channel="test-shards")
+    try:
+        first._publish({"method": "emit", "event": "state_updated", "data": [{"round": 2}], "host_id": "a"})
+        assert first._inbox.empty()
+        message = next(second._listen())
+        assert json.loads(message)["data"] == [{"round": 2}]
+    finally:
+        first.close()
+        second.close()
+    assert socket_queue.LocalQueueManager._channels["test-shards"] == []
+
+
+def test_message_queue_options(monkeypatch):
+    monkeypatch.delenv("SOCKETIO_MESSAGE_QUEUE", raising=False)
+    assert socket_queue.message_queue_options() == {}
+    monkeypatch.setenv("SOCKETIO_MESSAGE_QUEUE", "redis://localhost:6379/0")
+    assert socket_queue.message_queue_options() == {"message_queue": "redis://localhost:6379/0", "channel": "gemtrpg"}
+    monkeypatch.setenv("SOCKETIO_MESSAGE_QUEUE", "local")
+    options = socket_queue.message_queue_options()
+    assert isinstance(options["client_manager"], socket_queue.LocalQueueManager)
+    options["client_manager"].close()
+
+
+def _two_shards(monkeypatch, index):
+    monkeypatch.setattr(room_shards, "_SHARD_COUNT", 2)
+    monkeypatch.setattr(room_shards, "_SHARD_INDEX", index)
+    monkeypatch.setattr(room_shards, "_ring", room_shards.ShardRing(2))
+    monkeypatch.setattr(room_shards, "_SHARD_URLS", ["http://h:10000", "http://h:10001"])
+
+
+def test_room_routes_only_run_on_the_owning_shard(monkeypatch, tmp_path):
+    from app import create_app
+    from extensions import active_room_states, db
+    from manager import room_access
+    from manager.auth import hash_gm_pin
+    from models import Room, User
+
+    app = create_app(
+        config={
+            "TESTING": True,
+            "SQLALCHEMY_DATABASE_URI": f"sqlite:///{(tmp_path / 'shards.db').as_posix()}",
+            "SQLALCHEMY_ENGINE_OPTIONS": {},
+        },
+        run_startup=False,
+        register_sockets=False,
+    )
+    with app.app_context():
+        db.create_all()
+        room_name = next(f"r{n}" for n in range(100) if room_shards.ShardRing(2).owner(f"r{n}") == 1)
+        for uid in ("owner", "other"):
+            db.session.add(User(id=uid, name=uid))
+        room = Room(name=room_name, owner_id="owner", data={"characters": []}, gm_pin_hash=hash_gm_pin("1234"))
+        db.session.add(room)
+        db.session.flush()
+        room_access.ensure_membership(room.id, "owner", room_access.OWNER, commit=False)
+        db.session.commit()
+
+        client = app.test_client()
+        with client.session_transaction() as s:
+            s.update({"user_id": "owner", "username": "owner", "attribute": "GM", "auth_version": 1})
+
+        _two_shards(monkeypatch, 0)
+        redirect = {"room": room_name, "shard": 1, "url": "http://h:10001"}
+        requests_ = [
+            ("post", "/save_room", {"json": {"room_name": room_name, "state": {"characters": [1]}}}),
+            ("get", f"/api/room/export_logs?room_name={room_name}", {}),
+            ("get", f"/api/room/logs?room_name={room_name}", {}),
+            ("post", "/api/room/transfer_owner", {"json": {"room_name": room_name, "user_id": "other"}}),
+            ("post", "/delete_room", {"json": {"room_name": room_name, "gm_pin": "1234"}}),
+        ]
+        for method, url, kwargs in requests_:
+            response = getattr(client, method)(url, **kwargs)
+            assert response.status_code == 409, url
+            assert response.get_json()["shard_redirect"] == redirect
+        assert room_name not in active_room_states
+        assert Room.query.filter_by(name=room_name).first().owner_id == "owner"
+
+        _two_shards(monkeypatch, 1)
+        try:
+            response = client.post("/save_room", json={"room_name": room_name, "state": {"characters": []}})
+            assert response.status_code == 200
+            assert room_name in active_room_states
+        finally:
+            from manager.room_manager import discard_pending_save, forget_room_state
+            discard_pending_save(room_name)
+            forget_room_state(room_name)
+            db.session.remove()
+            db.drop_all()
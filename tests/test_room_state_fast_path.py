@@ -0,0 +1,76 @@
+import os
+
+os.environ["GEMTRPG_SKIP_IMPORT_STARTUP"] = "1"
+
+import pytest
+
+from app import create_app
+from extensions import active_room_states, db
+from models import Room, RoomMember, User
+from manager import perf_counters, room_manager
+from manager.room_access import transfer_owner
+
+
+@pytest.fixture
+def app_ctx(tmp_path, monkeypatch):
+    monkeypatch.setattr(perf_counters, "_PERF_LOG", True)
+    monkeypatch.setattr(room_manager, "_ensure_evict_worker", lambda: None)
+    db_path = tmp_path / "room_fast_path.db"
+    test_app = create_app(
+        config={
+            "TESTING": True,
+            "SQLALCHEMY_DATABASE_URI": f"sqlite:///{db_path.as_posix()}",
+            "SQLALCHEMY_ENGINE_OPTIONS": {},
+        },
+        run_startup=False,
+        register_sockets=False,
+    )
+    with test_app.app_context():
+        db.create_all()
+        db.session.add(User(id="owner-1", name="owner"))
+        db.session.add(User(id="owner-2", name="next"))
+        room = Room(name="R1", owner_id="owner-1", data={"characters": [], "round": 2})
+        db.session.add(room)
+        db.session.flush()
+        db.session.add(RoomMember(room_id=room.id, user_id="owner-1", role="owner"))
+        db.session.commit()
+        active_room_states.clear()
+        yield test_app
+        db.session.remove()
+        db.drop_all()
+    active_room_states.clear()
+
+
+def test_cached_room_state_is_returned_without_queries(app_ctx):
+    with app_ctx.test_request_context("/"):
+        first = room_manager.get_room_state("R1")
+        loaded = perf_counters.get_perf_counters()
+        for _ in range(5):
+            assert room_manager.get_room_state("R1") is first
+        counters = perf_counters.get_perf_counters()
+
+    assert first["owner_id"] == "owner-1"
+    assert first["battle_mode"] == "pvp"
+    assert counters["get_room_state"] == 6
+    assert counters["room_state_loads"] == 1
+    assert counters["db_queries"] == loaded["db_queries"]
+
+
+def test_replaced_state_object_is_hydrated_once(app_ctx):
+    room_manager.get_room_state("R1")
+    active_room_states["R1"] = {"characters": []}
+
+    state = room_manager.get_room_state("R1")
+
+    assert state["owner_id"] == "owner-1"
+    assert state["logs"] == []
+    assert "battle_only" in state
+
+
+def test_transfer_owner_updates_cached_owner(app_ctx):
+    state = room_manager.get_room_state("R1")
+
+    assert transfer_owner("R1", "owner-2") is True
+
+    assert room_manager.get_room_state("R1") is state
+    assert state["owner_id"] == "owner-2"
@@ -0,0 +1,218 @@
+import os
+
+os.environ["GEMTRPG_SKIP_IMPORT_STARTUP"] = "1"
+
+import pytest
+
+from app import create_app
+from extensions import active_room_states, db
+from models import Room, RoomStateSection
+from manager import data_manager, room_manager, room_sections
+
+
+@pytest.fixture
+def app_ctx(tmp_path, monkeypatch):
+    monkeypatch.setattr(room_manager, "_ensure_evict_worker", lambda: None)
+    monkeypatch.setattr(room_manager, "_schedule_flush", lambda: None)
+    db_path = tmp_path / "room_sections.db"
+    test_app = create_app(
+        config={
+            "TESTING": True,
+            "SQLALCHEMY_DATABASE_URI": f"sqlite:///{db_path.as_posix()}",
+            "SQLALCHEMY_ENGINE_OPTIONS": {},
+        },
+        run_startup=False,
+        register_sockets=False,
+    )
+    with test_app.app_context():
+        db.create_all()
+        data_manager._section_digests.clear()
+        active_room_states.clear()
+        room_manager._dirty_rooms.clear()
+        room_manager._dirty_sections.clear()
+        yield test_app
+        db.session.remove()
+        db.drop_all()
+    data_manager._section_digests.clear()
+    active_room_states.clear()
+    room_manager._dirty_rooms.clear()
+    room_manager._dirty_sections.clear()
+
+
+def _legacy_state():
+    return {
+        "characters": [{"id": "c1", "name": "A", "hp": 10, "x": 1, "y": 1}],
+        "character_owners": {"c1": "owner"},
+        "timeline": ["c1"],
+        "battle_state": {"phase": "select"},
+        "map_data": {"width": 20},
+        "presets": {"p1": []},
+        "round": 3,
+        "play_mode": "normal",
+        "logs": [{"log_id": 1, "message": "old"}],
+    }
+
+
+def _section_rows(room_name):
+    room = Room.query.filter_by(name=room_name).first()
+    return dict(data_manager._section_rows_by_room([room.id]).get(room.id, []))
+
+
+def test_legacy_room_is_migrated_to_sections_on_first_save(app_ctx):
+    db.session.add(Room(name="R1", data=_legacy_state()))
+    db.session.commit()
+    state = data_manager.read_saved_room("R1")
+    assert state == _legacy_state()
+
+    assert data_manager.save_room_to_db("R1", state, update_only=True)
+
+    db.session.expire_all()
+    core = Room.query.filter_by(name="R1").first().data
+    assert "characters" not in core and "battle_state" not in core
+    assert core["play_mode"] == "normal"
+    # 移行前の Room.data にあった logs は core に残す（アーカイブ済みとは限らないため）。
+    assert core["logs"] == [{"log_id": 1, "message": "old"}]
+    assert set(_section_rows("R1")) == {"characters", "battle_state", "battle_only", "map", "presets"}
+    assert data_manager.read_saved_room("R1") == _legacy_state()
+
+
+def test_only_changed_sections_are_rewritten(app_ctx):
+    state = _legacy_state()
+    assert data_manager.save_room_to_db("R1", state)
+    room = Room.query.filter_by(name="R1").first()
+
+    state["characters"][0]["x"] = 5
+    assert data_manager.write_room_sections(room, state) == {
+        "characters": data_manager.encode_section({
+            "characters": state["characters"],
+            "character_owners": state["character_owners"],
+        })[1],
+    }
+    db.session.rollback()
+
+    # コミットされなかった書き込みは既知扱いにしない。
+    assert "characters" in data_manager.write_room_sections(room, state)
+
+
+def test_section_flags_limit_what_the_flush_writes(app_ctx):
+    db.session.add(Room(name="R1", data={}))
+    db.session.commit()
+    state = _legacy_state()
+    active_room_states["R1"] = state
+    room_manager.save_specific_room_state("R1")
+    room_manager._flush_dirty_rooms_once()
+
+    state["characters"][0]["hp"] = 4
+    state["battle_state"]["phase"] = "resolve"
+    room_manager.save_specific_room_state("R1", sections=("characters",))
+    assert room_manager._dirty_sections["R1"] == {"characters"}
+    room_manager._flush_dirty_rooms_once()
+
+    rows = _section_rows("R1")
+    assert rows["characters"]["characters"][0]["hp"] == 4
+    assert rows["battle_state"]["battle_state"]["phase"] == "select"
+
+    # 範囲指定なしの保存要求が混ざれば全セクションが候補に戻る。
+    room_manager.save_specific_room_state("R1", sections=("presets",))
+    room_manager.save_specific_room_state("R1")
+    room_manager._flush_dirty_rooms_once()
+    assert _section_rows("R1")["battle_state"]["battle_state"]["phase"] == "resolve"
+
+
+def test_delete_room_removes_section_rows(app_ctx):
+    assert data_manager.save_room_to_db("R1", _legacy_state())
+    room_id = Room.query.filter_by(name="R1").first().id
+
+    assert data_manager.delete_room_from_db("R1")
+
+    assert RoomStateSection.query.filter_by(room_id=room_id).count() == 0
+    assert room_id not in data_manager._section_digests
+
+
+def test_flush_writes_all_dirty_rooms_in_one_commit(app_ctx, monkeypatch):
+    db.session.add(Room(name="R1", data={}))
+    db.session.add(Room(name="R2", data={}))
+    db.session.commit()
+    commits = []
+    real_commit = db.session.commit
+    monkeypatch.setattr(db.session, "commit", lambda: commits.append(1) or real_commit())
+    before = room_manager.get_flush_metrics()
+
+    active_room_states["R1"] = _legacy_state()
+    active_room_states["R2"] = _legacy_state()
+    active_room_states["Gone"] = _legacy_state()
+    for room_name in ("R1", "R2", "Gone"):
+        room_manager.save_specific_room_state(room_name)
+    room_manager._flush_dirty_rooms_once()
+
+    assert len(commits) == 1
+    assert Room.query.filter_by(name="Gone").count() == 0
+    assert _section_rows("R2")["characters"]["characters"][0]["name"] == "A"
+    metrics = room_manager.get_flush_metrics()
+    assert metrics["flushes"] == before["flushes"] + 1
+    assert metrics["saved"] == before["saved"] + 2
+    assert metrics["missing"] == before["missing"] + 1
+
+
+def test_failed_batch_falls_back_to_per_room_writes(app_ctx, monkeypatch):
+    db.session.add(Room(name="R1", data={}))
+    db.session.add(Room(name="R2", data={}))
+    db.session.commit()
+    real_update = room_manager.update_room_state
+
+    def update(room_name, state, sections=None):
+        if room_name == "R2":
+            raise RuntimeError("bad row")
+        return real_update(room_name, state, sections)
+
+    monkeypatch.setattr(room_manager, "update_room_state", update)
+    before = room_manager.get_flush_metrics()
+    active_room_states["R1"] = _legacy_state()
+    active_room_states["R2"] = _legacy_state()
+    room_manager.save_specific_room_state("R1")
+    room_manager.save_specific_room_state("R2")
+    room_manager._flush_dirty_rooms_once()
+
+    assert "characters" in _section_rows("R1")
+    assert room_manager._dirty_rooms == {"R2"}
+    metrics = room_manager.get_flush_metrics()
+    assert metrics["fallbacks"] == before["fallbacks"] + 1
+    assert metrics["retries"] == before["retries"] + 1
+    room_manager._save_retry_counts.clear()
+
+
+def test_sections_are_stored_compressed_with_format_byte(app_ctx):
+    state = _legacy_state()
+    state["presets"] = {f"p{i}": [{"name": "preset", "commands": "【攻撃】 2d6+3"}] for i in range(50)}
+    assert data_manager.save_room_to_db("R1", state)
+
+    room_id = Room.query.filter_by(name="R1").first().id
+    row = RoomStateSection.query.filter_by(room_id=room_id, section="presets").first()
+    assert row.data is None
+    assert row.payload[0] == room_sections.FORMAT_ZLIB
+    encoded, _digest = room_sections.encode_section({"presets": state["presets"]})
+    assert len(row.payload) < len(encoded.encode("utf-8"))
+    small = RoomStateSection.query.filter_by(room_id=room_id, section="map").first()
+    assert small.payload[0] == room_sections.FORMAT_JSON
+    assert data_manager.read_saved_room("R1") == state
+
+    with pytest.raises(ValueError):
+        room_sections.unpack_section(b"\x09{}")
+
+
+def test_json_section_rows_are_read_and_migrated_on_write(app_ctx, monkeypatch):
+    monkeypatch.setattr(data_manager, "_SECTION_STORAGE", "json")
+    state = _legacy_state()
+    assert data_manager.save_room_to_db("R1", state)
+    room_id = Room.query.filter_by(name="R1").first().id
+    row = RoomStateSection.query.filter_by(room_id=room_id, section="characters").first()
+    assert row.payload is None and row.data["characters"][0]["name"] == "A"
+
+    monkeypatch.setattr(data_manager, "_SECTION_STORAGE", "zlib")
+    data_manager._section_digests.clear()
+    assert data_manager.read_saved_room("R1") == state
+    assert data_manager.save_room_to_db("R1", state)
+
+    db.session.expire_all()
+    assert all(r.data is None for r in RoomStateSection.query.filter_by(room_id=room_id))
+    assert data_manager.read_saved_room("R1") == state
@@ -482,3 +482,43 @@ def test_japanese_key_category_does_not_hit_other_category(monkeypatch):
     monkeypatch.setattr(skill_access, "all_skill_data", {"P-01": skill})
     ev = skill_access.evaluate_skill_access(actor, "P-01")
     assert ev["usable"] is True
+
+
+def test_usable_skill_ids_are_memoized_until_inputs_change(monkeypatch):
+    actor = _char(fp=1, commands="[P-01 Test] [M-01 Test]")
+    monkeypatch.setattr(skill_access, "all_skill_data", {"P-01": _SKILL_FP1, "M-01": _SKILL_MP1})
+    battle_state = {"field_effects": []}
+
+    assert skill_access.list_regular_usable_skill_ids(actor, battle_state=battle_state) == ["P-01"]
+    before = skill_access.get_usable_skill_metrics()
+    assert skill_access.list_regular_usable_skill_ids(actor, battle_state=battle_state) == ["P-01"]
+    after = skill_access.get_usable_skill_metrics()
+    assert after["hits"] == before["hits"] + 1
+    assert after["parses"] == before["parses"]
+
+    actor["mp"] = 1
+    assert skill_access.list_regular_usable_skill_ids(actor, battle_state=battle_state) == ["P-01", "M-01"]
+
+    battle_state["field_effects"].append(
+        {"id": "f1", "mode": "block", "match": {"cost_types": ["MP"]}, "reason": "no magic"}
+    )
+    assert skill_access.list_regular_usable_skill_ids(actor, battle_state=battle_state) == ["P-01"]
+
+    actor["states"][0]["value"] = 0
+    assert skill_access.list_regular_usable_skill_ids(actor, battle_state=battle_state) == []
+
+    actor["commands"] = "[M-01 Test]"
+    battle_state["field_effects"].clear()
+    assert skill_access.list_regular_usable_skill_ids(actor, battle_state=battle_state) == ["M-01"]
+
+
+def test_commands_are_parsed_once_per_text():
+    before = skill_access.get_usable_skill_metrics()["parses"]
+    text = "1d6 【T-90 斬撃】 [T-91 Test]"
+
+    assert skill_access._extract_skill_ids_from_commands(text) == ["T-90", "T-91"]
+    ids = skill_access._extract_skill_ids_from_commands(text)
+    ids.append("mutated")
+
+    assert skill_access._extract_skill_ids_from_commands(text) == ["T-90", "T-91"]
+    assert skill_access.get_usable_skill_metrics()["parses"] == before + 1
@@ -0,0 +1,99 @@
+import os
+
+os.environ["GEMTRPG_SKIP_IMPORT_STARTUP"] = "1"
+
+import json
+
+import pytest
+
+from manager import skill_catalog
+from manager.battle.skill_rules import _extract_rule_data_from_skill, _has_skill_tag
+from manager.json_rule_v2 import JsonRuleV2Error
+
+_RULE = {
+    "schema": "skill_json_rule_v2",
+    "tags": ["広域-合算", "強硬"],
+    "cost": [{"type": "FP", "value": 2}],
+    "effects": [
+        {"timing": "HIT", "type": "APPLY_STATE", "target": "target", "state_name": "出血", "value": 1},
+        {"timing": "END_ROUND", "type": "APPLY_STATE", "target": "self", "state_name": "FP", "value": 1},
+    ],
+}
+
+
+@pytest.fixture(autouse=True)
+def clean_catalog():
+    skill_catalog.clear()
+    yield
+    skill_catalog.clear()
+
+
+def _skill(**extra):
+    skill = {"id": "S-01", "tags": ["攻撃"], "特記処理": json.dumps(_RULE, ensure_ascii=False)}
+    skill.update(extra)
+    return skill
+
+
+def test_same_rule_text_is_parsed_once_and_copies_are_independent():
+    first, second = _skill(), _skill()
+    before = skill_catalog.get_catalog_metrics()["rule_misses"]
+
+    copy_a = _extract_rule_data_from_skill(first)
+    copy_a["effects"].clear()
+    copy_b = _extract_rule_data_from_skill(second)
+
+    assert skill_catalog.get_catalog_metrics()["rule_misses"] == before + 1
+    assert len(copy_b["effects"]) == 2
+    assert skill_catalog.shared_rule_data(first) is skill_catalog.shared_rule_data(second)
+
+
+def test_compiled_record_holds_derived_metadata():
+    skill = _skill()
+    record = skill_catalog.compiled_skill(skill)
+
+    assert record is skill_catalog.compiled_skill(skill)
+    assert record.tags == ("攻撃", "広域-合算", "強硬")
+    assert record.cost == ({"type": "FP", "value": 2},)
+    assert record.effect_timings == frozenset({"HIT", "END_ROUND"})
+    assert record.mass_type == "mass_summation"
+    assert record.target_scope == "enemy"
+    assert _has_skill_tag(skill, "強硬")
+    with pytest.raises(AttributeError):
+        record.tags = ()
+
+
+def test_fresh_effects_skips_missing_timing_and_returns_copies():
+    raw = json.dumps(_RULE, ensure_ascii=False)
+    before = skill_catalog.get_catalog_metrics()["object_misses"]
+
+    assert skill_catalog.fresh_effects(raw, timing="PRE_MATCH") == []
+    effects = skill_catalog.fresh_effects(raw, timing="END_ROUND")
+    effects[0]["value"] = 99
+    effects.append({})
+
+    assert skill_catalog.parsed_object(raw)["effects"][0]["value"] == 1
+    assert len(skill_catalog.parsed_object(raw)["effects"]) == 2
+    assert skill_catalog.get_catalog_metrics()["object_misses"] == before + 1
+    assert skill_catalog.fresh_effects("not json") == []
+
+
+def test_pve_planner_reads_compiled_mass_type_and_target_scope(monkeypatch):
+    from manager.battle import pve_intent_planner
+
+    skills = {"S-01": _skill(), "S-02": {"id": "S-02", "tags": ["同陣営"]}}
+    monkeypatch.setattr(pve_intent_planner, "all_skill_data", skills)
+
+    assert pve_intent_planner._infer_mass_type_from_skill("S-01") == "mass_summation"
+    assert pve_intent_planner._infer_target_scope_from_skill("S-01") == "enemy"
+    assert pve_intent_planner._infer_target_scope_from_skill("S-02") == "ally"
+    assert pve_intent_planner._infer_target_scope_from_skill("missing") == "enemy"
+    assert skill_catalog.get_catalog_metrics()["records"] == 2
+
+
+def test_broken_rule_is_not_cached_and_still_raises():
+    skill = {"rule_data": '{"effects": [}'}
+    for _ in range(2):
+        with pytest.raises(JsonRuleV2Error):
+            _extract_rule_data_from_skill(skill, raise_on_error=True)
+    assert _extract_rule_data_from_skill(skill) == {}
+    assert skill_catalog.get_catalog_metrics()["rules"] == 0
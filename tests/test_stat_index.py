@@ -0,0 +1,77 @@
+import os
+
+os.environ["GEMTRPG_SKIP_IMPORT_STARTUP"] = "1"
+
+import json
+
+from manager import utils
+from manager.utils import get_status_value, set_status_value
+
+
+def _char():
+    return {
+        "hp": 10,
+        "mp": 5,
+        "params": [
+            {"label": "速度", "value": "abc"},
+            {"label": "速度", "value": "4"},
+            {"label": "物理補正", "value": "2"},
+        ],
+        "states": [{"name": "出血", "value": 3}],
+        "special_buffs": [],
+    }
+
+
+def test_lookups_reuse_index_and_keep_params_priority():
+    char = _char()
+    builds = utils.get_stat_index_metrics()["builds"]
+
+    assert get_status_value(char, "速度") == 4
+    assert get_status_value(char, "物理補正") == 2
+    assert get_status_value(char, "出血") == 3
+    assert get_status_value(char, "未設定") == 0
+    assert get_status_value(char, "行動回数") == 1
+    assert utils.get_stat_index_metrics()["builds"] == builds + 1
+    json.dumps(char)
+
+
+def test_setter_and_direct_edits_are_seen():
+    char = _char()
+    get_status_value(char, "出血")
+
+    set_status_value(char, "出血", 7)
+    set_status_value(char, "物理補正", 5)
+    set_status_value(char, "亀裂", 2)
+    assert get_status_value(char, "出血") == 7
+    assert get_status_value(char, "物理補正") == 5
+    assert get_status_value(char, "亀裂") == 2
+    assert char["states"][-1] == {"name": "亀裂", "value": 2}
+
+    char["states"][0]["value"] = 1
+    assert get_status_value(char, "出血") == 1
+    char["states"][0] = {"name": "破裂", "value": 4}
+    assert get_status_value(char, "出血") == 0
+    assert get_status_value(char, "破裂") == 4
+    char["states"] = [{"name": "出血", "value": 9}]
+    assert get_status_value(char, "出血") == 9
+    char["params"].pop()
+    assert get_status_value(char, "物理補正") == 0
+
+
+def test_replaced_row_is_found_after_a_cached_miss():
+    char = _char()
+    char["states"].append({"name": "破裂", "value": 1})
+    assert get_status_value(char, "亀裂") == 0
+
+    char["states"][1] = {"name": "亀裂", "value": 3}
+    assert get_status_value(char, "亀裂") == 3
+
+
+def test_pop_and_append_is_found_after_a_cached_miss():
+    char = _char()
+    assert get_status_value(char, "破裂") == 0
+
+    char["states"].pop()
+    char["states"].append({"name": "破裂", "value": 5})
+    assert get_status_value(char, "破裂") == 5
+    assert get_status_value(char, "出血") == 0
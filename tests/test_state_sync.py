@@ -0,0 +1,235 @@
+import copy
+import json
+import os
+
+os.environ["GEMTRPG_SKIP_IMPORT_STARTUP"] = "1"
+
+import pytest
+
+from extensions import active_room_states, user_sids
+from manager import payload_cache, room_manager, state_sync
+
+
+@pytest.fixture(autouse=True)
+def clean_runtime(monkeypatch):
+    active_room_states.clear()
+    user_sids.clear()
+    state_sync._room_sync.clear()
+    payload_cache._rooms.clear()
+    emitted = []
+    monkeypatch.setattr(room_manager, "_safe_emit", lambda event, payload, **kw: emitted.append((event, payload, kw)))
+    monkeypatch.setattr(room_manager, "emit_select_resolve_events", lambda *_a, **_kw: None)
+    room_manager._test_emitted = emitted
+    yield
+    active_room_states.clear()
+    user_sids.clear()
+    state_sync._room_sync.clear()
+    payload_cache._rooms.clear()
+
+
+def _room_state():
+    return {
+        "characters": [
+            {"id": "c1", "name": "A", "hp": 10, "states": [{"name": "FP", "value": 1}]},
+            {"id": "c2", "name": "B", "hp": 8, "states": []},
+        ],
+        "character_owners": {},
+        "round": 1,
+        "flags": {"a/b": True, "x~y": 1},
+    }
+
+
+def test_diff_and_apply_roundtrip():
+    old = _room_state()
+    new = copy.deepcopy(old)
+    new["characters"][0]["hp"] = 3
+    new["characters"][0]["states"].append({"name": "出血", "value": 2})
+    new["characters"].pop(1)
+    new["round"] = 2
+    new["flags"]["a/b"] = 1
+    del new["flags"]["x~y"]
+    new["timeline"] = ["c1"]
+
+    ops = state_sync.diff_state(old, new)
+
+    assert state_sync.apply_state_patch(copy.deepcopy(old), ops) == new
+    assert {"op": "replace", "path": "/flags/a~1b", "value": 1} in ops
+    assert {"op": "remove", "path": "/flags/x~0y"} in ops
+
+
+def test_unchanged_state_does_not_advance_version():
+    state = _room_state()
+    first = state_sync.advance_state("R1", state)
+    second = state_sync.advance_state("R1", state)
+
+    assert first["ops"] is None
+    assert second["ops"] == []
+    assert second["version"] == first["version"]
+
+
+def _seed_room(monkeypatch):
+    state = _room_state()
+    active_room_states["R1"] = state
+    monkeypatch.setattr(room_manager, "get_room_state", lambda room: active_room_states.get(room))
+    return state
+
+
+def test_broadcast_without_patch_subscribers_sends_versioned_full_state(monkeypatch):
+    _seed_room(monkeypatch)
+    user_sids["sid-legacy"] = {"room": "R1"}
+
+    room_manager.broadcast_state_update("R1")
+    room_manager.broadcast_state_update("R1")
+
+    events = [(e, p.get("state_version"), kw) for e, p, kw in room_manager._test_emitted]
+    assert events == [
+        ("state_updated", 1, {"to": "R1"}),
+        ("state_updated", 2, {"to": "R1"}),
+    ]
+
+
+def test_broadcast_sends_patch_to_subscribers_and_full_to_legacy(monkeypatch):
+    state = _seed_room(monkeypatch)
+    user_sids["sid-legacy"] = {"room": "R1"}
+    user_sids["sid-patch"] = {"room": "R1", "state_patch": True}
+
+    snapshot = room_manager.build_state_snapshot_payload("R1", state, to_sid="sid-patch")
+    client_view = state_sync.encode_state(snapshot)[0]
+    room_manager._test_emitted.clear()
+
+    state["characters"][0]["hp"] = 4
+    room_manager.broadcast_state_update("R1")
+
+    by_event = {e: (p, kw) for e, p, kw in room_manager._test_emitted}
+    full, full_kw = by_event["state_updated"]
+    assert full_kw == {"to": "R1", "skip_sid": ["sid-patch"]}
+    patch, patch_kw = by_event["state_patch"]
+    assert patch_kw["to"] == state_sync.state_patch_room("R1")
+    assert patch["base_version"] == snapshot["state_version"]
+    assert patch["version"] == full["state_version"]
+    assert patch["ops"] == [{"op": "replace", "path": "/characters/0/hp", "value": 4}]
+
+    patched = state_sync.apply_state_patch(client_view, patch["ops"])
+    patched["state_version"] = patch["version"]
+    assert patched == state_sync.encode_state(full)[0]
+
+
+def test_snapshot_request_flushes_pending_changes_to_other_subscribers(monkeypatch):
+    state = _seed_room(monkeypatch)
+    user_sids["sid-a"] = {"room": "R1", "state_patch": True}
+    room_manager.broadcast_state_update("R1")
+    room_manager._test_emitted.clear()
+
+    monkeypatch.setattr(room_manager, "_schedule_flush", lambda: None)
+    state["round"] = 5
+    room_manager.save_specific_room_state("R1")
+    room_manager._dirty_rooms.discard("R1")
+    user_sids["sid-b"] = {"room": "R1", "state_patch": True}
+    payload = room_manager.build_state_snapshot_payload("R1", state, to_sid="sid-b")
+
+    assert [(e, kw.get("skip_sid")) for e, _p, kw in room_manager._test_emitted] == [("state_patch", "sid-b")]
+    assert payload["state_version"] == room_manager._test_emitted[0][1]["version"]
+    assert "state_version" not in state
+
+
+def test_patch_subscribers_do_not_receive_logs(monkeypatch):
+    state = _seed_room(monkeypatch)
+    state["logs"] = [{"log_id": 1, "message": "hello"}]
+    state["_log_seq"] = 1
+    user_sids["sid-legacy"] = {"room": "R1"}
+    user_sids["sid-patch"] = {"room": "R1", "state_patch": True}
+
+    snapshot = room_manager.build_state_snapshot_payload("R1", state, to_sid="sid-patch")
+    legacy = room_manager.build_state_snapshot_payload("R1", state, to_sid="sid-legacy")
+    assert "logs" not in snapshot and "_log_seq" not in snapshot
+    assert legacy["logs"] == state["logs"]
+
+    # ログの追記だけでは差分購読者向けの版は進まない。
+    room_manager._test_emitted.clear()
+    state["logs"].append({"log_id": 2, "message": "again"})
+    state["_log_seq"] = 2
+    room_manager.broadcast_state_update("R1")
+
+    events = [e for e, _p, _kw in room_manager._test_emitted]
+    assert events == ["state_updated"]
+
+
+def test_snapshot_payload_is_encoded_once_until_state_changes(monkeypatch):
+    state = _seed_room(monkeypatch)
+    monkeypatch.setattr(room_manager, "_schedule_flush", lambda: None)
+    state["logs"] = [{"log_id": 1, "message": "hello"}]
+    user_sids["sid-a"] = {"room": "R1", "state_patch": True}
+    user_sids["sid-b"] = {"room": "R1", "state_patch": True}
+    user_sids["sid-legacy"] = {"room": "R1"}
+
+    first = room_manager.build_state_snapshot_payload("R1", state, to_sid="sid-a")
+    assert room_manager.build_state_snapshot_payload("R1", state, to_sid="sid-b") is first
+    assert json.loads(first.encoded) == state_sync.encode_state(dict(first))[0]
+    legacy = room_manager.build_state_snapshot_payload("R1", state, to_sid="sid-legacy")
+    assert json.loads(legacy.encoded)["logs"] == state["logs"]
+
+    # ログの追記は全量版だけを作り直させる。
+    room_manager.broadcast_log("R1", "again", save=False)
+    assert room_manager.build_state_snapshot_payload("R1", state, to_sid="sid-b") is first
+    relisted = room_manager.build_state_snapshot_payload("R1", state, to_sid="sid-legacy")
+    assert [log["message"] for log in json.loads(relisted.encoded)["logs"]] == ["hello", "again"]
+
+    state["round"] = 9
+    room_manager.save_specific_room_state("R1")
+    room_manager._dirty_rooms.discard("R1")
+    refreshed = room_manager.build_state_snapshot_payload("R1", state, to_sid="sid-b")
+    assert refreshed is not first
+    assert json.loads(refreshed.encoded)["round"] == 9
+    assert json.loads(refreshed.encoded)["state_version"] == first["state_version"] + 1
+
+
+def test_socket_json_embeds_encoded_payloads(monkeypatch):
+    state = _seed_room(monkeypatch)
+    user_sids["sid-patch"] = {"room": "R1", "state_patch": True}
+    room_manager.build_state_snapshot_payload("R1", state, to_sid="sid-patch")
+    room_manager._test_emitted.clear()
+    state["characters"][0]["hp"] = 3
+    room_manager.broadcast_state_update("R1")
+
+    patch = next(p for e, p, _kw in room_manager._test_emitted if e == "state_patch")
+    packet = payload_cache.SocketJSON.dumps(["state_patch", patch], separators=(",", ":"))
+    assert json.loads(packet) == ["state_patch", json.loads(json.dumps(dict(patch)))]
+    assert payload_cache.SocketJSON.dumps({"a": 1}) == json.dumps({"a": 1})
+
+
+def test_repeated_snapshot_requests_do_not_reencode_state(monkeypatch):
+    state = _seed_room(monkeypatch)
+    monkeypatch.setattr(room_manager, "_schedule_flush", lambda: None)
+    user_sids["sid-a"] = {"room": "R1", "state_patch": True}
+    user_sids["sid-legacy"] = {"room": "R1"}
+    room_manager.broadcast_state_update("R1")
+    room_manager.build_state_snapshot_payload("R1", state, to_sid="sid-a")
+    room_manager.build_state_snapshot_payload("R1", state, to_sid="sid-legacy")
+
+    encodes = []
+    real_encode = state_sync.encode_snapshot
+    counting = lambda value: encodes.append(1) or real_encode(value)
+    monkeypatch.setattr(state_sync, "encode_snapshot", counting)
+    monkeypatch.setattr(room_manager, "encode_snapshot", counting)
+    for _ in range(5):
+        room_manager.build_state_snapshot_payload("R1", state, to_sid="sid-a")
+    assert encodes == []
+
+    state["round"] = 4
+    room_manager.save_specific_room_state("R1")
+    room_manager._dirty_rooms.discard("R1")
+    payload = room_manager.build_state_snapshot_payload("R1", state, to_sid="sid-a")
+    assert payload["round"] == 4
+    assert len(encodes) == 1
+
+
+def test_legacy_snapshot_sees_unsaved_mutation(monkeypatch):
+    state = _seed_room(monkeypatch)
+    user_sids["sid-legacy"] = {"room": "R1"}
+    room_manager.broadcast_state_update("R1")
+    assert room_manager.build_state_snapshot_payload("R1", state, to_sid="sid-legacy")["round"] != 6
+
+    state["round"] = 6
+    payload = room_manager.build_state_snapshot_payload("R1", state, to_sid="sid-legacy")
+    assert payload["round"] == 6
+    assert json.loads(payload.encoded)["round"] == 6
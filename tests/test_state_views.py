@@ -0,0 +1,147 @@
+import json
+import os
+
+os.environ["GEMTRPG_SKIP_IMPORT_STARTUP"] = "1"
+
+import pytest
+
+from extensions import active_room_states, user_sids
+from manager import payload_cache, room_manager, state_sync, state_views
+
+
+@pytest.fixture(autouse=True)
+def clean_runtime(monkeypatch):
+    active_room_states.clear()
+    user_sids.clear()
+    state_sync._room_sync.clear()
+    payload_cache._rooms.clear()
+    emitted = []
+    monkeypatch.setattr(room_manager, "_safe_emit", lambda event, payload, **kw: emitted.append((event, payload, kw)))
+    monkeypatch.setattr(room_manager, "emit_select_resolve_events", lambda *_a, **_kw: None)
+    monkeypatch.setattr(room_manager, "get_room_state", lambda room: active_room_states.get(room))
+    room_manager._test_emitted = emitted
+    yield
+    active_room_states.clear()
+    user_sids.clear()
+    state_sync._room_sync.clear()
+    payload_cache._rooms.clear()
+
+
+def _seed_room():
+    state = {
+        "characters": [{"id": "c1", "name": "A", "hp": 10}],
+        "logs": [
+            {"log_id": 1, "message": "hello", "secret": False, "user": "alice"},
+            {"log_id": 2, "message": "2d6 → (3+4) = 7", "secret": True, "user": "alice"},
+        ],
+        "_log_seq": 2,
+    }
+    active_room_states["R1"] = state
+    user_sids["sid-gm"] = {"room": "R1", "attribute": "GM", "username": "gm"}
+    user_sids["sid-alice"] = {"room": "R1", "attribute": "Player", "username": "alice"}
+    user_sids["sid-bob"] = {"room": "R1", "attribute": "Player", "username": "bob"}
+    return state
+
+
+def _messages(payload):
+    return [log["message"] for log in json.loads(payload.encoded)["logs"]]
+
+
+def test_broadcast_sends_one_view_per_role_and_sender(monkeypatch):
+    _seed_room()
+    room_manager.broadcast_state_update("R1")
+
+    sent = {kw["to"]: (p, kw.get("skip_sid")) for e, p, kw in room_manager._test_emitted if e == "state_updated"}
+    gm, gm_skip = sent[state_views.role_room("R1", state_views.GM_VIEW)]
+    player, player_skip = sent[state_views.role_room("R1", state_views.PLAYER_VIEW)]
+    own, _ = sent["sid-alice"]
+    assert gm_skip is None and player_skip == ["sid-alice"]
+    assert _messages(gm) == ["hello", "2d6 → (3+4) = 7"]
+    assert _messages(player) == ["hello", state_views.SECRET_LOG_MESSAGE]
+    assert player["logs"][1]["masked"] is True
+    assert _messages(own) == _messages(gm)
+    assert len(sent) == 3
+
+    # 従来クライアント宛てのスナップショットは作り直すが、配信したプレイヤー版と同じ内容になる。
+    state = active_room_states["R1"]
+    snapshot = room_manager.build_state_snapshot_payload("R1", state, to_sid="sid-bob")
+    assert snapshot == player and snapshot.encoded == player.encoded
+
+
+def test_room_without_secret_logs_keeps_single_broadcast(monkeypatch):
+    state = _seed_room()
+    state["logs"][1]["secret"] = False
+    room_manager.broadcast_state_update("R1")
+
+    assert [(e, kw) for e, _p, kw in room_manager._test_emitted] == [("state_updated", {"to": "R1"})]
+    bob = room_manager.build_state_snapshot_payload("R1", state, to_sid="sid-bob")
+    gm = room_manager.build_state_snapshot_payload("R1", state, to_sid="sid-gm")
+    assert bob == gm and bob.encoded == gm.encoded
+
+
+def test_snapshot_and_log_pages_are_masked_per_viewer(monkeypatch):
+    state = _seed_room()
+    assert _messages(room_manager.build_state_snapshot_payload("R1", state, to_sid="sid-bob"))[1] == state_views.SECRET_LOG_MESSAGE
+    assert _messages(room_manager.build_state_snapshot_payload("R1", state, to_sid="sid-alice"))[1] != state_views.SECRET_LOG_MESSAGE
+    assert _messages(room_manager.build_state_snapshot_payload("R1", state, to_sid="sid-gm"))[1] != state_views.SECRET_LOG_MESSAGE
+    assert state["logs"][1]["message"] == "2d6 → (3+4) = 7"
+
+    monkeypatch.setattr(room_manager, "page_archived_logs", lambda *_a, **_kw: [])
+    page = room_manager.page_room_logs("R1", view=state_views.PLAYER_VIEW, username="bob")
+    assert [log["message"] for log in page["logs"]] == ["hello", state_views.SECRET_LOG_MESSAGE]
+
+
+def test_secret_log_is_masked_for_other_players(monkeypatch):
+    _seed_room()
+    room_manager.broadcast_log("R1", "1d100 → 42", type="chat", user="alice", secret=True, save=False)
+
+    new_logs = [(p, kw) for e, p, kw in room_manager._test_emitted if e == "new_log"]
+    (real, real_kw), (masked, masked_kw) = new_logs
+    assert real["message"] == "1d100 → 42"
+    assert real_kw == {"to": [state_views.role_room("R1", state_views.GM_VIEW), "sid-alice"]}
+    assert masked["message"] == state_views.SECRET_LOG_MESSAGE
+    assert masked_kw == {"to": state_views.role_room("R1", state_views.PLAYER_VIEW), "skip_sid": ["sid-alice"]}
+
+
+class _FakeServer:
+    def __init__(self):
+        self.rooms = {}
+
+    def enter_room(self, sid, room, namespace=None):
+        self.rooms.setdefault(room, set()).add(sid)
+
+    def leave_room(self, sid, room, namespace=None):
+        self.rooms.get(room, set()).discard(sid)
+
+
+def _received(server, sid, emitted):
+    """emit 先（サブルーム・sid）から sid に届いた new_log の本文。"""
+    messages = []
+    for event, payload, kw in emitted:
+        targets = kw.get("to")
+        targets = targets if isinstance(targets, list) else [targets]
+        skip = kw.get("skip_sid") or []
+        if event == "new_log" and sid not in skip and any(t == sid or sid in server.rooms.get(t, ()) for t in targets):
+            messages.append(payload["message"])
+    return messages
+
+
+def test_demoted_gm_stops_receiving_secret_logs(monkeypatch):
+    from extensions import socketio
+    from manager import room_access
+    from routes import room as room_routes
+
+    _seed_room()
+    server = _FakeServer()
+    monkeypatch.setattr(socketio, "server", server, raising=False)
+    user_sids["sid-gm"]["user_id"] = "gm-uid"
+    server.enter_room("sid-gm", state_views.role_room("R1", state_views.GM_VIEW))
+    monkeypatch.setattr(room_access, "resolve_room_role", lambda *_a, **_kw: "player")
+    monkeypatch.setattr(room_manager, "broadcast_user_list", lambda *_a, **_kw: None)
+
+    room_routes._sync_room_member_session("R1", "gm-uid")
+    room_manager.broadcast_log("R1", "1d100 → 42", type="chat", user="alice", secret=True, save=False)
+
+    assert user_sids["sid-gm"]["attribute"] == "Player"
+    assert "sid-gm" not in server.rooms[state_views.role_room("R1", state_views.GM_VIEW)]
+    assert _received(server, "sid-gm", room_manager._test_emitted) == [state_views.SECRET_LOG_MESSAGE]
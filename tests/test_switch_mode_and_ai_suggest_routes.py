@@ -15,7 +15,7 @@ from events.battle import common_routes
 def test_switch_battle_mode_and_ai_suggest_skill_have_socketio_decorator():
     """デコレータ欠落バグの回帰防止。
 
-    ハンドラ関数の直前行に @socketio.on('<event>') があることをソースから確認する
+    ハンドラ関数直前のデコレータ列に @socketio.on('<event>') があることをソースから確認する
     （socketio.server は Flask app 初期化前のテスト実行時は None のため、
     ランタイムの登録一覧チェックではなくソースベースで検証する）。
     """
@@ -27,9 +27,13 @@ def test_switch_battle_mode_and_ai_suggest_skill_have_socketio_decorator():
         ("def on_request_ai_suggest_skill(", "request_ai_suggest_skill"),
     ):
         idx = text.index(handler_name)
-        preceding = text[:idx].splitlines()[-1]
-        assert preceding.strip() == f"@socketio.on('{event_name}')", (
-            f"{handler_name} の直前に @socketio.on('{event_name}') が無い: {preceding!r}"
+        decorators = []
+        for line in reversed(text[:idx].splitlines()):
+            if not line.startswith("@"):
+                break
+            decorators.append(line.strip())
+        assert f"@socketio.on('{event_name}')" in decorators, (
+            f"{handler_name} の直前に @socketio.on('{event_name}') が無い: {decorators!r}"
         )
 
 